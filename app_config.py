@@ -1,9 +1,9 @@
 # app_config.py
 
-import json
 from pathlib import Path
 import os
 from assets.logging import PersistentLogger
+from config_store import get_store
 
 class AppConfig:
     def __init__(self):
@@ -31,16 +31,16 @@ class AppConfig:
 
     def _load_config(self):
         """Carga la configuración desde app_config.json, usa por defecto si no existe o está corrupto."""
-        if self.config_path.exists():
+        store = get_store(self.config_path, logger=self.logger)
+        if store.exists():
             try:
-                with open(self.config_path, "r", encoding="utf-8") as f:
-                    # Cargar la configuración existente y fusionarla con la por defecto
-                    existing_config = json.load(f)
-                    # Asegurarse de que las claves por defecto estén presentes si faltan
-                    for key, value in self.default_config.items():
-                        if key not in existing_config:
-                            existing_config[key] = value
-                    return existing_config
+                # Cargar la configuración existente y fusionarla con la por defecto
+                existing_config = store.read(default={})
+                # Asegurarse de que las claves por defecto estén presentes si faltan
+                for key, value in self.default_config.items():
+                    if key not in existing_config:
+                        existing_config[key] = value
+                return existing_config
             except Exception as e:
                 self.logger.error(f"[Config] Error leyendo {self.config_path}: {e}")
                 # Si hay un error, simplemente usa la configuración por defecto sin sobreescribir
@@ -52,23 +52,30 @@ class AppConfig:
             return self.config
 
     def save_config(self):
-        """Guarda la configuración en app_config.json"""
+        """Guarda la configuración en app_config.json de inmediato"""
         try:
-            with open(self.config_path, "w", encoding="utf-8") as f:
-                json.dump(self.config, f, indent=4)
+            get_store(self.config_path, logger=self.logger).write(self.config)
         except Exception as e:
             self.logger.error(f"[Config] Error guardando {self.config_path}: {e}")
 
+    def _save_later(self):
+        """Programa el guardado; varios cambios seguidos se escriben una sola vez."""
+        get_store(self.config_path, logger=self.logger).write_later(self.config)
+
     def get(self, key, default=None):
         """Obtiene un valor de la configuración"""
         return self.config.get(key, default)
 
     def set(self, key, value):
-        """Establece un valor en la configuración y guarda automáticamente"""
+        """Establece un valor en la configuración y programa su guardado"""
         self.config[key] = value
-        self.save_config()
+        self._save_later()
 
     def remove(self, key):
         if key in self.config:
             del self.config[key]
-            self.save_config()
\ No newline at end of file
+            self._save_later()
+
+    def flush(self):
+        """Escribe de inmediato los cambios pendientes de guardar"""
+        get_store(self.config_path, logger=self.logger).flush()
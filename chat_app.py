@@ -6,6 +6,7 @@ from tkinter import filedialog, messagebox, ttk
 from pathlib import Path
 import time
 from mcp_manager import MCPManager
+from mcp_config_watcher import MCPConfigWatcher
 from mcp_sdk_bridge import MCPSDKBridge
 import asyncio
 from env_manager import env_manager
@@ -267,6 +268,12 @@ class ChatApp:
         self.ollama_stop_event = threading.Event()
         self.mcp_manager = MCPManager(lambda msg, tag: self.log_message(msg, tag))
         self.mcp_manager.load_config()  # Cargar configuración MCP inmediatamente
+        # Recarga en caliente de mcp_servers.json (aplica solo los cambios, fuera del hilo de la UI)
+        self.mcp_config_watcher = MCPConfigWatcher(
+            self.mcp_manager,
+            on_reload=lambda diff: self.window.after(0, self._on_mcp_config_reloaded, diff)
+        )
+        self.mcp_config_watcher.start()
         self.llm_menu_popup = None
         self.config = AppConfig()
         self.llm_model = self.config.get('llm_model') or ""
@@ -1379,6 +1386,21 @@ class ChatApp:
         except Exception as e:
             self.log_message(f"Error al cambiar proveedor: {e}", "error")
     
+    def _on_mcp_config_reloaded(self, diff):
+        """Refleja en la UI una recarga en caliente de mcp_servers.json."""
+        changes = []
+        if diff.added:
+            changes.append(f"iniciados: {', '.join(diff.added)}")
+        if diff.removed:
+            changes.append(f"detenidos: {', '.join(diff.removed)}")
+        if diff.restarted:
+            changes.append(f"reiniciados: {', '.join(diff.restarted)}")
+        if changes:
+            self.log_message(f"Configuración MCP recargada ({'; '.join(changes)})", "info")
+        if hasattr(self, 'mcp_cache'):
+            self.mcp_cache['last_update'] = 0  # Forzar el recuento con la nueva configuración
+        self.update_mcp_status_label()
+    
     def update_mcp_status_label(self):
         """Actualiza la etiqueta de estado de los servidores MCP con caché"""
         # Versión segura que verifica si el widget existe
@@ -1445,6 +1467,10 @@ class ChatApp:
                 self.config.set('llm_provider', self.provider_combo.get())
                 self.config.save_config()
             
+            # Dejar de vigilar mcp_servers.json
+            if hasattr(self, 'mcp_config_watcher'):
+                self.mcp_config_watcher.stop()
+            
             # Cancelar la actualización periódica del estado MCP
             if hasattr(self, 'mcp_status_after_id'):
                 self.window.after_cancel(self.mcp_status_after_id)
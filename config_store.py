@@ -0,0 +1,260 @@
+"""
+Almacén de archivos de configuración JSON
+Capa única para leer y escribir mcp_servers.json, installed_servers.json y
+app_config.json: mantiene en memoria la copia parseada de cada archivo (se
+vuelve a parsear solo si cambia su mtime o tamaño), serializa las escrituras
+con un lock entre procesos, escribe de forma atómica (archivo temporal +
+rename) y agrupa las ráfagas de cambios en una sola escritura diferida.
+"""
+
+import atexit
+import copy
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+try:
+    import msvcrt
+except ImportError:  # POSIX
+    msvcrt = None
+
+DEFAULT_DEBOUNCE = 0.5
+
+
+class FileLock:
+    """
+    Lock exclusivo entre procesos sobre un archivo `.lock` junto al archivo protegido.
+
+    Es reentrante dentro del mismo hilo, de modo que una transacción puede
+    escribir sin volver a bloquear.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._handle = None
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            handle = open(self.path, "a+b")
+            try:
+                if fcntl is not None:
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+                elif msvcrt is not None:
+                    handle.seek(0)
+                    msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+            except OSError:
+                handle.close()
+                self._thread_lock.release()
+                raise
+            self._handle = handle
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc):
+        self._depth -= 1
+        if self._depth == 0:
+            handle, self._handle = self._handle, None
+            try:
+                if fcntl is not None:
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+                elif msvcrt is not None:
+                    handle.seek(0)
+                    msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+            finally:
+                handle.close()
+        self._thread_lock.release()
+        return False
+
+
+def _file_signature(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class JsonFileStore:
+    """
+    Copia en memoria de un archivo JSON con recarga por mtime y escrituras atómicas.
+
+    `read()` devuelve por defecto una copia que el llamador puede modificar;
+    con `copy=False` devuelve el objeto compartido, que no debe modificarse.
+    """
+
+    def __init__(self, path, indent: int = 4, debounce: float = DEFAULT_DEBOUNCE, logger=None):
+        """
+        Args:
+            path: Ruta del archivo JSON
+            indent: Sangría con la que se escribe el archivo
+            debounce: Segundos que espera `write_later` antes de escribir
+            logger: Logger opcional
+        """
+        self.path = Path(path)
+        self.indent = indent
+        self.debounce = debounce
+        self.logger = logger
+        self.lock = FileLock(self.path.with_name(self.path.name + ".lock"))
+
+        # El lock de hilos del FileLock protege también el estado en memoria (un solo orden de adquisición)
+        self._state_lock = self.lock._thread_lock
+        self._data: Any = None
+        self._signature = None
+        self._pending: Any = None
+        self._timer: Optional[threading.Timer] = None
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def read(self, default: Any = None, copy: bool = True) -> Any:
+        """
+        Contenido parseado del archivo (se vuelve a parsear solo si cambió en disco).
+
+        Args:
+            default: Valor si el archivo no existe
+            copy: Si False, devuelve el objeto en caché (solo lectura)
+
+        Raises:
+            ValueError: Si el archivo no es JSON válido
+        """
+        with self._state_lock:
+            if self._pending is not None:
+                data = self._pending
+            else:
+                signature = _file_signature(self.path)
+                if signature is None:
+                    return default
+                if signature != self._signature:
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        self._data = json.load(f)
+                    self._signature = signature
+                data = self._data
+            return _copy(data) if copy else data
+
+    def write(self, data: Any):
+        """Escribe el archivo de inmediato (atómico y con lock entre procesos)."""
+        with self._state_lock:
+            self._cancel_timer()
+            self._pending = None
+            with self.lock:
+                self._write_locked(data)
+
+    def update(self, mutator: Callable[[Any], Any], default: Any = None) -> Any:
+        """
+        Lee, modifica y escribe el archivo como una transacción bajo el lock.
+
+        Args:
+            mutator: Recibe una copia del contenido y la modifica en su sitio; si
+                devuelve False, no se escribe nada
+            default: Contenido inicial si el archivo no existe
+
+        Returns:
+            Lo que devuelva `mutator`
+        """
+        with self._state_lock, self.lock:
+            data = self.read(default=copy.deepcopy(default))
+            result = mutator(data)
+            if result is not False:
+                self._cancel_timer()
+                self._pending = None
+                self._write_locked(data)
+            return result
+
+    def write_later(self, data: Any):
+        """Programa una escritura; las llamadas dentro de la ventana de debounce se agrupan."""
+        with self._state_lock:
+            self._pending = _copy(data)
+            self._cancel_timer()
+            self._timer = threading.Timer(self.debounce, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        """Escribe de inmediato la escritura diferida pendiente, si la hay."""
+        with self._state_lock:
+            self._cancel_timer()
+            pending, self._pending = self._pending, None
+            if pending is None:
+                return
+            try:
+                with self.lock:
+                    self._write_locked(pending)
+            except Exception as e:
+                if self.logger:
+                    self.logger.error(f"[ConfigStore] Error guardando {self.path}: {e}")
+
+    def _cancel_timer(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _write_locked(self, data: Any):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=self.indent, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+        except BaseException:
+            try:
+                tmp.unlink()
+            except OSError:
+                pass
+            raise
+        self._data = _copy(data)
+        self._signature = _file_signature(self.path)
+
+
+def _copy(data: Any) -> Any:
+    # Los JSON solo contienen dicts, listas y escalares: deepcopy es suficiente
+    return copy.deepcopy(data)
+
+
+_stores: Dict[Path, JsonFileStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(path, indent: Optional[int] = None, logger=None) -> JsonFileStore:
+    """
+    Almacén compartido de un archivo: todos los módulos que lo usan ven la misma copia en memoria.
+
+    Args:
+        path: Ruta del archivo JSON
+        indent: Sangría con la que se escribe el archivo (por defecto 4)
+        logger: Logger opcional
+    """
+    key = Path(path).resolve()
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = JsonFileStore(key, indent=4 if indent is None else indent, logger=logger)
+        else:
+            if indent is not None:
+                store.indent = indent
+            if logger is not None and store.logger is None:
+                store.logger = logger
+        return store
+
+
+def flush_all():
+    """Escribe todas las escrituras diferidas pendientes (se llama también al salir)."""
+    with _stores_lock:
+        stores = list(_stores.values())
+    for store in stores:
+        store.flush()
+
+
+atexit.register(flush_all)
@@ -0,0 +1,258 @@
+"""
+Disponibilidad de Docker con caché
+Resuelve una sola vez el endpoint de Docker que funciona (entorno, TCP o named
+pipe), conserva el cliente y sigue la disponibilidad del daemon con un ping
+corto desde un hilo en segundo plano: consultar `available` devuelve el último
+estado conocido sin lanzar procesos ni esperar a la red (salvo la primera vez,
+si aún no se ha comprobado). Los cambios de estado se notifican a los
+suscriptores.
+
+Los comandos `docker` de DockerHelper solo se usan en `ensure_running()`, para
+intentar arrancar el daemon antes de una operación explícita (instalar o iniciar
+un servidor), nunca al cargar la galería.
+"""
+
+import platform
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+import docker
+
+DEFAULT_TTL = 5.0  # Antigüedad máxima del estado antes de una operación explícita
+DEFAULT_PROBE_INTERVAL = 2.0  # Segundos entre comprobaciones en segundo plano (menor que el TTL)
+PING_TIMEOUT = 2.0  # Timeout del ping de disponibilidad (el cliente de trabajo usa el predeterminado)
+
+ClientFactory = Callable[[Optional[float]], "docker.DockerClient"]
+
+
+def _timeout_kwargs(timeout: Optional[float]) -> dict:
+    return {"timeout": timeout} if timeout is not None else {}
+
+
+def default_endpoints() -> List[Tuple[str, ClientFactory]]:
+    """Endpoints que se prueban en orden: entorno (DOCKER_HOST o el socket local), TCP y, en Windows, named pipe."""
+    endpoints = [
+        ("predeterminado", lambda timeout: docker.from_env(**_timeout_kwargs(timeout))),
+        ("TCP", lambda timeout: docker.DockerClient(base_url="tcp://localhost:2375", **_timeout_kwargs(timeout))),
+    ]
+    if platform.system() == "Windows":
+        endpoints.append(("named pipe", lambda timeout: docker.DockerClient(
+            base_url="npipe://./pipe/docker_engine", **_timeout_kwargs(timeout))))
+    return endpoints
+
+
+class DockerAvailability:
+    """
+    Cliente Docker compartido y estado de disponibilidad del daemon.
+    """
+
+    def __init__(self, logger=None, ttl: float = DEFAULT_TTL, probe_interval: float = DEFAULT_PROBE_INTERVAL,
+                 endpoints: Optional[List[Tuple[str, ClientFactory]]] = None, helper=None):
+        """
+        Args:
+            logger: Logger opcional
+            ttl: Antigüedad máxima del estado en `ensure_running()`; si es mayor se comprueba antes
+            probe_interval: Segundos entre comprobaciones en segundo plano (menor que `ttl`,
+                para que el hilo mantenga el estado vigente)
+            endpoints: Pares (nombre, fábrica de clientes con timeout) a probar en orden
+            helper: DockerHelper para intentar arrancar el daemon en `ensure_running()`
+
+        Raises:
+            ValueError: Si `probe_interval` no es menor que `ttl`
+        """
+        if probe_interval >= ttl:
+            raise ValueError(f"probe_interval ({probe_interval}) debe ser menor que ttl ({ttl})")
+        self.logger = logger
+        self.ttl = ttl
+        self.probe_interval = probe_interval
+        self.endpoints = endpoints if endpoints is not None else default_endpoints()
+        self.helper = helper
+
+        self._lock = threading.Lock()  # Serializa las comprobaciones (una sola resolución a la vez)
+        self._client: Optional[docker.DockerClient] = None
+        self._probe_client: Optional[docker.DockerClient] = None
+        self.endpoint: Optional[str] = None
+        self._available = False
+        self._checked_at: Optional[float] = None
+        self._listeners: List[Callable[[bool], None]] = []
+        self._stop = threading.Event()
+        self._wake = threading.Event()  # Adelanta la siguiente comprobación en segundo plano
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"pings": 0, "resolutions": 0, "changes": 0}
+
+    @property
+    def client(self) -> Optional[docker.DockerClient]:
+        """Cliente Docker del endpoint resuelto (None si Docker no está disponible)."""
+        return self._client if self.available else None
+
+    @property
+    def available(self) -> bool:
+        """
+        Último estado conocido del daemon, sin esperar a la red: lo renueva el
+        hilo de `start()`. Solo la primera consulta, si aún no se ha comprobado
+        nunca, hace la comprobación en el hilo que llama.
+        """
+        if self._checked_at is None:
+            return self._check(only_if_unchecked=True)
+        return self._available
+
+    def subscribe(self, listener: Callable[[bool], None]) -> Callable[[], None]:
+        """
+        Registra una función que recibe la nueva disponibilidad cada vez que cambia.
+
+        Returns:
+            Función para cancelar la suscripción
+        """
+        with self._lock:
+            self._listeners.append(listener)
+
+        def unsubscribe():
+            with self._lock:
+                if listener in self._listeners:
+                    self._listeners.remove(listener)
+        return unsubscribe
+
+    def refresh(self) -> bool:
+        """
+        Comprueba el daemon ahora: ping con el cliente actual y, si falla o no hay
+        cliente, resolución de los endpoints.
+
+        Returns:
+            True si Docker responde
+        """
+        return self._check()
+
+    def _check(self, only_if_unchecked: bool = False) -> bool:
+        with self._lock:
+            # Otro hilo ha comprobado mientras esperábamos el lock: reutilizar su resultado
+            if only_if_unchecked and self._checked_at is not None:
+                return self._available
+            available = self._ping() or self._resolve()
+            self._checked_at = time.monotonic()
+            listeners = self._update(available)
+        self._notify(available, listeners)
+        return available
+
+    def _update(self, available: bool) -> Optional[List[Callable[[bool], None]]]:
+        """Guarda el nuevo estado (con el lock tomado); devuelve los suscriptores a avisar si cambió."""
+        if available == self._available:
+            return None
+        self._available = available
+        return list(self._listeners)
+
+    def _notify(self, available: bool, listeners: Optional[List[Callable[[bool], None]]]):
+        if listeners is not None:
+            self.stats["changes"] += 1
+            self._log("info" if available else "warning",
+                      f"Docker {'disponible' if available else 'no disponible'}"
+                      f"{f' ({self.endpoint})' if available else ''}")
+            for listener in listeners:
+                try:
+                    listener(available)
+                except Exception as e:
+                    self._log("error", f"Error notificando la disponibilidad de Docker: {e}")
+
+    def mark_unavailable(self):
+        """
+        Marca Docker como no disponible tras un error de la API y adelanta la
+        comprobación en segundo plano, que lo vuelve a marcar disponible si responde.
+        """
+        with self._lock:
+            self._checked_at = time.monotonic()
+            listeners = self._update(False)
+        self._notify(False, listeners)
+        self._wake.set()
+
+    def ensure_running(self) -> bool:
+        """
+        Disponibilidad para una operación explícita: si el estado no es reciente
+        (más de `ttl` segundos) o indica que Docker no está disponible se comprueba
+        ahora y, si el daemon no responde, se intenta arrancar con DockerHelper.
+
+        Returns:
+            True si Docker está disponible
+        """
+        checked_at = self._checked_at
+        if self._available and checked_at is not None and time.monotonic() - checked_at < self.ttl:
+            return True
+        if self.refresh():
+            return True
+        if self.helper is None or not self.helper.ensure_docker_running():
+            return False
+        return self.refresh()
+
+    def _ping(self) -> bool:
+        if self._probe_client is None:
+            return False
+        self.stats["pings"] += 1
+        try:
+            return bool(self._probe_client.ping())
+        except Exception as e:
+            self._log("debug", f"Ping a Docker fallido ({self.endpoint}): {e}")
+            return False
+
+    def _resolve(self) -> bool:
+        """Prueba los endpoints en orden y conserva el primero que responde."""
+        self.stats["resolutions"] += 1
+        for name, factory in self.endpoints:
+            probe = None
+            try:
+                probe = factory(PING_TIMEOUT)
+                probe.ping()
+                client = factory(None)
+            except Exception:
+                if probe is not None:
+                    probe.close()
+                continue
+            self._close_clients()
+            self._probe_client, self._client, self.endpoint = probe, client, name
+            return True
+        return False
+
+    def _close_clients(self):
+        for client in (self._probe_client, self._client):
+            if client is not None:
+                try:
+                    client.close()
+                except Exception:
+                    pass
+        self._probe_client = self._client = None
+
+    # ------------------------------------------------------------------ #
+    # Comprobación en segundo plano
+    # ------------------------------------------------------------------ #
+
+    def start(self):
+        """Lanza la comprobación periódica en segundo plano (idempotente)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._wake.clear()
+        self._thread = threading.Thread(target=self._run, name="docker-availability", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Detiene la comprobación periódica y cierra los clientes."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        with self._lock:
+            self._close_clients()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.probe_interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            try:
+                self.refresh()
+            except Exception as e:
+                self._log("error", f"Error comprobando la disponibilidad de Docker: {e}")
+
+    def _log(self, level: str, message: str):
+        if self.logger:
+            getattr(self.logger, level, self.logger.info)(message)
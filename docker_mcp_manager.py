@@ -3,11 +3,17 @@ Gestor de Servidores MCP Docker
 Maneja la instalación, ejecución y gestión de servidores MCP como contenedores Docker.
 """
 
+import hashlib
 import json
 import docker
 import os
+import re
+import threading
 import time
 import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 from assets.logging import PersistentLogger
@@ -18,15 +24,26 @@ logging.getLogger("urllib3").setLevel(logging.WARNING)
 
 # Importar nuestro helper de Docker
 from docker_helper import DockerHelper
+from docker_state_snapshot import DockerStateSnapshot
+from docker_availability import DockerAvailability
+from mcp_remote_transport import RemoteMCPConnection
+
+CONFIG_HASH_LABEL = "puentellm.config-hash"  # Etiqueta con el hash de la configuración del contenedor
+STARTUP_TIMEOUT = 60.0  # Segundos máximos hasta que el servidor esté listo
+READINESS_POLL_INTERVAL = 0.25  # Segundos entre comprobaciones de preparación
+READINESS_PROBE_TIMEOUT = 2.0  # Timeout de cada intento de initialize MCP
+STARTUP_WORKERS = 4  # Arranques simultáneos en start_docker_servers
+STARTUP_SAMPLES = 100  # Tiempos de arranque que se conservan por modo
 
 
 class DockerMCPManager:
-    def __init__(self, config_dir: Optional[str] = None):
+    def __init__(self, config_dir: Optional[str] = None, availability: Optional[DockerAvailability] = None):
         """
         Inicializa el gestor de servidores MCP Docker.
         
         Args:
             config_dir: Directorio base para configuración
+            availability: Servicio de disponibilidad de Docker (por defecto uno propio)
         """
         if config_dir is None:
             self.base_dir = Path.home() / ".config" / "puentellm-mcp"
@@ -45,56 +62,32 @@ class DockerMCPManager:
         log_dir.mkdir(exist_ok=True)
         self.logger = PersistentLogger(log_dir=str(log_dir))
         
-        # Docker Helper para asegurar disponibilidad
+        # Docker Helper: solo para intentar arrancar Docker antes de una operación explícita
         self.docker_helper = DockerHelper(self.logger)
         
-        # Cliente Docker
+        # Cliente Docker: el endpoint se resuelve una vez y la disponibilidad se guarda en caché
+        self.availability = availability or DockerAvailability(self.logger, helper=self.docker_helper)
+        if self.availability.helper is None:
+            self.availability.helper = self.docker_helper
         try:
-            # Asegurar que Docker esté disponible antes de inicializar cliente
-            if self.docker_helper.ensure_docker_running():
-                # Intentar diferentes métodos de conexión para Windows
-                self.docker_client = None
-                
-                # Método 1: Conexión predeterminada
-                try:
-                    self.docker_client = docker.from_env()
-                    # Probar la conexión haciendo una llamada simple
-                    self.docker_client.ping()
-                    self.logger.info("Cliente Docker inicializado correctamente (método predeterminado)")
-                except Exception:
-                    pass  # Intentar siguiente método
-                
-                # Método 2: Conexión TCP si el predeterminado falla
-                if self.docker_client is None:
-                    try:
-                        self.docker_client = docker.DockerClient(base_url='tcp://localhost:2375')
-                        self.docker_client.ping()
-                        self.logger.info("Cliente Docker inicializado correctamente (TCP)")
-                    except Exception:
-                        pass  # Intentar siguiente método
-                
-                # Método 3: Conexión con named pipe explícita para Windows
-                if self.docker_client is None:
-                    try:
-                        self.docker_client = docker.DockerClient(base_url='npipe://./pipe/docker_engine')
-                        self.docker_client.ping()
-                        self.logger.info("Cliente Docker inicializado correctamente (named pipe)")
-                    except Exception:
-                        pass  # Último intento falló
-                
-                if self.docker_client is None:
-                    self.logger.warning("No se pudo establecer conexión con Docker client")
-                    self.logger.warning("Docker parece estar instalado pero el daemon no está accesible")
-                    self.logger.info("Sugerencia: Verificar que Docker Desktop esté completamente iniciado")
-                    self.logger.info("Docker MCP Manager funcionará con capacidades limitadas")
+            if self.availability.refresh():
+                self.logger.info(f"Cliente Docker inicializado correctamente ({self.availability.endpoint})")
             else:
-                self.docker_client = None
-                self.logger.info("Docker no está disponible en el sistema")
+                self.logger.info("Docker no está accesible; Docker MCP Manager funcionará con capacidades limitadas")
         except Exception as e:
-            self.docker_client = None
             self.logger.warning(f"Error inicializando cliente Docker: {e}")
             self.logger.info("Docker MCP Manager continuará funcionando con capacidades limitadas")
         
+        # running_docker_mcps.json y tiempos de arranque (los arranques pueden ser paralelos)
+        self._containers_lock = threading.Lock()
+        self.startup_times = {"cold": deque(maxlen=STARTUP_SAMPLES), "warm": deque(maxlen=STARTUP_SAMPLES)}
+        
+        # Imágenes y contenedores en una instantánea invalidada por los eventos de Docker
+        self.state = DockerStateSnapshot(lambda: self.docker_client, self.logger)
+        # Si el daemon cae o vuelve, la instantánea guardada deja de valer
+        self.availability.subscribe(lambda available: self.state.invalidate())
+        self.availability.start()
+        
         # Cargar catálogo de servidores Docker
         self.docker_servers_catalog = self._load_docker_catalog()
     
@@ -111,92 +104,54 @@ class DockerMCPManager:
             self.logger.error(f"Error cargando catálogo Docker: {e}")
             return []
     
+    @property
+    def docker_client(self) -> Optional[docker.DockerClient]:
+        """Cliente Docker del endpoint resuelto (None si Docker no está disponible)."""
+        return self.availability.client
+    
     def check_docker_availability(self) -> bool:
-        """Verifica si Docker está disponible y funcionando."""
+        """
+        Verifica si Docker está disponible y funcionando.
+        
+        Consulta el estado en caché del servicio de disponibilidad: no lanza
+        comandos `docker` ni prueba de nuevo los métodos de conexión.
+        """
         try:
-            # Usar nuestro helper para verificar y asegurar Docker
-            if not self.docker_helper.ensure_docker_running():
-                return False
-            
-            if self.docker_client is None:
-                # Intentar reconectar usando los mismos métodos que en __init__
-                self.logger.debug("Intentando reconectar cliente Docker...")
-                
-                # Método 1: Conexión predeterminada
-                try:
-                    self.docker_client = docker.from_env()
-                    self.docker_client.ping()
-                    self.logger.info("Cliente Docker reconectado correctamente (método predeterminado)")
-                except Exception:
-                    # Método predeterminado falló, intentar siguiente método
-                    pass
-                
-                # Método 2: Conexión TCP si el predeterminado falla
-                if self.docker_client is None:
-                    try:
-                        self.docker_client = docker.DockerClient(base_url='tcp://localhost:2375')
-                        self.docker_client.ping()
-                        self.logger.info("Cliente Docker reconectado correctamente (TCP)")
-                    except Exception:
-                        # Método TCP falló, intentar siguiente método
-                        pass
-                
-                # Método 3: Conexión con named pipe explícita para Windows
-                if self.docker_client is None:
-                    try:
-                        self.docker_client = docker.DockerClient(base_url='npipe://./pipe/docker_engine')
-                        self.docker_client.ping()
-                        self.logger.info("Cliente Docker reconectado correctamente (named pipe)")
-                    except Exception:
-                        pass
-            
-            # Verificar que el cliente funciona
-            if self.docker_client is not None:
-                try:
-                    self.docker_client.ping()
-                    return True
-                except Exception as e:
-                    self.logger.debug(f"Error en ping Docker: {e}")
-                    self.docker_client = None
-            
-            # Si llegamos aquí, no hay cliente disponible pero Docker está ejecutándose
-            # Esto puede ser normal en algunos casos
-            self.logger.warning("Docker está ejecutándose pero el cliente Python no puede conectar")
+            return self.availability.available
+        except Exception as e:
+            self.logger.error(f"Docker no está disponible: {e}")
             return False
-            
+    
+    def ensure_docker_available(self) -> bool:
+        """
+        Verifica Docker antes de una operación explícita (instalar o iniciar) e
+        intenta arrancarlo si no responde.
+        """
+        try:
+            return self.availability.ensure_running()
         except Exception as e:
             self.logger.error(f"Docker no está disponible: {e}")
             return False
     
     def get_available_docker_servers(self) -> List[Dict]:
-        """Obtiene la lista de servidores MCP Docker disponibles."""
-        if not self.check_docker_availability():
-            self.logger.warning("Docker no está disponible")
-            return []
+        """
+        Obtiene la lista de servidores MCP Docker disponibles.
         
-        # Agregar información de estado de instalación
-        for server in self.docker_servers_catalog:
+        El estado de instalación y ejecución sale de una instantánea (un listado de
+        imágenes y otro de contenedores) que se reutiliza mientras no llegue ningún
+        evento de Docker. La disponibilidad del daemon se consulta en caché.
+        """
+        if self.check_docker_availability():
             try:
-                image_name = server['docker']['image']
-                tag = server['docker'].get('tag', 'latest')
-                full_image = f"{image_name}:{tag}"
-                
-                # Verificar si la imagen está descargada
-                try:
-                    self.docker_client.images.get(full_image)
-                    server['installed'] = True
-                except docker.errors.ImageNotFound:
-                    server['installed'] = False
-                
-                # Verificar si hay un contenedor ejecutándose
-                server['running'] = self._is_container_running(server['name'])
-                
+                self.state.start()
+                return self.state.annotate(self.docker_servers_catalog)
             except Exception as e:
-                self.logger.error(f"Error verificando estado de {server['name']}: {e}")
-                server['installed'] = False
-                server['running'] = False
+                self.logger.debug(f"No se pudo obtener el estado de Docker: {e}")
+                # El daemon no respondió: la comprobación en segundo plano dirá cuándo vuelve
+                self.availability.mark_unavailable()
         
-        return self.docker_servers_catalog
+        self.logger.warning("Docker no está disponible")
+        return []
     
     def _is_container_running(self, server_name: str) -> bool:
         """Verifica si un contenedor MCP está ejecutándose."""
@@ -220,7 +175,7 @@ class DockerMCPManager:
         Returns:
             Tupla (éxito, mensaje)
         """
-        if not self.check_docker_availability():
+        if not self.ensure_docker_available():
             return False, "Docker no está disponible"
         
         # Buscar el servidor en el catálogo
@@ -242,6 +197,7 @@ class DockerMCPManager:
             
             # Hacer pull de la imagen
             self.docker_client.images.pull(image_name, tag=tag)
+            self.state.invalidate()
             
             self.logger.info(f"Imagen {full_image} descargada correctamente")
             return True, f"Servidor {server_name} instalado correctamente"
@@ -251,18 +207,27 @@ class DockerMCPManager:
             self.logger.error(error_msg)
             return False, error_msg
     
-    def start_docker_server(self, server_name: str, env_vars: Dict[str, str] = None) -> Tuple[bool, str]:
+    def start_docker_server(self, server_name: str, env_vars: Dict[str, str] = None,
+                            timeout: Optional[float] = None) -> Tuple[bool, str]:
         """
-        Inicia un servidor MCP Docker como contenedor.
+        Inicia un servidor MCP Docker como contenedor y espera a que esté listo.
+        
+        Si existe un contenedor detenido con la misma configuración (mismo hash en
+        la etiqueta del contenedor) se vuelve a arrancar en lugar de crear otro
+        (arranque en caliente); si la configuración cambió se sustituye. El
+        servidor se da por listo según su healthcheck de Docker, el patrón de log
+        `readiness.log_pattern` o un `initialize` MCP correcto en
+        `readiness.mcp_path`; sin ninguna de esas señales, al estar en ejecución.
         
         Args:
             server_name: Nombre del servidor a iniciar
             env_vars: Variables de entorno adicionales
+            timeout: Segundos máximos de espera hasta que esté listo
             
         Returns:
             Tupla (éxito, mensaje)
         """
-        if not self.check_docker_availability():
+        if not self.ensure_docker_available():
             return False, "Docker no está disponible"
         
         # Buscar configuración del servidor
@@ -277,69 +242,224 @@ class DockerMCPManager:
         
         try:
             container_name = f"mcp-{server_name}"
-            
-            # Verificar si ya está ejecutándose
-            if self._is_container_running(server_name):
-                return False, f"El servidor {server_name} ya está ejecutándose"
-            
-            # Preparar configuración de Docker
             docker_config = server_config['docker']
-            image_name = docker_config['image']
-            tag = docker_config.get('tag', 'latest')
-            full_image = f"{image_name}:{tag}"
-            
-            # Variables de entorno
-            environment = docker_config.get('environment', {})
-            if env_vars:
-                environment.update(env_vars)
+            run_config = self._build_run_config(server_name, docker_config, env_vars)
+            config_hash = self._config_hash(run_config)
+            readiness = docker_config.get('readiness', {})
+            if timeout is None:
+                timeout = readiness.get('timeout', STARTUP_TIMEOUT)
             
-            # Puertos
-            ports = {}
-            if 'ports' in docker_config:
-                for port_mapping in docker_config['ports']:
-                    if ':' in port_mapping:
-                        host_port, container_port = port_mapping.split(':')
-                        ports[f"{container_port}/tcp"] = host_port
-            
-            # Volúmenes
-            volumes = {}
-            if 'volumes' in docker_config:
-                for volume_mapping in docker_config['volumes']:
-                    if ':' in volume_mapping:
-                        host_path, container_path = volume_mapping.split(':')
-                        # Crear directorio host si no existe
-                        host_full_path = self.docker_data_dir / server_name / host_path.lstrip('./')
-                        host_full_path.mkdir(parents=True, exist_ok=True)
-                        volumes[str(host_full_path)] = {'bind': container_path, 'mode': 'rw'}
+            started = time.perf_counter()
+            container = self._get_container(container_name)
+            if container is not None and container.status == 'running':
+                return False, f"El servidor {server_name} ya está ejecutándose"
             
-            # Crear y ejecutar contenedor
-            container = self.docker_client.containers.run(
-                full_image,
-                name=container_name,
-                environment=environment,
-                ports=ports,
-                volumes=volumes,
-                detach=True,
-                restart_policy={"Name": "unless-stopped"}
-            )
+            if container is not None and container.labels.get(CONFIG_HASH_LABEL) == config_hash:
+                # Misma configuración: arrancar el contenedor existente (en caliente)
+                mode = "warm"
+                container.start()
+            else:
+                if container is not None:
+                    # Configuración distinta (o contenedor sin etiqueta): sustituirlo
+                    self.logger.info(f"Configuración de {container_name} cambiada; se recrea el contenedor")
+                    container.remove(force=True)
+                mode = "cold"
+                container = self._create_container(container_name, run_config, config_hash)
+                container.start()
+            self.state.invalidate()
             
-            # Esperar un momento para que el contenedor inicie
-            time.sleep(2)
+            ready, detail = self._wait_until_ready(container, run_config, readiness, timeout)
+            elapsed = time.perf_counter() - started
+            if not ready:
+                error_msg = f"El contenedor {server_name} no pudo iniciarse: {detail}"
+                self.logger.error(error_msg)
+                return False, error_msg
             
-            # Verificar que esté ejecutándose
-            container.reload()
-            if container.status == 'running':
-                self._save_running_container(server_name, container.id)
-                self.logger.info(f"Servidor MCP {server_name} iniciado como contenedor {container_name}")
-                return True, f"Servidor {server_name} iniciado correctamente"
-            else:
-                return False, f"El contenedor {server_name} no pudo iniciarse"
+            self._record_startup(server_name, container.id, mode, elapsed, detail)
+            self.logger.info(f"Servidor MCP {server_name} iniciado como contenedor {container_name} "
+                             f"(arranque {'en caliente' if mode == 'warm' else 'en frío'}, "
+                             f"{elapsed:.2f}s, listo por {detail})")
+            return True, f"Servidor {server_name} iniciado correctamente"
                 
         except Exception as e:
             error_msg = f"Error iniciando servidor {server_name}: {str(e)}"
             self.logger.error(error_msg)
             return False, error_msg
     
+    def start_docker_servers(self, server_names: List[str], env_vars: Optional[Dict[str, Dict[str, str]]] = None,
+                             max_workers: int = STARTUP_WORKERS) -> Dict[str, Tuple[bool, str]]:
+        """
+        Inicia varios servidores MCP Docker en paralelo.
+        
+        Args:
+            server_names: Nombres de los servidores a iniciar
+            env_vars: Variables de entorno adicionales por servidor
+            max_workers: Arranques simultáneos
+            
+        Returns:
+            Diccionario nombre -> (éxito, mensaje)
+        """
+        env_vars = env_vars or {}
+        names = list(dict.fromkeys(server_names))
+        if not names:
+            return {}
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(names))),
+                                thread_name_prefix="docker-start") as executor:
+            futures = {name: executor.submit(self.start_docker_server, name, env_vars.get(name))
+                       for name in names}
+            return {name: future.result() for name, future in futures.items()}
+    
+    def get_startup_stats(self) -> Dict[str, Dict]:
+        """
+        Tiempos de arranque registrados, separados en frío (contenedor nuevo) y en caliente.
+        
+        Returns:
+            Diccionario modo -> {count, avg, min, max, last} en segundos
+        """
+        stats = {}
+        with self._containers_lock:
+            samples = {mode: list(times) for mode, times in self.startup_times.items()}
+        for mode, times in samples.items():
+            if times:
+                stats[mode] = {"count": len(times), "avg": sum(times) / len(times),
+                               "min": min(times), "max": max(times), "last": times[-1]}
+            else:
+                stats[mode] = {"count": 0}
+        return stats
+    
+    def _build_run_config(self, server_name: str, docker_config: Dict,
+                          env_vars: Optional[Dict[str, str]]) -> Dict:
+        """Parámetros de creación del contenedor a partir de la entrada del catálogo."""
+        image_name = docker_config['image']
+        tag = docker_config.get('tag', 'latest')
+        
+        # Variables de entorno (copia: no modificar el catálogo)
+        environment = dict(docker_config.get('environment', {}))
+        if env_vars:
+            environment.update(env_vars)
+        
+        # Puertos
+        ports = {}
+        for port_mapping in docker_config.get('ports', []):
+            if ':' in port_mapping:
+                host_port, container_port = port_mapping.split(':')
+                ports[f"{container_port}/tcp"] = host_port
+        
+        # Volúmenes
+        volumes = {}
+        for volume_mapping in docker_config.get('volumes', []):
+            if ':' in volume_mapping:
+                host_path, container_path = volume_mapping.split(':')
+                # Crear directorio host si no existe
+                host_full_path = self.docker_data_dir / server_name / host_path.lstrip('./')
+                host_full_path.mkdir(parents=True, exist_ok=True)
+                volumes[str(host_full_path)] = {'bind': container_path, 'mode': 'rw'}
+        
+        return {
+            'image': f"{image_name}:{tag}",
+            'environment': environment,
+            'ports': ports,
+            'volumes': volumes,
+            'restart_policy': {"Name": "unless-stopped"},
+        }
+    
+    @staticmethod
+    def _config_hash(run_config: Dict) -> str:
+        """Hash estable de la configuración del contenedor (se guarda como etiqueta)."""
+        canonical = json.dumps(run_config, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+    
+    def _get_container(self, container_name: str):
+        """Contenedor con ese nombre, en cualquier estado (None si no existe)."""
+        try:
+            return self.docker_client.containers.get(container_name)
+        except docker.errors.NotFound:
+            return None
+    
+    def _create_container(self, container_name: str, run_config: Dict, config_hash: str):
+        """Crea el contenedor (sin arrancarlo), descargando la imagen si falta."""
+        kwargs = dict(run_config, name=container_name, detach=True, labels={CONFIG_HASH_LABEL: config_hash})
+        try:
+            return self.docker_client.containers.create(**kwargs)
+        except docker.errors.ImageNotFound:
+            image_name, _, tag = run_config['image'].rpartition(':')
+            self.logger.info(f"Descargando imagen Docker: {run_config['image']}")
+            self.docker_client.images.pull(image_name, tag=tag)
+            return self.docker_client.containers.create(**kwargs)
+    
+    def _wait_until_ready(self, container, run_config: Dict, readiness: Dict, timeout: float) -> Tuple[bool, str]:
+        """
+        Espera a que el contenedor esté listo.
+        
+        Returns:
+            Tupla (listo, señal que lo confirmó o motivo del fallo)
+        """
+        pattern = re.compile(readiness['log_pattern']) if readiness.get('log_pattern') else None
+        mcp_url = None
+        if readiness.get('mcp_path') and run_config['ports']:
+            host_port = next(iter(run_config['ports'].values()))
+            mcp_url = f"http://localhost:{host_port}{readiness['mcp_path']}"
+        
+        deadline = time.monotonic() + timeout
+        since = None
+        while True:
+            container.reload()
+            state = container.attrs.get('State', {})
+            status = state.get('Status')
+            if status in ('exited', 'dead'):
+                return False, f"el contenedor terminó (código {state.get('ExitCode')})"
+            
+            if status == 'running':
+                health = (state.get('Health') or {}).get('Status')
+                if health == 'healthy':
+                    return True, "healthcheck"
+                if health == 'unhealthy':
+                    return False, "healthcheck fallido"
+                if pattern is not None:
+                    # Solo los logs de este arranque (un contenedor reutilizado conserva los anteriores)
+                    if since is None:
+                        since = self._started_at_timestamp(state)
+                    logs = container.logs(since=since) if since else container.logs()
+                    if pattern.search(logs.decode('utf-8', errors='replace')):
+                        return True, "log"
+                if mcp_url and self._mcp_initialize_succeeds(mcp_url):
+                    return True, "initialize"
+                if health is None and pattern is None and mcp_url is None:
+                    return True, "running"
+            
+            if time.monotonic() >= deadline:
+                return False, f"no estuvo listo en {timeout:.0f}s"
+            time.sleep(READINESS_POLL_INTERVAL)
+    
+    @staticmethod
+    def _started_at_timestamp(state: Dict) -> Optional[float]:
+        """`State.StartedAt` (RFC 3339 con nanosegundos, reloj del daemon) como timestamp."""
+        started_at = state.get('StartedAt') or ''
+        match = re.match(r'(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2})(?:\.(\d+))?', started_at)
+        if not match or started_at.startswith('0001-'):
+            return None
+        seconds = datetime.strptime(match.group(1), '%Y-%m-%dT%H:%M:%S').replace(tzinfo=timezone.utc).timestamp()
+        return seconds + float(f"0.{match.group(2) or 0}")
+    
+    def _mcp_initialize_succeeds(self, url: str) -> bool:
+        """True si el servidor responde al handshake `initialize` de MCP."""
+        connection = RemoteMCPConnection(url, timeout=READINESS_PROBE_TIMEOUT, max_retries=0, logger=self.logger)
+        try:
+            connection.initialize()
+            return True
+        except Exception as e:
+            self.logger.debug(f"{url} aún no responde a initialize: {e}")
+            return False
+        finally:
+            connection.close()
+    
+    def _record_startup(self, server_name: str, container_id: str, mode: str, elapsed: float, ready_by: str):
+        """Registra el tiempo de arranque (en memoria y en running_docker_mcps.json)."""
+        with self._containers_lock:
+            self.startup_times[mode].append(elapsed)
+        self._save_running_container(server_name, container_id,
+                                     {'start_mode': mode, 'startup_seconds': round(elapsed, 3), 'ready_by': ready_by})
+    
     def stop_docker_server(self, server_name: str) -> Tuple[bool, str]:
         """
         Detiene un servidor MCP Docker.
@@ -361,6 +481,7 @@ class DockerMCPManager:
             
             # Detener el contenedor
             container.stop()
+            self.state.invalidate()
             
             # Remover de la lista de contenedores ejecutándose
             self._remove_running_container(server_name)
@@ -395,17 +516,19 @@ class DockerMCPManager:
             self.logger.error(f"Error obteniendo logs de {server_name}: {e}")
             return f"Error obteniendo logs: {str(e)}"
     
-    def _save_running_container(self, server_name: str, container_id: str):
+    def _save_running_container(self, server_name: str, container_id: str, details: Optional[Dict] = None):
         """Guarda información de un contenedor en ejecución."""
         try:
-            running_containers = self._load_running_containers()
-            running_containers[server_name] = {
-                'container_id': container_id,
-                'started_at': time.time()
-            }
-            
-            with open(self.running_containers_file, 'w', encoding='utf-8') as f:
-                json.dump(running_containers, f, indent=2, ensure_ascii=False)
+            with self._containers_lock:
+                running_containers = self._load_running_containers()
+                running_containers[server_name] = {
+                    'container_id': container_id,
+                    'started_at': time.time(),
+                    **(details or {})
+                }
+                
+                with open(self.running_containers_file, 'w', encoding='utf-8') as f:
+                    json.dump(running_containers, f, indent=2, ensure_ascii=False)
                 
         except Exception as e:
             self.logger.error(f"Error guardando información de contenedor: {e}")
@@ -413,12 +536,13 @@ class DockerMCPManager:
     def _remove_running_container(self, server_name: str):
         """Remueve información de un contenedor detenido."""
         try:
-            running_containers = self._load_running_containers()
-            if server_name in running_containers:
-                del running_containers[server_name]
-                
-                with open(self.running_containers_file, 'w', encoding='utf-8') as f:
-                    json.dump(running_containers, f, indent=2, ensure_ascii=False)
+            with self._containers_lock:
+                running_containers = self._load_running_containers()
+                if server_name in running_containers:
+                    del running_containers[server_name]
+                    
+                    with open(self.running_containers_file, 'w', encoding='utf-8') as f:
+                        json.dump(running_containers, f, indent=2, ensure_ascii=False)
                     
         except Exception as e:
             self.logger.error(f"Error removiendo información de contenedor: {e}")
@@ -469,6 +593,7 @@ class DockerMCPManager:
                 if container.name.startswith('mcp-'):
                     try:
                         container.remove()
+                        self.state.invalidate()
                         removed_count += 1
                         self.logger.info(f"Contenedor removido: {container.name}")
                     except Exception as e:
@@ -477,4 +602,9 @@ class DockerMCPManager:
         except Exception as e:
             self.logger.error(f"Error en limpieza de contenedores: {e}")
         
-        return removed_count
\ No newline at end of file
+        return removed_count
+    
+    def close(self):
+        """Detiene los hilos en segundo plano (eventos y disponibilidad de Docker)."""
+        self.state.stop()
+        self.availability.stop()
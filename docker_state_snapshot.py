@@ -0,0 +1,188 @@
+"""
+Instantánea del estado de Docker para los servidores MCP
+Obtiene las imágenes y los contenedores con una sola llamada a cada listado de
+la API de Docker y cruza el resultado con el catálogo en una pasada, en lugar
+de consultar una imagen y un contenedor por cada entrada del catálogo.
+
+La instantánea se conserva mientras un hilo en segundo plano está suscrito al
+flujo de eventos de Docker: cualquier evento de imagen o contenedor la marca
+como obsoleta y la siguiente lectura vuelve a listar. Sin suscripción activa
+(daemon reiniciado, flujo cortado) cada lectura lista de nuevo.
+"""
+
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+CONTAINER_PREFIX = "mcp-"
+EVENT_TYPES = ["image", "container"]
+RECONNECT_DELAY = 1.0  # Segundos iniciales entre reconexiones del flujo de eventos
+MAX_RECONNECT_DELAY = 30.0
+
+
+class DockerStateSnapshot:
+    """
+    Imágenes y contenedores MCP de Docker, invalidados por el flujo de eventos.
+    """
+
+    def __init__(self, client_provider: Callable[[], Optional[object]], logger=None,
+                 container_prefix: str = CONTAINER_PREFIX):
+        """
+        Args:
+            client_provider: Devuelve el cliente Docker actual (None si no hay conexión)
+            logger: Logger opcional
+            container_prefix: Prefijo de los contenedores de servidores MCP
+        """
+        self.client_provider = client_provider
+        self.logger = logger
+        self.container_prefix = container_prefix
+
+        self._lock = threading.Lock()
+        self._snapshot: Optional[Dict] = None
+        self._generation = 0  # Aumenta con cada evento: un listado en curso no se da por bueno
+        self._subscribed = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stream = None
+        self.stats = {"refreshes": 0, "events": 0, "reconnects": 0}
+
+    @property
+    def live(self) -> bool:
+        """True si la suscripción a eventos está activa (la instantánea en caché es fiable)."""
+        return self._subscribed.is_set()
+
+    def get(self) -> Dict:
+        """
+        Instantánea actual: la guardada si sigue siendo válida o un listado nuevo.
+
+        Returns:
+            Diccionario con `images` (conjunto de "imagen:tag"), `containers`
+            (nombre -> estado) y `taken_at`
+
+        Raises:
+            RuntimeError: Si no hay cliente Docker
+            docker.errors.DockerException: Si falla la llamada a la API
+        """
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and self.live:
+                return snapshot
+            generation = self._generation
+
+        snapshot = self._list()
+        with self._lock:
+            if generation == self._generation and self.live:
+                self._snapshot = snapshot
+        return snapshot
+
+    def invalidate(self):
+        """Descarta la instantánea guardada (tras una operación propia, sin esperar al evento)."""
+        with self._lock:
+            self._generation += 1
+            self._snapshot = None
+
+    def annotate(self, catalog: List[Dict]) -> List[Dict]:
+        """
+        Marca `installed` y `running` en cada entrada del catálogo Docker.
+
+        Returns:
+            El mismo catálogo, anotado en una sola pasada sobre la instantánea
+
+        Raises:
+            RuntimeError: Si no hay cliente Docker
+            docker.errors.DockerException: Si falla la llamada a la API
+        """
+        snapshot = self.get()
+        images, containers = snapshot["images"], snapshot["containers"]
+        for server in catalog:
+            try:
+                docker_config = server["docker"]
+                full_image = f"{docker_config['image']}:{docker_config.get('tag', 'latest')}"
+                server["installed"] = full_image in images
+                server["running"] = containers.get(f"{self.container_prefix}{server['name']}") == "running"
+            except (KeyError, TypeError) as e:
+                self._log("error", f"Entrada Docker inválida en el catálogo ({server.get('name')}): {e}")
+                server["installed"] = False
+                server["running"] = False
+        return catalog
+
+    def _list(self) -> Dict:
+        """Lista imágenes y contenedores con una llamada a cada endpoint (sin inspeccionar cada uno)."""
+        client = self.client_provider()
+        if client is None:
+            raise RuntimeError("Cliente Docker no disponible")
+        # La API de bajo nivel devuelve los listados tal cual; images.list() y containers.list()
+        # del cliente de alto nivel inspeccionan después cada elemento (una llamada más por elemento)
+        images = set()
+        for image in client.api.images():
+            images.update(tag for tag in image.get("RepoTags") or [] if tag != "<none>:<none>")
+        containers = {}
+        for container in client.api.containers(all=True, filters={"name": self.container_prefix}):
+            for name in container.get("Names") or []:
+                name = name.lstrip("/")
+                if name.startswith(self.container_prefix):
+                    containers[name] = container.get("State", "")
+        self.stats["refreshes"] += 1
+        return {"images": images, "containers": containers, "taken_at": time.time()}
+
+    # ------------------------------------------------------------------ #
+    # Suscripción a eventos
+    # ------------------------------------------------------------------ #
+
+    def start(self):
+        """Lanza el hilo que sigue el flujo de eventos de Docker (idempotente)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch_events, name="docker-events", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Detiene la suscripción y espera al hilo."""
+        self._stop.set()
+        stream = self._stream
+        if stream is not None:
+            try:
+                stream.close()
+            except Exception:
+                pass
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self._subscribed.clear()
+
+    def wait_live(self, timeout: float) -> bool:
+        """Espera a que la suscripción a eventos esté activa."""
+        return self._subscribed.wait(timeout)
+
+    def _watch_events(self):
+        delay = RECONNECT_DELAY
+        while not self._stop.is_set():
+            client = self.client_provider()
+            if client is not None:
+                try:
+                    self._stream = client.events(decode=True, filters={"type": EVENT_TYPES})
+                    # Suscritos antes de listar: ningún cambio posterior al listado se pierde
+                    self.invalidate()
+                    self._subscribed.set()
+                    delay = RECONNECT_DELAY
+                    for event in self._stream:
+                        self.stats["events"] += 1
+                        self.invalidate()
+                        if self._stop.is_set():
+                            break
+                except Exception as e:
+                    if not self._stop.is_set():
+                        self._log("debug", f"Flujo de eventos de Docker interrumpido: {e}")
+                finally:
+                    self._subscribed.clear()
+                    self.invalidate()
+                    self._stream = None
+            if self._stop.wait(delay):
+                break
+            self.stats["reconnects"] += 1
+            delay = min(delay * 2, MAX_RECONNECT_DELAY)
+
+    def _log(self, level: str, message: str):
+        if self.logger:
+            getattr(self.logger, level, self.logger.info)(message)
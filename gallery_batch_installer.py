@@ -0,0 +1,369 @@
+"""
+Instalación y actualización por lotes de servidores de la galería MCP
+Agrupa varios servidores en una sola operación: verifica una vez cada runtime
+necesario (npm, pip, docker), descarga y verifica los manifests en paralelo con
+concurrencia acotada, instala los paquetes de un mismo gestor con un único
+comando y confirma todos los cambios de installed_servers.json y
+mcp_servers.json en una sola transacción al final. Si la transacción (o, a
+petición, cualquier elemento) falla, se revierten los paquetes instalados.
+"""
+
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+
+# Estados que recorre cada elemento del lote
+STATUS_QUEUED = "queued"
+STATUS_VERIFYING = "verifying"
+STATUS_INSTALLING = "installing"
+STATUS_INSTALLED = "installed"
+STATUS_SKIPPED = "skipped"
+STATUS_FAILED = "failed"
+STATUS_ROLLED_BACK = "rolled_back"
+
+
+class BatchInstaller:
+    """
+    Instala o actualiza un conjunto de servidores de la galería como una unidad.
+    """
+
+    def __init__(self, gallery_manager, max_workers: int = 3,
+                 progress_callback: Optional[Callable[[Dict], None]] = None,
+                 rollback_on_failure: bool = False, command_timeout: int = 300):
+        """
+        Args:
+            gallery_manager: Instancia de MCPGalleryManager
+            max_workers: Descargas, verificaciones y grupos de instalación simultáneos
+            progress_callback: Recibe un dict por cada cambio de estado de un elemento
+                (`server_id`, `status`, `message`, `completed`, `total`)
+            rollback_on_failure: Si True, el fallo de cualquier elemento revierte todo el lote
+            command_timeout: Timeout de cada comando de instalación en segundos
+        """
+        self.gallery_manager = gallery_manager
+        self.logger = gallery_manager.logger
+        self.max_workers = max(1, max_workers)
+        self.progress_callback = progress_callback
+        self.rollback_on_failure = rollback_on_failure
+        self.command_timeout = command_timeout
+        self._items: List[Dict] = []
+
+    def install(self, servers: Iterable[Dict]) -> Dict:
+        """
+        Instala o actualiza los servidores indicados.
+
+        Args:
+            servers: Servidores de la galería (como los de fetch_available_servers)
+
+        Returns:
+            Diccionario con `committed` (bool) y `results`: por ID de servidor,
+            `status` y `message`
+        """
+        installed = self.gallery_manager.get_installed_servers()
+        self._items = [self._plan_item(server, installed) for server in servers]
+        pending = [item for item in self._items if item["status"] == STATUS_QUEUED]
+        for item in self._items:
+            self._report(item)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="batch-install") as pool:
+            self._resolve_runtimes(pending, pool)
+            self._verify_manifests([i for i in pending if i["status"] == STATUS_QUEUED], pool)
+            self._run_installations([i for i in pending if i["status"] == STATUS_QUEUED], pool)
+
+        succeeded = [item for item in pending if item["status"] == STATUS_INSTALLING]
+        failed = [item for item in pending if item["status"] == STATUS_FAILED]
+        committed = False
+        # Los manifests verificados de los elementos que fallaron después no se instalan
+        self._discard_staged(failed)
+        if failed and self.rollback_on_failure:
+            self._rollback(succeeded, "Revertido: otro servidor del lote falló")
+        elif succeeded:
+            committed = self._commit(succeeded)
+
+        return {
+            "committed": committed,
+            "results": {item["server_id"]: {"status": item["status"], "message": item["message"]}
+                        for item in self._items},
+        }
+
+    # ------------------------------------------------------------------ #
+    # Planificación
+    # ------------------------------------------------------------------ #
+
+    def _plan_item(self, server: Dict, installed: Dict) -> Dict:
+        server_id = server.get("id") or server.get("name", "unknown_server")
+        version = server.get("version", "1.0.0")
+        item = {
+            "server": server,
+            "server_id": server_id,
+            "previous": installed.get(server_id),
+            "status": STATUS_QUEUED,
+            "message": "En cola",
+            "method": None,
+            "package": None,
+            "install_details": None,
+            "record": None,
+            "staged_manifest": None,
+            "rollback_command": None,
+        }
+        if item["previous"] and item["previous"].get("version", "") == version:
+            item["status"], item["message"] = STATUS_SKIPPED, f"{server_id} v{version} ya está instalado"
+            return item
+
+        packages, remotes = self.gallery_manager.get_installation_sources(server)
+        if packages:
+            item["method"], item["package"] = "package", packages[0]  # Usar el primer paquete disponible
+        elif remotes:
+            item["method"] = "remote"
+            remote = remotes[0]
+            item["install_details"] = {
+                "install_method": "remote",
+                "url": remote.get("url", ""),
+                "transport_type": remote.get("type", ""),
+                "headers": remote.get("headers", [])
+            }
+        elif server.get("manifest_url", "").startswith("file://"):
+            item["method"] = "local"
+        else:
+            item["status"], item["message"] = STATUS_FAILED, "No se encontró método de instalación válido"
+        return item
+
+    def _resolve_runtimes(self, items: List[Dict], pool: ThreadPoolExecutor):
+        """Verifica una sola vez cada gestor de paquetes que necesita el lote."""
+        registry_types = sorted({item["package"].get("registryType", "") for item in items
+                                 if item["method"] == "package"})
+        checks = dict(zip(registry_types, pool.map(self.gallery_manager.check_package_runtime, registry_types)))
+        for item in items:
+            if item["method"] != "package":
+                continue
+            available, message = checks[item["package"].get("registryType", "")]
+            if not available:
+                self._set(item, STATUS_FAILED, message)
+
+    # ------------------------------------------------------------------ #
+    # Descarga y verificación
+    # ------------------------------------------------------------------ #
+
+    def _verify_manifests(self, items: List[Dict], pool: ThreadPoolExecutor):
+        """Descarga y verifica en paralelo los manifests remotos que tienen checksum."""
+        to_verify = [item for item in items if self._needs_verification(item["server"])]
+        for item in to_verify:
+            self._set(item, STATUS_VERIFYING, "Descargando y verificando manifest")
+        for item, outcome in zip(to_verify, pool.map(self._verify_one, to_verify)):
+            ok, staged, message = outcome
+            if ok:
+                item["staged_manifest"] = staged
+                item["verification_message"] = message
+                self._set(item, STATUS_QUEUED, message)
+            else:
+                self._set(item, STATUS_FAILED, message)
+
+    def _needs_verification(self, server: Dict) -> bool:
+        checksum = server.get("checksum", "")
+        manifest_url = server.get("manifest_url", "")
+        return bool(checksum) and checksum != "placeholder" and manifest_url.startswith(("http://", "https://"))
+
+    def _verify_one(self, item: Dict):
+        try:
+            ok, staged, _, message = self.gallery_manager.download_and_verify(
+                item["server"]["manifest_url"], item["server"])
+            return ok, staged, message
+        except Exception as e:
+            return False, None, f"Error verificando manifest: {e}"
+
+    # ------------------------------------------------------------------ #
+    # Instalación
+    # ------------------------------------------------------------------ #
+
+    def _run_installations(self, items: List[Dict], pool: ThreadPoolExecutor):
+        """
+        Ejecuta las instalaciones: un comando por gestor para npm y pip (los
+        gestores globales no admiten instalaciones simultáneas), pulls de Docker
+        en paralelo, y remotos y locales sin comandos externos.
+        """
+        groups: Dict[str, List[Dict]] = {}
+        futures = []
+        for item in items:
+            self._set(item, STATUS_INSTALLING, "Instalando")
+            if item["method"] == "package":
+                registry_type = item["package"].get("registryType", "")
+                if registry_type == "oci":
+                    futures.append(pool.submit(self._install_package_group, "oci", [item]))
+                else:
+                    groups.setdefault(registry_type, []).append(item)
+            elif item["method"] == "local":
+                self._prepare_local(item)
+            else:
+                self._set(item, STATUS_INSTALLING, "Listo para registrar")
+        for registry_type, group in groups.items():
+            futures.append(pool.submit(self._install_package_group, registry_type, group))
+        for future in futures:
+            future.result()
+
+    def _install_package_group(self, registry_type: str, group: List[Dict]):
+        specs = [(item["package"].get("identifier", ""), item["package"].get("version", "")) for item in group]
+        ok, output = self._run_command(self.gallery_manager.package_install_command(registry_type, specs))
+        if ok:
+            for item in group:
+                self._package_installed(item, registry_type)
+            return
+        if len(group) == 1:
+            self._set(group[0], STATUS_FAILED, f"Error en instalación: {output}")
+            return
+        # El comando conjunto falló: instalar uno a uno para saber cuál falla
+        self.logger.warning(f"Instalación conjunta de {registry_type} falló, reintentando por separado")
+        for item in group:
+            self._install_package_group(registry_type, [item])
+
+    def _package_installed(self, item: Dict, registry_type: str):
+        package = item["package"]
+        identifier = package.get("identifier", "")
+        item["install_details"] = {
+            "install_method": "package",
+            "registry_type": registry_type,
+            "identifier": identifier,
+            "package_version": package.get("version", ""),
+            "transport": package.get("transport", {}),
+            "environment_variables": package.get("environmentVariables", [])
+        }
+        previous_details = (item["previous"] or {}).get("install_details", {})
+        if (previous_details.get("registry_type") == registry_type
+                and previous_details.get("identifier") == identifier and registry_type != "oci"):
+            # Actualización: revertir es volver a instalar la versión anterior
+            item["rollback_command"] = self.gallery_manager.package_install_command(
+                registry_type, [(identifier, previous_details.get("package_version", ""))])
+        elif not item["previous"]:
+            item["rollback_command"] = self.gallery_manager.package_uninstall_command(registry_type, identifier)
+        self._set(item, STATUS_INSTALLING, f"Paquete instalado vía {registry_type}")
+
+    def _prepare_local(self, item: Dict):
+        try:
+            ok, record, message = self.gallery_manager.prepare_local_installation(item["server"])
+        except Exception as e:
+            ok, record, message = False, None, f"Error configurando servidor local: {e}"
+        if ok:
+            item["record"] = record
+            self._set(item, STATUS_INSTALLING, message)
+        else:
+            self._set(item, STATUS_FAILED, message)
+
+    def _run_command(self, cmd: Optional[List[str]]):
+        if not cmd:
+            return False, "Comando de instalación no soportado"
+        self.logger.info(f"Ejecutando: {' '.join(cmd)}")
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=self.command_timeout)
+        except subprocess.TimeoutExpired:
+            return False, f"La instalación excedió el tiempo límite ({self.command_timeout} s)"
+        except (FileNotFoundError, OSError) as e:
+            return False, str(e)
+        return result.returncode == 0, result.stderr
+
+    # ------------------------------------------------------------------ #
+    # Transacción y rollback
+    # ------------------------------------------------------------------ #
+
+    def _commit(self, items: List[Dict]) -> bool:
+        """Escribe todos los cambios de configuración de una vez; si falla, revierte el lote."""
+        manager = self.gallery_manager
+        installed_store = manager._installed_store()
+        mcp_store = manager._mcp_servers_store()
+        originals = {}
+        written = []
+        manifests = []  # (destino, contenido anterior o None) de los manifests ya movidos
+        try:
+            # Ambos archivos se leen una vez y se escriben una vez, bajo sus locks
+            with installed_store.lock, mcp_store.lock:
+                for store in (installed_store, mcp_store):
+                    originals[store] = store.read() if store.exists() else None
+
+                installed = installed_store.read(default={})
+                mcp_config = mcp_store.read()
+                for item in items:
+                    record = item["record"] or manager.installation_record(item["server"], item["install_details"])
+                    installed[item["server_id"]] = record
+                    if mcp_config is not None:
+                        mcp_servers = mcp_config.setdefault("mcpServers", {})
+                        if item["server_id"] not in mcp_servers:
+                            entry = manager.mcp_config_entry(item["server_id"], record, mcp_servers)
+                            if entry is not None:
+                                mcp_servers[item["server_id"]] = entry
+
+                written.append(installed_store)
+                installed_store.write(installed)
+                if mcp_config is not None:
+                    written.append(mcp_store)
+                    mcp_store.write(mcp_config)
+
+                # Los manifests se instalan solo con la configuración ya escrita; el anterior se
+                # conserva en memoria para restaurarlo si falla alguno
+                for item in items:
+                    if item["staged_manifest"] is not None:
+                        destination = manager.mcps_dir / item["server_id"] / "manifest.json"
+                        previous = destination.read_bytes() if destination.exists() else None
+                        item["staged_manifest"].commit(destination)
+                        item["staged_manifest"] = None
+                        manifests.append((destination, previous))
+        except Exception as e:
+            self.logger.error(f"Error confirmando el lote de instalación, revirtiendo: {e}")
+            for destination, previous in manifests:
+                try:
+                    if previous is not None:
+                        destination.write_bytes(previous)
+                    else:
+                        destination.unlink()
+                except OSError as restore_error:
+                    self.logger.error(f"No se pudo restaurar {destination}: {restore_error}")
+            for store in written:
+                try:
+                    if originals[store] is not None:
+                        store.write(originals[store])
+                    elif store.path.exists():
+                        store.path.unlink()
+                except OSError as restore_error:
+                    self.logger.error(f"No se pudo restaurar {store.path.name}: {restore_error}")
+            self._rollback(items, f"Revertido: error guardando la configuración ({e})")
+            return False
+        finally:
+            manager.status_index.invalidate()
+
+        for item in items:
+            self._set(item, STATUS_INSTALLED, f"Servidor {item['server_id']} instalado")
+        self.logger.info(f"Lote de instalación confirmado: {len(items)} servidores")
+        return True
+
+    def _rollback(self, items: List[Dict], message: str):
+        """Deshace los efectos de los elementos ya instalados del lote."""
+        self._discard_staged(items)
+        for item in items:
+            if item["rollback_command"]:
+                ok, output = self._run_command(item["rollback_command"])
+                if not ok:
+                    self.logger.error(f"Rollback de {item['server_id']} incompleto: {output}")
+            self._set(item, STATUS_ROLLED_BACK, message)
+
+    def _discard_staged(self, items: List[Dict]):
+        """Elimina de staging los manifests verificados que no se llegaron a instalar."""
+        for item in items:
+            if item["staged_manifest"] is not None:
+                item["staged_manifest"].discard()
+                item["staged_manifest"] = None
+
+    def _set(self, item: Dict, status: str, message: str):
+        item["status"], item["message"] = status, message
+        self._report(item)
+
+    def _report(self, item: Dict):
+        if not self.progress_callback:
+            return
+        completed = sum(1 for i in self._items
+                        if i["status"] in (STATUS_INSTALLED, STATUS_SKIPPED, STATUS_FAILED, STATUS_ROLLED_BACK))
+        try:
+            self.progress_callback({
+                "server_id": item["server_id"],
+                "status": item["status"],
+                "message": item["message"],
+                "completed": completed,
+                "total": len(self._items),
+            })
+        except Exception as e:
+            self.logger.error(f"Error en callback de progreso del lote: {e}")
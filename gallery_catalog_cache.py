@@ -0,0 +1,206 @@
+"""
+Caché en disco del catálogo de la galería MCP (stale-while-revalidate)
+Guarda el último catálogo combinado comprimido para mostrarlo al instante al
+abrir la galería, y lo revalida en segundo plano con peticiones condicionales
+(ETag / If-Modified-Since). Varias aperturas simultáneas comparten una única
+descarga.
+"""
+
+import gzip
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+CATALOG_CACHE_FILE = "gallery_catalog.json.gz"
+CATALOG_CACHE_VERSION = 1
+
+# Revalidaciones en curso por archivo de caché (compartidas entre instancias)
+_inflight: Dict[str, "_Revalidation"] = {}
+_inflight_lock = threading.Lock()
+
+
+def server_key(server: Dict) -> str:
+    """Clave estable de un servidor del catálogo."""
+    return server.get("id") or server.get("name", "")
+
+
+def diff_catalogs(old_servers: List[Dict], new_servers: List[Dict]) -> Dict:
+    """
+    Calcula las diferencias entre dos catálogos.
+
+    Returns:
+        Diccionario con `added` (servidores), `changed` (servidores), `removed` (claves)
+        y `new_order` (claves del catálogo nuevo en orden)
+    """
+    old_by_key = {server_key(s): s for s in old_servers}
+    new_keys = []
+    added, changed = [], []
+    for server in new_servers:
+        key = server_key(server)
+        new_keys.append(key)
+        previous = old_by_key.get(key)
+        if previous is None:
+            added.append(server)
+        elif previous != server:
+            changed.append(server)
+    new_key_set = set(new_keys)
+    removed = [key for key in old_by_key if key not in new_key_set]
+    return {"added": added, "changed": changed, "removed": removed, "new_order": new_keys}
+
+
+def catalog_diff_is_empty(diff: Dict) -> bool:
+    """Indica si un diff no contiene cambios."""
+    return not (diff.get("added") or diff.get("changed") or diff.get("removed"))
+
+
+def apply_catalog_diff(servers: List[Dict], diff: Dict) -> List[Dict]:
+    """
+    Aplica un diff a la lista visible conservando los objetos no modificados.
+
+    Args:
+        servers: Lista actual de servidores
+        diff: Resultado de `diff_catalogs`
+
+    Returns:
+        Nueva lista en el orden del catálogo actualizado
+    """
+    by_key = {server_key(s): s for s in servers}
+    for key in diff.get("removed", []):
+        by_key.pop(key, None)
+    for server in diff.get("added", []) + diff.get("changed", []):
+        by_key[server_key(server)] = server
+    order = diff.get("new_order") or list(by_key)
+    return [by_key[key] for key in order if key in by_key]
+
+
+class _Revalidation:
+    """Revalidación en curso con los callbacks que esperan su resultado."""
+
+    def __init__(self):
+        self.callbacks: List[Callable] = []
+
+
+class GalleryCatalogCache:
+    """
+    Snapshot comprimido del catálogo de la galería con revalidación en segundo plano.
+    """
+
+    def __init__(self, gallery_manager, cache_dir: Optional[str] = None):
+        """
+        Args:
+            gallery_manager: Instancia de MCPGalleryManager (provee `fetch_catalog`)
+            cache_dir: Directorio del snapshot (por defecto el base_dir del gestor)
+        """
+        self.gallery_manager = gallery_manager
+        self.logger = gallery_manager.logger
+        base_dir = Path(cache_dir) if cache_dir else Path(gallery_manager.base_dir)
+        self.cache_file = base_dir / CATALOG_CACHE_FILE
+        self._snapshot: Optional[Dict] = None
+        self._snapshot_mtime: Optional[float] = None
+
+    def load_snapshot(self) -> Optional[Dict]:
+        """
+        Carga el último catálogo guardado (sin acceder a la red).
+
+        Returns:
+            Snapshot con `servers`, `official_names`, `etag`, `last_modified` y `saved_at`,
+            o None si no hay caché válida
+        """
+        try:
+            mtime = os.path.getmtime(self.cache_file)
+        except OSError:
+            return None
+        if self._snapshot is not None and self._snapshot_mtime == mtime:
+            return self._snapshot
+        try:
+            with gzip.open(self.cache_file, "rt", encoding="utf-8") as f:
+                snapshot = json.load(f)
+            if snapshot.get("version") != CATALOG_CACHE_VERSION or not isinstance(snapshot.get("servers"), list):
+                return None
+        except (OSError, EOFError, json.JSONDecodeError) as e:
+            self.logger.warning(f"Caché del catálogo ilegible, se ignorará: {e}")
+            return None
+        self._snapshot, self._snapshot_mtime = snapshot, mtime
+        return snapshot
+
+    def save_snapshot(self, catalog: Dict):
+        """Guarda el catálogo de forma atómica (JSON compacto + gzip)."""
+        snapshot = {
+            "version": CATALOG_CACHE_VERSION,
+            "saved_at": time.time(),
+            "etag": catalog.get("etag"),
+            "last_modified": catalog.get("last_modified"),
+            "official_names": catalog.get("official_names", []),
+            "servers": catalog.get("servers", []),
+        }
+        tmp_file = self.cache_file.with_name(self.cache_file.name + ".tmp")
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            with gzip.open(tmp_file, "wt", encoding="utf-8", compresslevel=6) as f:
+                json.dump(snapshot, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp_file, self.cache_file)
+            self._snapshot, self._snapshot_mtime = snapshot, os.path.getmtime(self.cache_file)
+        except OSError as e:
+            self.logger.error(f"Error guardando la caché del catálogo: {e}")
+
+    def revalidate(self, on_complete: Callable[[Dict, List[Dict], Optional[Exception]], None]) -> bool:
+        """
+        Revalida el catálogo en segundo plano.
+
+        Si ya hay una revalidación en curso para este archivo de caché, el callback
+        se suma a ella en lugar de lanzar otra descarga.
+
+        Args:
+            on_complete: Recibe (diff respecto al snapshot, catálogo nuevo, error o None).
+                Se invoca desde el hilo de fondo.
+
+        Returns:
+            True si se lanzó una descarga nueva, False si se reutilizó una en curso
+        """
+        key = str(self.cache_file)
+        with _inflight_lock:
+            flight = _inflight.get(key)
+            if flight is not None:
+                flight.callbacks.append(on_complete)
+                return False
+            flight = _Revalidation()
+            flight.callbacks.append(on_complete)
+            _inflight[key] = flight
+
+        threading.Thread(target=self._run_revalidation, args=(key, flight), daemon=True).start()
+        return True
+
+    def _run_revalidation(self, key: str, flight: _Revalidation):
+        diff, servers, error = {}, [], None
+        try:
+            snapshot = self.load_snapshot() or {}
+            old_servers = snapshot.get("servers", [])
+            official_names = set(snapshot.get("official_names", []))
+            catalog = self.gallery_manager.fetch_catalog(
+                etag=snapshot.get("etag"),
+                last_modified=snapshot.get("last_modified"),
+                cached_official=[s for s in old_servers if s.get("name") in official_names],
+            )
+            servers = catalog["servers"]
+            diff = diff_catalogs(old_servers, servers)
+            if not catalog_diff_is_empty(diff) or catalog.get("etag") != snapshot.get("etag") or not snapshot:
+                self.save_snapshot(catalog)
+            self.logger.info(
+                f"Catálogo revalidado: +{len(diff['added'])} ~{len(diff['changed'])} -{len(diff['removed'])}"
+            )
+        except Exception as e:
+            error = e
+            self.logger.error(f"Error revalidando el catálogo de la galería: {e}")
+        finally:
+            with _inflight_lock:
+                _inflight.pop(key, None)
+                callbacks = list(flight.callbacks)
+
+        for callback in callbacks:
+            try:
+                callback(diff, servers, error)
+            except Exception as e:
+                self.logger.error(f"Error en callback de revalidación del catálogo: {e}")
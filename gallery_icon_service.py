@@ -0,0 +1,252 @@
+"""
+Servicio de íconos de la galería MCP
+Descarga los íconos de los servidores con un pool pequeño de hilos sobre una
+sesión HTTP compartida, agrupa las peticiones repetidas de la misma URL y guarda
+las miniaturas ya redimensionadas en una caché en disco direccionada por
+contenido (con límite de tamaño LRU), de modo que entre sesiones no se vuelve a
+descargar ni a redimensionar nada.
+"""
+
+import hashlib
+import io
+import os
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from urllib.parse import unquote
+
+import requests
+
+try:
+    from PIL import Image
+except ImportError:  # Sin Pillow solo se muestran los íconos emoji
+    Image = None
+
+INLINE_ICON_PREFIX = "data:text/plain"
+ICON_CACHE_DIR = "icon_cache"
+
+
+def inline_icon_text(icon_url: str) -> Optional[str]:
+    """
+    Devuelve el texto (emoji) de un ícono en data URL de texto, o None si es una URL remota.
+    """
+    if not icon_url or not icon_url.startswith(INLINE_ICON_PREFIX):
+        return None
+    _, _, text = icon_url.partition(",")
+    return unquote(text) or None
+
+
+def _url_key(url: str) -> str:
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()[:32]
+
+
+class IconService:
+    """
+    Carga de miniaturas de íconos con pool acotado, de-duplicación y caché en disco.
+
+    Los callbacks se invocan desde los hilos del pool con `(url, ruta_png | None)`;
+    quien los reciba debe pasar al hilo de la interfaz para crear el PhotoImage.
+    """
+
+    def __init__(self, cache_dir, session: Optional[requests.Session] = None, max_workers: int = 3,
+                 thumb_size: int = 40, max_cache_bytes: int = 20 * 1024 * 1024,
+                 max_download_bytes: int = 2 * 1024 * 1024, timeout: float = 5, logger=None):
+        """
+        Args:
+            cache_dir: Directorio base de la caché de miniaturas
+            session: Sesión HTTP compartida (se crea una si no se indica)
+            max_workers: Hilos de descarga
+            thumb_size: Lado de la miniatura en píxeles
+            max_cache_bytes: Tamaño máximo de la caché en disco
+            max_download_bytes: Tamaño máximo aceptado para una imagen original
+            timeout: Timeout de cada descarga en segundos
+            logger: Logger opcional
+        """
+        self.cache_dir = Path(cache_dir)
+        self.blobs_dir = self.cache_dir / "blobs"
+        self.refs_dir = self.cache_dir / "refs"
+        self.blobs_dir.mkdir(parents=True, exist_ok=True)
+        self.refs_dir.mkdir(parents=True, exist_ok=True)
+
+        self.session = session or requests.Session()
+        self.thumb_size = thumb_size
+        self.max_cache_bytes = max_cache_bytes
+        self.max_download_bytes = max_download_bytes
+        self.timeout = timeout
+        self.logger = logger
+
+        self._lock = threading.Condition()
+        self._pending: deque = deque()  # URLs en espera (la más reciente se atiende primero)
+        self._waiters: Dict[str, List[Callable]] = {}  # URL -> callbacks (pendiente o en curso)
+        self._failed = set()  # URLs que fallaron en esta sesión
+        self._closed = False
+        self._cache_bytes = sum(f.stat().st_size for f in self.blobs_dir.glob("*.png"))
+
+        self._workers = [threading.Thread(target=self._worker, daemon=True, name=f"icon-worker-{i}")
+                         for i in range(max_workers)]
+        for worker in self._workers:
+            worker.start()
+
+    # ------------------------------------------------------------------ #
+    # API pública
+    # ------------------------------------------------------------------ #
+
+    def cached_path(self, url: str) -> Optional[Path]:
+        """Ruta de la miniatura en caché para una URL (sin acceder a la red), o None."""
+        try:
+            digest = (self.refs_dir / _url_key(url)).read_text(encoding="ascii").strip()
+        except OSError:
+            return None
+        blob = self.blobs_dir / f"{digest}.png"
+        try:
+            os.utime(blob)  # marca de uso para el LRU
+        except OSError:
+            return None
+        return blob
+
+    def request(self, url: str, callback: Callable[[str, Optional[Path]], None]) -> bool:
+        """
+        Solicita la miniatura de una URL.
+
+        Si ya está en caché el callback se invoca inmediatamente en este hilo; si ya
+        hay una descarga de esa URL pendiente o en curso, el callback se suma a ella.
+
+        Returns:
+            True si el callback se invocó de forma inmediata
+        """
+        path = self.cached_path(url)
+        if path is not None or url in self._failed:
+            callback(url, path)
+            return True
+        with self._lock:
+            waiters = self._waiters.get(url)
+            if waiters is not None:
+                waiters.append(callback)
+                if url in self._pending:
+                    # Volver a priorizarla: la ha pedido una tarjeta visible ahora
+                    self._pending.remove(url)
+                    self._pending.append(url)
+                return False
+            self._waiters[url] = [callback]
+            self._pending.append(url)
+            self._lock.notify()
+        return False
+
+    def cancel(self, url: str, callback: Callable) -> None:
+        """
+        Retira un callback (p. ej. la tarjeta se ha reciclado). Si nadie más espera
+        la URL y su descarga aún no empezó, se descarta.
+        """
+        with self._lock:
+            waiters = self._waiters.get(url)
+            if not waiters or callback not in waiters:
+                return
+            waiters.remove(callback)
+            if not waiters and url in self._pending:
+                self._pending.remove(url)
+                del self._waiters[url]
+
+    def close(self):
+        """Detiene los hilos del pool (las descargas en curso terminan)."""
+        with self._lock:
+            self._closed = True
+            self._pending.clear()
+            self._lock.notify_all()
+
+    # ------------------------------------------------------------------ #
+    # Pool de descarga
+    # ------------------------------------------------------------------ #
+
+    def _worker(self):
+        while True:
+            with self._lock:
+                while not self._pending and not self._closed:
+                    self._lock.wait()
+                if self._closed:
+                    return
+                url = self._pending.pop()
+
+            path = None
+            try:
+                path = self._fetch_thumbnail(url)
+            except Exception as e:
+                self._failed.add(url)
+                if self.logger:
+                    self.logger.warning(f"No se pudo cargar el ícono {url}: {e}")
+
+            with self._lock:
+                callbacks = self._waiters.pop(url, [])
+            for callback in callbacks:
+                try:
+                    callback(url, path)
+                except Exception as e:
+                    if self.logger:
+                        self.logger.error(f"Error en callback de ícono: {e}")
+
+    def _fetch_thumbnail(self, url: str) -> Path:
+        if Image is None:
+            raise RuntimeError("Pillow no está disponible")
+        with self.session.get(url, timeout=self.timeout, stream=True) as response:
+            response.raise_for_status()
+            buffer = io.BytesIO()
+            for chunk in response.iter_content(chunk_size=16384):
+                buffer.write(chunk)
+                if buffer.tell() > self.max_download_bytes:
+                    raise ValueError(f"imagen mayor de {self.max_download_bytes} bytes")
+
+        buffer.seek(0)
+        with Image.open(buffer) as image:
+            thumbnail = image.convert("RGBA").resize((self.thumb_size, self.thumb_size), Image.Resampling.LANCZOS)
+        encoded = io.BytesIO()
+        thumbnail.save(encoded, format="PNG", optimize=True)
+        return self._store(url, encoded.getvalue())
+
+    # ------------------------------------------------------------------ #
+    # Caché en disco
+    # ------------------------------------------------------------------ #
+
+    def _store(self, url: str, data: bytes) -> Path:
+        """Guarda una miniatura por su hash de contenido y la asocia a la URL."""
+        digest = hashlib.sha256(data).hexdigest()
+        blob = self.blobs_dir / f"{digest}.png"
+        if not blob.exists():
+            self._atomic_write(blob, data)
+            with self._lock:
+                self._cache_bytes += len(data)
+        self._atomic_write(self.refs_dir / _url_key(url), digest.encode("ascii"))
+        if self._cache_bytes > self.max_cache_bytes:
+            self._evict(keep=blob)
+        return blob
+
+    def _atomic_write(self, path: Path, data: bytes):
+        tmp = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def _evict(self, keep: Path):
+        """Elimina las miniaturas usadas menos recientemente hasta bajar del límite."""
+        with self._lock:
+            blobs = []
+            for blob in self.blobs_dir.glob("*.png"):
+                try:
+                    stat = blob.stat()
+                except OSError:
+                    continue
+                blobs.append((stat.st_mtime, stat.st_size, blob))
+            total = sum(size for _, size, _ in blobs)
+            # Objetivo por debajo del límite para no desalojar en cada descarga
+            target = int(self.max_cache_bytes * 0.8)
+            for _, size, blob in sorted(blobs, key=lambda entry: entry[0]):
+                if total <= target:
+                    break
+                if blob == keep:
+                    continue
+                try:
+                    blob.unlink()
+                    total -= size
+                except OSError:
+                    pass
+            self._cache_bytes = total
+        # Las referencias a miniaturas eliminadas se descartan al leerlas (cached_path)
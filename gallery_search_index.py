@@ -0,0 +1,259 @@
+"""
+Índice de búsqueda del catálogo de servidores MCP
+Índice invertido compartido por la ventana de la galería y la API de galería:
+se construye una vez por versión del catálogo y resuelve cada consulta con
+búsqueda exacta, por prefijo, por subcadena y tolerante a erratas (trigramas),
+ordenando los resultados con una puntuación tipo BM25 y ofreciendo facetas
+por tag.
+"""
+
+import heapq
+import math
+import re
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+_TOKEN_RE = re.compile(r"[^\W_]+")
+
+# Peso de cada campo en la puntuación (un término en el nombre vale más que en la descripción)
+FIELD_WEIGHTS = {"name": 3.0, "tags": 2.0, "id": 2.0, "description": 1.0}
+
+# Peso relativo según cómo se encontró el término de la consulta
+MATCH_WEIGHTS = {"exact": 1.0, "prefix": 0.8, "infix": 0.6, "fuzzy": 0.5}
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    """Divide un texto en términos en minúsculas (letras y dígitos)."""
+    return _TOKEN_RE.findall(text.lower()) if text else []
+
+
+def trigrams(term: str) -> Set[str]:
+    """Trigramas de un término con relleno en los extremos."""
+    padded = f"${term}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def split_tag_filters(query: str) -> Tuple[str, List[str]]:
+    """
+    Separa los filtros `tag:xxx` del texto libre de una consulta.
+
+    Returns:
+        Tupla (texto libre, lista de tags)
+    """
+    words, tags = [], []
+    for word in query.split():
+        if word.lower().startswith("tag:") and len(word) > 4:
+            tags.append(word[4:].lower())
+        else:
+            words.append(word)
+    return " ".join(words), tags
+
+
+def _within_distance(a: str, b: str, max_distance: int) -> bool:
+    """Distancia de Levenshtein acotada: True si a y b difieren en max_distance ediciones o menos."""
+    if abs(len(a) - len(b)) > max_distance:
+        return False
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if min(current) > max_distance:
+            return False
+        previous = current
+    return previous[-1] <= max_distance
+
+
+class GallerySearchIndex:
+    """
+    Índice invertido inmutable sobre una versión del catálogo.
+
+    Cada servidor se indexa por id, nombre, descripción y tags. Las consultas
+    exigen que todos sus términos coincidan (de forma exacta, por prefijo, por
+    subcadena o con una errata) y los resultados se ordenan por puntuación BM25
+    ponderada por campo.
+    """
+
+    def __init__(self, servers: Iterable[Dict], max_expansions: int = 64):
+        """
+        Args:
+            servers: Servidores del catálogo (dicts con id, name, description y tags)
+            max_expansions: Máximo de términos del vocabulario en que se expande cada
+                término de la consulta (prefijo, subcadena o errata)
+        """
+        self.servers: List[Dict] = list(servers)
+        self.max_expansions = max_expansions
+
+        postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        self._tag_postings: Dict[str, Set[int]] = defaultdict(set)
+        self._doc_tags: List[List[str]] = []
+        lengths = []
+        for doc, server in enumerate(self.servers):
+            length = 0.0
+            for field, weight in FIELD_WEIGHTS.items():
+                value = server.get(field) or ""
+                terms = tokenize(" ".join(value) if isinstance(value, list) else str(value))
+                length += weight * len(terms)
+                for term in terms:
+                    doc_postings = postings[term]
+                    doc_postings[doc] = doc_postings.get(doc, 0.0) + weight
+            tags = [str(tag).lower() for tag in server.get("tags", []) or []]
+            self._doc_tags.append(tags)
+            for tag in tags:
+                self._tag_postings[tag].add(doc)
+            lengths.append(length)
+
+        self._postings = dict(postings)
+        self._vocabulary = sorted(self._postings)
+        self._trigrams: Dict[str, Set[str]] = defaultdict(set)
+        for term in self._vocabulary:
+            for gram in trigrams(term):
+                self._trigrams[gram].add(term)
+
+        count = len(self.servers)
+        average = (sum(lengths) / count) if count else 0.0
+        # La contribución BM25 de cada (término, documento) se precalcula al construir
+        for term, docs in self._postings.items():
+            idf = math.log(1 + (count - len(docs) + 0.5) / (len(docs) + 0.5))
+            for doc, tf in docs.items():
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * (lengths[doc] / average if average else 0.0))
+                docs[doc] = idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+    def __len__(self) -> int:
+        return len(self.servers)
+
+    def expand_term(self, token: str) -> Dict[str, float]:
+        """
+        Términos del vocabulario que corresponden a un término de la consulta.
+
+        Returns:
+            Diccionario término -> peso de la coincidencia (exacta > prefijo > subcadena > errata)
+        """
+        expansions: Dict[str, float] = {}
+        if token in self._postings:
+            expansions[token] = MATCH_WEIGHTS["exact"]
+
+        # Prefijo: rango contiguo del vocabulario ordenado
+        prefixed = []
+        start = bisect_left(self._vocabulary, token)
+        for term in self._vocabulary[start:]:
+            if not term.startswith(token):
+                break
+            if term != token:
+                prefixed.append(term)
+        for term in self._most_frequent(prefixed):
+            expansions.setdefault(term, MATCH_WEIGHTS["prefix"])
+
+        if len(token) >= 3:
+            grams = trigrams(token)
+            # Subcadena: los trigramas interiores del término deben aparecer todos
+            inner = [token[i:i + 3] for i in range(len(token) - 2)]
+            candidates = set.intersection(*(self._trigrams.get(g, set()) for g in inner))
+            infix = [term for term in candidates if token in term and term not in expansions]
+            for term in self._most_frequent(infix):
+                expansions.setdefault(term, MATCH_WEIGHTS["infix"])
+
+            # Errata: candidatos que comparten trigramas, verificados por distancia de edición
+            if not expansions:
+                shared = Counter()
+                for gram in grams:
+                    shared.update(self._trigrams.get(gram, ()))
+                max_distance = 1 if len(token) <= 5 else 2
+                minimum_shared = max(1, len(grams) - 3 * max_distance)
+                fuzzy = [term for term, n in shared.most_common() if n >= minimum_shared
+                         and _within_distance(token, term, max_distance)]
+                for term in self._most_frequent(fuzzy):
+                    expansions.setdefault(term, MATCH_WEIGHTS["fuzzy"])
+        return expansions
+
+    def _most_frequent(self, terms: List[str]) -> List[str]:
+        if len(terms) <= self.max_expansions:
+            return terms
+        return sorted(terms, key=lambda term: len(self._postings[term]), reverse=True)[:self.max_expansions]
+
+    def _tag_filter(self, tags: Optional[Iterable[str]]) -> Optional[Set[int]]:
+        if not tags:
+            return None
+        docs: Set[int] = set()
+        for tag in tags:
+            docs |= self._tag_postings.get(tag.strip().lower(), set())
+        return docs
+
+    def search_ids(self, query: str = "", tags: Optional[Iterable[str]] = None,
+                   limit: Optional[int] = None) -> List[Tuple[int, float]]:
+        """
+        Resuelve una consulta sobre el índice.
+
+        Args:
+            query: Texto libre
+            tags: Tags a filtrar (basta con que el servidor tenga uno de ellos)
+            limit: Número máximo de resultados
+
+        Returns:
+            Lista de (posición del servidor, puntuación) ordenada por relevancia y,
+            a igual puntuación, por orden del catálogo (también sin texto libre).
+        """
+        allowed = self._tag_filter(tags)
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            docs = range(len(self.servers)) if allowed is None else sorted(allowed)
+            hits = [(doc, 0.0) for doc in docs]
+            return hits[:limit] if limit is not None else hits
+
+        scores: Optional[Dict[int, float]] = None
+        # Empezar por el término más selectivo para que la intersección sea pequeña
+        expanded = sorted((self.expand_term(token) for token in tokens),
+                          key=lambda terms: sum(len(self._postings[t]) for t in terms))
+        for terms in expanded:
+            token_scores: Dict[int, float] = {}
+            for term, match_weight in terms.items():
+                postings = self._postings[term]
+                if scores is None:
+                    candidates = postings.items()
+                elif len(scores) < len(postings):
+                    # Recorrer solo los documentos que siguen siendo candidatos
+                    candidates = [(doc, postings[doc]) for doc in scores if doc in postings]
+                else:
+                    candidates = [(doc, score) for doc, score in postings.items() if doc in scores]
+                if allowed is not None:
+                    candidates = [(doc, score) for doc, score in candidates if doc in allowed]
+                if not token_scores:
+                    token_scores = {doc: score * match_weight for doc, score in candidates}
+                    continue
+                for doc, score in candidates:
+                    score *= match_weight
+                    if score > token_scores.get(doc, 0.0):
+                        token_scores[doc] = score
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {doc: scores[doc] + score for doc, score in token_scores.items()}
+            if not scores:
+                return []
+
+        # A igual puntuación decide la posición en el catálogo (los postings no la respetan)
+        if limit is not None:
+            return heapq.nsmallest(limit, scores.items(), key=lambda hit: (-hit[1], hit[0]))
+        return sorted(scores.items(), key=lambda hit: (-hit[1], hit[0]))
+
+    def search(self, query: str = "", tags: Optional[Iterable[str]] = None,
+               limit: Optional[int] = None) -> List[Dict]:
+        """Como `search_ids`, pero devuelve los servidores."""
+        return [self.servers[doc] for doc, _ in self.search_ids(query, tags, limit)]
+
+    def facets(self, hits: Optional[Iterable[Tuple[int, float]]] = None) -> Dict[str, int]:
+        """
+        Recuento de tags de un conjunto de resultados (o de todo el catálogo).
+
+        Returns:
+            Diccionario tag -> número de servidores, de mayor a menor
+        """
+        if hits is None:
+            counts = {tag: len(docs) for tag, docs in self._tag_postings.items()}
+        else:
+            counts = Counter(tag for doc, _ in hits for tag in self._doc_tags[doc])
+        return dict(sorted(counts.items(), key=lambda item: (-item[1], item[0])))
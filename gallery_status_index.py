@@ -0,0 +1,162 @@
+"""
+Índice precalculado del estado de instalación de los servidores de la galería
+Combina installed_servers.json y mcp_servers.json en estructuras en memoria para
+que la consulta del estado de cada tarjeta sea O(1) en lugar de releer y parsear
+ambos archivos por tarjeta. Se reconstruye cuando cambia el mtime de alguno de
+los archivos o cuando el gestor lo invalida tras escribirlos.
+"""
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Set, Tuple
+
+from config_store import get_store
+
+# IDs conocidos de la galería que aparecen con otro nombre en mcp_servers.json
+ID_MAPPINGS = {
+    "weather-server-local": "weather-server-python",
+    "file-manager": "filesystem",  # file-manager de galería = filesystem en config
+}
+
+
+def normalize_server_id(server_id: str) -> str:
+    """Forma normalizada usada en la coincidencia por patrón (sin guiones, minúsculas)."""
+    return server_id.replace("-", "").lower()
+
+
+def _substrings(text: str) -> Set[str]:
+    """Todas las subcadenas no vacías de un texto."""
+    return {text[i:j] for i in range(len(text)) for j in range(i + 1, len(text) + 1)}
+
+
+def _file_signature(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class InstallationStatusIndex:
+    """
+    Estado de instalación consultable en O(1) por ID de servidor.
+
+    Conserva la semántica de `MCPGalleryManager.get_server_status`: primero el
+    registro de la galería (con comparación de versión), después mcp_servers.json
+    por ID directo, por alias conocido (en ambos sentidos) y por patrón de subcadena.
+    """
+
+    def __init__(self, installed_servers_file, mcp_servers_file, logger=None, max_staleness: float = 0.5):
+        """
+        Args:
+            installed_servers_file: Ruta de installed_servers.json
+            mcp_servers_file: Ruta de mcp_servers.json
+            logger: Logger opcional
+            max_staleness: Segundos entre comprobaciones del mtime de los archivos
+        """
+        self.installed_servers_file = Path(installed_servers_file)
+        self.mcp_servers_file = Path(mcp_servers_file)
+        self.logger = logger
+        self.max_staleness = max_staleness
+
+        self._lock = threading.Lock()
+        self._signatures = None
+        self._checked_at = 0.0
+        self._installed_versions: Dict[str, str] = {}
+        self._configured: Set[str] = set()
+        self._configured_normalized: Set[str] = set()
+        self._configured_substrings: Set[str] = set()
+        self._configured_lengths: Set[int] = set()
+        self._cache: Dict[Tuple[str, str], str] = {}
+
+    def invalidate(self):
+        """Fuerza la reconstrucción en la próxima consulta (tras escribir alguno de los archivos)."""
+        with self._lock:
+            self._signatures = None
+
+    def status(self, server_info: Dict) -> str:
+        """
+        Obtiene el estado de un servidor de la galería.
+
+        Args:
+            server_info: Información del servidor desde la API
+
+        Returns:
+            Estado del servidor: 'not_installed', 'installed', 'update_available'
+        """
+        server_id = server_info.get("id") or server_info.get("name", "unknown_server")
+        current_version = server_info.get("version", "1.0.0")
+        key = (server_id, current_version)
+        with self._lock:
+            self._refresh_if_stale()
+            cached = self._cache.get(key)
+            if cached is None:
+                cached = self._cache[key] = self._compute(server_id, current_version)
+            return cached
+
+    def _compute(self, server_id: str, current_version: str) -> str:
+        installed_version = self._installed_versions.get(server_id)
+        if installed_version is not None:
+            # Comparación simple de versiones
+            return "update_available" if installed_version != current_version else "installed"
+
+        if server_id in self._configured:
+            return "installed"
+
+        # Coincidencia por patrón: el ID normalizado contiene o está contenido en un ID configurado
+        if not self._configured_normalized:
+            return "not_installed"
+        normalized = normalize_server_id(server_id)
+        if not normalized or "" in self._configured_normalized or normalized in self._configured_substrings:
+            return "installed"
+        for length in self._configured_lengths:
+            for start in range(len(normalized) - length + 1):
+                if normalized[start:start + length] in self._configured_normalized:
+                    return "installed"
+        return "not_installed"
+
+    def _refresh_if_stale(self):
+        now = time.monotonic()
+        if self._signatures is not None and now - self._checked_at < self.max_staleness:
+            return
+        self._checked_at = now
+        signatures = (_file_signature(self.installed_servers_file), _file_signature(self.mcp_servers_file))
+        if signatures != self._signatures:
+            self._rebuild()
+            self._signatures = signatures
+
+    def _rebuild(self):
+        installed = self._load_json(self.installed_servers_file)
+        self._installed_versions = {
+            server_id: (entry.get("version", "") if isinstance(entry, dict) else "")
+            for server_id, entry in installed.items()
+        }
+
+        mcp_servers = self._load_json(self.mcp_servers_file).get("mcpServers", {})
+        configured = set(mcp_servers)
+        # Alias conocidos en ambos sentidos (galería -> config y config -> galería)
+        for gallery_id, config_id in ID_MAPPINGS.items():
+            if config_id in mcp_servers:
+                configured.add(gallery_id)
+            if gallery_id in mcp_servers:
+                configured.add(config_id)
+        self._configured = configured
+
+        self._configured_normalized = {mcp_id.lower() for mcp_id in mcp_servers}
+        self._configured_lengths = {len(mcp_id) for mcp_id in self._configured_normalized if mcp_id}
+        self._configured_substrings = set()
+        for mcp_id in self._configured_normalized:
+            self._configured_substrings.update(_substrings(mcp_id))
+        self._cache.clear()
+
+    def _load_json(self, path: Path) -> Dict:
+        try:
+            # Copia compartida del almacén (solo lectura): no se vuelve a parsear si ya está en memoria
+            data = get_store(path).read(default={}, copy=False)
+            return data if isinstance(data, dict) else {}
+        except Exception as e:
+            if self.logger:
+                self.logger.error(f"Error leyendo {path.name} para el índice de estado: {e}")
+            return {}
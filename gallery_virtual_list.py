@@ -0,0 +1,68 @@
+"""
+Cálculos de la lista virtual de tarjetas de la galería MCP
+Geometría de filas de altura fija y planificación del reciclado de widgets:
+solo existen tarjetas para las filas visibles (más un margen de overscan) y,
+al hacer scroll, las que salen del viewport se reutilizan para las que entran.
+No depende de Tkinter para poder probarse sin pantalla.
+"""
+
+from typing import Any, Dict, List, Tuple
+
+
+class VirtualListLayout:
+    """Geometría de una lista vertical de filas de altura fija."""
+
+    def __init__(self, row_height: int, overscan: int = 3):
+        """
+        Args:
+            row_height: Altura de cada fila en píxeles (incluye la separación)
+            overscan: Filas extra a cada lado del viewport que se mantienen creadas
+        """
+        if row_height <= 0:
+            raise ValueError("row_height debe ser positivo")
+        self.row_height = row_height
+        self.overscan = max(0, overscan)
+
+    def content_height(self, total: int) -> int:
+        """Altura total del contenido para `total` filas."""
+        return max(0, total) * self.row_height
+
+    def row_top(self, index: int) -> int:
+        """Coordenada y de la fila `index`."""
+        return index * self.row_height
+
+    def visible_range(self, scroll_top: float, viewport_height: float, total: int) -> range:
+        """
+        Filas que deben tener widget para la posición de scroll dada.
+
+        Args:
+            scroll_top: Coordenada y del borde superior del viewport
+            viewport_height: Altura visible en píxeles
+            total: Número de filas de la lista
+
+        Returns:
+            Rango de índices (visibles más overscan), acotado a [0, total)
+        """
+        if total <= 0:
+            return range(0)
+        scroll_top = max(0.0, scroll_top)
+        first = int(scroll_top // self.row_height) - self.overscan
+        last = int((scroll_top + max(viewport_height, 0)) // self.row_height) + 1 + self.overscan
+        return range(max(0, first), min(total, last))
+
+
+def plan_recycling(bound: Dict[int, Any], visible: range) -> Tuple[List[int], List[Any]]:
+    """
+    Decide qué widgets se liberan y qué filas necesitan uno.
+
+    Args:
+        bound: Widgets actualmente asignados, por índice de fila (se modifica:
+            se eliminan las filas que quedan fuera de `visible`)
+        visible: Filas que deben mostrarse
+
+    Returns:
+        Tupla (filas visibles sin widget, widgets liberados para reutilizar)
+    """
+    freed = [bound.pop(index) for index in [i for i in bound if i not in visible]]
+    missing = [index for index in visible if index not in bound]
+    return missing, freed
@@ -1,5 +1,6 @@
 import threading
 from ui_helpers import display_message
+from llm_mcp_handler import mcp_command_stream_complete
 import psutil
 import os
 import subprocess
@@ -206,7 +207,12 @@ class LLMBridge:
             return
         
         messages = [{"role": "system", "content": system_prompt}]
-        if previous_mcp_response_json:
+        if previous_mcp_response_json and '"mcp_batch_results"' in str(previous_mcp_response_json):
+            messages.append({"role": "user", "content": (
+                f"Estas son las respuestas JSON de varias herramientas MCP, en el mismo orden en que se pidieron "
+                f"(cada entrada indica servidor, método y resultado o error). Interprétalas para mí en español "
+                f"conversacional. No intentes ejecutar otro comando MCP ahora. Respuestas MCP JSON:\n{previous_mcp_response_json}" )})
+        elif previous_mcp_response_json:
             messages.append({"role": "user", "content": (
                 f"Esta es una respuesta JSON de un servidor MCP. Interprétala para mí en español conversacional. "
                 f"No intentes ejecutar otro comando MCP ahora. Respuesta MCP JSON:\n{previous_mcp_response_json}" )})
@@ -243,7 +249,8 @@ class LLMBridge:
                         if self.window.winfo_exists():
                             self.window.after(0, callback, {"content": content, "final": False})
                     # Detener si se detecta un comando MCP
-                    if "MCP_COMMAND_JSON:" in full_response and (content.endswith("}") or content.endswith("}\n")):
+                    # (se espera a que el lote de comandos esté completo antes de cortar)
+                    if "MCP_COMMAND_JSON:" in full_response and mcp_command_stream_complete(full_response):
                         break
 
                 # After streaming, send a final event. If we streamed, final event will indicate completion
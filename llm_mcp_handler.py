@@ -2,9 +2,101 @@ import json
 import threading
 import asyncio
 import os  # Añadido para verificar la existencia de archivos
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
 from ui_helpers import log_to_chat_on_ui_thread
-import re  # Para mejor procesamiento del JSON
 from assets.logging import PersistentLogger
+from mcp_result_pipeline import ToolResultPipeline
+
+COMMAND_PREFIX = "MCP_COMMAND_JSON:"
+DEFAULT_CALL_TIMEOUT = 60  # segundos por llamada a herramienta dentro de un lote
+
+_json_decoder = json.JSONDecoder()
+
+
+def _decode_commands_at(text: str, pos: int) -> Tuple[List[Any], Optional[int]]:
+    """
+    Decodifica el valor JSON (objeto o array) que empieza en `pos`.
+
+    Returns:
+        Tupla (valores decodificados, posición final) o ([], None) si el JSON
+        está incompleto o no es válido
+    """
+    while pos < len(text) and text[pos].isspace():
+        pos += 1
+    try:
+        value, end = _json_decoder.raw_decode(text, pos)
+    except json.JSONDecodeError:
+        return [], None
+    values = value if isinstance(value, list) else [value]
+    return values, end
+
+
+def extract_mcp_commands(llm_response_text: str) -> List[Dict[str, Any]]:
+    """
+    Extrae todos los comandos MCP de una respuesta del LLM.
+
+    Acepta uno o varios objetos precedidos por `MCP_COMMAND_JSON:` y también
+    un array JSON de comandos tras un único prefijo. Si la respuesta no contiene
+    el prefijo se intenta decodificar el primer objeto/array JSON del texto.
+
+    Args:
+        llm_response_text: Texto completo generado por el LLM
+
+    Returns:
+        Lista de comandos en el orden en que aparecen
+
+    Raises:
+        ValueError: Si no hay JSON válido o algún comando no tiene `server`/`method`
+    """
+    text = llm_response_text or ""
+    starts = []
+    pos = text.find(COMMAND_PREFIX)
+    while pos != -1:
+        starts.append(pos + len(COMMAND_PREFIX))
+        pos = text.find(COMMAND_PREFIX, pos + len(COMMAND_PREFIX))
+    if not starts:
+        first = min((i for i in (text.find("{"), text.find("[")) if i != -1), default=-1)
+        if first != -1:
+            starts.append(first)
+
+    commands = []
+    for start in starts:
+        values, end = _decode_commands_at(text, start)
+        if end is None:
+            raise ValueError(f"No se encontró JSON válido en la respuesta del LLM: '{text[start:start + 200]}...'")
+        commands.extend(values)
+
+    if not commands:
+        raise ValueError(f"No se encontró JSON válido en la respuesta del LLM: '{text[:200]}...'")
+
+    for index, command in enumerate(commands):
+        if not isinstance(command, dict):
+            raise ValueError(f"El comando MCP #{index + 1} no es un objeto JSON")
+        missing_keys = [key for key in ('server', 'method') if key not in command]
+        if missing_keys:
+            raise ValueError(f"Faltan claves requeridas en el comando MCP #{index + 1}: {missing_keys}")
+    return commands
+
+
+def mcp_command_stream_complete(partial_text: str) -> bool:
+    """
+    Indica si se puede cortar el streaming de una respuesta con comandos MCP.
+
+    El lote se considera completo cuando el JSON tras el último prefijo está
+    cerrado y el modelo ya ha empezado a escribir algo que no es otro comando.
+    Así un LLM puede emitir varios `MCP_COMMAND_JSON:` seguidos (o un array)
+    sin que la respuesta se corte en el primer `}`.
+    """
+    last = partial_text.rfind(COMMAND_PREFIX)
+    if last == -1:
+        return False
+    _, end = _decode_commands_at(partial_text, last + len(COMMAND_PREFIX))
+    if end is None:
+        return False
+    tail = partial_text[end:].lstrip()
+    return bool(tail) and not COMMAND_PREFIX.startswith(tail[:len(COMMAND_PREFIX)])
+
 
 class LLMMCPHandler:
     """
@@ -50,88 +142,249 @@ class LLMMCPHandler:
             self.log_callback = kwargs.get('log_callback')
             
         self.logger = PersistentLogger()
+        self.result_pipeline = ToolResultPipeline(logger=self.logger)
         self._is_closing = False
 
     def handle_mcp_command_from_llm(self, llm_response_text, callback):
-        """Maneja un comando MCP generado por el LLM."""
-        command_prefix = "MCP_COMMAND_JSON:"
-        
+        """
+        Maneja los comandos MCP generados por el LLM.
+
+        Un único comando conserva el comportamiento original (se devuelve el
+        contenido del resultado). Varios comandos, ya sea como varios objetos
+        `MCP_COMMAND_JSON:` o como un array JSON, se ejecutan en lote con
+        `handle_mcp_batch` y se devuelven agregados en un solo JSON.
+        """
         try:
-            # Extraer el JSON usando expresiones regulares para mayor robustez
-            json_match = re.search(r'\{(?:[^{}]|(?R))*\}|$$$(?:[^$$]|(?R))*$$', llm_response_text)
-            if not json_match:
-                raise ValueError(f"No se encontró JSON válido en la respuesta del LLM: '{llm_response_text[:200]}...'")
-            
-            json_str_part = json_match.group(0)
-            
-            # Validar que el JSON tenga las claves necesarias
-            mcp_cmd_data = json.loads(json_str_part)
-            required_keys = ['server', 'method']
-            missing_keys = [key for key in required_keys if key not in mcp_cmd_data]
-            
-            if missing_keys:
-                raise ValueError(f"Faltan claves requeridas en el comando MCP: {missing_keys}")
-            
-            log_to_chat_on_ui_thread(self.window, self.chat_text, f"LLM -> MCP: {json_str_part}", "mcp_comm")
+            commands = extract_mcp_commands(llm_response_text)
+        except ValueError as e:
+            error_msg = str(e)
+            log_to_chat_on_ui_thread(self.window, self.chat_text, error_msg, "error")
+            callback(json.dumps({"error": error_msg}, ensure_ascii=False))
+            return
+
+        if len(commands) > 1:
+            self.handle_mcp_batch(commands, callback)
+            return
+
+        mcp_cmd_data = commands[0]
+        try:
+            log_to_chat_on_ui_thread(self.window, self.chat_text, f"LLM -> MCP: {json.dumps(mcp_cmd_data, ensure_ascii=False)}", "mcp_comm")
             
             server = mcp_cmd_data.get('server')
             method = mcp_cmd_data.get('method')
             params = mcp_cmd_data.get('params')
             
-            # Verificar si el servidor está configurado
-            config = self.mcp_manager.servers_config.get("mcpServers", {}).get(server)
-            if not config:
-                raise ValueError(f"No se encontró configuración para el servidor '{server}'")
-            
-            if not config.get('enabled', False):
-                raise ValueError(f"El servidor '{server}' está deshabilitado en la configuración")
-            
-            # Encontrar el script del servidor
-            script_path = None
-            for arg in config.get("args", []):
-                if isinstance(arg, str) and (arg.endswith('.py') or arg.endswith('.js')):
-                    script_path = arg
-                    break
-            
-            if not script_path or not os.path.exists(script_path):
-                raise ValueError(f"No se encontró script .py/.js para {server} en args: {config.get('args')}")
+            config, script_path = self._resolve_server(server)
+            sdk_bridge = self.sdk_bridge or self.mcp_manager.get_client(server)
             
             # Ejecutar el comando MCP en un hilo separado
             def run_sdk_tool():
                 try:
                     # Usar el SDK Bridge para ejecutar el comando MCP
                     loop = asyncio.new_event_loop()
-                    tools = loop.run_until_complete(self.sdk_bridge.connect(script_path))
+                    tools = loop.run_until_complete(self._connect_bridge(sdk_bridge, config, script_path))
                     
                     # Encontrar la herramienta especificada
                     tool_obj = next((t for t in tools if t.name == method), None)
                     if not tool_obj:
                         raise ValueError(f"No se encontró la herramienta '{method}' en el SDK para {server}")
-                    
+
+                    # Validar los argumentos contra el inputSchema antes de llamar al servidor
+                    arguments = params if params is not None else {}
+                    validation_errors = sdk_bridge.validate_tool_arguments(method, arguments)
+                    if validation_errors:
+                        error_payload = sdk_bridge.validator.build_error_payload(server, method, validation_errors)
+                        log_to_chat_on_ui_thread(self.window, self.chat_text, f"Parámetros inválidos para {server}.{method}: {validation_errors}", "error")
+                        callback(json.dumps(error_payload, ensure_ascii=False))
+                        return
+
                     # Ejecutar la herramienta
-                    result = loop.run_until_complete(self.sdk_bridge.call_tool(tool_obj, params or {}))
-                    result_content = getattr(result, 'content', str(result))
+                    result = loop.run_until_complete(sdk_bridge.call_tool(method, arguments))
+                    # Compactar y acotar el resultado antes de mostrarlo y reenviarlo al LLM
+                    processed = self.result_pipeline.process(result, server, method, config)
                     
-                    log_to_chat_on_ui_thread(self.window, self.chat_text, f"MCP -> LLM: Resultado de {method}: {result_content}", "system")
-                    callback(result_content)
+                    log_to_chat_on_ui_thread(self.window, self.chat_text, f"MCP -> LLM: Resultado de {method}: {processed['preview']}", "system")
+                    if processed['bytes_saved']:
+                        log_to_chat_on_ui_thread(
+                            self.window, self.chat_text,
+                            f"Resultado compactado: {processed['original_bytes']} -> {processed['bytes']} bytes ({processed['bytes_saved']} ahorrados)",
+                            "system"
+                        )
+                    if processed['truncated']:
+                        log_to_chat_on_ui_thread(self.window, self.chat_text, f"Resultado completo de {method} en: {processed['spill_path']}", "system")
+                    callback(processed['content'])
                 except Exception as e:
                     error_msg = f"Error ejecutando herramienta MCP {server}.{method}: {str(e)}"
                     log_to_chat_on_ui_thread(self.window, self.chat_text, error_msg, "error")
-                    callback(f"{{\"error\": \"{error_msg}\"}}")
+                    callback(json.dumps({"error": error_msg}, ensure_ascii=False))
             
             # Ejecutar en hilo separado para no bloquear la UI
             threading.Thread(target=run_sdk_tool, daemon=True).start()
             
-        except json.JSONDecodeError as e:
-            error_msg = f"Error decodificando JSON del LLM: {str(e)}. JSON: '{json_str_part[:200]}...'"
-            log_to_chat_on_ui_thread(self.window, self.chat_text, error_msg, "error")
-            callback(f"{{\"error\": \"{error_msg}\"}}")
         except ValueError as e:
             error_msg = str(e)
             log_to_chat_on_ui_thread(self.window, self.chat_text, error_msg, "error")
-            callback(f"{{\"error\": \"{error_msg}\"}}")
+            callback(json.dumps({"error": error_msg}, ensure_ascii=False))
         except Exception as e:
             error_msg = f"Error inesperado procesando comando MCP: {str(e)}"
             log_to_chat_on_ui_thread(self.window, self.chat_text, error_msg, "error")
-            callback(f"{{\"error\": \"{error_msg}\"}}")
+            callback(json.dumps({"error": error_msg}, ensure_ascii=False))
+
+    def _resolve_server(self, server: str) -> Tuple[Dict[str, Any], str]:
+        """
+        Obtiene la configuración y el script de un servidor MCP.
+
+        Returns:
+            Tupla (configuración, ruta del script); la ruta es None para servidores remotos
 
+        Raises:
+            ValueError: Si el servidor no existe, está deshabilitado o no tiene script
+        """
+        # Verificar si el servidor está configurado
+        config = self.mcp_manager.servers_config.get("mcpServers", {}).get(server)
+        if not config:
+            raise ValueError(f"No se encontró configuración para el servidor '{server}'")
+        
+        if not config.get('enabled', False):
+            raise ValueError(f"El servidor '{server}' está deshabilitado en la configuración")
+        
+        # Los servidores remotos (HTTP/SSE) no tienen script local
+        if config.get('type') == 'remote':
+            if not config.get('url'):
+                raise ValueError(f"El servidor remoto '{server}' no tiene 'url' en la configuración")
+            return config, None
+        
+        # Encontrar el script del servidor
+        script_path = None
+        for arg in config.get("args", []):
+            if isinstance(arg, str) and (arg.endswith('.py') or arg.endswith('.js')):
+                script_path = arg
+                break
+        
+        if not script_path or not os.path.exists(script_path):
+            raise ValueError(f"No se encontró script .py/.js para {server} en args: {config.get('args')}")
+        return config, script_path
+
+    @staticmethod
+    async def _connect_bridge(sdk_bridge, config: Dict[str, Any], script_path: Optional[str]):
+        """Conecta el puente por stdio (script local) o por el transporte remoto."""
+        if script_path is None:
+            return await sdk_bridge.connect_remote(config)
+        return await sdk_bridge.connect(script_path)
+
+    def handle_mcp_batch(self, commands: List[Dict[str, Any]], callback, wait: bool = False):
+        """
+        Ejecuta un lote de comandos MCP de forma concurrente.
+
+        Los comandos se agrupan por servidor: cada servidor se atiende en su
+        propio hilo (con su propia sesión) y, dentro de un servidor, se lanzan
+        hasta `max_concurrent_calls` llamadas a la vez (1 por defecto, es decir,
+        en serie). Cada llamada tiene su propio timeout (`timeout` del comando,
+        `call_timeout` del servidor o DEFAULT_CALL_TIMEOUT). La latencia total
+        es la del servidor más lento en lugar de la suma de todas las llamadas.
+
+        Args:
+            commands: Comandos MCP extraídos de la respuesta del LLM
+            callback: Recibe un JSON con los resultados en el orden de los comandos
+            wait: Si es True se ejecuta en el hilo actual (por defecto en segundo plano)
+        """
+        def run_batch():
+            results = self.run_mcp_batch(commands)
+            failed = sum(1 for r in results if "error" in r)
+            log_to_chat_on_ui_thread(
+                self.window, self.chat_text,
+                f"MCP -> LLM: {len(results) - failed}/{len(results)} herramientas ejecutadas correctamente", "system"
+            )
+            callback(json.dumps({"mcp_batch_results": results}, ensure_ascii=False))
+
+        log_to_chat_on_ui_thread(self.window, self.chat_text, f"LLM -> MCP: lote de {len(commands)} comandos", "mcp_comm")
+        if wait:
+            run_batch()
+        else:
+            threading.Thread(target=run_batch, daemon=True).start()
+
+    def run_mcp_batch(self, commands: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Ejecuta un lote de comandos y devuelve los resultados en el orden original.
+
+        Returns:
+            Lista de diccionarios {"server", "method", "result"} o {"server", "method", "error"}
+        """
+        groups: Dict[str, List[Tuple[int, Dict[str, Any]]]] = {}
+        for index, command in enumerate(commands):
+            groups.setdefault(command.get('server'), []).append((index, command))
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(commands)
+        with ThreadPoolExecutor(max_workers=len(groups) or 1, thread_name_prefix="mcp-batch") as executor:
+            futures = [executor.submit(self._run_server_group, server, calls) for server, calls in groups.items()]
+            for future in futures:
+                for index, entry in future.result().items():
+                    results[index] = entry
+        return results
+
+    def _run_server_group(self, server: str, calls: List[Tuple[int, Dict[str, Any]]]) -> Dict[int, Dict[str, Any]]:
+        """Ejecuta en un bucle de eventos propio todas las llamadas dirigidas a un servidor."""
+        try:
+            config, script_path = self._resolve_server(server)
+        except ValueError as e:
+            return {index: self._batch_entry(cmd, error=str(e)) for index, cmd in calls}
+
+        loop = asyncio.new_event_loop()
+        sdk_bridge = None
+        try:
+            # Cada grupo necesita su propia sesión: una sesión no puede compartirse entre bucles
+            sdk_bridge = self.mcp_manager.get_client(server)
+            tools = loop.run_until_complete(self._connect_bridge(sdk_bridge, config, script_path))
+            return loop.run_until_complete(self._call_server_tools(sdk_bridge, server, config, tools, calls))
+        except Exception as e:
+            error_msg = f"Error conectando con el servidor MCP {server}: {str(e)}"
+            self.logger.error(error_msg)
+            return {index: self._batch_entry(cmd, error=error_msg) for index, cmd in calls}
+        finally:
+            if sdk_bridge is not None and hasattr(sdk_bridge, 'close'):
+                try:
+                    loop.run_until_complete(sdk_bridge.close())
+                except Exception as e:
+                    self.logger.warning(f"Error cerrando la sesión MCP de {server}: {str(e)}")
+            loop.close()
+
+    async def _call_server_tools(self, sdk_bridge, server, config, tools, calls) -> Dict[int, Dict[str, Any]]:
+        """Lanza las llamadas de un servidor respetando su límite de concurrencia."""
+        tool_names = {getattr(t, 'name', None) for t in tools}
+        semaphore = asyncio.Semaphore(max(1, int(config.get('max_concurrent_calls', 1))))
+        default_timeout = config.get('call_timeout', DEFAULT_CALL_TIMEOUT)
+
+        async def run_call(index, command):
+            method = command.get('method')
+            arguments = command.get('params') if command.get('params') is not None else {}
+            if method not in tool_names:
+                return index, self._batch_entry(command, error=f"No se encontró la herramienta '{method}' en el SDK para {server}")
+
+            validation_errors = sdk_bridge.validate_tool_arguments(method, arguments)
+            if validation_errors:
+                payload = sdk_bridge.validator.build_error_payload(server, method, validation_errors)
+                return index, self._batch_entry(command, error=payload["error"])
+
+            timeout = command.get('timeout', default_timeout)
+            async with semaphore:
+                try:
+                    result = await asyncio.wait_for(sdk_bridge.call_tool(method, arguments), timeout)
+                except asyncio.TimeoutError:
+                    return index, self._batch_entry(command, error=f"Timeout tras {timeout}s ejecutando {server}.{method}")
+                except Exception as e:
+                    return index, self._batch_entry(command, error=f"Error ejecutando herramienta MCP {server}.{method}: {str(e)}")
+            processed = self.result_pipeline.process(result, server, method, config)
+            return index, self._batch_entry(command, result=processed['content'])
+
+        pairs = await asyncio.gather(*(run_call(index, command) for index, command in calls))
+        return dict(pairs)
+
+    @staticmethod
+    def _batch_entry(command: Dict[str, Any], result: Any = None, error: Any = None) -> Dict[str, Any]:
+        """Construye la entrada de un comando en la respuesta agregada del lote."""
+        entry = {"server": command.get('server'), "method": command.get('method')}
+        if error is not None:
+            entry["error"] = error
+        else:
+            entry["result"] = result
+        return entry
@@ -0,0 +1,229 @@
+"""
+Recarga en caliente de mcp_servers.json
+Vigila el archivo de configuración (con watchdog/inotify si está instalado, o
+comprobando su mtime periódicamente si no) y, tras un debounce, compara la
+nueva configuración con la que está en ejecución: solo se inician los
+servidores añadidos, se detienen los eliminados o deshabilitados y se
+reinician aquellos cuyo comando, argumentos, entorno o conexión remota
+cambiaron. El resto conserva sus procesos y sesiones. La recarga se hace en un
+hilo propio, nunca en el de la interfaz.
+"""
+
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from config_store import get_store
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # Sin watchdog se usa el sondeo del mtime
+    FileSystemEventHandler = object
+    Observer = None
+
+# Campos que determinan cómo se lanza (o se conecta) un servidor: si cambian, hay que reiniciarlo
+LAUNCH_FIELDS = ("type", "command", "args", "env", "cwd", "url", "transport", "headers")
+
+
+def launch_signature(config: Dict) -> Tuple:
+    """Parte de la configuración de un servidor que exige reiniciarlo si cambia."""
+    return tuple(repr(config.get(field)) for field in LAUNCH_FIELDS)
+
+
+def _is_enabled(config: Optional[Dict]) -> bool:
+    return bool(config) and config.get("enabled", True)
+
+
+class ConfigDiff:
+    """Cambios entre dos versiones de `mcpServers`."""
+
+    def __init__(self, added: List[str], removed: List[str], restarted: List[str], updated: List[str]):
+        """
+        Args:
+            added: Servidores habilitados que antes no lo estaban (o no existían)
+            removed: Servidores eliminados o deshabilitados
+            restarted: Servidores cuyo lanzamiento cambió
+            updated: Servidores con cambios que no requieren reinicio (p. ej. descripción)
+        """
+        self.added = added
+        self.removed = removed
+        self.restarted = restarted
+        self.updated = updated
+
+    def is_empty(self) -> bool:
+        return not (self.added or self.removed or self.restarted or self.updated)
+
+    def __repr__(self) -> str:
+        return (f"ConfigDiff(added={self.added}, removed={self.removed}, "
+                f"restarted={self.restarted}, updated={self.updated})")
+
+
+def diff_server_configs(old_servers: Dict[str, Dict], new_servers: Dict[str, Dict]) -> ConfigDiff:
+    """
+    Compara dos diccionarios `mcpServers`.
+
+    Args:
+        old_servers: Configuración en ejecución
+        new_servers: Configuración nueva
+
+    Returns:
+        ConfigDiff con los servidores a iniciar, detener, reiniciar o solo actualizar
+    """
+    added, removed, restarted, updated = [], [], [], []
+    for name in sorted(set(old_servers) | set(new_servers)):
+        old, new = old_servers.get(name), new_servers.get(name)
+        old_enabled, new_enabled = _is_enabled(old), _is_enabled(new)
+        if new_enabled and not old_enabled:
+            added.append(name)
+        elif old_enabled and not new_enabled:
+            removed.append(name)
+        elif old_enabled and new_enabled:
+            if launch_signature(old) != launch_signature(new):
+                restarted.append(name)
+            elif old != new:
+                updated.append(name)
+        elif old != new:
+            updated.append(name)  # Deshabilitado en ambas versiones
+    return ConfigDiff(added, removed, restarted, updated)
+
+
+def _file_signature(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class _ConfigEventHandler(FileSystemEventHandler):
+    """Reenvía al vigilante los eventos que afectan al archivo de configuración."""
+
+    def __init__(self, watcher: "MCPConfigWatcher"):
+        super().__init__()
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        name = self.watcher.config_path.name
+        paths = (getattr(event, "src_path", ""), getattr(event, "dest_path", ""))
+        if any(path and os.path.basename(path) == name for path in paths):
+            self.watcher.schedule_reload()
+
+
+class MCPConfigWatcher:
+    """
+    Vigila mcp_servers.json y aplica los cambios al MCPManager de forma incremental.
+    """
+
+    def __init__(self, mcp_manager, config_path=None, debounce: float = 0.5, poll_interval: float = 1.0,
+                 on_reload: Optional[Callable[[ConfigDiff], None]] = None, use_watchdog: bool = True):
+        """
+        Args:
+            mcp_manager: Instancia de MCPManager con la configuración en ejecución
+            config_path: Ruta de mcp_servers.json (por defecto la del MCPManager)
+            debounce: Segundos de calma tras el último cambio antes de recargar
+            poll_interval: Intervalo del sondeo del mtime cuando no hay watchdog
+            on_reload: Recibe el ConfigDiff aplicado (desde el hilo de recarga; la
+                interfaz debe pasar a su hilo con `after`)
+            use_watchdog: Si False, se usa siempre el sondeo
+        """
+        self.mcp_manager = mcp_manager
+        self.config_path = Path(config_path or mcp_manager.get_default_config_path()).resolve()
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.on_reload = on_reload
+        self.use_watchdog = use_watchdog and Observer is not None
+        self.logger = mcp_manager.logger
+
+        self._reload_lock = threading.Lock()
+        self._timer_lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._stop_event = threading.Event()
+        self._observer = None
+        self._poll_thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Empieza a vigilar el archivo."""
+        self._stop_event.clear()
+        if self.use_watchdog:
+            try:
+                self._observer = Observer()
+                self._observer.schedule(_ConfigEventHandler(self), str(self.config_path.parent), recursive=False)
+                self._observer.daemon = True
+                self._observer.start()
+                self.logger.info(f"Vigilando {self.config_path.name} (watchdog)")
+                return
+            except Exception as e:
+                self.logger.warning(f"No se pudo iniciar watchdog, usando sondeo: {e}")
+                self._observer = None
+        self._poll_thread = threading.Thread(target=self._poll, daemon=True, name="mcp-config-poll")
+        self._poll_thread.start()
+        self.logger.info(f"Vigilando {self.config_path.name} (sondeo cada {self.poll_interval} s)")
+
+    def stop(self):
+        """Deja de vigilar el archivo y descarta la recarga pendiente."""
+        self._stop_event.set()
+        with self._timer_lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer = None
+
+    def schedule_reload(self):
+        """Programa una recarga; los cambios dentro de la ventana de debounce se agrupan."""
+        if self._stop_event.is_set():
+            return
+        with self._timer_lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.debounce, self.reload)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _poll(self):
+        signature = _file_signature(self.config_path)
+        while not self._stop_event.wait(self.poll_interval):
+            current = _file_signature(self.config_path)
+            if current != signature:
+                signature = current
+                self.schedule_reload()
+
+    def reload(self) -> Optional[ConfigDiff]:
+        """
+        Lee el archivo y aplica los cambios respecto a la configuración en ejecución.
+
+        Returns:
+            ConfigDiff aplicado, o None si el archivo no se pudo leer o no es válido
+        """
+        with self._timer_lock:
+            self._timer = None
+        with self._reload_lock:
+            try:
+                new_config = get_store(self.config_path).read()
+            except ValueError as e:
+                # Archivo a medio escribir o editado a mano con errores: conservar lo que está en marcha
+                self.logger.warning(f"{self.config_path.name} no es JSON válido, se ignora el cambio: {e}")
+                return None
+            except OSError as e:
+                self.logger.error(f"Error leyendo {self.config_path.name}: {e}")
+                return None
+            if not isinstance(new_config, dict) or not isinstance(new_config.get("mcpServers"), dict):
+                self.logger.warning(f"{self.config_path.name} sin 'mcpServers' válido, se ignora el cambio")
+                return None
+
+            diff = self.mcp_manager.apply_config(new_config)
+            if diff.is_empty():
+                return diff
+            self.logger.info(
+                f"Configuración MCP recargada: +{len(diff.added)} -{len(diff.removed)} "
+                f"↻{len(diff.restarted)} ~{len(diff.updated)}"
+            )
+            if self.on_reload:
+                try:
+                    self.on_reload(diff)
+                except Exception as e:
+                    self.logger.error(f"Error en callback de recarga de configuración: {e}")
+            return diff
@@ -0,0 +1,334 @@
+"""
+Rastreador de salud de la Galería MCP
+Comprueba periódicamente los manifest_url de todo el catálogo con un cliente
+HTTP asíncrono: concurrencia acotada, límite de peticiones por host y
+peticiones condicionales (ETag / Last-Modified), de modo que un manifest sin
+cambios se confirma con un 304 sin volver a descargarlo ni validarlo.
+
+Cada comprobación (disponibilidad, validez del manifest, tiempo de respuesta)
+se guarda en un historial SQLite; el resumen por servidor se mantiene en
+memoria para /mcps/{id}/health y para ordenar /search por salud.
+"""
+
+import asyncio
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+from mcp_gallery_api.pagination import utc_now
+from mcp_gallery_api.utils import check_manifest_fields
+
+HEALTH_DATABASE_FILE = "health.db"
+DEFAULT_INTERVAL = 6 * 3600  # Segundos entre rastreos completos
+DEFAULT_CONCURRENCY = 32
+DEFAULT_PER_HOST_CONCURRENCY = 4
+DEFAULT_PER_HOST_RATE = 10.0  # Peticiones por segundo a un mismo host
+DEFAULT_TIMEOUT = 10.0
+HISTORY_LIMIT = 100  # Comprobaciones que se conservan por servidor
+FLUSH_EVERY = 200  # Resultados que se acumulan antes de escribirlos en el historial
+UNKNOWN_RESPONSE_MS = 1e9  # Orden de los servidores sin respuestas (finito: las claves van en cursores JSON)
+
+
+class HealthHistory:
+    """Historial de comprobaciones y validadores HTTP por servidor (SQLite en modo WAL)."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS checks (
+            server_id TEXT NOT NULL,
+            checked_at TEXT NOT NULL,
+            available INTEGER NOT NULL,
+            valid INTEGER NOT NULL,
+            status INTEGER,
+            response_ms REAL,
+            error TEXT
+        );
+        CREATE INDEX IF NOT EXISTS checks_server ON checks(server_id, checked_at);
+        CREATE TABLE IF NOT EXISTS validators (
+            server_id TEXT PRIMARY KEY,
+            url TEXT NOT NULL,
+            etag TEXT,
+            last_modified TEXT,
+            valid INTEGER NOT NULL,
+            error TEXT
+        );
+    """
+
+    def __init__(self, path, history_limit: int = HISTORY_LIMIT):
+        """
+        Args:
+            path: Archivo de la base de datos
+            history_limit: Comprobaciones que se conservan por servidor
+        """
+        self.path = path
+        self.history_limit = history_limit
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+
+    def validators(self) -> Dict[str, Dict]:
+        """Validadores guardados (ETag, Last-Modified y última validez) por servidor."""
+        with self._lock:
+            rows = self._conn.execute("SELECT server_id, url, etag, last_modified, valid, error FROM validators")
+            return {row[0]: {"url": row[1], "etag": row[2], "last_modified": row[3],
+                             "valid": bool(row[4]), "error": row[5]} for row in rows}
+
+    def record(self, results: List[Dict]):
+        """Guarda un lote de comprobaciones y los validadores de las que se descargaron."""
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.executemany(
+                "INSERT INTO checks(server_id, checked_at, available, valid, status, response_ms, error) "
+                "VALUES (:server_id, :checked_at, :available, :valid, :status, :response_ms, :error)", results)
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO validators(server_id, url, etag, last_modified, valid, error) "
+                "VALUES (:server_id, :url, :etag, :last_modified, :valid, :error)",
+                [result for result in results if result["status"] == 200])
+
+    def prune(self, server_ids: Optional[List[str]] = None):
+        """Descarta las comprobaciones antiguas y, si se indica el catálogo, las de servidores eliminados."""
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.execute(
+                "DELETE FROM checks WHERE rowid IN (SELECT rowid FROM ("
+                "SELECT rowid, ROW_NUMBER() OVER (PARTITION BY server_id ORDER BY checked_at DESC) AS rank "
+                "FROM checks) WHERE rank > ?)", (self.history_limit,))
+            if server_ids is not None:
+                self._conn.execute("CREATE TEMP TABLE IF NOT EXISTS live(server_id TEXT PRIMARY KEY)")
+                self._conn.execute("DELETE FROM live")
+                self._conn.executemany("INSERT OR IGNORE INTO live VALUES (?)", ((i,) for i in server_ids))
+                self._conn.execute("DELETE FROM checks WHERE server_id NOT IN (SELECT server_id FROM live)")
+                self._conn.execute("DELETE FROM validators WHERE server_id NOT IN (SELECT server_id FROM live)")
+
+    def summaries(self) -> Dict[str, Dict]:
+        """Resumen por servidor: última comprobación y disponibilidad sobre el historial conservado."""
+        with self._lock:
+            rows = self._conn.execute("""
+                SELECT c.server_id, c.checked_at, c.available, c.valid, c.status, c.response_ms, c.error,
+                       s.uptime, s.checks, s.avg_ms
+                FROM checks c
+                JOIN (SELECT server_id, MAX(checked_at) AS last, AVG(available) AS uptime,
+                             COUNT(*) AS checks, AVG(CASE WHEN available THEN response_ms END) AS avg_ms
+                      FROM checks GROUP BY server_id) s
+                  ON s.server_id = c.server_id AND s.last = c.checked_at
+            """)
+            return {row[0]: _summary(*row[1:]) for row in rows}
+
+    def history(self, server_id: str, limit: int = 20) -> List[Dict]:
+        """Últimas comprobaciones de un servidor, de la más reciente a la más antigua."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT checked_at, available, valid, status, response_ms, error FROM checks "
+                "WHERE server_id = ? ORDER BY checked_at DESC LIMIT ?", (server_id, limit))
+            return [{"checked_at": row[0], "available": bool(row[1]), "valid": bool(row[2]), "status": row[3],
+                     "response_ms": row[4], "error": row[5]} for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _summary(checked_at, available, valid, status, response_ms, error, uptime, checks, avg_ms) -> Dict:
+    return {
+        "last_check": checked_at,
+        "available": bool(available),
+        "valid": bool(valid),
+        "status": status,
+        "response_ms": response_ms,
+        "error": error,
+        "uptime": round(uptime, 4),
+        "checks": checks,
+        "avg_response_ms": round(avg_ms, 1) if avg_ms is not None else None,
+    }
+
+
+def health_sort_key(summary: Optional[Dict]) -> Tuple[float, float]:
+    """Clave de orden por salud (menor es mejor): disponibilidad y validez, después tiempo de respuesta."""
+    if not summary:
+        return 0.0, UNKNOWN_RESPONSE_MS  # Sin comprobar: al final, junto a los caídos
+    score = summary["uptime"] * (1.0 if summary["valid"] else 0.5)
+    response_ms = summary["avg_response_ms"]
+    return round(-score, 4), response_ms if response_ms is not None else UNKNOWN_RESPONSE_MS
+
+
+class HostRateLimiter:
+    """Reparte el inicio de las peticiones a un mismo host a un ritmo máximo."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._next_slot: Dict[str, float] = {}
+
+    async def wait(self, host: str):
+        if not self.interval:
+            return
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        # Sin await entre la lectura y la reserva: la reserva del turno es atómica en el bucle de eventos
+        slot = max(now, self._next_slot.get(host, now))
+        self._next_slot[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class HealthCrawler:
+    """
+    Comprueba en segundo plano la salud de los manifest del catálogo.
+    """
+
+    def __init__(self, servers_provider: Callable[[], List[Dict]], history: HealthHistory,
+                 interval: float = DEFAULT_INTERVAL, concurrency: int = DEFAULT_CONCURRENCY,
+                 per_host_concurrency: int = DEFAULT_PER_HOST_CONCURRENCY,
+                 per_host_rate: float = DEFAULT_PER_HOST_RATE, timeout: float = DEFAULT_TIMEOUT,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        """
+        Args:
+            servers_provider: Devuelve los servidores actuales del catálogo
+            history: Historial donde se guardan las comprobaciones
+            interval: Segundos entre rastreos completos (0 desactiva el rastreo periódico)
+            concurrency: Peticiones simultáneas en total
+            per_host_concurrency: Peticiones simultáneas a un mismo host
+            per_host_rate: Peticiones por segundo a un mismo host
+            timeout: Timeout de cada petición
+            transport: Transporte httpx alternativo (tests)
+        """
+        self.servers_provider = servers_provider
+        self.history = history
+        self.interval = interval
+        self.concurrency = concurrency
+        self.per_host_concurrency = per_host_concurrency
+        self.per_host_rate = per_host_rate
+        self.timeout = timeout
+        self.transport = transport
+
+        self.summaries: Dict[str, Dict] = history.summaries()
+        self.last_crawl: Optional[Dict] = None
+        self._task: Optional[asyncio.Task] = None
+        self._crawl_lock = asyncio.Lock()
+
+    def summary(self, server_id: str) -> Optional[Dict]:
+        """Resumen de salud de un servidor (None si aún no se ha comprobado)."""
+        return self.summaries.get(server_id)
+
+    async def crawl_once(self) -> Dict:
+        """
+        Comprueba todos los manifest del catálogo una vez.
+
+        Returns:
+            Estadísticas del rastreo (comprobados, disponibles, válidos, sin cambios, duración)
+        """
+        async with self._crawl_lock:
+            servers = [server for server in self.servers_provider() if server.get("manifest_url")]
+            validators = await asyncio.to_thread(self.history.validators)
+            limiter = HostRateLimiter(self.per_host_rate)
+            global_slots = asyncio.Semaphore(self.concurrency)
+            host_slots: Dict[str, asyncio.Semaphore] = {}
+            pending: List[Dict] = []
+            stats = {"checked": 0, "available": 0, "valid": 0, "not_modified": 0}
+            started = time.perf_counter()
+
+            limits = httpx.Limits(max_connections=self.concurrency,
+                                  max_keepalive_connections=self.concurrency)
+            async with httpx.AsyncClient(timeout=self.timeout, limits=limits, follow_redirects=True,
+                                         transport=self.transport) as client:
+                async def check(server: Dict):
+                    host = urlsplit(server["manifest_url"]).netloc.lower()
+                    slots = host_slots.setdefault(host, asyncio.Semaphore(self.per_host_concurrency))
+                    # Esperar el turno del host antes de ocupar una plaza global
+                    await limiter.wait(host)
+                    async with slots, global_slots:
+                        result = await self._check(client, server, validators.get(server["id"]))
+                    pending.append(result)
+                    stats["checked"] += 1
+                    stats["available"] += result["available"]
+                    stats["valid"] += result["valid"]
+                    stats["not_modified"] += result["status"] == 304
+                    if len(pending) >= FLUSH_EVERY:
+                        batch = pending[:]
+                        pending.clear()
+                        await asyncio.to_thread(self.history.record, batch)
+
+                await asyncio.gather(*(check(server) for server in servers))
+
+            if pending:
+                await asyncio.to_thread(self.history.record, pending)
+            await asyncio.to_thread(self.history.prune, [server["id"] for server in self.servers_provider()])
+            self.summaries = await asyncio.to_thread(self.history.summaries)
+            stats["duration_s"] = round(time.perf_counter() - started, 3)
+            stats["finished_at"] = utc_now()
+            self.last_crawl = stats
+            return stats
+
+    async def _check(self, client: httpx.AsyncClient, server: Dict, validator: Optional[Dict]) -> Dict:
+        """Comprueba un manifest; con validadores de la misma URL la petición es condicional."""
+        url = server["manifest_url"]
+        headers = {}
+        if validator and validator["url"] == url:
+            if validator["etag"]:
+                headers["If-None-Match"] = validator["etag"]
+            if validator["last_modified"]:
+                headers["If-Modified-Since"] = validator["last_modified"]
+
+        result = {"server_id": server["id"], "url": url, "checked_at": utc_now(), "available": False,
+                  "valid": False, "status": None, "response_ms": None, "error": None,
+                  "etag": None, "last_modified": None}
+        start = time.perf_counter()
+        try:
+            response = await client.get(url, headers=headers)
+            result["response_ms"] = round((time.perf_counter() - start) * 1000, 1)
+            result["status"] = response.status_code
+            if response.status_code == 304 and validator:
+                # Sin cambios: la validez es la de la última descarga
+                result["available"] = True
+                result["valid"], result["error"] = validator["valid"], validator["error"]
+                return result
+            response.raise_for_status()
+            result["available"] = True
+            result["etag"] = response.headers.get("etag")
+            result["last_modified"] = response.headers.get("last-modified")
+            try:
+                valid, message = check_manifest_fields(response.json())
+            except ValueError:
+                valid, message = False, "El manifest no es un JSON válido"
+            result["valid"] = valid
+            result["error"] = None if valid else message
+        except httpx.HTTPError as e:
+            if result["response_ms"] is None:
+                result["response_ms"] = round((time.perf_counter() - start) * 1000, 1)
+            result["error"] = f"Error accediendo al manifest: {e}" if str(e) else type(e).__name__
+        return result
+
+    # ------------------------------------------------------------------ #
+    # Rastreo periódico
+    # ------------------------------------------------------------------ #
+
+    def start(self, initial_delay: float = 10.0):
+        """Lanza el rastreo periódico en el bucle de eventos actual."""
+        if self.interval and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run(initial_delay))
+
+    async def stop(self):
+        """Detiene el rastreo periódico (cancela el rastreo en curso)."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self, initial_delay: float):
+        await asyncio.sleep(initial_delay)
+        while True:
+            try:
+                stats = await self.crawl_once()
+                print(f"Rastreo de salud completado: {stats['checked']} manifests en {stats['duration_s']} s")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error en el rastreo de salud: {e}")
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,100 @@
+"""
+Respuestas precalculadas para la API de la Galería MCP
+Un cuerpo JSON se serializa y comprime una sola vez por versión del catálogo
+(identidad, gzip y, si está instalado, brotli). Cada representación tiene su
+ETag fuerte y las peticiones condicionales con If-None-Match se responden con
+304 sin volver a enviar el cuerpo.
+"""
+
+import gzip
+import hashlib
+from typing import Dict, Optional
+
+from fastapi import Request, Response
+
+try:
+    import brotli
+except ImportError:  # Sin brotli se ofrecen solo identidad y gzip
+    brotli = None
+
+JSON_MEDIA_TYPE = "application/json"
+
+
+def _accepted_encodings(accept_encoding: str) -> Dict[str, float]:
+    """Codificaciones aceptadas por el cliente con su peso q."""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+class PrecompressedBody:
+    """Cuerpo JSON serializado una vez, con sus variantes comprimidas y ETags."""
+
+    def __init__(self, body: bytes, gzip_level: int = 6, brotli_quality: int = 5,
+                 cache_control: str = "no-cache"):
+        """
+        Args:
+            body: JSON ya serializado
+            gzip_level: Nivel de compresión gzip
+            brotli_quality: Calidad de compresión brotli
+            cache_control: Cabecera Cache-Control de las respuestas (no-cache: revalidar con ETag)
+        """
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.cache_control = cache_control
+        # Representación -> (bytes, ETag); el ETag fuerte es distinto por codificación
+        self.variants: Dict[str, tuple] = {"identity": (body, f'"{digest}"')}
+        # mtime=0: la salida gzip es determinista para el mismo cuerpo
+        self.variants["gzip"] = (gzip.compress(body, compresslevel=gzip_level, mtime=0), f'"{digest}-gzip"')
+        if brotli is not None:
+            self.variants["br"] = (brotli.compress(body, quality=brotli_quality), f'"{digest}-br"')
+        self._etags = {etag for _, etag in self.variants.values()}
+
+    @property
+    def etag(self) -> str:
+        """ETag de la representación sin comprimir."""
+        return self.variants["identity"][1]
+
+    def choose_encoding(self, accept_encoding: Optional[str]) -> str:
+        """Mejor codificación disponible para un Accept-Encoding."""
+        accepted = _accepted_encodings(accept_encoding or "")
+        for coding in ("br", "gzip"):
+            if coding in self.variants and accepted.get(coding, accepted.get("*", 0.0)) > 0:
+                return coding
+        return "identity"
+
+    def not_modified(self, if_none_match: Optional[str]) -> bool:
+        """True si el cliente ya tiene esta versión (comparación débil, como exige If-None-Match)."""
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        for tag in if_none_match.split(","):
+            tag = tag.strip()
+            if tag.startswith("W/"):
+                tag = tag[2:]
+            if tag in self._etags:
+                return True
+        return False
+
+    def response(self, request: Request, status_code: int = 200) -> Response:
+        """Respuesta para una petición: 304 si el cliente tiene la versión actual, o el cuerpo negociado."""
+        encoding = self.choose_encoding(request.headers.get("accept-encoding"))
+        content, etag = self.variants[encoding]
+        headers = {"ETag": etag, "Cache-Control": self.cache_control, "Vary": "Accept-Encoding"}
+        if self.not_modified(request.headers.get("if-none-match")):
+            return Response(status_code=304, headers=headers)
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(content=content, status_code=status_code, media_type=JSON_MEDIA_TYPE, headers=headers)
@@ -0,0 +1,291 @@
+"""
+Espejo del registro oficial de servidores MCP para la API de la Galería
+Sincroniza periódicamente el registro de origen (`/v0/servers`) y conserva sus
+entradas ya normalizadas en una base de datos SQLite, de modo que la API sirve
+el registro junto a su propio catálogo sin que cada cliente lo consulte.
+
+La primera sincronización recorre el registro completo (condicional con ETag /
+Last-Modified); las siguientes solo piden las entradas actualizadas desde la
+anterior (`updated_since`) y dan de baja las retiradas. Cada cierto tiempo se
+repite una sincronización completa, que detecta también las bajas de un
+registro que no informe de ellas.
+"""
+
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, Optional
+
+import requests
+
+from mcp_gallery_api.pagination import format_timestamp, utc_now
+from registry_ingest import RegistryIngestor
+
+UPSTREAM_REGISTRY_URL = "https://registry.modelcontextprotocol.io/v0/servers"
+MIRROR_DATABASE_FILE = "mirror.db"
+DEFAULT_SYNC_INTERVAL = 15 * 60  # Segundos entre sincronizaciones incrementales
+DEFAULT_FULL_SYNC_INTERVAL = 24 * 3600  # Segundos entre sincronizaciones completas
+SYNC_OVERLAP = 60  # Margen de `updated_since` frente a desfases de reloj con el registro
+DEFAULT_TIMEOUT = 30.0
+
+
+def _entry_key(server: Dict) -> str:
+    """Nombre completo de la entrada en el registro (el ID servido es solo su último segmento)."""
+    return (server.get("registry") or {}).get("name") or server["id"]
+
+
+def _to_entry(server: Dict) -> Dict:
+    """Entrada normalizada del registro en el formato de la API (los datos de origen van en `registry`)."""
+    entry = {key: value for key, value in server.items() if key != "_original"}
+    entry["registry"] = server.get("_original") or {}
+    return entry
+
+
+def _same_entry(a: Dict, b: Dict) -> bool:
+    return {k: v for k, v in a.items() if k != "updated_at"} == {k: v for k, v in b.items() if k != "updated_at"}
+
+
+class RegistryMirror:
+    """
+    Copia local del registro de origen, sincronizada en segundo plano.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS entries (
+            key TEXT PRIMARY KEY,
+            data TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS removed (
+            server_id TEXT PRIMARY KEY,
+            removed_at TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+    """
+
+    def __init__(self, upstream_url: str, path, interval: float = DEFAULT_SYNC_INTERVAL,
+                 full_sync_interval: float = DEFAULT_FULL_SYNC_INTERVAL, page_size: int = 100,
+                 timeout: float = DEFAULT_TIMEOUT, session: Optional[requests.Session] = None,
+                 on_change: Optional[Callable[[Dict[str, Dict]], Awaitable[None]]] = None):
+        """
+        Args:
+            upstream_url: URL de `/v0/servers` del registro de origen
+            path: Archivo de la base de datos del espejo
+            interval: Segundos entre sincronizaciones (0 desactiva la sincronización periódica)
+            full_sync_interval: Segundos entre sincronizaciones completas
+            page_size: Entradas pedidas por página
+            timeout: Timeout de cada petición al registro
+            session: Sesión HTTP reutilizable
+            on_change: Corrutina que recibe el catálogo del espejo tras una sincronización con cambios
+        """
+        self.upstream_url = upstream_url
+        self.path = path
+        self.interval = interval
+        self.full_sync_interval = full_sync_interval
+        self.page_size = page_size
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        self.on_change = on_change
+
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        # Marca de las entradas sincronizadas que aún no se han entregado con on_change
+        self._stamp_lock = threading.Lock()
+        self._pending_since: Optional[str] = None
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+
+        # Las sincronizaciones sustituyen estos diccionarios en lugar de modificarlos: los lectores
+        # del bucle de eventos ven siempre una versión completa
+        self.entries: Dict[str, Dict] = {key: json.loads(data) for key, data in
+                                         self._conn.execute("SELECT key, data FROM entries ORDER BY key")}
+        self.removed: Dict[str, str] = dict(self._conn.execute("SELECT server_id, removed_at FROM removed"))
+        self._meta: Dict[str, str] = dict(self._conn.execute("SELECT key, value FROM meta"))
+        self._catalog: Optional[Dict[str, Dict]] = None
+        self.last_sync: Optional[Dict] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def catalog(self) -> Dict[str, Dict]:
+        """Entradas del espejo por ID servido (con IDs repetidos gana el primer nombre del registro)."""
+        catalog = self._catalog
+        if catalog is None:
+            catalog = {}
+            for key in sorted(self.entries):
+                entry = self.entries[key]
+                catalog.setdefault(entry["id"], entry)
+            self._catalog = catalog
+        return catalog
+
+    def stable_time(self) -> str:
+        """
+        Hora hasta la que el catálogo entregado con on_change está completo: la
+        actual o, si hay una sincronización sin entregar, la marca de sus entradas.
+        """
+        with self._stamp_lock:
+            now = utc_now()
+            return min(now, self._pending_since) if self._pending_since else now
+
+    def status(self) -> Dict:
+        """Origen, última sincronización y número de entradas del espejo."""
+        return {"upstream": self.upstream_url, "entries": len(self.entries),
+                "synced_at": self._meta.get("synced_at"), "last_sync": self.last_sync}
+
+    def sync_once(self, full: Optional[bool] = None) -> Dict:
+        """
+        Sincroniza el espejo con el registro de origen.
+
+        Args:
+            full: Forzar (True) o evitar (False) una sincronización completa; por
+                defecto es completa la primera y cuando vence `full_sync_interval`
+
+        Returns:
+            Estadísticas (modo, sin cambios, actualizadas, eliminadas, total, duración)
+
+        Raises:
+            requests.RequestException: Si falla la descarga de alguna página
+            ValueError: Si una página no se puede decodificar
+        """
+        with self._sync_lock:
+            started = time.perf_counter()
+            started_at = datetime.now(timezone.utc)
+            synced_at = self._meta.get("synced_at")
+            if full is None:
+                full_synced_at = self._meta.get("full_synced_at")
+                full = not synced_at or not full_synced_at or \
+                    started_at - datetime.fromisoformat(full_synced_at.replace("Z", "+00:00")) \
+                    >= timedelta(seconds=self.full_sync_interval)
+
+            ingestor = RegistryIngestor(self.upstream_url, session=self.session, page_size=self.page_size,
+                                        timeout=self.timeout)
+            if full:
+                result = ingestor.ingest(etag=self._meta.get("etag"), last_modified=self._meta.get("last_modified"))
+            else:
+                since = datetime.fromisoformat(synced_at.replace("Z", "+00:00")) - timedelta(seconds=SYNC_OVERLAP)
+                result = ingestor.ingest(updated_since=format_timestamp(since))
+
+            with self._stamp_lock:
+                now = utc_now()
+                pending_since = self._pending_since
+                self._pending_since = pending_since or now  # Se entrega en sync()
+            meta = {"synced_at": format_timestamp(started_at)}
+            updated: Dict[str, Dict] = {}
+            retired = set()
+            if full:
+                meta["full_synced_at"] = meta["synced_at"]
+                if not result["not_modified"]:
+                    meta["etag"], meta["last_modified"] = result["etag"], result["last_modified"]
+            if not result["not_modified"]:
+                fetched = {}
+                for server in result["servers"]:
+                    entry = _to_entry(server)
+                    fetched.setdefault(_entry_key(entry), entry)
+                for key, entry in fetched.items():
+                    previous = self.entries.get(key)
+                    if previous is not None and _same_entry(previous, entry):
+                        continue
+                    entry["updated_at"] = now
+                    updated[key] = entry
+                retired = set(self.entries) - set(fetched) if full else set(result["retired"]) & set(self.entries)
+            self._apply(updated, retired, now, meta)
+            if not updated and not retired:
+                with self._stamp_lock:
+                    self._pending_since = pending_since
+
+            stats = {
+                "mode": "full" if full else "incremental",
+                "not_modified": result["not_modified"],
+                "updated": len(updated),
+                "removed": len(retired),
+                "entries": len(self.entries),
+                "duration_s": round(time.perf_counter() - started, 3),
+                "finished_at": utc_now(),
+            }
+            self.last_sync = stats
+            return stats
+
+    def _apply(self, updated: Dict[str, Dict], retired: set, removed_at: str, meta: Dict[str, Optional[str]]):
+        """Guarda los cambios de una sincronización y publica la nueva versión en memoria."""
+        entries = dict(self.entries)
+        removed = dict(self.removed)
+        gone_ids = {entries.pop(key)["id"] for key in retired}
+        entries.update(updated)
+        live_ids = {entry["id"] for entry in entries.values()}
+        tombstones = {server_id: removed_at for server_id in gone_ids - live_ids}
+        revived = [server_id for server_id in removed if server_id in live_ids]
+
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.executemany("DELETE FROM entries WHERE key = ?", ((key,) for key in retired))
+            self._conn.executemany("INSERT OR REPLACE INTO entries(key, data) VALUES (?, ?)",
+                                   ((key, json.dumps(entry, ensure_ascii=False)) for key, entry in updated.items()))
+            self._conn.executemany("INSERT OR REPLACE INTO removed(server_id, removed_at) VALUES (?, ?)",
+                                   tombstones.items())
+            self._conn.executemany("DELETE FROM removed WHERE server_id = ?", ((i,) for i in revived))
+            self._conn.executemany("INSERT OR REPLACE INTO meta(key, value) VALUES (?, ?)", meta.items())
+
+        for server_id in revived:
+            del removed[server_id]
+        removed.update(tombstones)
+        self._meta = {**self._meta, **meta}
+        if updated or retired:
+            self.entries = entries
+            self._catalog = None
+        self.removed = removed
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # ------------------------------------------------------------------ #
+    # Sincronización periódica
+    # ------------------------------------------------------------------ #
+
+    def start(self, initial_delay: float = 0.0):
+        """Lanza la sincronización periódica en el bucle de eventos actual."""
+        if self.interval and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run(initial_delay))
+
+    async def stop(self):
+        """Detiene la sincronización periódica (la descarga en curso termina en su hilo)."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def sync(self, full: Optional[bool] = None) -> Dict:
+        """
+        Sincroniza fuera del bucle de eventos y, si hay cambios sin entregar (de
+        esta sincronización o de una entrega anterior que falló), avisa con el
+        nuevo catálogo.
+        """
+        stats = await asyncio.to_thread(self.sync_once, full)
+        with self._stamp_lock:
+            undelivered = self._pending_since is not None
+        if undelivered and self.on_change:
+            await self.on_change(self.catalog())
+        with self._stamp_lock:
+            self._pending_since = None
+        return stats
+
+    async def _run(self, initial_delay: float):
+        await asyncio.sleep(initial_delay)
+        while True:
+            try:
+                stats = await self.sync()
+                print(f"Espejo del registro sincronizado ({stats['mode']}): {stats['updated']} actualizados, "
+                      f"{stats['removed']} eliminados, {stats['entries']} en total en {stats['duration_s']} s")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error sincronizando el espejo del registro: {e}")
+            await asyncio.sleep(self.interval)
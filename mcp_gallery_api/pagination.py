@@ -0,0 +1,165 @@
+"""
+Paginación por cursor (keyset) y proyección de campos para la API de la Galería MCP
+Los cursores son opacos y guardan la clave de ordenación del último elemento
+entregado, no una posición: las altas y bajas concurrentes no desplazan las
+páginas siguientes, de modo que no se repiten ni se saltan elementos que
+existían al empezar el recorrido.
+
+Las búsquedas no tienen una clave estable (la relevancia BM25 y la salud cambian
+con cada alta, baja o rastreo), así que su primera página guarda el orden de los
+resultados en ResultSnapshots y las siguientes lo recorren por posición.
+"""
+
+import base64
+import json
+import secrets
+import time
+from bisect import bisect_right
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+SEARCH_RESULTS_TTL = 600.0  # Segundos que se conserva el orden de una búsqueda paginada
+SEARCH_RESULTS_MAX = 256  # Búsquedas paginadas conservadas a la vez (se descartan las más antiguas)
+
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
+
+
+def format_timestamp(moment: datetime) -> str:
+    """Marca de tiempo UTC con formato fijo (se compara correctamente como texto)."""
+    return moment.astimezone(timezone.utc).strftime(TIMESTAMP_FORMAT)
+
+
+def utc_now() -> str:
+    """Marca de tiempo UTC actual."""
+    return format_timestamp(datetime.now(timezone.utc))
+
+
+def normalize_timestamp(value: str) -> str:
+    """
+    Normaliza una fecha ISO 8601 al formato de las marcas de la galería.
+
+    Raises:
+        ValueError: Si la fecha no es válida
+    """
+    moment = datetime.fromisoformat(value.strip().replace(" ", "+"))  # "+" llega como espacio si no se codifica
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return format_timestamp(moment)
+
+
+def encode_cursor(state: Dict) -> str:
+    """Cursor opaco a partir de su estado (orden, clave del último elemento, filtros)."""
+    raw = json.dumps(state, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict:
+    """
+    Estado guardado en un cursor.
+
+    Raises:
+        ValueError: Si el cursor no es válido
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        state = json.loads(raw.decode("utf-8"))
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Cursor inválido: {e}")
+    if not isinstance(state, dict) or not isinstance(state.get("k"), list):
+        raise ValueError("Cursor inválido")
+    return state
+
+
+def parse_fields(fields: Optional[str], allowed: Iterable[str]) -> Optional[List[str]]:
+    """
+    Campos pedidos en `fields=a,b`. El id se incluye siempre.
+
+    Returns:
+        Lista de campos, o None para devolver los elementos completos
+
+    Raises:
+        ValueError: Si se pide un campo desconocido
+    """
+    if not fields:
+        return None
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = sorted(set(requested) - set(allowed))
+    if unknown:
+        raise ValueError(f"Campos desconocidos: {', '.join(unknown)}")
+    return ["id"] + [field for field in dict.fromkeys(requested) if field != "id"]
+
+
+def project(item: Dict, fields: Optional[Sequence[str]]) -> Dict:
+    """Elemento reducido a los campos pedidos."""
+    if fields is None:
+        return item
+    return {field: item.get(field) for field in fields}
+
+
+def keyset_page(rows: Sequence[Tuple[tuple, Dict]], after: Optional[tuple],
+                limit: int) -> Tuple[List[Tuple[tuple, Dict]], Optional[tuple]]:
+    """
+    Página de filas ordenadas por clave, a partir de la clave `after` (excluida).
+
+    Args:
+        rows: Filas (clave, elemento) ordenadas por clave, sin claves repetidas
+        after: Clave del último elemento de la página anterior
+        limit: Tamaño de la página
+
+    Returns:
+        Tupla (filas de la página, clave para el cursor siguiente o None si no hay más)
+    """
+    start = 0
+    if after is not None:
+        start = bisect_right(rows, after, key=lambda row: row[0])
+    page = list(rows[start:start + limit])
+    next_key = page[-1][0] if page and start + limit < len(rows) else None
+    return page, next_key
+
+
+class ResultSnapshots:
+    """
+    Orden de los resultados de las búsquedas paginadas, guardado durante un TTL
+    para que las páginas siguientes no dependan de la puntuación del momento.
+    """
+
+    def __init__(self, ttl: float = SEARCH_RESULTS_TTL, max_entries: int = SEARCH_RESULTS_MAX):
+        """
+        Args:
+            ttl: Segundos que se conserva cada orden
+            max_entries: Órdenes conservados a la vez
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, List[str]]]" = OrderedDict()
+
+    def save(self, version: int, ids: List[str]) -> str:
+        """
+        Guarda el orden de una búsqueda.
+
+        Args:
+            version: Versión del catálogo sobre la que se ha buscado
+            ids: IDs de los resultados en orden
+
+        Returns:
+            Identificador del orden para el cursor
+        """
+        now = time.monotonic()
+        while self._entries and next(iter(self._entries.values()))[0] <= now:
+            self._entries.popitem(last=False)
+        token = f"{version}.{secrets.token_urlsafe(9)}"
+        self._entries[token] = (now + self.ttl, ids)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return token
+
+    def get(self, token: str) -> Optional[List[str]]:
+        """IDs guardados con `save`, o None si el orden no existe o ha caducado."""
+        entry = self._entries.get(token)
+        if entry is None or entry[0] <= time.monotonic():
+            self._entries.pop(token, None)
+            return None
+        return entry[1]
@@ -7,7 +7,7 @@ import sys
 from pathlib import Path
 
 # Añadir el directorio padre al path para poder importar módulos
-project_root = Path(__file__).parent.parent
+project_root = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(project_root))
 
 def main():
@@ -3,14 +3,35 @@ Servidor API para la Galería de Servidores MCP
 FastAPI server que actúa como catálogo centralizado de servidores MCP.
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
+import asyncio
 import json
+import os
+import sys
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Dict, List, Optional
 import uvicorn
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+if __name__ == "__main__":
+    # Ejecutado como script (python mcp_gallery_api/server.py): el paquete y los módulos
+    # compartidos de la raíz del proyecto no están en el path
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from gallery_search_index import GallerySearchIndex
+from mcp_gallery_api.health_crawler import (DEFAULT_INTERVAL, HEALTH_DATABASE_FILE, HealthCrawler, HealthHistory,
+                                            health_sort_key)
+from mcp_gallery_api.http_cache import PrecompressedBody
+from mcp_gallery_api.mirror import DEFAULT_SYNC_INTERVAL, MIRROR_DATABASE_FILE, UPSTREAM_REGISTRY_URL, RegistryMirror
+from mcp_gallery_api.pagination import (DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, TIMESTAMP_FORMAT, ResultSnapshots,
+                                        decode_cursor, encode_cursor, format_timestamp, keyset_page,
+                                        normalize_timestamp, parse_fields, project, utc_now)
+from mcp_gallery_api.storage import STORAGE_BACKENDS, GalleryStorage, open_storage
 
 
 # Modelos de datos
@@ -25,6 +46,8 @@ class MCPServer(BaseModel):
     checksum: str
     signature_url: str
     tags: List[str]
+    updated_at: Optional[str] = None  # Asignado por la API en cada alta (UTC)
+    registry: Optional[Dict] = None  # Datos originales del registro (entradas del espejo)
 
 
 class MCPServerDetails(MCPServer):
@@ -38,13 +61,69 @@ class MCPServerDetails(MCPServer):
     launch_config: Optional[Dict] = None
 
 
+# Validación y serialización de /mcps en una sola pasada (una vez por versión del catálogo)
+_SERVER_LIST_ADAPTER = TypeAdapter(List[MCPServer])
+
+
+class CatalogSnapshot:
+    """
+    Versión publicada del catálogo con sus estructuras derivadas: cuerpo de /mcps
+    precomprimido, elementos validados con sus órdenes de paginación e índice de
+    búsqueda. Se construye entera fuera del bucle de eventos y no cambia después.
+    """
+
+    def __init__(self, version: int, servers: List[Dict], watermark: str):
+        """
+        Args:
+            version: Versión del catálogo que representa
+            servers: Servidores servidos, en orden de catálogo
+            watermark: Hora del servidor (X-Server-Time) anterior a cualquier cambio
+                que no incluye esta versión
+        """
+        self.version = version
+        self.servers = servers
+        self.watermark = watermark
+        self.search_index = GallerySearchIndex(servers)
+        self.list_body: Optional[PrecompressedBody] = None
+        self.view: Optional[Dict] = None
+        self.error: Optional[str] = None
+        try:
+            models = _SERVER_LIST_ADAPTER.validate_python(servers)
+        except ValidationError as e:
+            # La búsqueda sigue funcionando; /mcps y la paginación responden con el error
+            self.error = f"Catálogo inválido: {e}"
+            return
+        # Los campos opcionales sin valor (p. ej. `registry` en servidores locales) no se emiten
+        self.list_body = PrecompressedBody(_SERVER_LIST_ADAPTER.dump_json(models, exclude_none=True))
+        items = _SERVER_LIST_ADAPTER.dump_python(models, mode="json", exclude_none=True)
+        self.view = {
+            "items": items,
+            "index": {item["id"]: item for item in items},
+            "by_id": sorted((((item["id"],), item) for item in items), key=lambda row: row[0]),
+            "by_updated": sorted((((item.get("updated_at") or "", item["id"]), item) for item in items),
+                                 key=lambda row: row[0]),
+        }
+
+    def require_valid(self):
+        """
+        Raises:
+            HTTPException: Si algún servidor de esta versión no cumple el modelo
+        """
+        if self.error:
+            raise HTTPException(status_code=500, detail=self.error)
+
+
 class MCPGalleryAPI:
-    def __init__(self, data_dir: str = None):
+    def __init__(self, data_dir: str = None, storage=None, upstream_url: str = None):
         """
         Inicializa la API de la galería MCP.
         
         Args:
             data_dir: Directorio donde están los datos de la galería
+            storage: "sqlite", "json" o una instancia de GalleryStorage
+                (por defecto MCP_GALLERY_STORAGE o sqlite)
+            upstream_url: URL de `/v0/servers` del registro a replicar
+                (por defecto MCP_GALLERY_UPSTREAM_URL; sin ella no se replica ningún registro)
         """
         if data_dir is None:
             self.data_dir = Path(__file__).parent
@@ -64,7 +143,8 @@ class MCPGalleryAPI:
         self.app = FastAPI(
             title="MCP Gallery API",
             description="API centralizada para la galería de servidores MCP",
-            version="1.0.0"
+            version="1.0.0",
+            lifespan=self._lifespan
         )
         
         # Configurar CORS
@@ -77,25 +157,258 @@ class MCPGalleryAPI:
         )
         
         # Cargar datos
+        self._servers: Dict[str, Dict] = {}  # ID -> servidor, en orden de alta
+        self._upstream: Dict[str, Dict] = {}  # ID -> entrada del registro replicado (las locales tienen prioridad)
+        self._removed: Dict[str, str] = {}  # Bajas para la sincronización incremental
+        self._version = 0  # Aumenta con cada cambio del catálogo
+        self._snapshot: Optional[CatalogSnapshot] = None  # Última versión publicada (la que leen las peticiones)
+        # Las mutaciones se serializan y escriben fuera del bucle de eventos; las lecturas usan la copia en memoria
+        self._write_lock = asyncio.Lock()
+        self._search_results = ResultSnapshots()  # Orden de las búsquedas paginadas
+        self._publish_lock = asyncio.Lock()
+        self._publish_task: Optional[asyncio.Task] = None  # Publicación en segundo plano tras las mutaciones
+        self._pending_stamp: Optional[str] = None  # `updated_at` de la mutación en curso, aún fuera del catálogo
+        self.storage: GalleryStorage = storage if isinstance(storage, GalleryStorage) else \
+            open_storage(self.data_dir, storage)
         self._load_gallery_data()
         
+        # Espejo del registro: se sirve la última copia guardada y se sincroniza en segundo plano
+        self.mirror: Optional[RegistryMirror] = None
+        upstream_url = upstream_url or os.environ.get("MCP_GALLERY_UPSTREAM_URL")
+        if upstream_url:
+            self.mirror = RegistryMirror(
+                upstream_url, self.data_dir / MIRROR_DATABASE_FILE,
+                interval=float(os.environ.get("MCP_GALLERY_MIRROR_INTERVAL", DEFAULT_SYNC_INTERVAL)),
+                on_change=self._upstream_changed
+            )
+            self._upstream = self.mirror.catalog()
+            self._catalog_changed()
+        self._publish_now()
+        
+        # Rastreo periódico de la salud de los manifest (MCP_GALLERY_HEALTH_INTERVAL=0 lo desactiva).
+        # Solo las entradas locales: las del registro replicado no tienen manifest propio
+        self.health = HealthCrawler(
+            lambda: list(self._servers.values()), HealthHistory(self.data_dir / HEALTH_DATABASE_FILE),
+            interval=float(os.environ.get("MCP_GALLERY_HEALTH_INTERVAL", DEFAULT_INTERVAL))
+        )
+        
         # Configurar rutas
         self._setup_routes()
         self._setup_static_files()
     
+    @asynccontextmanager
+    async def _lifespan(self, app: FastAPI):
+        """
+        Arranca el rastreo de salud y la sincronización del espejo y, al detener
+        la API, cierra el almacenamiento (SQLite exporta entonces gallery.json).
+        """
+        self.health.start()
+        if self.mirror:
+            self.mirror.start()
+        yield
+        if self._publish_task and not self._publish_task.done():
+            await self._publish_task
+        await self.health.stop()
+        await asyncio.to_thread(self.health.history.close)
+        if self.mirror:
+            await self.mirror.stop()
+            await asyncio.to_thread(self.mirror.close)
+        async with self._write_lock:
+            await asyncio.to_thread(self.storage.close)
+    
     def _load_gallery_data(self):
-        """Carga los datos de la galería desde el archivo JSON."""
+        """Carga los datos de la galería desde el almacenamiento."""
         try:
-            if self.gallery_file.exists():
-                with open(self.gallery_file, 'r', encoding='utf-8') as f:
-                    self.gallery_data = json.load(f)
-            else:
+            if self.storage.is_empty() and not self.gallery_file.exists():
                 # Crear archivo de ejemplo si no existe
                 self._create_example_gallery()
+            self.gallery_data, self._removed = self.storage.load()
         except Exception as e:
             print(f"Error cargando datos de galería: {e}")
             self.gallery_data = []
     
+    @property
+    def gallery_data(self) -> List[Dict]:
+        """
+        Servidores de la versión publicada: los locales en orden de alta y, detrás,
+        los del registro replicado que no tapa ninguna entrada local.
+        """
+        return self._snapshot.servers if self._snapshot else self._compose()
+    
+    @gallery_data.setter
+    def gallery_data(self, servers: List[Dict]):
+        self._servers = {}
+        for server in servers:
+            self._servers.setdefault(server.get("id"), server)  # Con IDs repetidos gana el primero
+        self._catalog_changed()
+    
+    def _compose(self) -> List[Dict]:
+        servers = list(self._servers.values())
+        servers.extend(server for server_id, server in self._upstream.items() if server_id not in self._servers)
+        return servers
+    
+    def _catalog_changed(self):
+        """Marca una nueva versión del catálogo (las estructuras derivadas se publican con _publish)."""
+        self._version += 1
+    
+    def _publish_now(self):
+        """Publica la versión actual de forma síncrona (al arrancar, antes de servir peticiones)."""
+        try:
+            self._snapshot = CatalogSnapshot(self._version, self._compose(), self._watermark())
+        except Exception as e:
+            print(f"Error preparando el catálogo: {e}")
+            if self._snapshot is None:
+                self._snapshot = CatalogSnapshot(self._version, [], self._watermark())
+    
+    async def _publish(self):
+        """
+        Publica la versión actual del catálogo.
+        
+        Las estructuras derivadas (cuerpo de /mcps, vista paginable, índice de
+        búsqueda) se construyen fuera del bucle de eventos y se sustituyen de una
+        vez; mientras tanto las lecturas siguen usando la versión anterior. Las
+        publicaciones concurrentes se agrupan: quien espera al lock y encuentra ya
+        publicada una versión que incluye su cambio no vuelve a construir.
+        
+        Returns:
+            False si no se pudo construir la versión (se sigue sirviendo la anterior)
+        """
+        version = self._version
+        async with self._publish_lock:
+            if self._snapshot.version >= version:
+                return True
+            version, servers, watermark = self._version, self._compose(), self._watermark()
+            try:
+                snapshot = await asyncio.to_thread(CatalogSnapshot, version, servers, watermark)
+            except Exception as e:
+                # Se sigue sirviendo la versión anterior; el siguiente cambio vuelve a intentarlo
+                print(f"Error preparando el catálogo: {e}")
+                return False
+            self._snapshot = snapshot
+            return True
+    
+    def _publish_later(self):
+        """
+        Publica en segundo plano los cambios pendientes, para que las mutaciones
+        respondan en cuanto se guardan sin esperar a reconstruir el catálogo (O(N)).
+        Una sola tarea publica a la vez y, al terminar, recoge los cambios que
+        llegaron mientras construía.
+        """
+        if self._publish_task is None or self._publish_task.done():
+            self._publish_task = asyncio.create_task(self._publish_pending())
+    
+    async def _publish_pending(self):
+        while self._snapshot.version < self._version:
+            if not await self._publish():
+                return
+    
+    async def _published(self, version: int, wait: bool):
+        """Programa la publicación de una mutación y, con `wait`, espera a que esa versión se sirva."""
+        self._publish_later()
+        if wait:
+            while self._snapshot.version < version:
+                if not await self._publish():
+                    raise HTTPException(status_code=500, detail="Cambio guardado, pero no se pudo publicar el catálogo")
+    
+    def _watermark(self) -> str:
+        """
+        Hora hasta la que el catálogo actual en memoria está completo.
+        
+        Es la actual salvo que haya una mutación o una sincronización del espejo
+        con `updated_at` ya asignado y aún sin incorporar; en ese caso, justo antes
+        de esa marca. Se resta un microsegundo porque `updated_since` es estricto.
+        """
+        moment = self.mirror.stable_time() if self.mirror else utc_now()
+        if self._pending_stamp:
+            moment = min(moment, self._pending_stamp)
+        return format_timestamp(datetime.strptime(moment, TIMESTAMP_FORMAT).replace(tzinfo=timezone.utc)
+                                - timedelta(microseconds=1))
+    
+    def _get_server(self, server_id: str) -> Optional[Dict]:
+        """Servidor servido con ese ID (el local o, si no hay, el del registro replicado)."""
+        return self._servers.get(server_id) or self._upstream.get(server_id)
+    
+    def _get_list_body(self) -> PrecompressedBody:
+        """Cuerpo de /mcps de la versión publicada (serializado y comprimido una vez por versión)."""
+        self._snapshot.require_valid()
+        return self._snapshot.list_body
+    
+    async def _upstream_changed(self, catalog: Dict[str, Dict]):
+        """Publica el catálogo del espejo tras una sincronización con cambios."""
+        self._upstream = catalog
+        self._catalog_changed()
+        await self._publish()
+    
+    def _add_mirror_header(self, response):
+        if self.mirror:
+            response.headers["X-Registry-Mirror"] = self.mirror.upstream_url
+        return response
+    
+    def _get_catalog_view(self) -> Dict:
+        """
+        Elementos validados de la versión publicada y sus órdenes de paginación.
+        
+        Returns:
+            Diccionario con `items` (en el orden del catálogo), `index` (por ID), `by_id`
+            y `by_updated` (filas (clave, elemento) ordenadas por clave)
+        """
+        self._snapshot.require_valid()
+        return self._snapshot.view
+    
+    def _page_response(self, request: Request, rows: List, watermark: str, order: str, limit: Optional[int],
+                       cursor: Optional[str], fields: Optional[str], updated_since: Optional[str],
+                       query: Optional[Dict] = None) -> JSONResponse:
+        """
+        Página de resultados como lista JSON, con el cursor siguiente en las cabeceras.
+        
+        El cursor guarda el orden, los filtros, los campos y la hora del servidor de
+        la primera página (X-Server-Time), que el cliente usa como `updated_since`
+        en la siguiente sincronización; basta con enviar `cursor` (y `limit`).
+        
+        Args:
+            request: Petición original (para construir el enlace a la página siguiente)
+            rows: Filas (clave, elemento) ordenadas por clave y ya filtradas por la consulta
+            watermark: Marca de la versión publicada de la que salen las filas
+            order: Nombre del orden de las filas (se comprueba contra el del cursor)
+            limit: Tamaño de la página
+            cursor: Cursor de la página anterior
+            fields: Campos pedidos (separados por coma)
+            updated_since: Devolver solo elementos actualizados después de esta fecha
+            query: Parámetros de la consulta que se guardan en el cursor (p. ej. la búsqueda)
+            
+        Raises:
+            HTTPException: Si el cursor, la fecha o los campos no son válidos
+        """
+        try:
+            after = None
+            if cursor:
+                state = decode_cursor(cursor)
+                if state.get("o") != order:
+                    raise ValueError("El cursor pertenece a otra consulta")
+                after, since, server_time = tuple(state["k"]), state.get("s"), state["t"]
+                fields = fields or state.get("f")
+            else:
+                since = normalize_timestamp(updated_since) if updated_since else None
+                server_time = watermark
+            selected = parse_fields(fields, MCPServer.model_fields)
+        except (KeyError, ValueError) as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        if since:
+            rows = [row for row in rows if (row[1].get("updated_at") or "") > since]
+        page, next_key = keyset_page(rows, after, limit or DEFAULT_PAGE_SIZE)
+        headers = {"X-Server-Time": server_time}
+        if next_key is not None:
+            next_cursor = encode_cursor({"o": order, "k": list(next_key), "s": since, "t": server_time,
+                                         "f": fields, **(query or {})})
+            headers["X-Next-Cursor"] = next_cursor
+            headers["Link"] = f'<{request.url.include_query_params(cursor=next_cursor)}>; rel="next"'
+        return JSONResponse([project(item, selected) for _, item in page], headers=headers)
+    
+    def _get_search_index(self) -> GallerySearchIndex:
+        """Índice de búsqueda de la versión publicada de la galería."""
+        return self._snapshot.search_index
+    
     def _create_example_gallery(self):
         """Crea un archivo de galería de ejemplo."""
         # Usar los datos del archivo fallback como base
@@ -103,11 +416,11 @@ class MCPGalleryAPI:
         if fallback_file.exists():
             try:
                 with open(fallback_file, 'r', encoding='utf-8') as f:
-                    self.gallery_data = json.load(f)
+                    servers = json.load(f)
                     
                 # Guardar en el archivo de galería
                 with open(self.gallery_file, 'w', encoding='utf-8') as f:
-                    json.dump(self.gallery_data, f, indent=2, ensure_ascii=False)
+                    json.dump(servers, f, indent=2, ensure_ascii=False)
                     
                 print(f"Creado archivo de galería de ejemplo: {self.gallery_file}")
                 return
@@ -115,7 +428,7 @@ class MCPGalleryAPI:
                 print(f"Error copiando fallback: {e}")
         
         # Datos mínimos si no hay fallback
-        self.gallery_data = [
+        servers = [
             {
                 "id": "weather-server",
                 "name": "Weather Server",
@@ -131,7 +444,7 @@ class MCPGalleryAPI:
         ]
         
         with open(self.gallery_file, 'w', encoding='utf-8') as f:
-            json.dump(self.gallery_data, f, indent=2, ensure_ascii=False)
+            json.dump(servers, f, indent=2, ensure_ascii=False)
     
     def _setup_routes(self):
         """Configura las rutas de la API."""
@@ -146,26 +459,79 @@ class MCPGalleryAPI:
                 "endpoints": {
                     "list_servers": "/mcps",
                     "get_server": "/mcps/{server_id}",
+                    "removed_servers": "/mcps/removed",
                     "static_files": "/static/",
                     "health": "/health"
                 },
-                "total_servers": len(self.gallery_data)
+                "total_servers": len(self.gallery_data),
+                "mirror": self.mirror.status() if self.mirror else None
             }
         
         @self.app.get("/health")
         async def health_check():
-            """Endpoint de salud del servicio."""
-            return {"status": "healthy", "servers_loaded": len(self.gallery_data)}
+            """Endpoint de salud del servicio (`catalog_version` es la última versión publicada)."""
+            return {"status": "healthy", "servers_loaded": len(self.gallery_data),
+                    "catalog_version": self._snapshot.version}
         
         @self.app.get("/mcps", response_model=List[MCPServer])
-        async def list_mcps():
+        async def list_mcps(request: Request,
+                            limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+                            cursor: Optional[str] = None, fields: Optional[str] = None,
+                            updated_since: Optional[str] = None):
             """
             Obtiene la lista de todos los servidores MCP disponibles.
             
+            Sin parámetros se devuelve el catálogo completo: el cuerpo se serializa y
+            comprime una vez por versión del catálogo y, con If-None-Match y el ETag
+            actual, se responde 304. Con `limit`, `cursor`, `fields` o `updated_since`
+            se devuelve una página ordenada por ID (por fecha de actualización si se
+            filtra por ella); la página siguiente se indica en X-Next-Cursor y Link.
+            Si la API replica un registro, X-Registry-Mirror indica su URL de origen.
+            
+            Args:
+                limit: Tamaño de la página
+                cursor: Cursor de la página anterior
+                fields: Campos a devolver separados por coma (el ID se incluye siempre)
+                updated_since: Solo servidores actualizados después de esta fecha ISO 8601
+            
             Returns:
                 Lista de servidores MCP con información básica
             """
-            return self.gallery_data
+            if limit is None and cursor is None and fields is None and updated_since is None:
+                return self._add_mirror_header(self._get_list_body().response(request))
+            
+            view = self._get_catalog_view()
+            order = "updated" if updated_since else "id"
+            if cursor:
+                try:
+                    order = decode_cursor(cursor).get("o", order)
+                except ValueError as e:
+                    raise HTTPException(status_code=400, detail=str(e))
+            rows = view["by_updated"] if order == "updated" else view["by_id"]
+            return self._add_mirror_header(
+                self._page_response(request, rows, self._snapshot.watermark, order, limit, cursor, fields,
+                                    updated_since))
+        
+        @self.app.get("/mcps/removed")
+        async def list_removed_mcps(since: Optional[str] = None):
+            """
+            Servidores eliminados, para la sincronización incremental.
+            
+            Args:
+                since: Solo bajas posteriores a esta fecha ISO 8601
+                
+            Returns:
+                IDs eliminados y hora actual del servidor
+            """
+            server_time = self._watermark()
+            try:
+                since = normalize_timestamp(since) if since else ""
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            tombstones = {**self.mirror.removed, **self._removed} if self.mirror else self._removed
+            removed = sorted(server_id for server_id, removed_at in tombstones.items()
+                             if removed_at > since and self._get_server(server_id) is None)
+            return {"removed": removed, "server_time": server_time}
         
         @self.app.get("/mcps/{server_id}")
         async def get_mcp(server_id: str):
@@ -181,116 +547,222 @@ class MCPGalleryAPI:
             Raises:
                 HTTPException: Si el servidor no se encuentra
             """
-            for server in self.gallery_data:
-                if server["id"] == server_id:
-                    # Devolver datos básicos con información adicional simulada
-                    extended_info = server.copy()
-                    extended_info.update({
-                        "author": "MCP Community",
-                        "repository": f"https://github.com/mcp-servers/{server_id}",
-                        "homepage": f"https://mcp-servers.com/{server_id}",
-                        "license": "MIT",
-                        "capabilities": ["tools", "resources", "prompts"],
-                        "dependencies": {"python": ">=3.8"},
-                        "launch_config": {
-                            "command": "python",
-                            "args": [f"{server_id}.py"],
-                            "env": {}
-                        }
-                    })
-                    return extended_info
+            server = self._get_server(server_id)
+            if server is None:
+                raise HTTPException(status_code=404, detail=f"Servidor '{server_id}' no encontrado")
             
-            raise HTTPException(status_code=404, detail=f"Servidor '{server_id}' no encontrado")
+            # Devolver datos básicos con información adicional simulada
+            extended_info = server.copy()
+            extended_info.update({
+                "author": "MCP Community",
+                "repository": f"https://github.com/mcp-servers/{server_id}",
+                "homepage": f"https://mcp-servers.com/{server_id}",
+                "license": "MIT",
+                "capabilities": ["tools", "resources", "prompts"],
+                "dependencies": {"python": ">=3.8"},
+                "launch_config": {
+                    "command": "python",
+                    "args": [f"{server_id}.py"],
+                    "env": {}
+                }
+            })
+            return extended_info
+        
+        @self.app.get("/mcps/{server_id}/health")
+        async def get_mcp_health(server_id: str, limit: int = Query(20, ge=1, le=100)):
+            """
+            Salud de un servidor MCP según el rastreador de manifests.
+            
+            Args:
+                server_id: ID del servidor
+                limit: Número de comprobaciones del historial a devolver
+                
+            Returns:
+                Resumen (última comprobación, disponibilidad, tiempo medio de respuesta)
+                e historial de comprobaciones, de la más reciente a la más antigua
+                
+            Raises:
+                HTTPException: Si el servidor no se encuentra
+            """
+            if self._get_server(server_id) is None:
+                raise HTTPException(status_code=404, detail=f"Servidor '{server_id}' no encontrado")
+            history = await asyncio.to_thread(self.health.history.history, server_id, limit)
+            return {
+                "server_id": server_id,
+                "summary": self.health.summary(server_id),
+                "history": history,
+                "last_crawl": self.health.last_crawl,
+            }
         
         @self.app.post("/mcps")
-        async def add_mcp(server: MCPServer):
+        async def add_mcp(server: MCPServer, wait: bool = False):
             """
             Añade un nuevo servidor MCP a la galería.
             
+            Una entrada local con el ID de una del registro replicado la sustituye.
+            La respuesta llega en cuanto el alta está guardada; /mcps y /search la
+            muestran cuando se publica la versión devuelta (la de /health).
+            
             Args:
                 server: Datos del nuevo servidor
+                wait: Responder solo cuando la nueva versión ya esté publicada
                 
             Returns:
-                Confirmación de la operación
+                Confirmación de la operación y versión del catálogo que la incluye
             """
-            # Verificar que no exista ya
-            for existing in self.gallery_data:
-                if existing["id"] == server.id:
+            async with self._write_lock:
+                # Verificar que no exista ya
+                if server.id in self._servers:
                     raise HTTPException(status_code=400, detail=f"Servidor '{server.id}' ya existe")
-            
-            # Añadir a la lista
-            server_dict = server.dict()
-            self.gallery_data.append(server_dict)
-            
-            # Guardar en archivo
-            try:
-                with open(self.gallery_file, 'w', encoding='utf-8') as f:
-                    json.dump(self.gallery_data, f, indent=2, ensure_ascii=False)
-                return {"message": f"Servidor '{server.id}' añadido exitosamente"}
-            except Exception as e:
-                # Revertir cambio en memoria
-                self.gallery_data.pop()
-                raise HTTPException(status_code=500, detail=f"Error guardando servidor: {e}")
+                
+                server_dict = server.model_dump(exclude_none=True)
+                # Hasta que el alta esté en memoria, X-Server-Time no puede pasar de esta marca
+                server_dict["updated_at"] = self._pending_stamp = utc_now()
+                
+                # Guardar fuera del bucle de eventos; la copia en memoria solo cambia si se guardó
+                try:
+                    await asyncio.to_thread(self.storage.insert, server_dict)
+                except Exception as e:
+                    raise HTTPException(status_code=500, detail=f"Error guardando servidor: {e}")
+                finally:
+                    self._pending_stamp = None
+                
+                self._servers[server.id] = server_dict
+                self._removed.pop(server.id, None)
+                self._catalog_changed()
+                version = self._version
+            await self._published(version, wait)
+            return {"message": f"Servidor '{server.id}' añadido exitosamente", "version": version}
         
         @self.app.delete("/mcps/{server_id}")
-        async def remove_mcp(server_id: str):
+        async def remove_mcp(server_id: str, wait: bool = False):
             """
             Elimina un servidor MCP de la galería.
             
+            Solo se eliminan entradas locales; si tapaban una del registro replicado,
+            esta vuelve a servirse. Como en el alta, la publicación es en segundo plano.
+            
             Args:
                 server_id: ID del servidor a eliminar
+                wait: Responder solo cuando la nueva versión ya esté publicada
                 
             Returns:
-                Confirmación de la operación
+                Confirmación de la operación y versión del catálogo que la incluye
             """
-            for i, server in enumerate(self.gallery_data):
-                if server["id"] == server_id:
-                    removed_server = self.gallery_data.pop(i)
-                    
-                    # Guardar cambios
-                    try:
-                        with open(self.gallery_file, 'w', encoding='utf-8') as f:
-                            json.dump(self.gallery_data, f, indent=2, ensure_ascii=False)
-                        return {"message": f"Servidor '{server_id}' eliminado exitosamente"}
-                    except Exception as e:
-                        # Revertir cambio
-                        self.gallery_data.insert(i, removed_server)
-                        raise HTTPException(status_code=500, detail=f"Error eliminando servidor: {e}")
-            
-            raise HTTPException(status_code=404, detail=f"Servidor '{server_id}' no encontrado")
+            async with self._write_lock:
+                if server_id not in self._servers:
+                    raise HTTPException(status_code=404, detail=f"Servidor '{server_id}' no encontrado")
+                
+                removed_at = self._pending_stamp = utc_now()
+                try:
+                    await asyncio.to_thread(self.storage.delete, server_id, removed_at)
+                except Exception as e:
+                    raise HTTPException(status_code=500, detail=f"Error eliminando servidor: {e}")
+                finally:
+                    self._pending_stamp = None
+                
+                del self._servers[server_id]
+                self._removed[server_id] = removed_at
+                if server_id in self._upstream:
+                    # Nueva fecha para que la sincronización incremental de los clientes la vuelva a descargar
+                    self._upstream = {**self._upstream,
+                                      server_id: {**self._upstream[server_id], "updated_at": removed_at}}
+                self._catalog_changed()
+                version = self._version
+            await self._published(version, wait)
+            return {"message": f"Servidor '{server_id}' eliminado exitosamente", "version": version}
         
         @self.app.get("/search")
-        async def search_mcps(q: str = "", tags: str = ""):
+        async def search_mcps(request: Request, q: str = "", tags: str = "",
+                              limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+                              cursor: Optional[str] = None, fields: Optional[str] = None,
+                              updated_since: Optional[str] = None,
+                              sort: str = Query("relevance", pattern="^(relevance|health)$")):
             """
             Busca servidores MCP por nombre, descripción o tags.
             
+            Los resultados se ordenan por relevancia (BM25) y la búsqueda tolera
+            prefijos y erratas; con sort=health se ordenan por la salud medida por el
+            rastreador (disponibilidad y validez del manifest, después tiempo de
+            respuesta). Con `limit`, `cursor`, `fields` o `updated_since` se pagina
+            como en /mcps. La primera página fija el orden de los resultados (a igual
+            clave, por ID) y las siguientes lo recorren aunque la relevancia o la
+            salud cambien entretanto: los servidores eliminados desaparecen y los
+            añadidos no se incorporan. Ese orden se conserva SEARCH_RESULTS_TTL
+            segundos; después el cursor responde 410 y hay que repetir la búsqueda.
+            
             Args:
                 q: Término de búsqueda
                 tags: Tags separados por coma
+                limit: Tamaño de la página
+                cursor: Cursor de la página anterior
+                fields: Campos a devolver separados por coma (el ID se incluye siempre)
+                updated_since: Solo servidores actualizados después de esta fecha ISO 8601
+                sort: Orden de los resultados ("relevance" o "health")
                 
             Returns:
                 Lista de servidores que coinciden con la búsqueda
             """
-            results = self.gallery_data.copy()
-            
-            # Filtrar por término de búsqueda
-            if q:
-                q_lower = q.lower()
-                results = [
-                    server for server in results
-                    if (q_lower in server["name"].lower() or
-                        q_lower in server["description"].lower())
-                ]
+            if cursor:
+                # La página siguiente recorre el orden guardado por la primera
+                try:
+                    state = decode_cursor(cursor)
+                except ValueError as e:
+                    raise HTTPException(status_code=400, detail=str(e))
+                q, tags = state.get("q", q), state.get("tags", tags)
+                sort = "health" if state.get("o") == "health" else "relevance"
+                ordered_ids = self._search_results.get(state.get("r") or "")
+                if ordered_ids is None:
+                    raise HTTPException(status_code=410, detail="La búsqueda del cursor ha caducado; repítala")
+            search_tags = [tag.strip().lower() for tag in tags.split(",") if tag.strip()]
+            summaries = self.health.summaries
+            snapshot = self._snapshot  # Índice y elementos de la misma versión
+            if limit is None and cursor is None and fields is None and updated_since is None:
+                results = snapshot.search_index.search(q, tags=search_tags)
+                if sort == "health":
+                    results.sort(key=lambda server: health_sort_key(summaries.get(server.get("id"))))
+                return results
             
-            # Filtrar por tags
-            if tags:
-                search_tags = [tag.strip().lower() for tag in tags.split(",")]
-                results = [
-                    server for server in results
-                    if any(tag in [t.lower() for t in server.get("tags", [])] for tag in search_tags)
-                ]
+            snapshot.require_valid()
+            order = "health" if sort == "health" else "score"
+            query = {"q": q, "tags": tags}
+            if cursor:
+                query["r"] = state["r"]
+            else:
+                items = snapshot.view["items"]
+                hits = snapshot.search_index.search_ids(q, tags=search_tags)
+                if sort == "health":
+                    keys = [((*health_sort_key(summaries.get(items[doc]["id"])), items[doc]["id"]), items[doc]["id"])
+                            for doc, _ in hits]
+                else:
+                    keys = [((-round(score, 9), items[doc]["id"]), items[doc]["id"]) for doc, score in hits]
+                keys.sort(key=lambda key: key[0])
+                ordered_ids = [server_id for _, server_id in keys]
+                if len(ordered_ids) > (limit or DEFAULT_PAGE_SIZE):
+                    query["r"] = self._search_results.save(snapshot.version, ordered_ids)
+            # Posición en el orden fijado, con los datos de la versión publicada
+            index = snapshot.view["index"]
+            rows = [((position,), index[server_id]) for position, server_id in enumerate(ordered_ids)
+                    if server_id in index]
+            return self._page_response(request, rows, snapshot.watermark, order, limit, cursor, fields,
+                                       updated_since, query=query)
+        
+        @self.app.get("/search/facets")
+        async def search_facets(q: str = "", tags: str = ""):
+            """
+            Recuento de tags de los resultados de una búsqueda.
             
-            return results
+            Args:
+                q: Término de búsqueda
+                tags: Tags separados por coma
+                
+            Returns:
+                Total de resultados y número de servidores por tag
+            """
+            index = self._get_search_index()
+            search_tags = [tag.strip().lower() for tag in tags.split(",") if tag.strip()]
+            hits = index.search_ids(q, tags=search_tags)
+            return {"total": len(hits), "tags": index.facets(hits)}
     
     def _setup_static_files(self):
         """Configura el servido de archivos estáticos."""
@@ -344,17 +816,19 @@ class MCPGalleryAPI:
             signature_file.write_text("-----BEGIN PGP SIGNATURE-----\nExample signature\n-----END PGP SIGNATURE-----")
 
 
-def create_app(data_dir: str = None) -> FastAPI:
+def create_app(data_dir: str = None, storage: str = None, upstream_url: str = None) -> FastAPI:
     """
     Factory function para crear la aplicación FastAPI.
     
     Args:
         data_dir: Directorio de datos personalizado
+        storage: Almacenamiento del catálogo ("sqlite" o "json")
+        upstream_url: Registro a replicar (por defecto MCP_GALLERY_UPSTREAM_URL)
         
     Returns:
         Instancia configurada de FastAPI
     """
-    gallery_api = MCPGalleryAPI(data_dir)
+    gallery_api = MCPGalleryAPI(data_dir, storage, upstream_url)
     return gallery_api.app
 
 
@@ -367,11 +841,25 @@ def main():
     parser.add_argument("--port", type=int, default=8000, help="Puerto a usar")
     parser.add_argument("--data-dir", help="Directorio de datos personalizado")
     parser.add_argument("--reload", action="store_true", help="Habilitar recarga automática")
+    parser.add_argument("--storage", choices=STORAGE_BACKENDS, help="Almacenamiento del catálogo (por defecto sqlite)")
+    parser.add_argument("--export-json", metavar="RUTA", help="Exportar el catálogo a un archivo JSON y salir")
+    parser.add_argument("--mirror", nargs="?", const=UPSTREAM_REGISTRY_URL, metavar="URL",
+                        help="Replicar un registro MCP (por defecto el oficial) y servirlo junto a la galería")
     
     args = parser.parse_args()
     
-    # Crear aplicación
-    app = create_app(args.data_dir)
+    if args.export_json:
+        gallery_api = MCPGalleryAPI(args.data_dir, args.storage)
+        print(f"Catálogo exportado a {gallery_api.storage.export_json(Path(args.export_json))}")
+        gallery_api.storage.close()
+        return
+    
+    # Crear aplicación (con --reload la fábrica lee el almacenamiento y el espejo del entorno)
+    if args.storage:
+        os.environ["MCP_GALLERY_STORAGE"] = args.storage
+    if args.mirror:
+        os.environ["MCP_GALLERY_UPSTREAM_URL"] = args.mirror
+    app = create_app(args.data_dir, args.storage, args.mirror)
     
     # Configurar logging
     print(f"🚀 Iniciando MCP Gallery API en http://{args.host}:{args.port}")
@@ -0,0 +1,392 @@
+"""
+Almacenamiento del catálogo de la API de la Galería MCP
+Dos implementaciones con la misma interfaz:
+- SQLiteStorage: base de datos SQLite en modo WAL. Cada alta o baja escribe
+  una sola fila, así que el coste de una mutación no depende del tamaño del
+  catálogo. gallery.json se mantiene como formato de importación/exportación:
+  si se edita a mano (o lo reescriben las utilidades de importación) se vuelve
+  a importar al arrancar, y se exporta al cerrar la API si hubo cambios. Los
+  cambios de la API aún no exportados se vuelven a aplicar sobre el archivo
+  importado, de modo que una edición manual no los borra. Los IDs pendientes de
+  exportar se guardan en la base de datos en la misma transacción que cada
+  cambio, así que sobreviven a una caída del proceso.
+- JsonFileStorage: el formato anterior (gallery.json completo en cada cambio),
+  ahora con escritura atómica y bloqueo entre procesos.
+
+Los métodos son síncronos y seguros entre hilos: la API los ejecuta fuera del
+bucle de eventos (asyncio.to_thread) y serializa las mutaciones.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from config_store import get_store
+from mcp_gallery_api.pagination import format_timestamp, utc_now
+
+STORAGE_BACKENDS = ("sqlite", "json")
+DEFAULT_BACKEND = "sqlite"
+
+GALLERY_FILE = "gallery.json"
+REMOVED_FILE = "gallery_removed.json"
+DATABASE_FILE = "gallery.db"
+
+
+def _file_mtime(path: Path) -> Optional[float]:
+    try:
+        return path.stat().st_mtime
+    except OSError:
+        return None
+
+
+def stamp_missing_updates(servers: List[Dict], moment: Optional[float] = None):
+    """Asigna `updated_at` a las entradas que no lo tienen (la fecha del archivo de origen, o ahora)."""
+    stamp = format_timestamp(datetime.fromtimestamp(moment, timezone.utc)) if moment else utc_now()
+    for server in servers:
+        if isinstance(server, dict) and not server.get("updated_at"):
+            server["updated_at"] = stamp
+
+
+def _same_entry(stored: Dict, server: Dict) -> bool:
+    """True si la entrada guardada coincide con `server` (sin contar `updated_at`)."""
+    return {k: v for k, v in stored.items() if k != "updated_at"} == \
+        {k: v for k, v in server.items() if k != "updated_at"}
+
+
+class GalleryStorage(ABC):
+    """Interfaz común de los almacenamientos del catálogo (un backend incompleto no se puede instanciar)."""
+
+    @abstractmethod
+    def is_empty(self) -> bool:
+        """True si no hay ningún catálogo guardado."""
+
+    @abstractmethod
+    def load(self) -> Tuple[List[Dict], Dict[str, str]]:
+        """
+        Carga el catálogo completo.
+
+        Returns:
+            Tupla (servidores en orden de alta, {ID eliminado: fecha de la baja})
+        """
+
+    @abstractmethod
+    def insert(self, server: Dict):
+        """Guarda un servidor nuevo (y olvida una baja anterior con el mismo ID)."""
+
+    @abstractmethod
+    def delete(self, server_id: str, removed_at: str):
+        """Elimina un servidor y registra la baja."""
+
+    @abstractmethod
+    def upsert_many(self, servers: List[Dict], updated_at: str) -> Dict[str, int]:
+        """
+        Añade o actualiza varios servidores en una sola transacción.
+
+        Los servidores sin cambios no se tocan; los nuevos o modificados reciben
+        `updated_at` (y se olvida una baja anterior con el mismo ID).
+
+        Returns:
+            Recuento de servidores añadidos, actualizados y sin cambios
+        """
+
+    @abstractmethod
+    def export_json(self, path: Optional[Path] = None) -> Path:
+        """Exporta el catálogo en el formato de gallery.json."""
+
+    def close(self):
+        """Libera los recursos (y exporta los cambios pendientes si procede)."""
+
+
+class JsonFileStorage(GalleryStorage):
+    """Catálogo en gallery.json, reescrito de forma atómica en cada cambio."""
+
+    def __init__(self, data_dir):
+        self.data_dir = Path(data_dir)
+        self.gallery_file = self.data_dir / GALLERY_FILE
+        self._gallery = get_store(self.gallery_file, indent=2)
+        self._removed_store = get_store(self.data_dir / REMOVED_FILE, indent=2)
+        self._lock = threading.Lock()
+        self._servers: List[Dict] = []
+        self._removed: Dict[str, str] = {}
+
+    def is_empty(self) -> bool:
+        return not self._gallery.exists()
+
+    def load(self) -> Tuple[List[Dict], Dict[str, str]]:
+        with self._lock:
+            servers = self._gallery.read(default=[])
+            stamp_missing_updates(servers, _file_mtime(self.gallery_file))
+            self._servers = list(servers)
+            self._removed = dict(self._removed_store.read(default={}))
+            return servers, dict(self._removed)
+
+    def _mutate(self, mutator):
+        """
+        Aplica un cambio sobre el contenido actual de gallery.json, bajo el lock del
+        archivo: otro proceso (p. ej. una importación) puede haberlo reescrito.
+        """
+        state = {}
+
+        def apply(gallery: List[Dict]):
+            state["servers"] = gallery
+            return mutator(gallery)
+
+        result = self._gallery.update(apply, default=[])
+        self._servers = state["servers"]
+        return result
+
+    def _forget_removed(self, server_ids):
+        self._removed = dict(self._removed_store.read(default={}))
+        forgotten = [server_id for server_id in server_ids if self._removed.pop(server_id, None)]
+        if forgotten:
+            self._removed_store.write(self._removed)
+
+    def insert(self, server: Dict):
+        with self._lock:
+            self._mutate(lambda gallery: gallery.append(server))
+            self._forget_removed([server["id"]])
+
+    def delete(self, server_id: str, removed_at: str):
+        with self._lock:
+            def remove(gallery: List[Dict]):
+                gallery[:] = [server for server in gallery if server.get("id") != server_id]
+            self._mutate(remove)
+            self._removed = dict(self._removed_store.read(default={}))
+            self._removed[server_id] = removed_at
+            self._removed_store.write(self._removed)
+
+    def upsert_many(self, servers: List[Dict], updated_at: str) -> Dict[str, int]:
+        counts = {"added": 0, "updated": 0, "unchanged": 0}
+        changed = []
+
+        def apply(gallery: List[Dict]):
+            positions = {server.get("id"): i for i, server in enumerate(gallery)}
+            for server in servers:
+                position = positions.get(server["id"])
+                if position is None:
+                    positions[server["id"]] = len(gallery)
+                    gallery.append({**server, "updated_at": updated_at})
+                    counts["added"] += 1
+                elif _same_entry(gallery[position], server):
+                    counts["unchanged"] += 1
+                    continue
+                else:
+                    gallery[position] = {**server, "updated_at": updated_at}
+                    counts["updated"] += 1
+                changed.append(server["id"])
+            return bool(changed)
+
+        with self._lock:
+            self._mutate(apply)
+            if changed:
+                self._forget_removed(changed)
+        return counts
+
+    def export_json(self, path: Optional[Path] = None) -> Path:
+        with self._lock:
+            target = Path(path) if path else self.gallery_file
+            if target != self.gallery_file:
+                get_store(target, indent=2).write(self._servers)
+            return target
+
+
+class SQLiteStorage(GalleryStorage):
+    """Catálogo en SQLite (WAL), con gallery.json como formato de intercambio."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS servers (
+            id TEXT PRIMARY KEY,
+            position INTEGER NOT NULL,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS servers_position ON servers(position);
+        CREATE TABLE IF NOT EXISTS removed (
+            id TEXT PRIMARY KEY,
+            removed_at TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+        -- IDs con cambios de la API aún no exportados a gallery.json (sobreviven a una caída)
+        CREATE TABLE IF NOT EXISTS pending (
+            id TEXT PRIMARY KEY
+        );
+    """
+
+    def __init__(self, data_dir, database: Optional[Path] = None):
+        self.data_dir = Path(data_dir)
+        self.gallery_file = self.data_dir / GALLERY_FILE
+        self.database = Path(database) if database else self.data_dir / DATABASE_FILE
+        self._lock = threading.Lock()
+
+        # Una conexión compartida: las llamadas llegan desde los hilos del executor, serializadas por _lock
+        self._conn = sqlite3.connect(str(self.database), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")  # Con WAL sigue siendo duradero ante caídas del proceso
+        self._conn.executescript(self.SCHEMA)
+
+    def _meta(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str):
+        self._conn.execute("INSERT OR REPLACE INTO meta(key, value) VALUES (?, ?)", (key, value))
+
+    def _mark_pending(self, server_ids: Iterable[str]):
+        """Registra cambios sin exportar (dentro de la transacción de la mutación)."""
+        self._conn.executemany("INSERT OR IGNORE INTO pending(id) VALUES (?)", ((i,) for i in server_ids))
+
+    def _pending_entries(self) -> Dict[str, Optional[Dict]]:
+        """Cambios aún no exportados: ID -> entrada actual (None si se eliminó)."""
+        return {server_id: json.loads(data) if data is not None else None for server_id, data in
+                self._conn.execute("SELECT pending.id, servers.data FROM pending "
+                                   "LEFT JOIN servers ON servers.id = pending.id")}
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            return self._meta("synced_mtime") is None and \
+                self._conn.execute("SELECT 1 FROM servers LIMIT 1").fetchone() is None
+
+    def _import_if_newer(self):
+        """
+        Importa gallery.json si es más reciente que la última importación o exportación.
+        Los cambios pendientes de exportar se aplican después sobre lo importado.
+        """
+        mtime = _file_mtime(self.gallery_file)
+        synced = self._meta("synced_mtime")
+        if mtime is None or (synced is not None and mtime <= float(synced)):
+            return
+        with open(self.gallery_file, "r", encoding="utf-8") as f:
+            servers = json.load(f)
+        stamp_missing_updates(servers, mtime)
+        with self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            pending = self._pending_entries()  # Antes de vaciar la tabla: son las entradas de la API
+            self._conn.execute("DELETE FROM servers")
+            # Con IDs repetidos se conserva el primero, como en el índice de la API
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO servers(id, position, data) VALUES (?, ?, ?)",
+                ((server.get("id"), position, json.dumps(server, ensure_ascii=False))
+                 for position, server in enumerate(servers) if isinstance(server, dict)))
+            self._reapply_pending(pending,
+                                  {server.get("id"): server for server in servers if isinstance(server, dict)})
+            self._set_meta("synced_mtime", repr(mtime))
+
+    def _reapply_pending(self, pending: Dict[str, Optional[Dict]], imported: Dict[str, Dict]):
+        """Vuelve a aplicar los cambios de la API no exportados sobre un gallery.json recién importado."""
+        if not pending:
+            return
+        conflicts = sorted(server_id for server_id, server in pending.items() if server_id in imported and
+                           (server is None or not _same_entry(imported[server_id], server)))
+        if conflicts:
+            print(f"gallery.json editado con cambios de la API sin exportar; se conservan los de la API para: "
+                  f"{', '.join(conflicts)}")
+        for server_id, server in pending.items():
+            if server is None:
+                self._conn.execute("DELETE FROM servers WHERE id = ?", (server_id,))
+                continue
+            data = json.dumps(server, ensure_ascii=False)
+            if self._conn.execute("UPDATE servers SET data = ? WHERE id = ?", (data, server_id)).rowcount == 0:
+                self._conn.execute(
+                    "INSERT INTO servers(id, position, data) "
+                    "VALUES (?, (SELECT COALESCE(MAX(position), -1) + 1 FROM servers), ?)", (server_id, data))
+
+    def load(self) -> Tuple[List[Dict], Dict[str, str]]:
+        with self._lock:
+            self._import_if_newer()
+            servers = [json.loads(data) for (data,) in
+                       self._conn.execute("SELECT data FROM servers ORDER BY position")]
+            removed = dict(self._conn.execute("SELECT id, removed_at FROM removed"))
+            return servers, removed
+
+    def insert(self, server: Dict):
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.execute(
+                "INSERT INTO servers(id, position, data) "
+                "VALUES (?, (SELECT COALESCE(MAX(position), -1) + 1 FROM servers), ?)",
+                (server["id"], json.dumps(server, ensure_ascii=False)))
+            self._conn.execute("DELETE FROM removed WHERE id = ?", (server["id"],))
+            self._mark_pending([server["id"]])
+
+    def delete(self, server_id: str, removed_at: str):
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.execute("DELETE FROM servers WHERE id = ?", (server_id,))
+            self._conn.execute("INSERT OR REPLACE INTO removed(id, removed_at) VALUES (?, ?)",
+                               (server_id, removed_at))
+            self._mark_pending([server_id])
+
+    def upsert_many(self, servers: List[Dict], updated_at: str) -> Dict[str, int]:
+        counts = {"added": 0, "updated": 0, "unchanged": 0}
+        changed: List[str] = []
+        with self._lock:
+            # Un gallery.json editado después de la última sincronización se importa antes
+            self._import_if_newer()
+            with self._conn:
+                self._conn.execute("BEGIN IMMEDIATE")
+                (position,) = self._conn.execute("SELECT COALESCE(MAX(position), -1) FROM servers").fetchone()
+                for server in servers:
+                    row = self._conn.execute("SELECT data FROM servers WHERE id = ?", (server["id"],)).fetchone()
+                    data = json.dumps({**server, "updated_at": updated_at}, ensure_ascii=False)
+                    if row is None:
+                        position += 1
+                        self._conn.execute("INSERT INTO servers(id, position, data) VALUES (?, ?, ?)",
+                                           (server["id"], position, data))
+                        counts["added"] += 1
+                    elif _same_entry(json.loads(row[0]), server):
+                        counts["unchanged"] += 1
+                        continue
+                    else:
+                        self._conn.execute("UPDATE servers SET data = ? WHERE id = ?", (data, server["id"]))
+                        counts["updated"] += 1
+                    self._conn.execute("DELETE FROM removed WHERE id = ?", (server["id"],))
+                    changed.append(server["id"])
+                self._mark_pending(changed)
+        return counts
+
+    def export_json(self, path: Optional[Path] = None) -> Path:
+        with self._lock:
+            target = Path(path) if path else self.gallery_file
+            servers = [json.loads(data) for (data,) in
+                       self._conn.execute("SELECT data FROM servers ORDER BY position")]
+            get_store(target, indent=2).write(servers)
+            if target == self.gallery_file:
+                # La exportación no debe provocar una reimportación en el próximo arranque
+                with self._conn:
+                    self._set_meta("synced_mtime", repr(_file_mtime(target)))
+                    self._conn.execute("DELETE FROM pending")
+            return target
+
+    def close(self):
+        with self._lock:
+            dirty = self._conn.execute("SELECT 1 FROM pending LIMIT 1").fetchone() is not None
+        if dirty:
+            self.export_json()
+        with self._lock:
+            self._conn.close()
+
+
+def open_storage(data_dir, backend: Optional[str] = None) -> GalleryStorage:
+    """
+    Crea el almacenamiento del catálogo.
+
+    Args:
+        data_dir: Directorio de datos de la galería
+        backend: "sqlite" o "json" (por defecto MCP_GALLERY_STORAGE o sqlite)
+
+    Raises:
+        ValueError: Si el backend no existe
+    """
+    backend = (backend or os.environ.get("MCP_GALLERY_STORAGE") or DEFAULT_BACKEND).lower()
+    if backend == "sqlite":
+        return SQLiteStorage(data_dir)
+    if backend == "json":
+        return JsonFileStorage(data_dir)
+    raise ValueError(f"Almacenamiento desconocido: {backend} (disponibles: {', '.join(STORAGE_BACKENDS)})")
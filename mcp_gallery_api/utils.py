@@ -4,24 +4,131 @@ Utilidades para la gestión de la API de Galería MCP
 
 import json
 import hashlib
+import os
+import re
+import time
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterable, List, Optional, Tuple
 import shutil
 
+from requests.adapters import HTTPAdapter
+
+from config_store import get_store
+from mcp_gallery_api.pagination import utc_now
+from mcp_gallery_api.storage import GalleryStorage, open_storage
+
+try:
+    from jsonschema import validators
+    from jsonschema.exceptions import best_match
+except ImportError:
+    validators = None
+
+# Campos mínimos de un manifest MCP
+REQUIRED_MANIFEST_FIELDS = ["name", "version"]
+
+MANIFEST_SCHEMA_FILE = Path(__file__).parent.parent / "mcp_server_schema.json"
+GITHUB_API_URL = "https://api.github.com"
+GITHUB_CACHE_FILE = "github_manifest_cache.json"
+GITHUB_IMPORT_WORKERS = 16
+GITHUB_TIMEOUT = (5, 15)  # Conexión y lectura, en segundos
+MAX_MANIFEST_BYTES = 1024 * 1024
+
+
+def check_manifest_fields(manifest) -> tuple[bool, str]:
+    """
+    Comprueba que un manifest ya decodificado tenga los campos requeridos.
+    
+    Returns:
+        Tupla (es_válido, mensaje)
+    """
+    if not isinstance(manifest, dict):
+        return False, "El manifest no es un objeto JSON"
+    for field in REQUIRED_MANIFEST_FIELDS:
+        if field not in manifest:
+            return False, f"Campo requerido faltante en manifest: {field}"
+    return True, "Manifest válido"
+
+
+@lru_cache(maxsize=None)
+def manifest_schema_validator():
+    """
+    Validador compilado de mcp_server_schema.json (se construye una vez por proceso).
+    
+    Returns:
+        Validador de jsonschema, o None si jsonschema o el esquema no están disponibles
+    """
+    if validators is None or not MANIFEST_SCHEMA_FILE.exists():
+        return None
+    schema = json.loads(MANIFEST_SCHEMA_FILE.read_text(encoding="utf-8"))
+    validator_cls = validators.validator_for(schema)
+    validator_cls.check_schema(schema)
+    return validator_cls(schema)
+
+
+def validate_manifest_schema(manifest) -> Tuple[bool, str]:
+    """
+    Valida un manifest ya decodificado contra mcp_server_schema.json.
+    
+    Sin jsonschema solo se comprueban los campos requeridos.
+    
+    Returns:
+        Tupla (es_válido, mensaje)
+    """
+    validator = manifest_schema_validator()
+    if validator is None:
+        return check_manifest_fields(manifest)
+    error = best_match(validator.iter_errors(manifest))
+    if error is not None:
+        location = "/".join(str(part) for part in error.path)
+        message = error.message
+        if error.validator in ("anyOf", "oneOf") and error.context:
+            # El mensaje original repite el manifest completo: mostrar las alternativas
+            message = "se requiere una de estas condiciones: " + \
+                "; ".join(sorted({alternative.message for alternative in error.context}))
+        return False, f"Manifest inválido{f' en {location}' if location else ''}: {message}"
+    return True, "Manifest válido"
+
+
+def parse_github_repo(repo: str) -> str:
+    """
+    Normaliza un repositorio de GitHub ("owner/repo" o su URL) a "owner/repo".
+    
+    Raises:
+        ValueError: Si no es un repositorio de GitHub
+    """
+    match = re.fullmatch(r"(?:https?://(?:www\.)?github\.com/)?([\w.-]+)/([\w.-]+?)(?:\.git)?/?", repo.strip())
+    if not match or ("://" in repo and "github.com" not in repo):
+        raise ValueError(f"Solo se soportan repositorios de GitHub: {repo}")
+    return f"{match.group(1)}/{match.group(2)}"
+
 
 class GalleryDataManager:
     """Gestor de datos para la galería MCP"""
     
-    def __init__(self, data_dir: Path):
+    def __init__(self, data_dir: Path, github_api_url: str = GITHUB_API_URL, storage=None):
+        """
+        Args:
+            data_dir: Directorio de datos de la galería
+            github_api_url: URL base de la API de GitHub
+            storage: "sqlite", "json" o una instancia de GalleryStorage donde guardar
+                las importaciones (por defecto MCP_GALLERY_STORAGE o sqlite, abierto en cada guardado)
+        """
         self.data_dir = data_dir
+        self.storage = storage
         self.gallery_file = data_dir / "gallery.json"
         self.static_dir = data_dir / "static"
+        self.github_api_url = github_api_url.rstrip("/")
+        self.github_cache_file = data_dir / GITHUB_CACHE_FILE
     
     def import_from_github(self, repo_url: str, manifest_path: str = "manifest.json") -> Dict:
         """
         Importa un servidor MCP desde un repositorio de GitHub.
         
+        Para varios repositorios usar import_many_from_github (en paralelo y en un solo guardado).
+        
         Args:
             repo_url: URL del repositorio de GitHub
             manifest_path: Ruta al manifest dentro del repo
@@ -29,46 +136,172 @@ class GalleryDataManager:
         Returns:
             Datos del servidor importado
         """
-        try:
-            # Extraer info del repo
-            if "github.com" not in repo_url:
-                raise ValueError("Solo se soportan repositorios de GitHub")
+        report = self.import_many_from_github([repo_url], manifest_path, validate=False, upsert=False)
+        if report["errors"]:
+            raise Exception(f"Error importando desde GitHub: {report['errors'][repo_url]}")
+        return report["servers"][0]
+    
+    def import_many_from_github(self, repos: Iterable[str], manifest_path: str = "manifest.json",
+                                max_workers: int = GITHUB_IMPORT_WORKERS, validate: bool = True,
+                                upsert: bool = True, token: Optional[str] = None) -> Dict:
+        """
+        Importa servidores MCP desde muchos repositorios de GitHub en una sola pasada.
+        
+        Los manifest se descargan en paralelo con un pool de conexiones compartido.
+        Las peticiones son condicionales (ETag / Last-Modified guardados en
+        github_manifest_cache.json): un manifest sin cambios se confirma con un 304,
+        que además no consume cuota de la API de GitHub. El checksum SHA-256 se
+        calcula mientras se descarga el contenido, y los servidores importados se
+        guardan en gallery.json en una única escritura.
+        
+        Args:
+            repos: Repositorios ("owner/repo" o URL de GitHub)
+            manifest_path: Ruta al manifest dentro de cada repo
+            max_workers: Descargas simultáneas
+            validate: Validar cada manifest contra mcp_server_schema.json
+            upsert: Guardar los servidores importados en gallery.json
+            token: Token de GitHub (por defecto GITHUB_TOKEN)
             
-            # Convertir a URL de API
-            repo_path = repo_url.replace("https://github.com/", "").replace(".git", "")
-            api_url = f"https://api.github.com/repos/{repo_path}/contents/{manifest_path}"
+        Returns:
+            Diccionario con `servers` (importados, en el orden de `repos`), `errors`
+            (repositorio -> mensaje) y `stats`
+        """
+        started = time.perf_counter()
+        repos = list(dict.fromkeys(repos))
+        cache_store = get_store(self.github_cache_file, indent=0)
+        try:
+            cache = cache_store.read(default={})
+        except ValueError:
+            cache = {}
+        
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers, max_retries=1)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update({"Accept": "application/vnd.github.raw+json",
+                                "X-GitHub-Api-Version": "2022-11-28"})
+        token = token or os.environ.get("GITHUB_TOKEN")
+        if token:
+            session.headers["Authorization"] = f"Bearer {token}"
+        
+        def fetch(repo: str) -> Tuple[Optional[Dict], Optional[Dict], Optional[str]]:
+            try:
+                repo_path = parse_github_repo(repo)
+                api_url = f"{self.github_api_url}/repos/{repo_path}/contents/{manifest_path.lstrip('/')}"
+                entry = self._fetch_manifest(session, api_url, cache.get(api_url))
+                manifest = entry["manifest"]
+                valid, message = validate_manifest_schema(manifest) if validate else check_manifest_fields(manifest)
+                if not valid:
+                    return None, entry, message
+                server = self._manifest_to_server(
+                    manifest, f"https://github.com/{repo_path}",
+                    manifest_url=f"https://raw.githubusercontent.com/{repo_path}/HEAD/{manifest_path.lstrip('/')}",
+                    checksum=entry["checksum"])
+                return server, entry, None
+            except requests.RequestException as e:
+                return None, None, f"Error descargando el manifest: {e}"
+            except (ValueError, KeyError) as e:
+                return None, None, str(e)
+        
+        with session, ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="github-import") as pool:
+            results = list(pool.map(fetch, repos))
+        
+        servers, errors = [], {}
+        stats = {"requested": len(repos), "imported": 0, "not_modified": 0, "failed": 0}
+        for repo, (server, entry, error) in zip(repos, results):
+            if entry is not None:
+                stats["not_modified"] += entry.pop("not_modified")
+                cache[entry["url"]] = entry
+            if error:
+                errors[repo] = error
+                stats["failed"] += 1
+            else:
+                servers.append(server)
+                stats["imported"] += 1
+        cache_store.write(cache)
+        
+        if upsert and servers:
+            stats.update(self.upsert_servers(servers))
+        stats["duration_s"] = round(time.perf_counter() - started, 3)
+        return {"servers": servers, "errors": errors, "stats": stats}
+    
+    @staticmethod
+    def _fetch_manifest(session: requests.Session, api_url: str, cached: Optional[Dict]) -> Dict:
+        """
+        Descarga un manifest (condicional si hay una copia en caché) y calcula su checksum al vuelo.
+        
+        Returns:
+            Entrada de caché con `url`, `etag`, `last_modified`, `checksum`, `manifest` y `not_modified`
             
-            # Descargar manifest
-            response = requests.get(api_url)
+        Raises:
+            requests.RequestException: Si la descarga falla
+            ValueError: Si el manifest es demasiado grande o no es JSON válido
+        """
+        headers = {}
+        if cached:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+        
+        with session.get(api_url, headers=headers, stream=True, timeout=GITHUB_TIMEOUT) as response:
+            if response.status_code == 304 and cached:
+                response.content  # Consumir la respuesta vacía: la conexión vuelve al pool en lugar de cerrarse
+                return {**cached, "not_modified": True}
             response.raise_for_status()
-            
-            # Decodificar contenido base64
-            import base64
-            content = base64.b64decode(response.json()["content"]).decode('utf-8')
-            manifest = json.loads(content)
-            
-            # Crear entrada de servidor
-            server_data = self._manifest_to_server(manifest, repo_url)
-            
-            return server_data
-            
-        except Exception as e:
-            raise Exception(f"Error importando desde GitHub: {e}")
+            hasher = hashlib.sha256()
+            chunks, size = [], 0
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                size += len(chunk)
+                if size > MAX_MANIFEST_BYTES:
+                    raise ValueError(f"Manifest demasiado grande (más de {MAX_MANIFEST_BYTES} bytes)")
+                hasher.update(chunk)
+                chunks.append(chunk)
+            etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+        
+        try:
+            manifest = json.loads(b"".join(chunks).decode("utf-8"))
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            raise ValueError("El manifest no es un JSON válido")
+        return {"url": api_url, "etag": etag, "last_modified": last_modified,
+                "checksum": f"sha256:{hasher.hexdigest()}", "manifest": manifest, "not_modified": False}
+    
+    def upsert_servers(self, servers: List[Dict]) -> Dict[str, int]:
+        """
+        Añade o actualiza servidores en el almacenamiento de la galería en una sola transacción.
+        
+        Se usa el mismo almacenamiento que la API (SQLite o gallery.json), así una
+        importación con la API en marcha no se pierde cuando esta exporta su
+        catálogo. Los servidores sin cambios no se tocan; los nuevos o modificados
+        reciben `updated_at`. Si nada cambia, gallery.json no se reescribe.
+        
+        Returns:
+            Recuento de servidores añadidos, actualizados y sin cambios
+        """
+        if isinstance(self.storage, GalleryStorage):
+            return self.storage.upsert_many(servers, utc_now())
+        storage = open_storage(self.data_dir, self.storage)
+        try:
+            return storage.upsert_many(servers, utc_now())
+        finally:
+            storage.close()
     
-    def _manifest_to_server(self, manifest: Dict, repo_url: str) -> Dict:
+    def _manifest_to_server(self, manifest: Dict, repo_url: str, manifest_url: Optional[str] = None,
+                            checksum: Optional[str] = None) -> Dict:
         """Convierte un manifest MCP a formato de servidor de galería."""
         
         server_id = manifest.get("name", "unknown-server")
+        repo_path = "/".join(repo_url.rstrip("/").split("/")[-2:])
         
         return {
             "id": server_id,
             "name": manifest.get("description", server_id.title()),
             "description": manifest.get("description", "Servidor MCP"),
             "icon": "https://github.com/favicon.ico",  # Icono por defecto
-            "manifest_url": f"https://raw.githubusercontent.com/{repo_url.split('/')[-2:]}/main/manifest.json",
+            "manifest_url": manifest_url or f"https://raw.githubusercontent.com/{repo_path}/HEAD/manifest.json",
             "version": manifest.get("version", "1.0.0"),
             "min_client_version": "1.0.0",
-            "checksum": "sha256:placeholder",  # Se calcularía en un proceso real
+            "checksum": checksum or "sha256:placeholder",
             "signature_url": "",
             "tags": manifest.get("tags", ["community"]),
             "repository": repo_url,
@@ -164,12 +397,7 @@ class ServerValidator:
             manifest = response.json()  # Necesario para validación posterior
             
             # Verificar campos básicos requeridos
-            required = ["name", "version"]
-            for field in required:
-                if field not in manifest:
-                    return False, f"Campo requerido faltante en manifest: {field}"
-            
-            return True, "Manifest válido"
+            return check_manifest_fields(manifest)
             
         except requests.RequestException as e:
             return False, f"Error accediendo al manifest: {e}"
@@ -183,6 +411,9 @@ class ServerValidator:
         """
         Verifica el estado de salud de un servidor MCP.
         
+        Para revisar el catálogo completo (en paralelo y con historial) usar
+        mcp_gallery_api.health_crawler.HealthCrawler.
+        
         Returns:
             Tupla (saludable, info_salud)
         """
@@ -13,7 +13,14 @@ from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 from assets.logging import PersistentLogger
+from config_store import get_store
 from jsonschema import validate, ValidationError
+from pgp_keyring import PGPKeyring
+from gallery_batch_installer import BatchInstaller
+from gallery_status_index import InstallationStatusIndex
+from staged_download import DownloadError, StagedFile, download_to_staging, hash_file
+from registry_ingest import (RegistryIngestor, clean_server_name, extract_manifest_url, extract_server_id,
+                             extract_tags, generate_icon_url, normalize_registry_item)
 
 # Importar el gestor de Docker MCP
 try:
@@ -21,6 +28,8 @@ try:
 except ImportError:
     DockerMCPManager = None
 
+GALLERY_API_PAGE_SIZE = 500  # Servidores por página al sincronizar una API de galería
+
 
 class MCPGalleryManager:
     def __init__(self, config_dir: Optional[str] = None, mcp_manager=None, external_logger=None):
@@ -50,6 +59,9 @@ class MCPGalleryManager:
         self.mcps_dir = self.base_dir / "mcps"
         self.installed_servers_file = self.base_dir / "installed_servers.json"
         self.public_keys_dir = self.base_dir / "public_keys"
+        self.downloads_dir = self.base_dir / "downloads"  # Staging de descargas (reanudables)
+        # Índice del estado de instalación (se reconstruye al cambiar los archivos)
+        self.status_index = InstallationStatusIndex(self.installed_servers_file, self._mcp_servers_file())
         
         # Crear directorios si no existen
         self.base_dir.mkdir(parents=True, exist_ok=True)
@@ -64,6 +76,9 @@ class MCPGalleryManager:
             log_dir = self.base_dir / "logs"
             log_dir.mkdir(exist_ok=True)
             self.logger = PersistentLogger(log_dir=str(log_dir))
+        self.status_index.logger = self.logger
+        # Claves públicas parseadas una vez y veredictos de firma en caché
+        self.keyring = PGPKeyring(self.public_keys_dir, logger=self.logger)
         
         # Rutas de archivos de datos
         self.fallback_data_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gallery_fallback.json")
@@ -73,6 +88,12 @@ class MCPGalleryManager:
         # API endpoints
         self.official_api_url = "https://registry.modelcontextprotocol.io/v0/servers"
         self.fallback_api_url = os.environ.get("MCP_REGISTRY_FALLBACK_URL", "http://localhost:8000")  # Configurable desde .env
+        # API de galería propia o espejo (opcional): se sincroniza de forma incremental
+        self.gallery_api_url = os.environ.get("MCP_GALLERY_API_URL")
+        self.gallery_api_cache_file = self.base_dir / "gallery_api_cache.json"
+        self.gallery_api_mirror = None  # Registro que replica la API de galería (X-Registry-Mirror), si lo hace
+        self.http_session = requests.Session()  # Conexiones keep-alive para la paginación del registro
+        self.registry_progress_callback = None  # Opcional: recibe el progreso de la ingesta del registro
         
         # Inicializar gestor de Docker MCP si está disponible
         self.docker_manager = None
@@ -88,9 +109,7 @@ class MCPGalleryManager:
     def get_installed_servers(self) -> Dict:
         """Obtiene la lista de servidores instalados localmente."""
         try:
-            if self.installed_servers_file.exists():
-                with open(self.installed_servers_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+            return self._installed_store().read(default={})
         except Exception as e:
             self.logger.error(f"Error leyendo servidores instalados: {e}")
         return {}
@@ -98,10 +117,41 @@ class MCPGalleryManager:
     def save_installed_servers(self, installed_servers: Dict):
         """Guarda la lista de servidores instalados."""
         try:
-            with open(self.installed_servers_file, 'w', encoding='utf-8') as f:
-                json.dump(installed_servers, f, indent=2, ensure_ascii=False)
+            self._installed_store().write(installed_servers)
         except Exception as e:
             self.logger.error(f"Error guardando servidores instalados: {e}")
+        self.status_index.invalidate()
+    
+    def _installed_store(self):
+        """Almacén compartido de installed_servers.json."""
+        return get_store(self.installed_servers_file, indent=2, logger=self.logger)
+    
+    def _mcp_servers_store(self):
+        """Almacén compartido de mcp_servers.json."""
+        return get_store(self._mcp_servers_file(), indent=4, logger=self.logger)
+    
+    def _remove_from_mcp_config(self, server_id: str) -> bool:
+        """
+        Elimina un servidor de mcp_servers.json en una sola transacción.
+        
+        Returns:
+            True si el servidor estaba configurado y se eliminó
+        """
+        store = self._mcp_servers_store()
+        if not store.exists():
+            return False
+        
+        def remove(mcp_config):
+            mcp_servers = mcp_config.get("mcpServers", {})
+            if server_id not in mcp_servers:
+                return False
+            del mcp_servers[server_id]
+            return True
+        
+        removed = store.update(remove, default={})
+        if removed:
+            self.status_index.invalidate()
+        return removed
     
     def fetch_available_servers(self) -> List[Dict]:
         """
@@ -110,69 +160,208 @@ class MCPGalleryManager:
         Returns:
             Lista de servidores MCP disponibles en formato normalizado
         """
-        all_servers = []
+        return self.fetch_catalog()["servers"]
+
+    def fetch_catalog(self, etag: Optional[str] = None, last_modified: Optional[str] = None,
+                      cached_official: Optional[List[Dict]] = None) -> Dict:
+        """
+        Obtiene el catálogo combinado (API oficial + galería extendida + Docker).
+        
+        Si se pasan los validadores de una descarga anterior, cada página de la API
+        oficial se pide de forma condicional y, si ninguna ha cambiado (todas 304), se
+        reutiliza `cached_official`. Si la API de galería configurada es un espejo del
+        registro, no se consulta la API oficial.
+        
+        Args:
+            etag: Validador de la última descarga de la API oficial (uno por página)
+            last_modified: Last-Modified de la primera página de la última descarga
+            cached_official: Servidores oficiales de la última descarga
+            
+        Returns:
+            Diccionario con `servers`, `official_names`, `etag`, `last_modified` y `not_modified`
+        """
+        gallery_api_servers = self._load_gallery_api_servers()
+        if gallery_api_servers and self.gallery_api_mirror:
+            # El espejo ya sirve el registro normalizado: sin petición al registro en la ruta crítica
+            self.logger.info(f"Registro oficial servido por el espejo {self.gallery_api_url}")
+            official_servers, new_etag, new_last_modified, status = [], None, None, "mirror"
+        else:
+            official_servers, new_etag, new_last_modified, status = self._fetch_official_servers(etag, last_modified)
+        not_modified = status == "not_modified"
+        if not_modified or (status == "error" and cached_official):
+            # Sin cambios, o sin conexión: conservar la última copia conocida
+            official_servers = list(cached_official or [])
+            new_etag, new_last_modified = etag, last_modified
+
+        all_servers = list(official_servers)
+        all_servers.extend(self._load_extended_servers())
+        all_servers.extend(gallery_api_servers)
+        all_servers.extend(self._get_docker_gallery_servers())
+
+        # Si no hay servidores, usar fallback
+        if not all_servers:
+            all_servers = self._get_fallback_servers()
+        
+        # Eliminar duplicados por nombre
+        unique_servers = {}
+        for server in all_servers:
+            if 'name' in server:
+                unique_servers[server['name']] = server
+        
+        final_servers = list(unique_servers.values())
+        self.logger.info(f"Total de servidores únicos disponibles: {len(final_servers)}")
+        return {
+            "servers": final_servers,
+            "official_names": [server.get("name") for server in official_servers if server.get("name")],
+            "etag": new_etag,
+            "last_modified": new_last_modified,
+            "not_modified": not_modified,
+        }
+
+    def _fetch_official_servers(self, etag: Optional[str] = None,
+                                last_modified: Optional[str] = None) -> Tuple[List[Dict], Optional[str], Optional[str], str]:
+        """
+        Descarga y normaliza todas las páginas de la API oficial.
         
+        Returns:
+            Tupla (servidores, etag, last_modified, estado) con estado "ok",
+            "not_modified" o "error"
+        """
         try:
-            # 1. Obtener desde API oficial
             self.logger.info("Obteniendo lista de servidores MCP desde API oficial...")
-            response = requests.get(self.official_api_url, timeout=15)
-            response.raise_for_status()
+            ingestor = RegistryIngestor(
+                self.official_api_url, session=self.http_session,
+                progress_callback=self.registry_progress_callback, logger=self.logger
+            )
+            result = ingestor.ingest(etag=etag, last_modified=last_modified)
+            if result["not_modified"]:
+                self.logger.info("Catálogo de la API oficial sin cambios (304 en todas las páginas)")
+                return [], etag, last_modified, "not_modified"
             
-            official_data = response.json()
-            official_servers = self._normalize_official_api_response(official_data)
-            all_servers.extend(official_servers)
+            official_servers = result["servers"]
             self.logger.info(f"Obtenidos {len(official_servers)} servidores desde API oficial")
+            return official_servers, result["etag"], result["last_modified"], "ok"
             
         except requests.RequestException as e:
             self.logger.error(f"Error obteniendo servidores desde API oficial: {e}")
         except Exception as e:
             self.logger.error(f"Error procesando respuesta de API oficial: {e}")
-            
+        return [], None, None, "error"
+
+    def _load_extended_servers(self) -> List[Dict]:
+        """Carga los servidores de la galería extendida local."""
+        extended_servers = []
         try:
-            # 2. Cargar galería extendida local
             if os.path.exists(self.extended_gallery_path):
                 with open(self.extended_gallery_path, 'r', encoding='utf-8') as f:
                     extended_data = json.load(f)
                     if 'servers' in extended_data:
                         # Normalizar servidores de galería extendida
-                        extended_servers = []
                         for server in extended_data['servers']:
                             # Agregar estructura _original necesaria para instalación
                             normalized_server = server.copy()
                             normalized_server["_original"] = server
                             extended_servers.append(normalized_server)
                         
-                        all_servers.extend(extended_servers)
                         self.logger.info(f"Cargados {len(extended_servers)} servidores desde galería extendida")
         except Exception as e:
             self.logger.error(f"Error cargando galería extendida: {e}")
+        return extended_servers
 
-        # 3. Agregar servidores Docker si están disponibles
-        if self.docker_manager and self.docker_manager.check_docker_availability():
-            try:
-                docker_servers = self.docker_manager.get_available_docker_servers()
-                # Marcar servidores Docker con tipo especial
-                for server in docker_servers:
-                    server['installation_type'] = 'docker'
-                    server['docker_available'] = True
-                all_servers.extend(docker_servers)
-                self.logger.info(f"Agregados {len(docker_servers)} servidores Docker MCP")
-            except Exception as e:
-                self.logger.error(f"Error obteniendo servidores Docker: {e}")
-
-        # 4. Si no hay servidores, usar fallback
-        if not all_servers:
-            all_servers = self._get_fallback_servers()
+    def sync_gallery_api(self, base_url: Optional[str] = None, page_size: int = GALLERY_API_PAGE_SIZE) -> List[Dict]:
+        """
+        Sincroniza la copia local del catálogo de una API de galería (mcp_gallery_api) o espejo.
         
-        # Eliminar duplicados por nombre
-        unique_servers = {}
-        for server in all_servers:
-            if 'name' in server:
-                unique_servers[server['name']] = server
+        La primera vez se descarga el catálogo completo por páginas; después solo
+        los servidores actualizados desde la última sincronización (`updated_since`)
+        y las bajas de /mcps/removed. Con una API sin paginación se descarga la
+        lista completa en cada llamada. Si la API replica un registro (cabecera
+        X-Registry-Mirror) se anota en `gallery_api_mirror`.
         
-        final_servers = list(unique_servers.values())
-        self.logger.info(f"Total de servidores únicos disponibles: {len(final_servers)}")
-        return final_servers
+        Args:
+            base_url: URL base de la API (por defecto MCP_GALLERY_API_URL)
+            page_size: Servidores por página
+            
+        Returns:
+            Servidores de la API (la última copia conocida si no hay conexión)
+        """
+        base_url = (base_url or self.gallery_api_url or "").rstrip("/")
+        if not base_url:
+            return []
+        store = get_store(self.gallery_api_cache_file, indent=0)
+        try:
+            cache = store.read(default={})
+        except ValueError:
+            cache = {}
+        same_source = cache.get("base_url") == base_url
+        since = cache.get("synced_at") if same_source else None
+        servers = dict(cache.get("servers", {})) if since else {}
+        self.gallery_api_mirror = cache.get("mirror") if same_source else None
+        
+        try:
+            params = {"limit": page_size}
+            if since:
+                params["updated_since"] = since
+            synced_at = None
+            mirror = None
+            changed = 0
+            while True:
+                response = self.http_session.get(f"{base_url}/mcps", params=params, timeout=10)
+                response.raise_for_status()
+                for server in response.json():
+                    servers[server["id"]] = server
+                    changed += 1
+                # La hora del servidor de la primera página marca el punto de la siguiente sincronización
+                synced_at = synced_at or response.headers.get("X-Server-Time")
+                mirror = mirror or response.headers.get("X-Registry-Mirror")
+                next_cursor = response.headers.get("X-Next-Cursor")
+                if not next_cursor:
+                    break
+                params = {"limit": page_size, "cursor": next_cursor}
+            
+            removed = []
+            if since:
+                response = self.http_session.get(f"{base_url}/mcps/removed", params={"since": since}, timeout=10)
+                response.raise_for_status()
+                removed = [server_id for server_id in response.json().get("removed", [])
+                           if servers.pop(server_id, None) is not None]
+            
+            store.write({"base_url": base_url, "synced_at": synced_at, "mirror": mirror, "servers": servers})
+            self.gallery_api_mirror = mirror
+            self.logger.info(f"Galería {base_url} sincronizada: {changed} actualizados, "
+                             f"{len(removed)} eliminados, {len(servers)} en total")
+            return list(servers.values())
+        except requests.RequestException as e:
+            self.logger.error(f"Error sincronizando la galería {base_url}: {e}")
+        except (KeyError, TypeError, ValueError, OSError) as e:
+            self.logger.error(f"Respuesta inválida de la galería {base_url}: {e}")
+        return list(cache.get("servers", {}).values()) if same_source else []
+
+    def _load_gallery_api_servers(self) -> List[Dict]:
+        """Servidores de la API de galería configurada, con la estructura _original necesaria para instalación."""
+        gallery_servers = []
+        for server in self.sync_gallery_api():
+            normalized_server = server.copy()
+            # Las entradas de un espejo conservan los datos del registro (packages/remotes)
+            normalized_server["_original"] = normalized_server.pop("registry", None) or server
+            gallery_servers.append(normalized_server)
+        return gallery_servers
+
+    def _get_docker_gallery_servers(self) -> List[Dict]:
+        """Obtiene los servidores Docker MCP si Docker está disponible (el gestor lo comprueba)."""
+        if not self.docker_manager:
+            return []
+        try:
+            docker_servers = self.docker_manager.get_available_docker_servers()
+            # Marcar servidores Docker con tipo especial
+            for server in docker_servers:
+                server['installation_type'] = 'docker'
+                server['docker_available'] = True
+            self.logger.info(f"Agregados {len(docker_servers)} servidores Docker MCP")
+            return docker_servers
+        except Exception as e:
+            self.logger.error(f"Error obteniendo servidores Docker: {e}")
+            return []
 
     def _get_fallback_servers(self) -> List[Dict]:
         """Carga servidores desde el archivo fallback local."""
@@ -202,153 +391,31 @@ class MCPGalleryManager:
             Lista de servidores en formato normalizado
         """
         normalized_servers = []
-        
         for item in api_data.get("servers", []):
-            server_data = item.get("server", {})
-            meta_data = item.get("_meta", {}).get("io.modelcontextprotocol.registry/official", {})
-            
-            # Solo incluir servidores activos y latest
-            if meta_data.get("status") != "active" or not meta_data.get("isLatest", False):
-                continue
-                
-            # Extraer ID limpio del nombre
-            server_id = self._extract_server_id(server_data.get("name", ""))
-            
-            # Extraer tags desde diferentes fuentes
-            tags = self._extract_tags(server_data)
-            
-            # Determinar manifest URL
-            manifest_url = self._extract_manifest_url(server_data)
-            
-            # Generar ícono basado en tags o tipo
-            icon_url = self._generate_icon_url(tags, server_id)
-            
-            normalized_server = {
-                "id": server_id,
-                "name": self._clean_server_name(server_data.get("name", "")),
-                "description": server_data.get("description", ""),
-                "icon": icon_url,
-                "manifest_url": manifest_url,
-                "version": server_data.get("version", "1.0.0"),
-                "min_client_version": "1.0.0",  # Valor por defecto
-                "checksum": "",  # No disponible en API oficial
-                "signature_url": "",  # No disponible en API oficial
-                "tags": tags,
-                "_original": server_data  # Mantener datos originales para instalación
-            }
-            
-            normalized_servers.append(normalized_server)
-            
+            normalized_server = normalize_registry_item(item)
+            if normalized_server is not None:
+                normalized_servers.append(normalized_server)
         return normalized_servers
 
     def _extract_server_id(self, server_name: str) -> str:
         """Extrae un ID limpio del nombre del servidor."""
-        if not server_name:
-            return "unknown"
-        
-        # Para nombres como "ai.company/server-name", usar "server-name"
-        if "/" in server_name:
-            return server_name.split("/")[-1]
-        
-        # Para nombres como "company.server", usar "server"  
-        if "." in server_name:
-            return server_name.split(".")[-1]
-            
-        return server_name.lower().replace(" ", "-")
+        return extract_server_id(server_name)
 
     def _clean_server_name(self, server_name: str) -> str:
         """Limpia el nombre del servidor para mostrar en UI."""
-        if "/" in server_name:
-            return server_name.split("/")[-1].replace("-", " ").title()
-        return server_name
+        return clean_server_name(server_name)
 
     def _extract_tags(self, server_data: Dict) -> List[str]:
         """Extrae tags del servidor basado en descripción y datos."""
-        tags = []
-        
-        description = server_data.get("description", "").lower()
-        name = server_data.get("name", "").lower()
-        
-        # Tags basados en palabras clave en descripción y nombre
-        tag_keywords = {
-            "filesystem": ["file", "folder", "directory", "filesystem"],
-            "weather": ["weather", "clima", "meteorol"],
-            "github": ["github", "git"],
-            "database": ["database", "sql", "postgres", "mysql", "sqlite"],
-            "api": ["api", "rest", "http"],
-            "search": ["search", "query", "find"],
-            "analytics": ["analytics", "analysis", "statistics"],
-            "commerce": ["commerce", "stripe", "payment", "merchant"],
-            "network": ["network", "pcap", "packet"],
-            "memory": ["memory", "context", "conversation"]
-        }
-        
-        for tag, keywords in tag_keywords.items():
-            if any(keyword in description or keyword in name for keyword in keywords):
-                tags.append(tag)
-        
-        # Tags desde packages
-        packages = server_data.get("packages", [])
-        for package in packages:
-            if package.get("registryType") == "npm":
-                tags.append("nodejs")
-            elif package.get("registryType") == "pypi":
-                tags.append("python")
-            elif package.get("registryType") == "oci":
-                tags.append("docker")
-                
-        # Tags desde remotes
-        remotes = server_data.get("remotes", [])
-        if remotes:
-            tags.append("remote")
-            
-        return list(set(tags)) if tags else ["general"]
+        return extract_tags(server_data)
 
     def _extract_manifest_url(self, server_data: Dict) -> str:
         """Extrae la URL del manifest desde packages o remotes."""
-        # Prioridad: remotes > packages
-        remotes = server_data.get("remotes", [])
-        if remotes:
-            return remotes[0].get("url", "")
-            
-        packages = server_data.get("packages", [])
-        if packages:
-            package = packages[0]
-            registry_type = package.get("registryType", "")
-            identifier = package.get("identifier", "")
-            
-            if registry_type == "npm":
-                return f"https://registry.npmjs.org/{identifier}"
-            elif registry_type == "pypi":
-                return f"https://pypi.org/project/{identifier}/"
-                
-        return ""
+        return extract_manifest_url(server_data)
 
     def _generate_icon_url(self, tags: List[str], server_id: str) -> str:
         """Genera URL de ícono basado en tags."""
-        # Mapeo de tags a iconos genéricos
-        icon_mapping = {
-            "filesystem": "📁",
-            "weather": "🌤️", 
-            "github": "🐙",
-            "database": "🗄️",
-            "api": "🔗",
-            "search": "🔍",
-            "analytics": "📊",
-            "commerce": "🛒",
-            "network": "🌐",
-            "memory": "🧠",
-            "python": "🐍",
-            "nodejs": "📗",
-            "docker": "🐳"
-        }
-        
-        for tag in tags:
-            if tag in icon_mapping:
-                # Retornar data URL con emoji como ícono
-                return f"data:text/plain;charset=utf-8,{icon_mapping[tag]}"
-                
-        return "data:text/plain;charset=utf-8,⚙️"  # Ícono por defecto
+        return generate_icon_url(tags, server_id)
 
     def fetch_mcp_details(self, server_id: str) -> Optional[Dict]:
         """
@@ -507,12 +574,13 @@ class MCPGalleryManager:
             }
         ]
     
-    def verify_checksum(self, content: bytes, expected_checksum: str) -> bool:
+    def verify_checksum(self, content, expected_checksum: str) -> bool:
         """
         Verifica el checksum de un archivo descargado.
         
         Args:
-            content: Contenido del archivo en bytes
+            content: Contenido en bytes, o StagedFile / ruta del archivo descargado.
+                Con un StagedFile se usa el hash calculado durante la descarga.
             expected_checksum: Checksum esperado en formato "algoritmo:hash"
             
         Returns:
@@ -524,16 +592,24 @@ class MCPGalleryManager:
                 return False
                 
             algorithm, expected_hash = expected_checksum.split(":", 1)
+            algorithm = algorithm.lower()
             
             if algorithm not in hashlib.algorithms_available:
                 self.logger.error(f"Algoritmo de hash no soportado: {algorithm}")
                 return False
-                
-            hasher = hashlib.new(algorithm)
-            hasher.update(content)
-            actual_hash = hasher.hexdigest()
             
-            matches = actual_hash == expected_hash
+            if isinstance(content, StagedFile) and content.hexdigest(algorithm):
+                actual_hash = content.hexdigest(algorithm)
+            elif isinstance(content, (StagedFile, Path)):
+                # Algoritmo no calculado al descargar: hashear el archivo por bloques
+                path = content.path if isinstance(content, StagedFile) else content
+                actual_hash = hash_file(path, [algorithm])[algorithm]
+            else:
+                hasher = hashlib.new(algorithm)
+                hasher.update(content)
+                actual_hash = hasher.hexdigest()
+            
+            matches = actual_hash == expected_hash.lower()
             if matches:
                 self.logger.info(f"Checksum verificado correctamente: {algorithm}")
             else:
@@ -545,12 +621,13 @@ class MCPGalleryManager:
             self.logger.error(f"Error verificando checksum: {e}")
             return False
     
-    def verify_pgp_signature(self, content: bytes, signature_url: str, public_key_file: Optional[str] = None) -> Tuple[bool, str]:
+    def verify_pgp_signature(self, content, signature_url: str, public_key_file: Optional[str] = None) -> Tuple[bool, str]:
         """
         Verifica la firma PGP de un archivo.
         
         Args:
-            content: Contenido del archivo a verificar
+            content: Contenido en bytes, o StagedFile / ruta del archivo descargado
+                (se verifica en su sitio, sin copiarlo)
             signature_url: URL de la firma PGP
             public_key_file: Archivo de clave pública (opcional, usa mcp.gpg por defecto)
             
@@ -569,107 +646,21 @@ class MCPGalleryManager:
             else:
                 public_key_file = Path(public_key_file)
             
-            if not public_key_file.exists():
-                return False, f"Archivo de clave pública no encontrado: {public_key_file}"
-            
-            # Crear archivos temporales
-            import tempfile
-            with tempfile.TemporaryDirectory() as temp_dir:
-                temp_path = Path(temp_dir)
-                
-                # Guardar contenido y firma en archivos temporales
-                content_file = temp_path / "content.tmp"
-                signature_file = temp_path / "signature.sig"
-                
-                content_file.write_bytes(content)
-                signature_file.write_bytes(sig_content)
-                
-                # Intentar verificación con diferentes métodos
-                
-                # Método 1: Usar pgpy (si está disponible)
-                success, message = self._verify_with_pgpy(content_file, signature_file, public_key_file)
-                if success is not None:
-                    return success, message
-                
-                # Método 2: Usar gpg command line (si está disponible)
-                success, message = self._verify_with_gpg_cli(content_file, signature_file, public_key_file)
-                if success is not None:
-                    return success, message
-                
-                return False, "No hay herramientas de verificación PGP disponibles"
+            # Clave ya cargada en el llavero y veredicto en caché si el artefacto es conocido
+            success, message = self.keyring.verify(content, sig_content, public_key_file)
+            if success is None:
+                return False, message
+            return success, message
                 
         except Exception as e:
             return False, f"Error verificando firma PGP: {e}"
     
-    def _verify_with_pgpy(self, content_file: Path, signature_file: Path, public_key_file: Path) -> Tuple[Optional[bool], str]:
-        """Verificación usando la librería pgpy de Python."""
-        try:
-            import pgpy
-            
-            # Cargar clave pública
-            with open(public_key_file, 'rb') as kf:
-                public_key, _ = pgpy.PGPKey.from_blob(kf.read())
-            
-            # Cargar firma
-            with open(signature_file, 'rb') as sf:
-                signature = pgpy.PGPSignature.from_blob(sf.read())
-            
-            # Verificar
-            with open(content_file, 'rb') as cf:
-                content = cf.read()
-            
-            # Crear mensaje PGP
-            message = pgpy.PGPMessage.new(content)
-            
-            # Verificar firma
-            if public_key.verify(message, signature):
-                return True, "Firma PGP verificada correctamente"
-            else:
-                return False, "Firma PGP inválida"
-                
-        except ImportError:
-            return None, "pgpy no disponible"
-        except Exception as e:
-            return False, f"Error en verificación pgpy: {e}"
-    
-    def _verify_with_gpg_cli(self, content_file: Path, signature_file: Path, public_key_file: Path) -> Tuple[Optional[bool], str]:
-        """Verificación usando gpg command line."""
-        try:
-            # Verificar si gpg está disponible
-            result = subprocess.run(['gpg', '--version'], 
-                                  capture_output=True, text=True, timeout=5)
-            if result.returncode != 0:
-                return None, "gpg no disponible"
-            
-            # Importar clave pública temporalmente
-            import_result = subprocess.run(
-                ['gpg', '--import', str(public_key_file)],
-                capture_output=True, text=True, timeout=10
-            )
-            
-            # Verificar firma
-            verify_result = subprocess.run([
-                'gpg', '--verify', str(signature_file), str(content_file)
-            ], capture_output=True, text=True, timeout=10)
-            
-            if verify_result.returncode == 0:
-                return True, "Firma PGP verificada con gpg"
-            else:
-                return False, f"Verificación gpg falló: {verify_result.stderr}"
-                
-        except subprocess.TimeoutExpired:
-            return False, "Timeout en verificación gpg"
-        except FileNotFoundError:
-            return None, "gpg no encontrado en PATH"
-        except Exception as e:
-            return False, f"Error en verificación gpg: {e}"
-    
-    def verify_integrity(self, content: bytes, server_info: Dict) -> Tuple[bool, Dict[str, bool], str]:
+    def verify_integrity(self, content, server_info: Dict) -> Tuple[bool, Dict[str, bool], str]:
         """
         Verificación completa de integridad de un archivo.
         
         Args:
-            content: Contenido del archivo
+            content: Contenido en bytes, o StagedFile devuelto por `download_to_staging`
             server_info: Información del servidor con checksums y URLs de firma
             
         Returns:
@@ -727,7 +718,10 @@ class MCPGalleryManager:
     
     def download_file(self, url: str, timeout: int = 30) -> Tuple[bool, Optional[bytes], str]:
         """
-        Descarga un archivo desde una URL.
+        Descarga un archivo desde una URL y lo devuelve en memoria.
+        
+        Pensado para documentos pequeños (manifests, firmas); los artefactos se
+        descargan con `download_to_staging`.
         
         Args:
             url: URL del archivo a descargar
@@ -752,6 +746,65 @@ class MCPGalleryManager:
             self.logger.error(error_msg)
             return False, None, error_msg
     
+    def download_to_staging(self, url: str, timeout: int = 30,
+                            algorithms=("sha256",)) -> Tuple[bool, Optional[StagedFile], str]:
+        """
+        Descarga un artefacto en streaming al directorio de staging.
+        
+        Los hashes se calculan durante la descarga y una transferencia
+        interrumpida se reanuda con HTTP Range (también en un intento posterior).
+        
+        Args:
+            url: URL del artefacto
+            timeout: Timeout en segundos
+            algorithms: Algoritmos de hash a calcular al vuelo
+            
+        Returns:
+            Tupla (éxito, StagedFile, mensaje)
+        """
+        try:
+            self.logger.info(f"Descargando (staging): {url}")
+            staged = download_to_staging(url, self.downloads_dir, session=self.http_session, timeout=timeout,
+                                         algorithms=algorithms, logger=self.logger)
+            return True, staged, f"Descarga exitosa ({staged.size} bytes)"
+        except DownloadError as e:
+            self.logger.error(str(e))
+            return False, None, str(e)
+        except Exception as e:
+            error_msg = f"Error inesperado descargando {url}: {e}"
+            self.logger.error(error_msg)
+            return False, None, error_msg
+    
+    def download_and_verify(self, url: str, server_info: Dict) -> Tuple[bool, Optional[StagedFile], Dict[str, bool], str]:
+        """
+        Descarga un artefacto a staging y verifica su integridad sobre el archivo descargado.
+        
+        Si la verificación falla, el archivo de staging se elimina.
+        
+        Args:
+            url: URL del artefacto
+            server_info: Información del servidor con checksum y URL de firma
+            
+        Returns:
+            Tupla (éxito, StagedFile o None, detalles_verificación, mensaje)
+        """
+        checksum = server_info.get("checksum", "")
+        algorithms = ["sha256"]
+        if ":" in checksum:
+            algorithm = checksum.split(":", 1)[0].lower()
+            if algorithm in hashlib.algorithms_available and algorithm not in algorithms:
+                algorithms.append(algorithm)
+        
+        success, staged, msg = self.download_to_staging(url, algorithms=algorithms)
+        if not success:
+            return False, None, {}, msg
+        
+        verified, details, verify_msg = self.verify_integrity(staged, server_info)
+        if not verified:
+            staged.discard()
+            return False, None, details, verify_msg
+        return True, staged, details, verify_msg
+    
     def install_server(self, server_info: Dict) -> Tuple[bool, str]:
         """
         Instala un servidor MCP según la información de la API oficial.
@@ -775,33 +828,7 @@ class MCPGalleryManager:
                 if installed_version == version:
                     return False, f"El servidor {server_id} v{version} ya está instalado"
             
-            # Obtener datos originales para instalación
-            original_data = server_info.get("_original", {})
-            
-            # Determinar método de instalación
-            packages_data = original_data.get("packages", [])
-            remotes = original_data.get("remotes", [])
-            
-            # Transformar packages si está en formato de gallery_extended.json
-            packages = []
-            if isinstance(packages_data, dict):
-                # Formato gallery_extended.json: {"npm": {"package": "...", "version": "..."}}
-                for registry_type, package_info in packages_data.items():
-                    if registry_type == "npm":
-                        packages.append({
-                            "registryType": "npm",
-                            "identifier": package_info.get("package", ""),
-                            "version": package_info.get("version", "latest")
-                        })
-                    elif registry_type == "pypi":
-                        packages.append({
-                            "registryType": "pypi", 
-                            "identifier": package_info.get("package", ""),
-                            "version": package_info.get("version", "latest")
-                        })
-            elif isinstance(packages_data, list):
-                # Formato API oficial (lista de diccionarios)
-                packages = packages_data
+            packages, remotes = self.get_installation_sources(server_info)
             
             if packages:
                 # Instalación vía package manager (npm, pip, docker)
@@ -820,6 +847,116 @@ class MCPGalleryManager:
             self.logger.error(error_msg)
             return False, error_msg
 
+    def install_servers(self, servers: List[Dict], progress_callback=None,
+                        rollback_on_failure: bool = False, max_workers: int = 3) -> Dict:
+        """
+        Instala o actualiza varios servidores en un solo lote.
+
+        Args:
+            servers: Servidores desde fetch_available_servers()
+            progress_callback: Recibe un dict de progreso por cada cambio de estado
+            rollback_on_failure: Si True, un fallo revierte todo el lote
+            max_workers: Operaciones simultáneas (descargas, verificaciones, pulls)
+
+        Returns:
+            Diccionario con `committed` y `results` por ID de servidor
+        """
+        installer = BatchInstaller(self, max_workers=max_workers, progress_callback=progress_callback,
+                                   rollback_on_failure=rollback_on_failure)
+        return installer.install(servers)
+
+    def get_installation_sources(self, server_info: Dict) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Obtiene los paquetes y remotos desde los que se puede instalar un servidor.
+        
+        Args:
+            server_info: Información del servidor
+            
+        Returns:
+            Tupla (packages, remotes) en el formato de la API oficial
+        """
+        # Obtener datos originales para instalación
+        original_data = server_info.get("_original", {})
+        packages_data = original_data.get("packages", [])
+        remotes = original_data.get("remotes", []) or []
+        
+        # Transformar packages si está en formato de gallery_extended.json
+        packages = []
+        if isinstance(packages_data, dict):
+            # Formato gallery_extended.json: {"npm": {"package": "...", "version": "..."}}
+            for registry_type, package_info in packages_data.items():
+                if registry_type in ("npm", "pypi"):
+                    packages.append({
+                        "registryType": registry_type,
+                        "identifier": package_info.get("package", ""),
+                        "version": package_info.get("version", "latest")
+                    })
+        elif isinstance(packages_data, list):
+            # Formato API oficial (lista de diccionarios)
+            packages = packages_data
+        return packages, remotes
+    
+    def check_package_runtime(self, registry_type: str) -> Tuple[bool, str]:
+        """
+        Verifica que el gestor de paquetes de un tipo de registro esté disponible.
+        
+        Args:
+            registry_type: Tipo de registro ('npm', 'pypi', 'oci')
+            
+        Returns:
+            Tupla (disponible, mensaje)
+        """
+        if registry_type == "npm":
+            try:
+                result = subprocess.run([self._npm_command(), "--version"], capture_output=True, text=True, timeout=10)
+                if result.returncode != 0:
+                    return False, "npm no está instalado o no está en el PATH del sistema"
+            except (subprocess.TimeoutExpired, FileNotFoundError):
+                return False, "npm no está disponible. Por favor instale Node.js y npm primero."
+        elif registry_type == "pypi":
+            try:
+                result = subprocess.run(["pip", "--version"], capture_output=True, text=True, timeout=10)
+                if result.returncode != 0:
+                    return False, "pip no está instalado o no está en el PATH del sistema"
+            except (subprocess.TimeoutExpired, FileNotFoundError):
+                return False, "pip no está disponible. Por favor instale Python y pip primero."
+        elif registry_type != "oci":
+            return False, f"Tipo de registro no soportado: {registry_type}"
+        return True, "disponible"
+    
+    def _npm_command(self) -> str:
+        import platform
+        return "npm.cmd" if platform.system() == "Windows" else "npm"
+    
+    def package_install_command(self, registry_type: str, specs: List[Tuple[str, str]]) -> Optional[List[str]]:
+        """
+        Comando que instala uno o varios paquetes de un mismo gestor.
+        
+        Args:
+            registry_type: Tipo de registro ('npm', 'pypi', 'oci')
+            specs: Lista de (identificador, versión)
+            
+        Returns:
+            Comando como lista, o None si el tipo no está soportado
+        """
+        if registry_type == "npm":
+            return [self._npm_command(), "install", "-g"] + [f"{identifier}@{version}" for identifier, version in specs]
+        if registry_type == "pypi":
+            return ["pip", "install"] + [f"{identifier}=={version}" for identifier, version in specs]
+        if registry_type == "oci" and len(specs) == 1:
+            return ["docker", "pull", specs[0][0]]
+        return None
+    
+    def package_uninstall_command(self, registry_type: str, identifier: str) -> Optional[List[str]]:
+        """Comando que revierte la instalación de un paquete (usado en rollbacks)."""
+        if registry_type == "npm":
+            return [self._npm_command(), "uninstall", "-g", identifier]
+        if registry_type == "pypi":
+            return ["pip", "uninstall", "-y", identifier]
+        if registry_type == "oci":
+            return ["docker", "rmi", identifier]
+        return None
+    
     def _install_package_server(self, server_info: Dict, packages: List[Dict]) -> Tuple[bool, str]:
         """Instala un servidor desde un package manager."""
         try:
@@ -831,35 +968,10 @@ class MCPGalleryManager:
             version = package.get("version", "")
             
             # Verificar disponibilidad del comando antes de ejecutar
-            if registry_type == "npm":
-                # Verificar si npm está disponible (usar npm.cmd en Windows)
-                import platform
-                npm_cmd = "npm.cmd" if platform.system() == "Windows" else "npm"
-                
-                try:
-                    result = subprocess.run([npm_cmd, "--version"], capture_output=True, text=True, timeout=10)
-                    if result.returncode != 0:
-                        return False, "npm no está instalado o no está en el PATH del sistema"
-                except (subprocess.TimeoutExpired, FileNotFoundError):
-                    return False, "npm no está disponible. Por favor instale Node.js y npm primero."
-                
-                cmd = [npm_cmd, "install", "-g", f"{identifier}@{version}"]
-                
-            elif registry_type == "pypi":
-                # Verificar si pip está disponible
-                try:
-                    result = subprocess.run(["pip", "--version"], capture_output=True, text=True, timeout=10)
-                    if result.returncode != 0:
-                        return False, "pip no está instalado o no está en el PATH del sistema"
-                except (subprocess.TimeoutExpired, FileNotFoundError):
-                    return False, "pip no está disponible. Por favor instale Python y pip primero."
-                
-                cmd = ["pip", "install", f"{identifier}=={version}"]
-                
-            elif registry_type == "oci":
-                cmd = ["docker", "pull", identifier]
-            else:
-                return False, f"Tipo de registro no soportado: {registry_type}"
+            available, runtime_msg = self.check_package_runtime(registry_type)
+            if not available:
+                return False, runtime_msg
+            cmd = self.package_install_command(registry_type, [(identifier, version)])
                 
             self.logger.info(f"Ejecutando: {' '.join(cmd)}")
             
@@ -906,12 +1018,10 @@ class MCPGalleryManager:
         except Exception as e:
             return False, f"Error registrando servidor remoto: {str(e)}"
             
-    def _register_installation(self, server_info: Dict, install_details: Dict):
-        """Registra una instalación exitosa en el archivo de servidores instalados."""
-        installed_servers = self.get_installed_servers()
-        
+    def installation_record(self, server_info: Dict, install_details: Dict) -> Dict:
+        """Entrada de installed_servers.json para una instalación."""
         server_id = server_info.get("id") or server_info.get("name", "unknown_server")
-        installed_servers[server_id] = {
+        return {
             "id": server_id,
             "name": server_info.get("name", "Servidor Desconocido"),
             "description": server_info.get("description", ""),
@@ -920,6 +1030,13 @@ class MCPGalleryManager:
             "install_details": install_details,
             "tags": server_info.get("tags", [])
         }
+    
+    def _register_installation(self, server_info: Dict, install_details: Dict):
+        """Registra una instalación exitosa en el archivo de servidores instalados."""
+        installed_servers = self.get_installed_servers()
+        
+        server_id = server_info.get("id") or server_info.get("name", "unknown_server")
+        installed_servers[server_id] = self.installation_record(server_info, install_details)
         
         self.save_installed_servers(installed_servers)
         self.logger.info(f"Instalación de {server_id} registrada exitosamente")
@@ -1013,66 +1130,12 @@ class MCPGalleryManager:
             server_id = server_info.get("id") or server_info.get("name", "unknown_server")
             version = server_info.get("version", "1.0.0")
             
-            # Para servidores locales, verificar si el archivo existe
-            manifest_url = server_info.get("manifest_url", "")
-            local_path = manifest_url.replace("file://", "")
-            
-            # Intentar encontrar el archivo en el proyecto
-            project_root = self.base_dir.parent
-            possible_paths = [
-                project_root / local_path,
-                project_root / f"{server_id}.py",
-                project_root / "weather-server-python" / "weather.py"
-            ]
-            
-            server_file = None
-            for path in possible_paths:
-                if path.exists():
-                    server_file = path
-                    break
-            
-            if not server_file:
-                return False, f"No se encontró el archivo del servidor local: {local_path}"
-            
-            # Crear directorio del servidor
-            server_dir = self.mcps_dir / server_id
-            server_dir.mkdir(parents=True, exist_ok=True)
-            
-            # Crear un manifest básico para el servidor local
-            manifest_data = {
-                "name": server_id,
-                "version": version,
-                "description": server_info["description"],
-                "type": "local",
-                "source_file": str(server_file),
-                "capabilities": {
-                    "tools": [
-                        {
-                            "name": "local_server_tool",
-                            "description": "Herramientas del servidor local"
-                        }
-                    ]
-                }
-            }
-            
-            # Guardar manifest
-            manifest_file = server_dir / "manifest.json"
-            with open(manifest_file, 'w', encoding='utf-8') as f:
-                json.dump(manifest_data, f, indent=2, ensure_ascii=False)
+            success, record, message = self.prepare_local_installation(server_info)
+            if not success:
+                return False, message
             
             # Actualizar registro
-            installed_servers[server_id] = {
-                "version": version,
-                "installed_at": datetime.now().isoformat(),
-                "type": "local",
-                "source_file": str(server_file),
-                "checksum_validated": False,  # No aplica para servidores locales
-                "signature_verified": False,
-                "has_checksum": False,
-                "has_signature": False,
-                "verification_message": "Servidor local - verificación no requerida"
-            }
-            
+            installed_servers[server_id] = record
             self.save_installed_servers(installed_servers)
             
             success_msg = f"Servidor local {server_id} v{version} configurado correctamente"
@@ -1084,6 +1147,82 @@ class MCPGalleryManager:
             self.logger.error(error_msg)
             return False, error_msg
     
+    def prepare_local_installation(self, server_info: Dict) -> Tuple[bool, Optional[Dict], str]:
+        """
+        Prepara la instalación de un servidor local: localiza su archivo y escribe su manifest.
+        
+        No modifica installed_servers.json; el registro se devuelve para que el
+        llamador lo guarde (individualmente o dentro de un lote).
+        
+        Args:
+            server_info: Información del servidor
+            
+        Returns:
+            Tupla (éxito, registro para installed_servers.json, mensaje)
+        """
+        server_id = server_info.get("id") or server_info.get("name", "unknown_server")
+        version = server_info.get("version", "1.0.0")
+        
+        # Para servidores locales, verificar si el archivo existe
+        manifest_url = server_info.get("manifest_url", "")
+        local_path = manifest_url.replace("file://", "")
+        
+        # Intentar encontrar el archivo en el proyecto
+        project_root = self.base_dir.parent
+        possible_paths = [
+            project_root / local_path,
+            project_root / f"{server_id}.py",
+            project_root / "weather-server-python" / "weather.py"
+        ]
+        
+        server_file = None
+        for path in possible_paths:
+            if path.exists():
+                server_file = path
+                break
+        
+        if not server_file:
+            return False, None, f"No se encontró el archivo del servidor local: {local_path}"
+        
+        # Crear directorio del servidor
+        server_dir = self.mcps_dir / server_id
+        server_dir.mkdir(parents=True, exist_ok=True)
+        
+        # Crear un manifest básico para el servidor local
+        manifest_data = {
+            "name": server_id,
+            "version": version,
+            "description": server_info["description"],
+            "type": "local",
+            "source_file": str(server_file),
+            "capabilities": {
+                "tools": [
+                    {
+                        "name": "local_server_tool",
+                        "description": "Herramientas del servidor local"
+                    }
+                ]
+            }
+        }
+        
+        # Guardar manifest
+        manifest_file = server_dir / "manifest.json"
+        with open(manifest_file, 'w', encoding='utf-8') as f:
+            json.dump(manifest_data, f, indent=2, ensure_ascii=False)
+        
+        record = {
+            "version": version,
+            "installed_at": datetime.now().isoformat(),
+            "type": "local",
+            "source_file": str(server_file),
+            "checksum_validated": False,  # No aplica para servidores locales
+            "signature_verified": False,
+            "has_checksum": False,
+            "has_signature": False,
+            "verification_message": "Servidor local - verificación no requerida"
+        }
+        return True, record, "Servidor local preparado"
+    
     def uninstall_server(self, server_id: str) -> Tuple[bool, str]:
         """
         Desinstala un servidor MCP.
@@ -1100,27 +1239,10 @@ class MCPGalleryManager:
             if server_id not in installed_servers:
                 # Verificar si está en mcp_servers.json pero no en installed_servers
                 try:
-                    if self.base_dir.name == "puentellm-mcp" and "Repositorios" in str(self.base_dir):
-                        mcp_servers_file = self.base_dir / "mcp_servers.json"
-                    else:
-                        script_dir = Path(__file__).parent
-                        mcp_servers_file = script_dir / "mcp_servers.json"
-                    
-                    if mcp_servers_file.exists():
-                        with open(mcp_servers_file, 'r', encoding='utf-8') as f:
-                            mcp_config = json.load(f)
-                        
-                        mcp_servers = mcp_config.get("mcpServers", {})
-                        if server_id in mcp_servers:
-                            # Remover de mcp_servers.json
-                            del mcp_servers[server_id]
-                            with open(mcp_servers_file, 'w', encoding='utf-8') as f:
-                                json.dump(mcp_config, f, indent=4, ensure_ascii=False)
-                            
-                            success_msg = f"Servidor {server_id} removido de la configuración"
-                            self.logger.info(success_msg)
-                            return True, success_msg
-                
+                    if self._remove_from_mcp_config(server_id):
+                        success_msg = f"Servidor {server_id} removido de la configuración"
+                        self.logger.info(success_msg)
+                        return True, success_msg
                 except Exception as e:
                     self.logger.error(f"Error verificando mcp_servers.json: {e}")
                 
@@ -1137,23 +1259,8 @@ class MCPGalleryManager:
             
             # También remover de mcp_servers.json si existe
             try:
-                if self.base_dir.name == "puentellm-mcp" and "Repositorios" in str(self.base_dir):
-                    mcp_servers_file = self.base_dir / "mcp_servers.json"
-                else:
-                    script_dir = Path(__file__).parent
-                    mcp_servers_file = script_dir / "mcp_servers.json"
-                
-                if mcp_servers_file.exists():
-                    with open(mcp_servers_file, 'r', encoding='utf-8') as f:
-                        mcp_config = json.load(f)
-                    
-                    mcp_servers = mcp_config.get("mcpServers", {})
-                    if server_id in mcp_servers:
-                        del mcp_servers[server_id]
-                        with open(mcp_servers_file, 'w', encoding='utf-8') as f:
-                            json.dump(mcp_config, f, indent=4, ensure_ascii=False)
-                        self.logger.info(f"Servidor {server_id} también removido de mcp_servers.json")
-            
+                if self._remove_from_mcp_config(server_id):
+                    self.logger.info(f"Servidor {server_id} también removido de mcp_servers.json")
             except Exception as e:
                 self.logger.warning(f"Error removiendo de mcp_servers.json: {e}")
             
@@ -1176,80 +1283,79 @@ class MCPGalleryManager:
         Returns:
             Estado del servidor: 'not_installed', 'installed', 'update_available'
         """
-        # Obtener ID de manera robusta
-        server_id = server_info.get("id") or server_info.get("name", "unknown_server")
-        
-        # Verificar en el registro de instalaciones de la galería
-        installed_servers = self.get_installed_servers()
-        if server_id in installed_servers:
-            installed_version = installed_servers[server_id].get("version", "")
-            current_version = server_info.get("version", "1.0.0")
-            
-            # Comparación simple de versiones
-            if installed_version != current_version:
-                return "update_available"
-            return "installed"
+        return self.status_index.status(server_info)
+
+    def _mcp_servers_file(self) -> Path:
+        """Ubicación de mcp_servers.json según el directorio base."""
+        # El archivo mcp_servers.json está en el directorio del proyecto, no en config
+        # Si base_dir es ~/.config/puentellm-mcp, buscar en el directorio del script
+        if self.base_dir.name == "puentellm-mcp" and "Repositorios" in str(self.base_dir):
+            return self.base_dir / "mcp_servers.json"
+        return Path(__file__).parent / "mcp_servers.json"
+    
+    def mcp_config_entry(self, server_id: str, server_data: Dict, mcp_servers: Dict) -> Optional[Dict]:
+        """
+        Entrada de mcp_servers.json para un servidor instalado desde la galería.
         
-        # Verificar si el servidor está configurado en mcp_servers.json
-        try:
-            # El archivo mcp_servers.json está en el directorio del proyecto, no en config
-            # Si base_dir es el directorio del proyecto, usar directamente
-            # Si base_dir es ~/.config/puentellm-mcp, buscar en el directorio del script
-            if self.base_dir.name == "puentellm-mcp" and "Repositorios" in str(self.base_dir):
-                mcp_servers_file = self.base_dir / "mcp_servers.json"
-            else:
-                # Para el caso ~/.config/puentellm-mcp, asumir el archivo está junto al script
-                script_dir = Path(__file__).parent
-                mcp_servers_file = script_dir / "mcp_servers.json"
-            
-            self.logger.debug(f"Verificando archivo MCP: {mcp_servers_file}")
+        Args:
+            server_id: ID del servidor
+            server_data: Registro del servidor en installed_servers.json
+            mcp_servers: Servidores ya configurados (para elegir un puerto libre)
             
-            if mcp_servers_file.exists():
-                with open(mcp_servers_file, 'r', encoding='utf-8') as f:
-                    mcp_config = json.load(f)
-                    
-                # Verificar si hay un servidor con ID similar o si es un servidor local conocido
-                mcp_servers = mcp_config.get("mcpServers", {})
-                self.logger.debug(f"Servidores en config: {list(mcp_servers.keys())}")
-                self.logger.debug(f"Buscando servidor: {server_id}")
-                
-                # Primero verificar directamente
-                if server_id in mcp_servers:
-                    self.logger.debug(f"Servidor {server_id} encontrado directamente")
-                    return "installed"
-                
-                # Mapear algunos IDs conocidos (galería ID -> mcp_servers.json ID)
-                id_mappings = {
-                    "weather-server-local": "weather-server-python",
-                    "file-manager": "filesystem",  # file-manager de galería = filesystem en config
-                }
-                
-                mapped_id = id_mappings.get(server_id, server_id)
-                self.logger.debug(f"Mapped ID: {server_id} -> {mapped_id}")
-                if mapped_id in mcp_servers:
-                    self.logger.debug(f"Servidor encontrado por mapeo: {mapped_id}")
-                    return "installed"
-                    
-                # Mapear al revés (mcp_servers.json ID -> galería ID)  
-                reverse_mappings = {v: k for k, v in id_mappings.items()}
-                reverse_mapped = reverse_mappings.get(server_id, server_id)
-                self.logger.debug(f"Reverse mapped: {server_id} -> {reverse_mapped}")
-                if reverse_mapped in mcp_servers:
-                    self.logger.debug(f"Servidor encontrado por mapeo reverso: {reverse_mapped}")
-                    return "installed"
-                    
-                # Verificar por patrones comunes
-                for mcp_id in mcp_servers.keys():
-                    if (server_id.replace("-", "").lower() in mcp_id.lower() or
-                        mcp_id.lower() in server_id.replace("-", "").lower()):
-                        self.logger.debug(f"Servidor encontrado por patrón: {server_id} ~ {mcp_id}")
-                        return "installed"
-                        
-        except Exception as e:
-            self.logger.error(f"Error verificando mcp_servers.json: {e}")
+        Returns:
+            Configuración del servidor, o None si su método de instalación no se sincroniza
+        """
+        install_details = server_data.get("install_details", {})
+        install_method = install_details.get("install_method")
+        used_ports = {config.get("port") for config in mcp_servers.values() if config.get("port")}
         
+        if install_method == "remote":
+            # Servidor remoto (SSE o HTTP)
+            url = install_details.get("url", "")
+            if not url:
+                return None
+            # Encontrar un puerto disponible (empezando desde 8081)
+            port = 8081
+            while port in used_ports:
+                port += 1
+            return {
+                "command": "curl",
+                "args": ["-X", "POST", url],
+                "enabled": True,
+                "type": "remote",
+                "url": url,
+                "transport": install_details.get("transport_type") or "streamable-http",
+                "headers": install_details.get("headers", []),
+                "port": port
+            }
         
-        return "not_installed"
+        if install_method == "package":
+            # Servidor de paquete (npm, pip, etc.)
+            package_manager = install_details.get("package_manager", "npx")
+            package_name = install_details.get("package_name", server_id)
+            
+            # Encontrar un puerto disponible
+            port = 8080
+            while port in used_ports:
+                port += 1
+            
+            if package_manager == "npx":
+                return {
+                    "command": "npx",
+                    "args": ["-y", package_name],
+                    "enabled": True,
+                    "type": "package",
+                    "port": port
+                }
+            if package_manager == "pip":
+                return {
+                    "command": "python",
+                    "args": ["-m", package_name],
+                    "enabled": True,
+                    "type": "package",
+                    "port": port
+                }
+        return None
     
     def sync_installed_servers_to_config(self):
         """
@@ -1265,88 +1371,29 @@ class MCPGalleryManager:
                 self.logger.debug("No hay servidores instalados para sincronizar")
                 return 0
             
-            # Buscar el archivo mcp_servers.json
-            if self.base_dir.name == "puentellm-mcp" and "Repositorios" in str(self.base_dir):
-                mcp_servers_file = self.base_dir / "mcp_servers.json"
-            else:
-                script_dir = Path(__file__).parent
-                mcp_servers_file = script_dir / "mcp_servers.json"
-            
-            if not mcp_servers_file.exists():
-                self.logger.warning(f"Archivo mcp_servers.json no encontrado en {mcp_servers_file}")
+            store = self._mcp_servers_store()
+            if not store.exists():
+                self.logger.warning(f"Archivo mcp_servers.json no encontrado en {store.path}")
                 return 0
             
-            # Cargar configuración actual
-            with open(mcp_servers_file, 'r', encoding='utf-8') as f:
-                mcp_config = json.load(f)
-            
-            mcp_servers = mcp_config.get("mcpServers", {})
-            synced_count = 0
-            
-            for server_id, server_data in installed_servers.items():
-                # Verificar si ya está configurado
-                if server_id not in mcp_servers:
-                    # Configurar según el método de instalación
-                    install_method = server_data.get("install_details", {}).get("install_method")
-                    
-                    if install_method == "remote":
-                        # Servidor remoto (SSE o HTTP)
-                        url = server_data.get("install_details", {}).get("url", "")
-                        if url:
-                            # Encontrar un puerto disponible (empezando desde 8081)
-                            used_ports = {config.get("port") for config in mcp_servers.values() if config.get("port")}
-                            port = 8081
-                            while port in used_ports:
-                                port += 1
-                            
-                            mcp_servers[server_id] = {
-                                "command": "curl",
-                                "args": ["-X", "POST", url],
-                                "enabled": True,
-                                "type": "remote",
-                                "url": url,
-                                "port": port
-                            }
-                            synced_count += 1
-                            self.logger.info(f"Servidor remoto {server_id} sincronizado a mcp_servers.json")
-                    
-                    elif install_method == "package":
-                        # Servidor de paquete (npm, pip, etc.)
-                        package_data = server_data.get("install_details", {})
-                        package_manager = package_data.get("package_manager", "npx")
-                        package_name = package_data.get("package_name", server_id)
-                        
-                        # Encontrar un puerto disponible
-                        used_ports = {config.get("port") for config in mcp_servers.values() if config.get("port")}
-                        port = 8080
-                        while port in used_ports:
-                            port += 1
-                        
-                        if package_manager == "npx":
-                            mcp_servers[server_id] = {
-                                "command": "npx",
-                                "args": ["-y", package_name],
-                                "enabled": True,
-                                "type": "package",
-                                "port": port
-                            }
-                        elif package_manager == "pip":
-                            mcp_servers[server_id] = {
-                                "command": "python",
-                                "args": ["-m", package_name],
-                                "enabled": True,
-                                "type": "package",
-                                "port": port
-                            }
-                        
-                        synced_count += 1
-                        self.logger.info(f"Servidor de paquete {server_id} sincronizado a mcp_servers.json")
-            
+            def add_missing(mcp_config):
+                mcp_servers = mcp_config.setdefault("mcpServers", {})
+                added = 0
+                for server_id, server_data in installed_servers.items():
+                    # Verificar si ya está configurado
+                    if server_id not in mcp_servers:
+                        entry = self.mcp_config_entry(server_id, server_data, mcp_servers)
+                        if entry is not None:
+                            mcp_servers[server_id] = entry
+                            added += 1
+                            self.logger.info(f"Servidor {server_id} sincronizado a mcp_servers.json")
+                # Sin cambios no se reescribe el archivo
+                return added or False
+            
+            # Leer, completar y guardar la configuración en una sola transacción
+            synced_count = store.update(add_missing, default={}) or 0
             if synced_count > 0:
-                # Guardar la configuración actualizada
-                with open(mcp_servers_file, 'w', encoding='utf-8') as f:
-                    json.dump(mcp_config, f, indent=4, ensure_ascii=False)
-                
+                self.status_index.invalidate()
                 self.logger.info(f"Sincronizados {synced_count} servidores a mcp_servers.json")
             
             return synced_count
@@ -1379,6 +1426,7 @@ class MCPGalleryManager:
             
             # Guardar clave
             key_file.write_text(key_content, encoding='utf-8')
+            self.keyring.refresh()
             
             self.logger.info(f"Clave pública instalada: {key_name}")
             return True, f"Clave pública '{key_name}' instalada correctamente"
@@ -1448,6 +1496,7 @@ class MCPGalleryManager:
                 return False, f"Clave '{key_name}' no encontrada"
             
             key_file.unlink()
+            self.keyring.refresh()
             
             self.logger.info(f"Clave pública eliminada: {key_name}")
             return True, f"Clave '{key_name}' eliminada correctamente"
@@ -6,14 +6,39 @@ Ventana Tkinter que permite navegar, instalar y gestionar servidores MCP.
 import tkinter as tk
 from tkinter import ttk, messagebox
 from PIL import Image, ImageTk
-import requests
-import io
 import threading
-from typing import Dict
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
 from mcp_gallery_manager import MCPGalleryManager
+from gallery_catalog_cache import GalleryCatalogCache, apply_catalog_diff, catalog_diff_is_empty
+from gallery_search_index import GallerySearchIndex, split_tag_filters
+from gallery_virtual_list import VirtualListLayout, plan_recycling
+from gallery_icon_service import ICON_CACHE_DIR, IconService, inline_icon_text
 
 
 class MCPGalleryWindow:
+    # Espera tras la última pulsación antes de lanzar la búsqueda
+    SEARCH_DEBOUNCE_MS = 150
+    
+    # Geometría de la lista virtual de tarjetas
+    CARD_HEIGHT = 130
+    CARD_PADX = 10
+    CARD_PADY = 5
+    CARD_OVERSCAN = 3
+    MAX_CARD_TAGS = 3
+    
+    # Ícono por defecto y número máximo de PhotoImage en memoria
+    PLACEHOLDER_ICON = "📦"
+    ICON_MEMORY_LIMIT = 200
+    
+    # Texto y color del botón de acción por estado del servidor
+    ACTION_STYLES = {
+        "not_installed": ("Instalar", "#27ae60"),
+        "update_available": ("Actualizar", "#f39c12"),
+        "installed": ("Instalado", "#95a5a6"),
+    }
+
     def __init__(self, parent_window=None, config_dir=None, parent=None, mcp_manager=None, app_config=None, chat_app=None):
         """
         Inicializa la ventana de la galería MCP.
@@ -39,14 +64,24 @@ class MCPGalleryWindow:
         self.app_config = app_config
         self.chat_app = chat_app
         self.logger = self.gallery_manager.logger  # Acceso al logger
+        self.catalog_cache = GalleryCatalogCache(self.gallery_manager)
+        self.gallery_manager.registry_progress_callback = self._on_registry_progress
         
         # Variables de estado
         self.servers_data = []
         self.filtered_servers = []
         self.server_cards = {}
-        self.icons_cache = {}
+        self.icons_cache = OrderedDict()  # ruta de miniatura -> PhotoImage (LRU)
+        self.icon_service = IconService(Path(self.gallery_manager.base_dir) / ICON_CACHE_DIR, logger=self.logger)
+        self.card_layout = VirtualListLayout(self.CARD_HEIGHT + 2 * self.CARD_PADY, overscan=self.CARD_OVERSCAN)
+        self._bound_cards = {}  # fila visible -> tarjeta
+        self._card_pool = []  # tarjetas ocultas listas para reutilizar
+        self._visible_update_pending = False
+        self.search_index = GallerySearchIndex([])
+        self._search_after_id = None
         
         self._create_window()
+        self.window.bind('<Destroy>', self._on_window_destroy, add='+')
         self._create_widgets()
         self._load_servers()
     
@@ -106,6 +141,20 @@ class MCPGalleryWindow:
         )
         refresh_btn.pack(side='right', padx=20, pady=25)
         
+        # Botón para actualizar en lote los servidores con versión nueva
+        self.update_all_btn = tk.Button(
+            header_frame,
+            text="⬆️ Actualizar todos",
+            font=('Segoe UI', 10),
+            command=self._update_all_servers,
+            bg='#f39c12',
+            fg='white',
+            relief='flat',
+            padx=15,
+            pady=5
+        )
+        self.update_all_btn.pack(side='right', padx=0, pady=25)
+        
         # === BARRA DE BÚSQUEDA ===
         search_frame = tk.Frame(self.window, bg='#f9f9f9')
         search_frame.pack(fill='x', padx=20, pady=10)
@@ -146,7 +195,7 @@ class MCPGalleryWindow:
         self.status_label.pack(side='left', padx=10, pady=5)
     
     def _create_scrollable_area(self):
-        """Crea el área de scroll para las tarjetas de servidores."""
+        """Crea el área de scroll (lista virtual) para las tarjetas de servidores."""
         
         # Frame contenedor principal
         main_frame = tk.Frame(self.window, bg='#f9f9f9')
@@ -154,38 +203,58 @@ class MCPGalleryWindow:
         
         # Canvas y scrollbar
         self.canvas = tk.Canvas(main_frame, bg='#f9f9f9', highlightthickness=0)
-        scrollbar = ttk.Scrollbar(main_frame, orient='vertical', command=self.canvas.yview)
-        
-        self.scrollable_frame = tk.Frame(self.canvas, bg='#f9f9f9')
-        
-        # Configurar scroll
-        self.scrollable_frame.bind(
-            '<Configure>',
-            lambda e: self.canvas.configure(scrollregion=self.canvas.bbox('all'))
+        self.scrollbar = ttk.Scrollbar(main_frame, orient='vertical', command=self.canvas.yview)
+        
+        # Cada movimiento del scroll actualiza las tarjetas visibles
+        self.canvas.configure(yscrollcommand=self._on_canvas_scrolled)
+        
+        # Mensaje para búsquedas sin resultados (oculto por defecto)
+        self.empty_text_item = self.canvas.create_text(
+            0, 50,
+            text="No se encontraron servidores",
+            font=('Segoe UI', 12),
+            fill='#7f8c8d',
+            anchor='n',
+            state='hidden'
         )
         
-        # Crear window en canvas y configurar para que se expanda horizontalmente
-        self.canvas_window = self.canvas.create_window((0, 0), window=self.scrollable_frame, anchor='nw')
-        self.canvas.configure(yscrollcommand=scrollbar.set)
-        
-        # Configurar ancho del scrollable_frame para que coincida con el canvas
-        def _configure_scroll_region(event=None):
-            self.canvas.configure(scrollregion=self.canvas.bbox('all'))
-            # Hacer que el scrollable_frame tenga el mismo ancho que el canvas
+        def _on_canvas_configure(event=None):
+            # Ajustar el ancho de las tarjetas al del canvas
             canvas_width = self.canvas.winfo_width()
             if canvas_width > 1:  # Solo si el canvas tiene un tamaño válido
-                self.canvas.itemconfig(self.canvas_window, width=canvas_width)
+                self.canvas.coords(self.empty_text_item, canvas_width // 2, 50)
+                for card in self._bound_cards.values():
+                    self.canvas.itemconfig(card['item'], width=self._card_width())
+                self._update_scroll_region()
+            self._schedule_visible_update()
         
-        self.canvas.bind('<Configure>', _configure_scroll_region)
-        self.scrollable_frame.bind('<Configure>', _configure_scroll_region)
+        self.canvas.bind('<Configure>', _on_canvas_configure)
         
         # Pack components
         self.canvas.pack(side='left', fill='both', expand=True)
-        scrollbar.pack(side='right', fill='y')
+        self.scrollbar.pack(side='right', fill='y')
         
         # Bind mouse wheel
         self._bind_mousewheel()
     
+    def _on_canvas_scrolled(self, first, last):
+        """Sincroniza la scrollbar y programa la actualización de las tarjetas visibles."""
+        self.scrollbar.set(first, last)
+        self._schedule_visible_update()
+    
+    def _schedule_visible_update(self):
+        """Agrupa las actualizaciones de la lista virtual en una por ciclo de eventos."""
+        if not self._visible_update_pending:
+            self._visible_update_pending = True
+            self.window.after_idle(self._update_visible_cards)
+    
+    def _card_width(self) -> int:
+        return max(self.canvas.winfo_width() - 2 * self.CARD_PADX, 200)
+    
+    def _update_scroll_region(self):
+        height = self.card_layout.content_height(len(self.filtered_servers))
+        self.canvas.configure(scrollregion=(0, 0, self.canvas.winfo_width(), height))
+    
     def _bind_mousewheel(self):
         """Configura el scroll con la rueda del ratón."""
         def _on_mousewheel(event):
@@ -201,36 +270,66 @@ class MCPGalleryWindow:
         self.canvas.bind('<Leave>', _unbind_from_mousewheel)
     
     def _load_servers(self):
-        """Carga los servidores disponibles desde la API."""
-        self._update_status("Cargando servidores...")
+        """
+        Muestra al instante el último catálogo guardado y lo revalida en segundo plano.
         
-        print("[DEBUG] _load_servers iniciado")
+        La descarga (API oficial + Docker) nunca se hace en el hilo de Tk; al
+        terminar solo se aplican los cambios respecto a lo que ya se ve.
+        """
+        snapshot = self.catalog_cache.load_snapshot()
+        if snapshot and not self.servers_data:
+            self.servers_data = list(snapshot["servers"])
+            self._on_servers_loaded()
+            self._update_status(f"Cargados {len(self.servers_data)} servidores (actualizando en segundo plano...)")
+        elif not self.servers_data:
+            self._update_status("Cargando servidores...")
         
-        def load_in_thread():
+        def on_revalidated(diff, servers, error):
             try:
-                print("[DEBUG] Iniciando fetch_available_servers...")
-                self.servers_data = self.gallery_manager.fetch_available_servers()
-                print(f"[DEBUG] Servidores obtenidos: {len(self.servers_data)}")
-                print("[DEBUG] Programando callback _on_servers_loaded...")
-                self.window.after(0, self._on_servers_loaded)
-                print("[DEBUG] Callback programado")
-            except Exception as e:
-                print(f"[DEBUG] Error en load_in_thread: {e}")
-                import traceback
-                traceback.print_exc()
-                self.window.after(0, lambda: self._show_error(f"Error cargando servidores: {e}"))
-        
-        print("[DEBUG] Iniciando thread...")
-        # Intentar carga síncrona primero para debug
+                if self.window.winfo_exists():
+                    self.window.after(0, self._on_catalog_revalidated, diff, servers, error)
+            except Exception:
+                pass
+        
+        self.catalog_cache.revalidate(on_revalidated)
+    
+    def _on_registry_progress(self, progress):
+        """Muestra el avance de la descarga del registro (llamado desde el hilo de fondo)."""
+        if progress.get("done"):
+            return
+        message = f"Actualizando catálogo: {progress['servers']} servidores ({progress['pages']} páginas)..."
         try:
-            print("[DEBUG] Intentando carga síncrona...")
-            self.servers_data = self.gallery_manager.fetch_available_servers()
-            print(f"[DEBUG] Carga síncrona exitosa: {len(self.servers_data)} servidores")
+            if self.window.winfo_exists():
+                self.window.after(0, self.status_label.config, {"text": message})
+        except Exception:
+            pass
+    
+    def _on_catalog_revalidated(self, diff, servers, error=None):
+        """Aplica en la lista visible el resultado de la revalidación del catálogo."""
+        if error is not None:
+            if not self.servers_data:
+                self._show_error(f"Error cargando servidores: {error}")
+            else:
+                self._update_status(f"Mostrando catálogo guardado ({len(self.servers_data)} servidores): sin conexión")
+            return
+        
+        if not self.servers_data:
+            self.servers_data = list(servers)
             self._on_servers_loaded()
-        except Exception as e:
-            print(f"[DEBUG] Carga síncrona falló: {e}")
-            # Si falla la síncrona, intentar asíncrona
-            threading.Thread(target=load_in_thread, daemon=True).start()
+            return
+        
+        if catalog_diff_is_empty(diff):
+            self._update_status(f"Cargados {len(self.servers_data)} servidores (catálogo al día)")
+            return
+        
+        self.servers_data = apply_catalog_diff(self.servers_data, diff)
+        # Volver a aplicar la búsqueda activa sobre la lista actualizada
+        self._rebuild_search_index()
+        self._apply_search(reset_scroll=False)
+        self._update_status(
+            f"Catálogo actualizado: {len(diff['added'])} nuevos, {len(diff['changed'])} modificados, "
+            f"{len(diff['removed'])} eliminados ({len(self.servers_data)} servidores)"
+        )
     
     def _on_servers_loaded(self):
         """Callback cuando se cargan los servidores."""
@@ -239,6 +338,7 @@ class MCPGalleryWindow:
         
         self.filtered_servers = self.servers_data.copy()
         print(f"[DEBUG] filtered_servers copiado: {len(self.filtered_servers)} elementos")
+        self._rebuild_search_index()
         
         print("[DEBUG] Iniciando _render_server_cards...")
         self._render_server_cards()
@@ -247,78 +347,72 @@ class MCPGalleryWindow:
         self._update_status(f"Cargados {len(self.servers_data)} servidores")
         print(f"[DEBUG] Status actualizado: Cargados {len(self.servers_data)} servidores")
     
-    def _render_server_cards(self):
-        """Renderiza las tarjetas de servidores en la interfaz."""
-        print("[DEBUG] _render_server_cards iniciado")
-        
-        # Limpiar tarjetas existentes
-        print("[DEBUG] Limpiando widgets existentes...")
-        for widget in self.scrollable_frame.winfo_children():
-            widget.destroy()
-        self.server_cards.clear()
-        print("[DEBUG] Widgets limpiados")
-        
-        if not self.filtered_servers:
-            print("[DEBUG] No hay servidores filtrados, mostrando mensaje")
-            no_results_label = tk.Label(
-                self.scrollable_frame,
-                text="No se encontraron servidores",
-                font=('Segoe UI', 12),
-                bg='#f9f9f9',
-                fg='#7f8c8d'
-            )
-            no_results_label.pack(pady=50)
-            return
-        
-        print(f"[DEBUG] Creando {len(self.filtered_servers)} tarjetas...")
-        # Crear tarjetas
-        for i, server in enumerate(self.filtered_servers):
-            # Obtener ID de manera robusta
-            server_id = server.get('id') or server.get('name', f'server_{i}')
-            print(f"[DEBUG] Creando tarjeta {i+1}/{len(self.filtered_servers)}: {server_id}")
-            try:
-                card = self._create_server_card(server, i)
-                self.server_cards[server_id] = card
-                print(f"[DEBUG] Tarjeta {server_id} creada exitosamente")
-            except Exception as e:
-                print(f"[DEBUG] Error creando tarjeta {server_id}: {e}")
-                import traceback
-                traceback.print_exc()
+    def _render_server_cards(self, reset_scroll: bool = True):
+        """
+        Muestra la lista de servidores filtrados.
         
-        print(f"[DEBUG] Todas las tarjetas creadas")
+        Solo se crean tarjetas para las filas visibles (más overscan); las ya
+        creadas se reutilizan con los datos de sus nuevas filas.
         
-        # Forzar actualización del scroll region
-        self.canvas.update_idletasks()
-        bbox = self.canvas.bbox('all')
-        self.canvas.configure(scrollregion=bbox)
+        Args:
+            reset_scroll: Si True, vuelve al principio de la lista
+        """
+        total = len(self.filtered_servers)
+        self.canvas.itemconfig(self.empty_text_item, state='normal' if total == 0 else 'hidden')
+        self._update_scroll_region()
+        if reset_scroll:
+            self.canvas.yview_moveto(0)
+        self._update_visible_cards(rebind=True)
+    
+    def _update_visible_cards(self, rebind: bool = False):
+        """
+        Asigna tarjetas a las filas visibles, reciclando las que salen del viewport.
         
-        self.window.update_idletasks()
-        print("[DEBUG] _render_server_cards completado")
+        Args:
+            rebind: Si True, vuelve a rellenar también las tarjetas que siguen
+                visibles (la lista filtrada ha cambiado)
+        """
+        self._visible_update_pending = False
+        visible = self.card_layout.visible_range(
+            self.canvas.canvasy(0), self.canvas.winfo_height(), len(self.filtered_servers)
+        )
+        missing, freed = plan_recycling(self._bound_cards, visible)
+        for card in freed:
+            self.canvas.itemconfig(card['item'], state='hidden')
+            self._cancel_card_icon(card)
+            card['server'] = None
+        self._card_pool.extend(freed)
+        
+        for index in missing:
+            card = self._card_pool.pop() if self._card_pool else self._create_server_card()
+            self._bind_server_card(card, self.filtered_servers[index], index)
+            self._bound_cards[index] = card
+        
+        if rebind:
+            for index, card in self._bound_cards.items():
+                if index not in missing:
+                    self._bind_server_card(card, self.filtered_servers[index], index)
+        
+        self.server_cards = {self._get_server_id(card['server']): card for card in self._bound_cards.values()}
     
     def _get_server_id(self, server: Dict) -> str:
         """Obtiene el ID del servidor de forma robusta."""
         return server.get('id') or server.get('name', 'unknown_server')
     
-    def _create_server_card(self, server: Dict, index: int) -> tk.Frame:
+    def _create_server_card(self) -> Dict:
         """
-        Crea una tarjeta visual para un servidor MCP.
+        Crea una tarjeta visual vacía, lista para asignarle un servidor.
         
-        Args:
-            server: Datos del servidor
-            index: Índice en la lista
-            
         Returns:
-            Frame de la tarjeta
+            Diccionario con los widgets de la tarjeta y su item en el canvas
         """
         # Frame principal de la tarjeta
         card_frame = tk.Frame(
-            self.scrollable_frame,
+            self.canvas,
             bg='white',
             relief='solid',
-            bd=1,
-            height=120  # Altura fija para asegurar espacio
+            bd=1
         )
-        card_frame.pack(fill='x', pady=5, padx=10, ipady=10)
         card_frame.pack_propagate(False)  # Mantener altura fija
         
         # Frame izquierdo para ícono
@@ -326,7 +420,7 @@ class MCPGalleryWindow:
         left_frame.pack(side='left', padx=15, pady=10)
         left_frame.pack_propagate(False)
         
-        # Ícono (placeholder por ahora, se carga async)
+        # Ícono (placeholder por ahora)
         icon_label = tk.Label(
             left_frame,
             text="📦",
@@ -335,143 +429,154 @@ class MCPGalleryWindow:
         )
         icon_label.pack()
         
+        # Frame derecho para botones (se empaqueta antes que el central para reservar su ancho)
+        right_frame = tk.Frame(card_frame, bg='#f8f9fa', relief='solid', bd=1, width=160)
+        right_frame.pack(side='right', padx=10, pady=10, fill='y')
+        right_frame.pack_propagate(False)  # Mantener el ancho fijo
+        
         # Frame central para información
         info_frame = tk.Frame(card_frame, bg='white')
         info_frame.pack(side='left', fill='both', expand=True, padx=10)
         
         # Nombre y versión
         title_frame = tk.Frame(info_frame, bg='white')
-        title_frame.pack(fill='x', pady=(0, 5))
-        
-        # Limpiar y validar el nombre del servidor
-        server_name = str(server.get('name', 'Servidor Desconocido')).strip()
-        if not server_name:
-            server_name = 'Servidor Desconocido'
+        title_frame.pack(fill='x', pady=(10, 5))
         
         name_label = tk.Label(
             title_frame,
-            text=server_name,
             font=('Segoe UI', 14, 'bold'),
             bg='white',
             fg='#2c3e50'
         )
         name_label.pack(side='left')
         
-        # Limpiar y validar la versión
-        server_version = str(server.get('version', '1.0.0')).strip()
-        if not server_version:
-            server_version = '1.0.0'
-        
         version_label = tk.Label(
             title_frame,
-            text=f"v{server_version}",
             font=('Segoe UI', 10),
             bg='white',
             fg='#7f8c8d'
         )
         version_label.pack(side='left', padx=(10, 0))
         
-        # Descripción - limpiar y validar texto
-        server_desc = str(server.get('description', 'Sin descripción disponible')).strip()
-        if not server_desc:
-            server_desc = 'Sin descripción disponible'
-        
         desc_label = tk.Label(
             info_frame,
-            text=server_desc,
             font=('Segoe UI', 10),
             bg='white',
             fg='#34495e',
             wraplength=400,
-            justify='left'
+            justify='left',
+            anchor='w'
         )
         desc_label.pack(fill='x', pady=(0, 5))
         
-        # Tags - validar y limpiar
+        # Tags: se crean las etiquetas una vez y se muestran u ocultan al reciclar
         tags_frame = tk.Frame(info_frame, bg='white')
         tags_frame.pack(fill='x', pady=(0, 5))
+        tag_labels = [
+            tk.Label(
+                tags_frame,
+                font=('Segoe UI', 8),
+                bg='#ecf0f1',
+                fg='#7f8c8d',
+                padx=6,
+                pady=2,
+                relief='solid',
+                bd=1
+            )
+            for _ in range(self.MAX_CARD_TAGS)
+        ]
+        
+        card = {
+            'frame': card_frame,
+            'icon_label': icon_label,
+            'name_label': name_label,
+            'version_label': version_label,
+            'desc_label': desc_label,
+            'tag_labels': tag_labels,
+            'server': None,
+            'status': None,
+            'icon_request': None,
+        }
+        self._create_action_button(right_frame, card)
+        card['item'] = self.canvas.create_window(
+            self.CARD_PADX, 0,
+            window=card_frame,
+            anchor='nw',
+            width=self._card_width(),
+            height=self.CARD_HEIGHT,
+            state='hidden'
+        )
+        return card
+    
+    def _bind_server_card(self, card: Dict, server: Dict, index: int):
+        """
+        Rellena una tarjeta (nueva o reciclada) con los datos de un servidor.
         
-        # Obtener tags de forma segura
-        server_tags = server.get('tags', [])
-        if isinstance(server_tags, list):
-            for tag in server_tags[:3]:  # Máximo 3 tags
-                if tag and isinstance(tag, str) and tag.strip():
-                    tag_text = str(tag).strip()
-                    tag_label = tk.Label(
-                        tags_frame,
-                        text=f"#{tag_text}",
-                        font=('Segoe UI', 8),
-                        bg='#ecf0f1',
-                        fg='#7f8c8d',
-                        padx=6,
-                        pady=2,
-                        relief='solid',
-                        bd=1
-                    )
-                    tag_label.pack(side='left', padx=(0, 5))
-        
-        # Frame derecho para botones - Mejorado layout
-        right_frame = tk.Frame(card_frame, bg='#f8f9fa', relief='solid', bd=1)
-        right_frame.pack(side='right', padx=10, pady=10, fill='y')
-        
-        # Configurar el ancho mínimo del frame
-        right_frame.configure(width=160)
-        right_frame.pack_propagate(False)  # Mantener el ancho fijo
+        Args:
+            card: Tarjeta creada por `_create_server_card`
+            server: Datos del servidor
+            index: Fila de la lista filtrada
+        """
+        self.canvas.coords(card['item'], self.CARD_PADX, self.card_layout.row_top(index) + self.CARD_PADY)
+        self.canvas.itemconfig(card['item'], state='normal')
+        if card['server'] is server:
+            # Misma tarjeta en otra posición: solo puede haber cambiado el estado
+            self._update_card_status(card)
+            return
+        card['server'] = server
         
-        # Debug: Log información del frame
-        server_id = self._get_server_id(server)
-        print(f"[DEBUG] Frame derecho creado para {server_id}: configurado con width=160")
+        # Limpiar y validar el nombre del servidor
+        server_name = str(server.get('name', 'Servidor Desconocido')).strip() or 'Servidor Desconocido'
+        card['name_label'].config(text=server_name)
         
-        # Determinar estado y botón
-        status = self.gallery_manager.get_server_status(server)
-        print(f"[DEBUG] Estado obtenido para {server_id}: {status}")
-        self._create_action_button(right_frame, server, status)
+        # Limpiar y validar la versión
+        server_version = str(server.get('version', '1.0.0')).strip() or '1.0.0'
+        card['version_label'].config(text=f"v{server_version}")
         
-        # Cargar ícono en background (deshabilitado por rendimiento)
-        # self._load_server_icon(server, icon_label)
+        # Descripción - limpiar y validar texto
+        server_desc = str(server.get('description', 'Sin descripción disponible')).strip()
+        card['desc_label'].config(text=server_desc or 'Sin descripción disponible')
         
-        return card_frame
+        # Tags - validar y limpiar (máximo MAX_CARD_TAGS)
+        server_tags = server.get('tags', [])
+        tags = [str(tag).strip() for tag in server_tags if isinstance(tag, str) and tag.strip()] \
+            if isinstance(server_tags, list) else []
+        for i, tag_label in enumerate(card['tag_labels']):
+            if i < len(tags[:self.MAX_CARD_TAGS]):
+                tag_label.config(text=f"#{tags[i]}")
+                tag_label.pack(side='left', padx=(0, 5))
+            else:
+                tag_label.pack_forget()
+        
+        self._bind_card_icon(card, server)
+        card['status'] = None
+        self._update_card_status(card)
     
-    def _create_action_button(self, parent: tk.Frame, server: Dict, status: str):
-        """Crea el botón de acción según el estado del servidor."""
-        
-        server_id = self._get_server_id(server)
-        print(f"[DEBUG] _create_action_button llamado para {server_id} (estado: {status})")
-        
-        if status == "not_installed":
-            btn_text = "Instalar"
-            btn_color = "#27ae60"
-            btn_command = lambda s=server: self._install_server(s)
-        elif status == "update_available":
-            btn_text = "Actualizar"  
-            btn_color = "#f39c12"
-            btn_command = lambda s=server: self._update_server(s)
-        else:  # installed
-            btn_text = "Instalado"
-            btn_color = "#95a5a6"
-            btn_command = lambda s=server: self._show_installed_options(s)
-
-        print(f"[DEBUG] Creando botón '{btn_text}' con color {btn_color}")
-        
+    def _update_card_status(self, card: Dict):
+        """Actualiza en su sitio el botón de acción de una tarjeta según el estado del servidor."""
+        status = self.gallery_manager.get_server_status(card['server'])
+        if status == card['status']:
+            return
+        card['status'] = status
+        btn_text, btn_color = self.ACTION_STYLES.get(status, self.ACTION_STYLES['installed'])
+        card['action_btn'].config(text=btn_text, bg=btn_color, activebackground=btn_color)
+    
+    def _create_action_button(self, parent: tk.Frame, card: Dict):
+        """Crea los botones de acción de una tarjeta (el texto se asigna al rellenarla)."""
         # Botón principal con tamaño fijo
         action_btn = tk.Button(
             parent,
-            text=btn_text,
             font=('Segoe UI', 10, 'bold'),
-            bg=btn_color,
             fg='white',
             relief='flat',
             width=12,  # Ancho en caracteres
             height=2,  # Alto en líneas
-            command=btn_command,
+            command=lambda c=card: self._on_card_action(c),
             cursor='hand2',
-            activebackground=btn_color,
             activeforeground='white'
         )
         action_btn.pack(pady=(5, 5), padx=5, fill='x')
         
-        print(f"[DEBUG] Botón principal '{btn_text}' empaquetado")
-        
         # Botón de detalles con tamaño fijo
         details_btn = tk.Button(
             parent,
@@ -482,48 +587,88 @@ class MCPGalleryWindow:
             relief='flat',
             width=12,
             height=1,
-            command=lambda s=server: self._show_server_details(s),
+            command=lambda c=card: c['server'] and self._show_server_details(c['server']),
             cursor='hand2'
         )
         details_btn.pack(pady=(0, 5), padx=5, fill='x')
+        card['action_btn'] = action_btn
+    
+    def _on_card_action(self, card: Dict):
+        """Ejecuta la acción principal de una tarjeta según su estado actual."""
+        server = card['server']
+        if server is None:
+            return
+        if card['status'] == "not_installed":
+            self._install_server(server)
+        elif card['status'] == "update_available":
+            self._update_server(server)
+        else:  # installed
+            self._show_installed_options(server)
+    
+    def _bind_card_icon(self, card: Dict, server: Dict):
+        """
+        Muestra el ícono de un servidor en una tarjeta.
+        
+        Los emoji se pintan al momento; las imágenes remotas se piden al servicio
+        de íconos (solo para tarjetas visibles) y se muestran al llegar.
+        """
+        self._cancel_card_icon(card)
+        icon_url = server.get('icon') or ''
+        icon_label = card['icon_label']
+        icon_label.configure(image='', text=inline_icon_text(icon_url) or self.PLACEHOLDER_ICON)
+        icon_label.image = None
+        if not icon_url or inline_icon_text(icon_url) is not None:
+            return
         
-        print(f"[DEBUG] Botón 'Detalles' empaquetado")
+        def on_icon(url, path, c=card):
+            # Llamado desde el pool de íconos: pasar al hilo de Tk
+            try:
+                self.window.after(0, self._apply_card_icon, c, url, path)
+            except (RuntimeError, tk.TclError):
+                pass  # La ventana ya se cerró
         
-        # Debug: imprimir estado para verificar
-        self.logger.info(f"Botón creado para {server_id}: {btn_text} (estado: {status})")
-        print(f"[DEBUG] Finalizado _create_action_button para {server_id}")
+        card['icon_request'] = (icon_url, on_icon)
+        self.icon_service.request(icon_url, on_icon)
     
-    def _load_server_icon(self, server: Dict, icon_label: tk.Label):
-        """Carga el ícono del servidor de forma asíncrona."""
-        def load_icon():
-            try:
-                icon_url = server.get('icon', '')
-                if not icon_url or icon_url in self.icons_cache:
-                    return
-                
-                response = requests.get(icon_url, timeout=5)
-                response.raise_for_status()
-                
-                # Procesar imagen
-                image = Image.open(io.BytesIO(response.content))
-                image = image.resize((40, 40), Image.Resampling.LANCZOS)
+    def _cancel_card_icon(self, card: Dict):
+        """Retira la petición de ícono pendiente de una tarjeta que se recicla."""
+        if card.get('icon_request'):
+            url, callback = card['icon_request']
+            self.icon_service.cancel(url, callback)
+            card['icon_request'] = None
+    
+    def _apply_card_icon(self, card: Dict, url: str, path: Optional[Path]):
+        """Pinta una miniatura recibida si la tarjeta sigue mostrando ese servidor."""
+        server = card['server']
+        if path is None or server is None or server.get('icon') != url:
+            return
+        card['icon_request'] = None
+        photo = self._photo_for(path)
+        if photo is not None:
+            card['icon_label'].configure(image=photo, text="")
+            card['icon_label'].image = photo  # Mantener referencia
+    
+    def _photo_for(self, path: Path) -> Optional[ImageTk.PhotoImage]:
+        """PhotoImage de una miniatura, con caché LRU acotada en memoria."""
+        key = str(path)
+        photo = self.icons_cache.get(key)
+        if photo is not None:
+            self.icons_cache.move_to_end(key)
+            return photo
+        try:
+            with Image.open(path) as image:
                 photo = ImageTk.PhotoImage(image)
-                
-                # Cachear y actualizar UI
-                self.icons_cache[icon_url] = photo
-                self.window.after(0, lambda: self._update_icon(icon_label, photo))
-                
-            except Exception as e:
-                # Usar ícono por defecto si falla
-                pass
-        
-        if server.get('icon'):
-            threading.Thread(target=load_icon, daemon=True).start()
+        except (OSError, ValueError):
+            return None
+        self.icons_cache[key] = photo
+        if len(self.icons_cache) > self.ICON_MEMORY_LIMIT:
+            self.icons_cache.popitem(last=False)
+        return photo
     
-    def _update_icon(self, label: tk.Label, photo: ImageTk.PhotoImage):
-        """Actualiza el ícono en la UI thread."""
-        label.configure(image=photo, text="")
-        label.image = photo  # Mantener referencia
+    def _on_window_destroy(self, event):
+        """Detiene el pool de íconos al cerrar la ventana."""
+        if event.widget is self.window:
+            self.icon_service.close()
     
     def _install_server(self, server: Dict):
         """Instala un servidor MCP."""
@@ -556,6 +701,45 @@ class MCPGalleryWindow:
         if result:
             self._install_server(server)  # La instalación sobrescribe la versión anterior
     
+    def _update_all_servers(self):
+        """Actualiza en un solo lote todos los servidores con actualización disponible."""
+        servers = [server for server in self.servers_data
+                   if self.gallery_manager.get_server_status(server) == "update_available"]
+        if not servers:
+            messagebox.showinfo("Actualizar Todos", "Todos los servidores instalados están al día")
+            return
+        if not messagebox.askyesno("Actualizar Todos", f"¿Deseas actualizar {len(servers)} servidores?"):
+            return
+        
+        self.update_all_btn.config(state='disabled')
+        
+        def on_progress(event: Dict):
+            text = f"[{event['completed']}/{event['total']}] {event['server_id']}: {event['message']}"
+            self.window.after(0, self._update_status, text)
+        
+        def update():
+            result = self.gallery_manager.install_servers(servers, progress_callback=on_progress)
+            self.window.after(0, lambda: self._on_batch_install_complete(result, servers))
+        
+        threading.Thread(target=update, daemon=True).start()
+    
+    def _on_batch_install_complete(self, result: Dict, servers: List[Dict]):
+        """Callback cuando completa la actualización en lote."""
+        self.update_all_btn.config(state='normal')
+        for server in servers:
+            self._refresh_server_card(server)
+        
+        failed = {server_id: item["message"] for server_id, item in result["results"].items()
+                  if item["status"] in ("failed", "rolled_back")}
+        updated = sum(1 for item in result["results"].values() if item["status"] == "installed")
+        if failed:
+            details = "\n".join(f"• {server_id}: {message}" for server_id, message in failed.items())
+            messagebox.showwarning("Actualizar Todos",
+                                   f"Actualizados: {updated}. Con errores: {len(failed)}\n\n{details}")
+        else:
+            messagebox.showinfo("Actualizar Todos", f"Se actualizaron {updated} servidores")
+        self._update_status("Listo")
+    
     def _show_installed_options(self, server: Dict):
         """Muestra opciones para servidores instalados."""
         server_name = server.get('name', 'Servidor Desconocido')
@@ -659,21 +843,10 @@ class MCPGalleryWindow:
         self._update_status("Listo")
     
     def _refresh_server_card(self, server: Dict):
-        """Refresca una tarjeta específica de servidor."""
-        server_id = self._get_server_id(server)
-        # Buscar el índice del servidor
-        for i, srv in enumerate(self.filtered_servers):
-            srv_id = self._get_server_id(srv)
-            if srv_id == server_id:
-                # Recrear la tarjeta
-                old_card = self.server_cards.get(server_id)
-                if old_card:
-                    old_card.destroy()
-                
-                # Crear nueva tarjeta en la misma posición
-                new_card = self._create_server_card(server, i)
-                self.server_cards[server_id] = new_card
-                break
+        """Refresca en su sitio la tarjeta de un servidor (si está visible)."""
+        card = self.server_cards.get(self._get_server_id(server))
+        if card is not None:
+            self._update_card_status(card)
     
     def _show_server_details(self, server: Dict):
         """Muestra una ventana con detalles del servidor."""
@@ -729,22 +902,40 @@ Estado: {self.gallery_manager.get_server_status(server)}
         text_widget.insert('1.0', details_text)
         text_widget.config(state='disabled')
     
+    def _rebuild_search_index(self):
+        """Reconstruye el índice de búsqueda para la versión actual del catálogo."""
+        self.search_index = GallerySearchIndex(self.servers_data)
+    
     def _on_search_change(self, *args):
-        """Maneja cambios en la búsqueda."""
-        search_term = self.search_var.get().lower()
+        """Maneja cambios en la búsqueda (con debounce para no filtrar en cada pulsación)."""
+        if self._search_after_id is not None:
+            self.window.after_cancel(self._search_after_id)
+        self._search_after_id = self.window.after(self.SEARCH_DEBOUNCE_MS, self._apply_search)
+    
+    def _apply_search(self, reset_scroll: bool = True):
+        """
+        Filtra y ordena los servidores según la búsqueda actual (admite filtros `tag:xxx`).
         
-        if not search_term:
+        Args:
+            reset_scroll: Si True, vuelve al principio de la lista
+        """
+        self._search_after_id = None
+        query, tags = split_tag_filters(self.search_var.get())
+        
+        if not query and not tags:
             self.filtered_servers = self.servers_data.copy()
+            facets = {}
         else:
-            self.filtered_servers = [
-                server for server in self.servers_data
-                if (search_term in server['name'].lower() or
-                    search_term in server['description'].lower() or
-                    any(search_term in tag.lower() for tag in server.get('tags', [])))
-            ]
-        
-        self._render_server_cards()
-        self._update_status(f"Mostrando {len(self.filtered_servers)} de {len(self.servers_data)} servidores")
+            hits = self.search_index.search_ids(query, tags=tags)
+            self.filtered_servers = [self.search_index.servers[doc] for doc, _ in hits]
+            facets = self.search_index.facets(hits)
+        
+        self._render_server_cards(reset_scroll=reset_scroll)
+        status = f"Mostrando {len(self.filtered_servers)} de {len(self.servers_data)} servidores"
+        if facets:
+            top_tags = ", ".join(f"{tag} ({count})" for tag, count in list(facets.items())[:3])
+            status += f" · tags: {top_tags}"
+        self._update_status(status)
     
     def _refresh_servers(self):
         """Refresca la lista de servidores desde la API."""
@@ -6,6 +6,9 @@ import sys
 from pathlib import Path
 import time
 from assets.logging import PersistentLogger
+from config_store import get_store
+from mcp_config_watcher import diff_server_configs
+from mcp_remote_transport import RemoteMCPError, get_remote_pool
 
 MCP_CONFIG_FILE = "mcp_servers.json"
 
@@ -25,6 +28,7 @@ class MCPManager:
             app_logger_func: Función opcional para registrar mensajes
         """
         self.servers_config = {}
+        self._skipped_servers = {}  # Entradas del archivo que no pasaron la validación (se conservan al guardar)
         self.active_processes = {}
         self.server_ports = {}
         
@@ -159,15 +163,15 @@ class MCPManager:
             self.logger.error("Nombre del servidor MCP no proporcionado.")
             return False
         
-        if not config:
+        if not config or not isinstance(config, dict):
             self.logger.error(f"Configuración vacía para el servidor MCP '{server_name}'.")
             return False
         
-        required_fields = ['command', 'args', 'port', 'enabled']
-        missing_fields = [field for field in required_fields if field not in config]
-        
-        if missing_fields:
-            self.logger.error(f"Faltan campos obligatorios en la configuración de '{server_name}': {missing_fields}")
+        # Los servidores remotos solo necesitan la URL; los locales, el comando que lanzar
+        # (puerto, argumentos y estado tienen valores por defecto)
+        required_field = 'url' if config.get("type") == "remote" else 'command'
+        if not config.get(required_field):
+            self.logger.error(f"Falta el campo obligatorio '{required_field}' en la configuración de '{server_name}'")
             return False
         
         return True
@@ -175,55 +179,40 @@ class MCPManager:
     def load_config(self, config_path=None):
         path_to_load = Path(config_path) if config_path else self.get_default_config_path()
         try:
-            with open(path_to_load, 'r', encoding='utf-8') as f:
-                raw_config = json.load(f)
+            raw_config = get_store(path_to_load).read()
+            if raw_config is None:
+                raise FileNotFoundError(path_to_load)
             
             if not raw_config.get('mcpServers') or not isinstance(raw_config['mcpServers'], dict):
                 raise ValueError("Configuración de servidores MCP inválida: falta 'mcpServers' o no es un diccionario")
             
-            # Validar cada servidor
+            # Validar cada servidor: las entradas inválidas se ignoran solo en memoria,
+            # el archivo del usuario no se reescribe
             validated_servers = {}
+            skipped_servers = {}
             for server_name, server_config in raw_config['mcpServers'].items():
-                try:
-                    self._validate_server_config(server_name, server_config)
+                if self._validate_server_config(server_name, server_config):
                     validated_servers[server_name] = server_config
-                except ValueError as e:
-                    self.logger.error(f"Advertencia: Configuración ignorada para {server_name}: {str(e)}")
-                    continue
-            
-            self.servers_config = {"mcpServers": validated_servers}
+                else:
+                    self.logger.error(f"Advertencia: Configuración ignorada para {server_name}")
+                    skipped_servers[server_name] = server_config
             
-            # Si ningún servidor es válido, crear uno por defecto
+            # Las demás claves del documento se conservan
+            self.servers_config = {**raw_config, "mcpServers": validated_servers}
+            self._skipped_servers = skipped_servers
             if not validated_servers:
-                self.logger.info("No se encontraron configuraciones de servidores MCP válidas. Usando configuración por defecto.")
-                default_config = self._get_default_mcp_config_with_paths()
-                self.servers_config = default_config
-                with open(path_to_load, 'w') as f:
-                    json.dump(default_config, f, indent=4)
-                self.logger.info(f"Configuración por defecto creada en {path_to_load}. Revísala.")
-            else:
-                # Actualizar los puertos
-                base_port = 8080
-                self.server_ports = {}
-                for name, config_data in validated_servers.items():
-                    if config_data.get("enabled", True):
-                        self.server_ports[name] = config_data.get("port", base_port)
-                        base_port += 1
+                self.logger.warning(f"Ningún servidor MCP válido en {path_to_load}; revisa la configuración.")
+            self._assign_ports(validated_servers)
             
             return True
         except FileNotFoundError:
             self.logger.info(f"Archivo de configuración no encontrado: {path_to_load}. Creando configuración por defecto.")
             default_config = self._get_default_mcp_config_with_paths()
             self.servers_config = default_config
-            with open(path_to_load, 'w') as f:
-                json.dump(default_config, f, indent=4)
+            self._skipped_servers = {}
+            get_store(path_to_load).write(default_config)
             self.logger.info(f"Configuración por defecto creada en {path_to_load}. Revísala.")
-            base_port = 8080
-            self.server_ports = {}
-            for name, config_data in default_config.get("mcpServers", {}).items():
-                if config_data.get("enabled", True):
-                    self.server_ports[name] = config_data.get("port", base_port)
-                    base_port += 1
+            self._assign_ports(default_config.get("mcpServers", {}))
             return True
         except json.JSONDecodeError as e:
             self.logger.error(f"Error decodificando JSON en {path_to_load}: {e}. Usando configuración por defecto.")
@@ -235,6 +224,72 @@ class MCPManager:
             self.servers_config = {"mcpServers": {}}
             return False
 
+    def apply_config(self, new_config):
+        """
+        Aplica una nueva configuración de forma incremental (recarga en caliente).
+
+        Solo se inician los servidores añadidos o habilitados, se detienen los
+        eliminados o deshabilitados y se reinician los que estaban en marcha y
+        cambiaron su comando, argumentos, entorno o conexión. Los demás conservan
+        su proceso o sesión. Las entradas añadidas o modificadas que no pasan la
+        validación se ignoran: se mantiene la configuración anterior del servidor.
+        Las demás claves del documento se toman de la nueva configuración.
+
+        Args:
+            new_config: Contenido de mcp_servers.json
+
+        Returns:
+            ConfigDiff con los cambios aplicados
+        """
+        old_servers = self.servers_config.get("mcpServers", {})
+        new_servers = dict(new_config.get("mcpServers", {}))
+        skipped_servers = {}
+        for name, config_data in list(new_servers.items()):
+            if config_data == old_servers.get(name) or \
+                    (isinstance(config_data, dict) and not config_data.get("enabled", True)):
+                continue  # Sin cambios o deshabilitado: no se va a iniciar
+            if not self._validate_server_config(name, config_data):
+                self.logger.warning(f"Configuración de '{name}' inválida en la recarga; se ignora")
+                if name in old_servers:
+                    new_servers[name] = old_servers[name]
+                else:
+                    skipped_servers[name] = new_servers.pop(name)
+        self._skipped_servers = skipped_servers
+        diff = diff_server_configs(old_servers, new_servers)
+        if diff.is_empty():
+            self.servers_config = {**new_config, "mcpServers": old_servers}
+            return diff
+
+        # Detener con la configuración anterior (los remotos se cierran por su entrada actual)
+        to_restart = [name for name in diff.restarted if self._has_live_session(name)]
+        for name in diff.removed + to_restart:
+            self.stop_server(name, log_not_active=False)
+
+        self.servers_config = {**new_config, "mcpServers": new_servers}
+        self._assign_ports(new_servers)
+
+        if self.running:
+            for name in diff.added + to_restart:
+                self.start_server(name)
+        return diff
+
+    def _has_live_session(self, server_name):
+        """True si el servidor tiene un proceso vivo o una sesión remota abierta."""
+        process = self.active_processes.get(server_name)
+        if process and process.poll() is None:
+            return True
+        config_data = self.servers_config.get("mcpServers", {}).get(server_name, {})
+        return config_data.get("type") == "remote" and get_remote_pool().peek(config_data) is not None
+
+    def _assign_ports(self, servers):
+        """Recalcula los puertos de los servidores habilitados."""
+        base_port = 8080
+        self.server_ports = {}
+        for name, config_data in servers.items():
+            if config_data.get("enabled", True):
+                self.server_ports[name] = config_data.get("port", base_port)
+                base_port += 1
+
     def get_active_server_names(self):
         return [name for name, config in self.servers_config.get("mcpServers", {}).items() if config.get("enabled", True)]
 
@@ -269,10 +324,12 @@ class MCPManager:
         config_data = self.servers_config.get("mcpServers", {}).get(server_name)
         if not config_data or not config_data.get("enabled", True):
             self.logger.error(f"Servidor MCP '{server_name}' no encontrado o deshabilitado."); return False
+        if config_data.get("type") == "remote":
+            return self._start_remote_server(server_name, config_data)
         try:
             command_executable = config_data["command"]
             if os.name == 'nt' and command_executable.lower() == 'npx': command_executable = 'npx.cmd'
-            command_list = [command_executable] + config_data["args"]
+            command_list = [command_executable] + config_data.get("args", [])
             self.logger.info(f"Iniciando servidor MCP '{server_name}': {' '.join(command_list)}")
             preexec_fn = os.setsid if os.name != 'nt' else None
             creationflags = subprocess.CREATE_NEW_PROCESS_GROUP if os.name == 'nt' else 0
@@ -292,6 +349,26 @@ class MCPManager:
             if server_name in self.active_processes: self.active_processes.pop(server_name, None)
             return False
 
+    def _start_remote_server(self, server_name, config_data):
+        """
+        "Inicia" un servidor remoto: no hay proceso local, se abre (en segundo plano)
+        la sesión MCP compartida del pool de transportes remotos.
+        """
+        try:
+            connection = get_remote_pool().get(config_data)
+        except ValueError as e:
+            self.logger.error(f"Servidor MCP remoto '{server_name}' mal configurado: {e}"); return False
+
+        def connect():
+            try:
+                connection.initialize()
+                self.logger.info(f"Servidor MCP remoto '{server_name}' conectado ({connection.transport}: {connection.url}).")
+            except Exception as e:
+                self.logger.error(f"No se pudo conectar con el servidor MCP remoto '{server_name}': {e}")
+
+        threading.Thread(target=connect, daemon=True).start()
+        return True
+
     def check_server_startup(self, server_name, process):
         if process.poll() is not None:
             self.logger.error(f"El servidor MCP '{server_name}' terminó inesperadamente (código: {process.returncode}).")
@@ -325,6 +402,11 @@ class MCPManager:
             pass
 
     def stop_server(self, server_name, log_not_active=True):
+        config_data = self.servers_config.get("mcpServers", {}).get(server_name, {})
+        if config_data.get("type") == "remote" and get_remote_pool().peek(config_data) is not None:
+            get_remote_pool().close(config_data)
+            self.logger.info(f"Sesión con el servidor MCP remoto '{server_name}' cerrada.")
+            return True
         process = self.active_processes.get(server_name)
         stop_event = self._stop_events.get(server_name)
         if stop_event:
@@ -362,6 +444,7 @@ class MCPManager:
 
     def stop_all_servers(self):
         self.logger.info("Intentando detener todos los servidores MCP activos...")
+        get_remote_pool().close_all()
         active_names = list(self.active_processes.keys())
         if not active_names: self.logger.info("No hay MCPs activos para detener."); return
         for server_name in active_names:
@@ -372,6 +455,9 @@ class MCPManager:
         self.logger.info("Órdenes de detención enviadas a MCPs activos.")
 
     def send_command_to_mcp(self, server_name, method, params):
+        config_data = self.servers_config.get("mcpServers", {}).get(server_name, {})
+        if config_data.get("type") == "remote":
+            return self._send_command_to_remote(server_name, config_data, method, params)
         if server_name not in self.active_processes or self.active_processes[server_name].poll() is not None:
             self.logger.info(f"Servidor MCP '{server_name}' no activo. Intentando iniciar...")
             if not self.start_server(server_name): return {"error": {"code": -1, "message": f"MCP '{server_name}' no pudo iniciarse."}}
@@ -408,6 +494,19 @@ class MCPManager:
         except Exception as e:
             self.logger.error(f"Excepción en comunicación con {server_name}: {e}"); return {"error": {"code":-4, "message":str(e)}}
 
+    def _send_command_to_remote(self, server_name, config_data, method, params):
+        """Envía una petición JSON-RPC a un servidor remoto usando la sesión compartida del pool."""
+        try:
+            connection = get_remote_pool().get(config_data)
+            self.logger.info(f"-> {server_name} (remoto): {method}")
+            result = connection.request(method, params)
+            return {"jsonrpc": "2.0", "result": result}
+        except RemoteMCPError as e:
+            self.logger.error(f"Error JSON-RPC de {server_name}: {e}")
+            return {"error": {"code": e.code if e.code is not None else -4, "message": str(e), "data": e.data}}
+        except Exception as e:
+            self.logger.error(f"Excepción en comunicación con {server_name}: {e}"); return {"error": {"code":-4, "message":str(e)}}
+
     def is_server_running(self, server_name):
         """Verifica si un servidor MCP está en ejecución - VERSION OPTIMIZADA"""
         
@@ -423,9 +522,10 @@ class MCPManager:
             if not server_config.get("enabled", True):
                 return False
             
-            # Para servidores remotos, considerarlos activos si están habilitados
+            # Para servidores remotos, activos mientras su sesión del pool no haya fallado
             if server_config.get("type") == "remote":
-                return True
+                connection = get_remote_pool().peek(server_config)
+                return connection is None or not connection.failed
             
             # DESHABILITADO: Verificación de paquetes npm para evitar lentitud
             # Para paquetes npm, asumir que están disponibles si están configurados
@@ -483,8 +583,11 @@ class MCPManager:
         if filepath is None:
             filepath = self.get_default_config_path()
         try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(self.servers_config, f, indent=4, ensure_ascii=False)
+            # Las entradas ignoradas al cargar vuelven al archivo, salvo que ya se hayan sustituido
+            servers = dict(self.servers_config.get("mcpServers", {}))
+            for name, config_data in self._skipped_servers.items():
+                servers.setdefault(name, config_data)
+            get_store(filepath).write({**self.servers_config, "mcpServers": servers})
             self.logger.info(f"Configuración MCP guardada en {filepath}")
             return True
         except Exception as e:
@@ -0,0 +1,618 @@
+"""
+Transporte remoto para servidores MCP (Streamable HTTP y SSE)
+Permite hablar con servidores MCP declarados como `type: remote` en
+mcp_servers.json sin lanzar un proceso local. Las conexiones HTTP se reutilizan
+(keep-alive) a través de un pool compartido y las sesiones MCP se reanudan o
+se reinicializan con backoff exponencial cuando el servidor las pierde.
+"""
+
+import itertools
+import json
+import os
+import random
+import socket
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urljoin
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from assets.logging import PersistentLogger
+
+PROTOCOL_VERSION = "2025-03-26"
+CLIENT_INFO = {"name": "puentellm-mcp", "version": "1.0"}
+
+TRANSPORT_STREAMABLE_HTTP = "streamable-http"
+TRANSPORT_SSE = "sse"
+# Alias que aparecen en el registro oficial y en configuraciones escritas a mano
+TRANSPORT_ALIASES = {
+    "streamable-http": TRANSPORT_STREAMABLE_HTTP,
+    "streamable_http": TRANSPORT_STREAMABLE_HTTP,
+    "http": TRANSPORT_STREAMABLE_HTTP,
+    "sse": TRANSPORT_SSE,
+}
+
+
+class RemoteMCPError(RuntimeError):
+    """Error de comunicación o respuesta de error JSON-RPC de un servidor MCP remoto."""
+
+    def __init__(self, message: str, code: Optional[int] = None, data: Any = None):
+        super().__init__(message)
+        self.code = code
+        self.data = data
+
+
+class _SessionExpired(Exception):
+    """El servidor ya no reconoce el Mcp-Session-Id (HTTP 404)."""
+
+
+def normalize_transport(value: Optional[str]) -> str:
+    """Normaliza el nombre del transporte (por defecto Streamable HTTP)."""
+    return TRANSPORT_ALIASES.get((value or "").strip().lower(), TRANSPORT_STREAMABLE_HTTP)
+
+
+def headers_from_config(raw_headers: Any) -> Dict[str, str]:
+    """
+    Convierte las cabeceras de la configuración a un diccionario.
+
+    Acepta un diccionario o la lista del registro oficial
+    (`[{"name": ..., "value": ...}]`); las entradas sin valor se ignoran.
+    """
+    if isinstance(raw_headers, dict):
+        return {str(k): str(v) for k, v in raw_headers.items() if v is not None}
+    headers = {}
+    for header in raw_headers or []:
+        if isinstance(header, dict) and header.get("name") and header.get("value") is not None:
+            headers[header["name"]] = str(header["value"])
+    return headers
+
+
+def iter_sse_events(response: requests.Response, chunk_size: int = 8192) -> Iterator[Dict[str, str]]:
+    """
+    Decodifica un flujo `text/event-stream` en eventos.
+
+    Lee lo que haya disponible en el socket (sin esperar a llenar el buffer) para
+    que los eventos pequeños se entreguen en cuanto llegan.
+
+    Yields:
+        Diccionarios con las claves `event`, `data` e `id` (si existe)
+    """
+    raw = response.raw
+    if hasattr(raw, "read1"):
+        chunks = iter(lambda: raw.read1(chunk_size), b"")
+    else:
+        chunks = response.iter_content(chunk_size=1)
+
+    buffer = b""
+    event: Dict[str, Any] = {}
+    data_lines: List[str] = []
+    for chunk in chunks:
+        buffer += chunk
+        while True:
+            newline = buffer.find(b"\n")
+            if newline == -1:
+                break
+            line = buffer[:newline].rstrip(b"\r").decode("utf-8")
+            buffer = buffer[newline + 1:]
+            if not line:
+                if data_lines or event:
+                    event.setdefault("event", "message")
+                    event["data"] = "\n".join(data_lines)
+                    yield event
+                event, data_lines = {}, []
+                continue
+            if line.startswith(":"):
+                continue  # comentario / keep-alive
+            field, _, value = line.partition(":")
+            value = value[1:] if value.startswith(" ") else value
+            if field == "data":
+                data_lines.append(value)
+            elif field in ("event", "id", "retry"):
+                event[field] = value
+
+
+class RemoteMCPConnection:
+    """
+    Sesión MCP con un servidor remoto.
+
+    Una misma conexión puede compartirse entre varios clientes (hilos): las
+    peticiones JSON-RPC se identifican por id y las respuestas se enrutan a
+    quien las pidió.
+    """
+
+    def __init__(self, url: str, transport: str = TRANSPORT_STREAMABLE_HTTP,
+                 headers: Optional[Dict[str, str]] = None,
+                 http_session: Optional[requests.Session] = None,
+                 timeout: float = 30.0, max_retries: int = 4,
+                 backoff_base: float = 0.5, backoff_max: float = 30.0,
+                 logger: Optional[object] = None):
+        """
+        Args:
+            url: Endpoint MCP (Streamable HTTP) o URL del stream SSE
+            transport: "streamable-http" o "sse"
+            headers: Cabeceras adicionales (p.ej. autenticación)
+            http_session: Sesión `requests` compartida (pool keep-alive)
+            timeout: Timeout por petición en segundos
+            max_retries: Reintentos con backoff ante errores de red
+            backoff_base: Espera inicial del backoff en segundos
+            backoff_max: Espera máxima entre reintentos en segundos
+            logger: Logger opcional
+        """
+        self.url = url
+        self.transport = normalize_transport(transport)
+        self.headers = dict(headers or {})
+        self.http = http_session or requests.Session()
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.logger = logger if logger else PersistentLogger()
+
+        self.session_id: Optional[str] = None
+        self.server_info: Dict[str, Any] = {}
+        self.protocol_version: Optional[str] = None
+        self.initialized = False
+        self.failed = False
+        self.reconnects = 0
+
+        self._ids = itertools.count(1)
+        self._lock = threading.RLock()
+
+        # Estado del transporte SSE clásico
+        self._endpoint: Optional[str] = None
+        self._endpoint_ready = threading.Event()
+        self._pending: Dict[int, Tuple[threading.Event, List[Any]]] = {}
+        self._last_event_id: Optional[str] = None
+        self._reader: Optional[threading.Thread] = None
+        self._stream: Optional[requests.Response] = None
+        self._closed = threading.Event()
+
+    # ------------------------------------------------------------------ #
+    # API pública
+    # ------------------------------------------------------------------ #
+
+    def initialize(self) -> Dict[str, Any]:
+        """
+        Realiza el handshake `initialize` si la sesión aún no está activa.
+
+        Returns:
+            Resultado de `initialize` (capacidades e información del servidor)
+        """
+        with self._lock:
+            if self.initialized:
+                return self.server_info
+            if self.transport == TRANSPORT_SSE:
+                self._ensure_sse_stream()
+            try:
+                result = self._request_with_retry("initialize", {
+                    "protocolVersion": PROTOCOL_VERSION,
+                    "capabilities": {},
+                    "clientInfo": CLIENT_INFO,
+                }, reinitialize=False)
+                self.protocol_version = result.get("protocolVersion", PROTOCOL_VERSION)
+                self.server_info = result
+                self.initialized = True
+                self.failed = False
+                self.notify("notifications/initialized")
+            except Exception:
+                self.failed = True
+                raise
+            self.logger.info(f"Sesión MCP remota inicializada con {self.url} ({self.transport})")
+            return result
+
+    def request(self, method: str, params: Optional[Dict[str, Any]] = None,
+                timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Envía una petición JSON-RPC y devuelve su `result`.
+
+        Raises:
+            RemoteMCPError: Si el servidor responde con un error o no se puede conectar
+        """
+        if not self.initialized:
+            self.initialize()
+        return self._request_with_retry(method, params, timeout=timeout)
+
+    def notify(self, method: str, params: Optional[Dict[str, Any]] = None):
+        """Envía una notificación JSON-RPC (sin respuesta)."""
+        message = {"jsonrpc": "2.0", "method": method}
+        if params is not None:
+            message["params"] = params
+        if self.transport == TRANSPORT_SSE:
+            self._post_sse(message)
+        else:
+            response = self._post(message, stream=False)
+            response.close()
+
+    def list_tools(self) -> List[Dict[str, Any]]:
+        """Devuelve todas las herramientas del servidor (siguiendo la paginación)."""
+        tools: List[Dict[str, Any]] = []
+        cursor = None
+        while True:
+            result = self.request("tools/list", {"cursor": cursor} if cursor else None)
+            tools.extend(result.get("tools", []))
+            cursor = result.get("nextCursor")
+            if not cursor:
+                return tools
+
+    def call_tool(self, name: str, arguments: Optional[Dict[str, Any]] = None,
+                  timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Ejecuta una herramienta en el servidor remoto."""
+        return self.request("tools/call", {"name": name, "arguments": arguments or {}}, timeout=timeout)
+
+    def close(self):
+        """Termina la sesión (DELETE en Streamable HTTP) y cierra el stream SSE."""
+        self._closed.set()
+        if self.transport == TRANSPORT_STREAMABLE_HTTP and self.session_id:
+            try:
+                self.http.delete(self.url, headers=self._base_headers(), timeout=5)
+            except requests.RequestException:
+                pass
+        self._abort_stream()
+        self.initialized = False
+        self.session_id = None
+        self._fail_pending(RemoteMCPError("Conexión MCP remota cerrada"))
+
+    # ------------------------------------------------------------------ #
+    # Reintentos, backoff y reanudación de sesión
+    # ------------------------------------------------------------------ #
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """Backoff exponencial con jitter para no sincronizar reconexiones."""
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return delay * (0.5 + random.random() / 2)
+
+    def _request_with_retry(self, method: str, params: Optional[Dict[str, Any]],
+                            timeout: Optional[float] = None, reinitialize: bool = True) -> Dict[str, Any]:
+        attempt = 0
+        while True:
+            try:
+                return self._send_request(method, params, timeout)
+            except _SessionExpired:
+                if not reinitialize:
+                    raise RemoteMCPError(f"El servidor {self.url} rechazó la sesión MCP")
+                # El servidor perdió la sesión: abrir una nueva y repetir la petición
+                self.logger.warning(f"Sesión MCP expirada en {self.url}; reinicializando")
+                with self._lock:
+                    self.initialized = False
+                    self.session_id = None
+                    if self.transport == TRANSPORT_SSE:
+                        self._reset_sse_stream()
+                    self.initialize()
+                reinitialize = False
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= self.max_retries or self._closed.is_set():
+                    self.failed = True
+                    raise RemoteMCPError(f"No se pudo conectar con {self.url}: {e}") from e
+                delay = self._backoff_delay(attempt)
+                attempt += 1
+                self.reconnects += 1
+                self.logger.warning(f"Error de red con {self.url} ({e}); reintento {attempt} en {delay:.1f}s")
+                time.sleep(delay)
+
+    def _send_request(self, method: str, params: Optional[Dict[str, Any]],
+                      timeout: Optional[float]) -> Dict[str, Any]:
+        request_id = next(self._ids)
+        message = {"jsonrpc": "2.0", "id": request_id, "method": method}
+        if params is not None:
+            message["params"] = params
+
+        if self.transport == TRANSPORT_SSE:
+            reply = self._sse_round_trip(request_id, message, timeout or self.timeout)
+        else:
+            reply = self._streamable_round_trip(request_id, message, timeout or self.timeout)
+
+        if "error" in reply:
+            error = reply["error"] or {}
+            raise RemoteMCPError(error.get("message", "Error JSON-RPC"), error.get("code"), error.get("data"))
+        return reply.get("result", {})
+
+    # ------------------------------------------------------------------ #
+    # Streamable HTTP
+    # ------------------------------------------------------------------ #
+
+    def _base_headers(self) -> Dict[str, str]:
+        headers = dict(self.headers)
+        if self.session_id:
+            headers["Mcp-Session-Id"] = self.session_id
+        if self.protocol_version:
+            headers["MCP-Protocol-Version"] = self.protocol_version
+        return headers
+
+    def _post(self, message: Dict[str, Any], stream: bool, timeout: Optional[float] = None) -> requests.Response:
+        headers = self._base_headers()
+        headers["Accept"] = "application/json, text/event-stream"
+        headers["Content-Type"] = "application/json"
+        response = self.http.post(self.url, data=json.dumps(message), headers=headers,
+                                  stream=stream, timeout=timeout or self.timeout)
+        if response.status_code == 404 and self.session_id:
+            response.close()
+            raise _SessionExpired()
+        if response.status_code >= 400:
+            body = response.text[:200]
+            response.close()
+            raise RemoteMCPError(f"HTTP {response.status_code} de {self.url}: {body}", response.status_code)
+        session_id = response.headers.get("Mcp-Session-Id")
+        if session_id:
+            self.session_id = session_id
+        return response
+
+    def _streamable_round_trip(self, request_id: int, message: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        response = self._post(message, stream=True, timeout=timeout)
+        try:
+            content_type = response.headers.get("Content-Type", "")
+            if content_type.startswith("text/event-stream"):
+                return self._read_streamed_reply(response, request_id, timeout)
+            reply = response.json()
+        finally:
+            response.close()
+        if isinstance(reply, list):
+            reply = next((r for r in reply if r.get("id") == request_id), {})
+        return reply
+
+    def _read_streamed_reply(self, response: requests.Response, request_id: int, timeout: float) -> Dict[str, Any]:
+        """Lee la respuesta SSE de un POST; si el stream se corta, la reanuda con Last-Event-ID."""
+        last_event_id = None
+        attempt = 0
+        while True:
+            try:
+                for event in iter_sse_events(response):
+                    last_event_id = event.get("id", last_event_id)
+                    reply = self._match_reply(event, request_id)
+                    if reply is not None:
+                        return reply
+            except (requests.ConnectionError, requests.exceptions.ChunkedEncodingError) as e:
+                self.logger.warning(f"Stream MCP interrumpido en {self.url}: {e}")
+            finally:
+                response.close()
+
+            if last_event_id is None or attempt >= self.max_retries:
+                raise RemoteMCPError(f"El stream de {self.url} terminó sin respuesta a la petición {request_id}")
+            time.sleep(self._backoff_delay(attempt))
+            attempt += 1
+            self.reconnects += 1
+            headers = self._base_headers()
+            headers["Accept"] = "text/event-stream"
+            headers["Last-Event-ID"] = last_event_id
+            response = self.http.get(self.url, headers=headers, stream=True, timeout=timeout)
+            if response.status_code >= 400:
+                response.close()
+                raise RemoteMCPError(f"No se pudo reanudar el stream de {self.url} (HTTP {response.status_code})")
+
+    @staticmethod
+    def _match_reply(event: Dict[str, str], request_id: int) -> Optional[Dict[str, Any]]:
+        if event.get("event", "message") != "message" or not event.get("data"):
+            return None
+        try:
+            payload = json.loads(event["data"])
+        except json.JSONDecodeError:
+            return None
+        for item in payload if isinstance(payload, list) else [payload]:
+            if isinstance(item, dict) and item.get("id") == request_id and ("result" in item or "error" in item):
+                return item
+        return None
+
+    # ------------------------------------------------------------------ #
+    # SSE clásico (GET de eventos + POST al endpoint anunciado)
+    # ------------------------------------------------------------------ #
+
+    def _ensure_sse_stream(self):
+        if self._reader is not None and self._reader.is_alive() and self._endpoint_ready.is_set():
+            return
+        self._closed.clear()
+        self._endpoint_ready.clear()
+        self.failed = False
+        self._reader = threading.Thread(target=self._sse_reader_loop, daemon=True,
+                                        name=f"mcp-sse-{self.url}")
+        self._reader.start()
+        if not self._endpoint_ready.wait(self.timeout):
+            raise RemoteMCPError(f"El servidor SSE {self.url} no anunció su endpoint")
+
+    def _reset_sse_stream(self):
+        """
+        Descarta el stream SSE de una sesión expirada: el endpoint anunciado ya no
+        sirve, así que `_ensure_sse_stream` debe abrir un stream nuevo.
+        """
+        self._closed.set()
+        self._abort_stream()
+        reader, self._reader = self._reader, None
+        if reader is not None and reader is not threading.current_thread():
+            reader.join(self.timeout)
+        self._endpoint = None
+        self._endpoint_ready.clear()
+        self._last_event_id = None  # Los eventos de la sesión anterior no se reanudan
+        self._fail_pending(RemoteMCPError(f"Sesión SSE expirada en {self.url}"))
+
+    def _sse_reader_loop(self):
+        attempt = 0
+        while not self._closed.is_set():
+            try:
+                headers = dict(self.headers)
+                headers["Accept"] = "text/event-stream"
+                if self._last_event_id:
+                    headers["Last-Event-ID"] = self._last_event_id
+                self._stream = self.http.get(self.url, headers=headers, stream=True,
+                                             timeout=(self.timeout, None))
+                self._stream.raise_for_status()
+                for event in iter_sse_events(self._stream):
+                    attempt = 0
+                    if "id" in event:
+                        self._last_event_id = event["id"]
+                    if event.get("event") == "endpoint":
+                        self._on_endpoint(urljoin(self.url, event["data"].strip()))
+                    elif event.get("event", "message") == "message" and event.get("data"):
+                        self._dispatch(event["data"])
+            except Exception as e:
+                if self._closed.is_set():
+                    break
+                self.logger.warning(f"Stream SSE de {self.url} interrumpido: {e}")
+            if self._closed.is_set():
+                break
+            if attempt >= self.max_retries:
+                self.failed = True
+                self._fail_pending(RemoteMCPError(f"Se perdió la conexión SSE con {self.url}"))
+                self._endpoint_ready.set()
+                break
+            time.sleep(self._backoff_delay(attempt))
+            attempt += 1
+            self.reconnects += 1
+
+    def _abort_stream(self):
+        """Corta el stream SSE abierto desbloqueando al hilo lector."""
+        stream, self._stream = self._stream, None
+        if stream is None:
+            return
+        # Cerrar la respuesta mientras otro hilo lee del socket se bloquea:
+        # primero se apaga el socket para que la lectura termine con EOF.
+        try:
+            with socket.socket(fileno=os.dup(stream.raw.fileno())) as sock:
+                sock.shutdown(socket.SHUT_RDWR)
+        except (OSError, ValueError, AttributeError):
+            pass
+        stream.close()
+
+    def _on_endpoint(self, endpoint: str):
+        previous = self._endpoint
+        self._endpoint = endpoint
+        self._endpoint_ready.set()
+        if previous is not None and previous != endpoint and self.initialized:
+            # Reconexión con una sesión nueva: hay que repetir el handshake
+            self.initialized = False
+            threading.Thread(target=self._safe_reinitialize, daemon=True).start()
+
+    def _safe_reinitialize(self):
+        try:
+            self.initialize()
+        except Exception as e:
+            self.logger.error(f"No se pudo reinicializar la sesión SSE con {self.url}: {e}")
+
+    def _dispatch(self, data: str):
+        try:
+            payload = json.loads(data)
+        except json.JSONDecodeError:
+            return
+        for item in payload if isinstance(payload, list) else [payload]:
+            if not isinstance(item, dict):
+                continue
+            waiter = self._pending.pop(item.get("id"), None)
+            if waiter is not None:
+                waiter[1].append(item)
+                waiter[0].set()
+
+    def _fail_pending(self, error: Exception):
+        for request_id in list(self._pending):
+            waiter = self._pending.pop(request_id, None)
+            if waiter is not None:
+                waiter[1].append(error)
+                waiter[0].set()
+
+    def _post_sse(self, message: Dict[str, Any]):
+        if self._endpoint is None or self.failed:
+            raise RemoteMCPError(f"No hay endpoint SSE activo para {self.url}")
+        headers = dict(self.headers)
+        headers["Content-Type"] = "application/json"
+        response = self.http.post(self._endpoint, data=json.dumps(message), headers=headers, timeout=self.timeout)
+        response.close()
+        if response.status_code == 404:
+            raise _SessionExpired()
+        if response.status_code >= 400:
+            raise RemoteMCPError(f"HTTP {response.status_code} enviando a {self._endpoint}", response.status_code)
+
+    def _sse_round_trip(self, request_id: int, message: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        self._ensure_sse_stream()
+        done = threading.Event()
+        slot: List[Any] = []
+        self._pending[request_id] = (done, slot)
+        try:
+            self._post_sse(message)
+            if not done.wait(timeout):
+                raise RemoteMCPError(f"Timeout esperando la respuesta {request_id} de {self.url}")
+        finally:
+            self._pending.pop(request_id, None)
+        if isinstance(slot[0], Exception):
+            raise slot[0]
+        return slot[0]
+
+
+class RemoteTransportPool:
+    """
+    Pool de conexiones MCP remotas compartidas.
+
+    Todas las conexiones usan una única `requests.Session` con un adaptador
+    keep-alive, y cada servidor (url, transporte, cabeceras) tiene una sola
+    sesión MCP reutilizada por todos los clientes de la aplicación.
+    """
+
+    def __init__(self, pool_maxsize: int = 16, connection_factory: Optional[Callable[..., RemoteMCPConnection]] = None):
+        """
+        Args:
+            pool_maxsize: Conexiones HTTP keep-alive por host
+            connection_factory: Constructor alternativo de conexiones (tests)
+        """
+        self.http = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_maxsize, pool_maxsize=pool_maxsize, max_retries=0)
+        self.http.mount("http://", adapter)
+        self.http.mount("https://", adapter)
+        self._factory = connection_factory or RemoteMCPConnection
+        self._connections: Dict[Tuple, RemoteMCPConnection] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(config: Dict[str, Any]) -> Tuple:
+        """Clave del pool para una entrada de mcp_servers.json."""
+        headers = headers_from_config(config.get("headers"))
+        transport = normalize_transport(config.get("transport") or config.get("transport_type"))
+        return (config.get("url", ""), transport, tuple(sorted(headers.items())))
+
+    def get(self, config: Dict[str, Any]) -> RemoteMCPConnection:
+        """
+        Devuelve la conexión compartida para un servidor remoto (sin conectar todavía).
+
+        Raises:
+            ValueError: Si la configuración no tiene `url`
+        """
+        if not config.get("url"):
+            raise ValueError("La configuración del servidor remoto no tiene 'url'")
+        key = self.key_for(config)
+        with self._lock:
+            connection = self._connections.get(key)
+            if connection is None:
+                connection = self._factory(
+                    key[0], transport=key[1], headers=dict(key[2]), http_session=self.http,
+                    timeout=config.get("timeout", 30),
+                )
+                self._connections[key] = connection
+            return connection
+
+    def peek(self, config: Dict[str, Any]) -> Optional[RemoteMCPConnection]:
+        """Devuelve la conexión si ya existe en el pool (sin crearla)."""
+        return self._connections.get(self.key_for(config))
+
+    def close(self, config: Dict[str, Any]):
+        """Cierra y elimina del pool la conexión de un servidor."""
+        with self._lock:
+            connection = self._connections.pop(self.key_for(config), None)
+        if connection is not None:
+            connection.close()
+
+    def close_all(self):
+        """Cierra todas las conexiones del pool."""
+        with self._lock:
+            connections = list(self._connections.values())
+            self._connections.clear()
+        for connection in connections:
+            connection.close()
+
+
+_remote_pool: Optional[RemoteTransportPool] = None
+_remote_pool_lock = threading.Lock()
+
+
+def get_remote_pool() -> RemoteTransportPool:
+    """Obtiene la instancia global del pool de transportes remotos."""
+    global _remote_pool
+    with _remote_pool_lock:
+        if _remote_pool is None:
+            _remote_pool = RemoteTransportPool()
+        return _remote_pool
@@ -0,0 +1,252 @@
+"""
+Procesamiento de resultados de herramientas MCP
+Recorre los bloques de contenido de un resultado uno a uno, los compacta
+(sin nulos y con JSON minificado) y aplica límites de bytes/tokens por
+herramienta antes de que el resultado llegue al chat o al prompt del LLM.
+Lo que no cabe se vuelca a un archivo temporal que puede leerse por partes;
+al LLM solo se le indica que el resultado se ha truncado (no puede leer el
+archivo), y la ruta se muestra en el chat.
+"""
+
+import json
+import mmap
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from assets.logging import PersistentLogger
+
+DEFAULT_MAX_BYTES = 32 * 1024
+DEFAULT_MAX_TOKENS = 8000
+BYTES_PER_TOKEN = 4  # estimación conservadora sin depender de un tokenizador
+PREVIEW_CHARS = 500
+SPILL_DIR_NAME = "puentellm-mcp-results"
+SPILL_MAX_AGE_HOURS = 24
+
+
+def strip_nulls(value: Any) -> Any:
+    """
+    Elimina recursivamente las claves con valor None y los None de las listas.
+
+    Los objetos y listas que quedan vacíos se conservan: un `[]` o `{}` puede ser
+    un resultado legítimo de la herramienta.
+    """
+    if isinstance(value, dict):
+        cleaned = {}
+        for key, item in value.items():
+            item = strip_nulls(item)
+            if item is not None:
+                cleaned[key] = item
+        return cleaned
+    if isinstance(value, list):
+        return [strip_nulls(item) for item in value if item is not None]
+    return value
+
+
+def minify_json_text(text: str) -> str:
+    """Minifica el texto si es JSON (objeto o array); si no, lo devuelve tal cual."""
+    stripped = text.strip()
+    if not stripped or stripped[0] not in "[{":
+        return text
+    try:
+        data = json.loads(stripped)
+    except (json.JSONDecodeError, RecursionError):
+        return text
+    return json.dumps(strip_nulls(data), ensure_ascii=False, separators=(",", ":"))
+
+
+def _block_to_dict(block: Any) -> Any:
+    if hasattr(block, "model_dump"):
+        return block.model_dump(exclude_none=True)
+    return block
+
+
+def iter_content_blocks(result: Any) -> Iterator[Any]:
+    """Recorre los bloques de contenido de un resultado (`CallToolResult`, lista o valor suelto)."""
+    content = getattr(result, "content", result)
+    if isinstance(content, (list, tuple)):
+        for block in content:
+            yield _block_to_dict(block)
+    elif content is not None:
+        yield _block_to_dict(content)
+
+
+def compact_block(block: Any) -> Tuple[str, int]:
+    """
+    Convierte un bloque en su forma compacta para el LLM.
+
+    Los bloques de texto se reducen a su texto (minificado si es JSON); el resto
+    se serializa como JSON minificado sin nulos. El tamaño original es el del
+    texto tal como llegó, de modo que solo hay ahorro si el texto se ha reducido;
+    para los demás bloques no se cuenta ahorro.
+
+    Returns:
+        Tupla (texto compacto, tamaño original en bytes del bloque)
+    """
+    if isinstance(block, dict):
+        if block.get("type") == "text" and isinstance(block.get("text"), str):
+            return minify_json_text(block["text"]), len(block["text"].encode("utf-8"))
+        text = json.dumps(strip_nulls(block), ensure_ascii=False, separators=(",", ":"))
+        return text, len(text.encode("utf-8"))
+    if isinstance(block, str):
+        return minify_json_text(block), len(block.encode("utf-8"))
+    text = json.dumps(block, ensure_ascii=False, default=str)
+    return text, len(text.encode("utf-8"))
+
+
+def _truncate_utf8(text: str, max_bytes: int) -> str:
+    """Recorta un texto a `max_bytes` sin partir caracteres UTF-8."""
+    return text.encode("utf-8")[:max(0, max_bytes)].decode("utf-8", errors="ignore")
+
+
+def read_spilled(path: str, offset: int = 0, length: int = DEFAULT_MAX_BYTES) -> str:
+    """
+    Lee un fragmento de un resultado volcado a disco sin cargar el archivo entero.
+
+    Args:
+        path: Ruta devuelta en `spill_path`
+        offset: Desplazamiento en bytes
+        length: Número máximo de bytes a leer
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return ""
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return mapped[offset:offset + length].decode("utf-8", errors="ignore")
+
+
+class ToolResultPipeline:
+    """
+    Aplica los límites de tamaño a los resultados de las herramientas MCP.
+
+    Los límites se pueden ajustar por servidor y por herramienta en
+    mcp_servers.json:
+
+        "result_limits": {"max_bytes": 65536, "max_tokens": 16000,
+                          "tools": {"read_file": {"max_bytes": 8192}}}
+    """
+
+    def __init__(self, spill_dir: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES,
+                 max_tokens: int = DEFAULT_MAX_TOKENS, logger: Optional[object] = None):
+        """
+        Args:
+            spill_dir: Directorio para los resultados que exceden el límite
+            max_bytes: Límite de bytes por defecto
+            max_tokens: Límite de tokens (estimados) por defecto
+            logger: Logger opcional
+        """
+        self.spill_dir = Path(spill_dir) if spill_dir else Path(tempfile.gettempdir()) / SPILL_DIR_NAME
+        self.max_bytes = max_bytes
+        self.max_tokens = max_tokens
+        self.logger = logger if logger else PersistentLogger()
+        self.total_bytes_saved = 0
+        self._lock = threading.Lock()
+        self._cleanup_old_spills()
+
+    def limits_for(self, tool_name: str, server_config: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Calcula el presupuesto efectivo en bytes para una herramienta.
+
+        Returns:
+            El menor entre el límite de bytes y el de tokens convertido a bytes
+        """
+        limits = dict((server_config or {}).get("result_limits") or {})
+        limits.update((limits.get("tools") or {}).get(tool_name) or {})
+        max_bytes = int(limits.get("max_bytes", self.max_bytes))
+        max_tokens = int(limits.get("max_tokens", self.max_tokens))
+        return min(max_bytes, max_tokens * BYTES_PER_TOKEN)
+
+    def process(self, result: Any, server: str, tool_name: str,
+                server_config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Procesa un resultado bloque a bloque respetando el presupuesto de la herramienta.
+
+        Args:
+            result: Resultado de `call_tool`
+            server: Nombre del servidor
+            tool_name: Nombre de la herramienta
+            server_config: Entrada del servidor en mcp_servers.json (para `result_limits`)
+
+        Returns:
+            Diccionario con `content` (texto para el LLM), `preview` (para el chat),
+            `truncated`, `original_bytes`, `bytes`, `bytes_saved` y `spill_path`
+        """
+        budget = self.limits_for(tool_name, server_config)
+        parts = []
+        used = 0
+        original_bytes = 0
+        spill = None
+        spill_path = None
+        separator = "\n"
+
+        try:
+            for block in iter_content_blocks(result):
+                text, block_original = compact_block(block)
+                original_bytes += block_original
+                encoded_len = len(text.encode("utf-8")) + (len(separator) if parts else 0)
+
+                if spill is None and used + encoded_len <= budget:
+                    parts.append(text)
+                    used += encoded_len
+                    continue
+
+                if spill is None:
+                    # A partir de aquí el resultado completo va a disco, bloque a bloque
+                    spill = self._open_spill(server, tool_name)
+                    spill_path = spill.name
+                    for previous in parts:
+                        spill.write(previous.encode("utf-8") + b"\n")
+                    remaining = budget - used - (len(separator) if parts else 0)
+                    if remaining > 0:
+                        parts.append(_truncate_utf8(text, remaining))
+                        used = budget
+                spill.write(text.encode("utf-8") + b"\n")
+        finally:
+            if spill is not None:
+                spill.close()
+
+        content = separator.join(parts)
+        truncated = spill_path is not None
+        if truncated:
+            # La ruta del volcado no sirve al LLM (no puede leerla); se devuelve en `spill_path`
+            content += f"\n[Resultado truncado a {budget} bytes de {original_bytes}]"
+
+        final_bytes = len(content.encode("utf-8"))
+        bytes_saved = max(0, original_bytes - final_bytes)
+        with self._lock:
+            self.total_bytes_saved += bytes_saved
+        if bytes_saved:
+            detail = f", truncado; completo en {spill_path}" if truncated else ""
+            self.logger.info(f"Resultado de {server}.{tool_name}: {original_bytes} -> {final_bytes} bytes "
+                             f"({bytes_saved} bytes ahorrados{detail})")
+
+        return {
+            "content": content,
+            "preview": content[:PREVIEW_CHARS] + ("…" if len(content) > PREVIEW_CHARS else ""),
+            "truncated": truncated,
+            "original_bytes": original_bytes,
+            "bytes": final_bytes,
+            "bytes_saved": bytes_saved,
+            "spill_path": spill_path,
+        }
+
+    def _open_spill(self, server: str, tool_name: str):
+        self.spill_dir.mkdir(parents=True, exist_ok=True)
+        safe_name = "".join(c if c.isalnum() or c in "-_" else "_" for c in f"{server}_{tool_name}")
+        return tempfile.NamedTemporaryFile(mode="wb", prefix=f"{safe_name}_", suffix=".txt",
+                                           dir=self.spill_dir, delete=False)
+
+    def _cleanup_old_spills(self):
+        """Elimina volcados antiguos para que el directorio temporal no crezca sin límite."""
+        if not self.spill_dir.exists():
+            return
+        cutoff = time.time() - SPILL_MAX_AGE_HOURS * 3600
+        for path in self.spill_dir.glob("*.txt"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+            except OSError:
+                pass
@@ -6,8 +6,11 @@ import re
 import logging
 
 from mcp import ClientSession, StdioServerParameters, Tool
+from mcp.types import CallToolResult
 from mcp.client.stdio import stdio_client
 from assets.logging import PersistentLogger
+from mcp_tool_validator import ToolSchemaValidator
+from mcp_remote_transport import get_remote_pool
 
 class MCPSDKBridge:
     """
@@ -15,6 +18,8 @@ class MCPSDKBridge:
     Esta clase proporciona métodos para interactuar con servidores MCP,
     incluyendo listar herramientas disponibles y ejecutar comandos específicos.
     """
+
+    shared_validator = ToolSchemaValidator()
     
     def __init__(self, mcp_manager: Optional[object] = None, logger: Optional[object] = None):
         """
@@ -31,6 +36,11 @@ class MCPSDKBridge:
         self.mcp_manager = mcp_manager
         self.logger = logger if logger else PersistentLogger()
         self._tools_cache: Dict[str, List[Tool]] = {}
+        self.server_key: Optional[str] = None
+        # Conexión compartida del pool cuando el servidor es remoto (HTTP/SSE)
+        self.remote = None
+        # Validadores compilados de los inputSchema, compartidos entre instancias
+        self.validator = MCPSDKBridge.shared_validator
 
     async def connect(self, server_script_path: str) -> List[Tool]:
         """
@@ -75,7 +85,7 @@ class MCPSDKBridge:
             
             # Obtener las herramientas disponibles
             response = await self.session.list_tools()
-            self.tools_cache = response.tools
+            self._cache_tools(server_script_path, response.tools)
             
             self.logger.info(f"Conectado exitosamente a {server_script_path} con {len(self.tools_cache)} herramientas disponibles")
             return self.tools_cache
@@ -84,6 +94,35 @@ class MCPSDKBridge:
             self.logger.error(f"Error conectando al servidor MCP: {str(e)}", exc_info=True)
             raise RuntimeError(f"No se pudo conectar al servidor MCP: {str(e)}") from e
 
+    async def connect_remote(self, server_config: Dict[str, Any]) -> List[Tool]:
+        """
+        Conecta a un servidor MCP remoto (`type: remote` en mcp_servers.json).
+        
+        La sesión se obtiene del pool compartido de transportes remotos, por lo
+        que varias instancias del puente reutilizan la misma conexión.
+        
+        Args:
+            server_config (dict): Entrada del servidor con `url` y `transport` opcional
+            
+        Returns:
+            List[Tool]: Lista de herramientas disponibles en el servidor remoto
+            
+        Raises:
+            RuntimeError: Si hay un error al conectar con el servidor
+        """
+        try:
+            self.remote = get_remote_pool().get(server_config)
+            await asyncio.to_thread(self.remote.initialize)
+            raw_tools = await asyncio.to_thread(self.remote.list_tools)
+            tools = [Tool.model_validate(tool) for tool in raw_tools]
+            self._cache_tools(self.remote.url, tools)
+            self.logger.info(f"Conectado exitosamente a {self.remote.url} con {len(tools)} herramientas disponibles")
+            return tools
+        except Exception as e:
+            self.remote = None
+            self.logger.error(f"Error conectando al servidor MCP remoto: {str(e)}", exc_info=True)
+            raise RuntimeError(f"No se pudo conectar al servidor MCP remoto: {str(e)}") from e
+
     async def list_tools(self) -> List[Tool]:
         """
         Devuelve la lista de herramientas disponibles en el servidor MCP actual.
@@ -94,13 +133,43 @@ class MCPSDKBridge:
         Raises:
             RuntimeError: Si no hay una sesión MCP activa
         """
+        if self.remote is not None:
+            raw_tools = await asyncio.to_thread(self.remote.list_tools)
+            tools = [Tool.model_validate(tool) for tool in raw_tools]
+            self._cache_tools(self.server_key, tools)
+            return self.tools_cache
+
         if self.session is None:
             raise RuntimeError("La sesión MCP no está inicializada")
         
         response = await self.session.list_tools()
-        self.tools_cache = response.tools
+        self._cache_tools(self.server_key, response.tools)
         return self.tools_cache
 
+    def _cache_tools(self, server_key: Optional[str], tools: List[Tool]):
+        """Guarda el catálogo de herramientas y compila sus validadores de argumentos."""
+        self.tools_cache = tools
+        if server_key is None:
+            return
+        self.server_key = server_key
+        self._tools_cache[server_key] = tools
+        self.validator.register_tools(server_key, tools)
+
+    def validate_tool_arguments(self, tool_name: str, args: Any) -> List[Dict[str, Any]]:
+        """
+        Valida los argumentos de una herramienta contra su inputSchema compilado.
+        
+        Args:
+            tool_name (str): Nombre de la herramienta
+            args: Argumentos propuestos por el LLM
+            
+        Returns:
+            List[Dict[str, Any]]: Errores estructurados (vacía si son válidos)
+        """
+        if self.server_key is None:
+            return []
+        return self.validator.validate(self.server_key, tool_name, args)
+
     async def call_tool(self, tool_name: str, args: dict) -> Any:
         """
         Llama a una herramienta específica en el servidor MCP.
@@ -116,14 +185,30 @@ class MCPSDKBridge:
             RuntimeError: Si no hay una sesión MCP activa
             ValueError: Si la herramienta no existe o hay un error en la ejecución
         """
-        if self.session is None:
+        if self.remote is None and self.session is None:
             raise RuntimeError("La sesión MCP no está inicializada")
         
         try:
-            result = await self.session.call_tool(tool_name, args)
+            if self.remote is not None:
+                raw_result = await asyncio.to_thread(self.remote.call_tool, tool_name, args)
+                result = CallToolResult.model_validate(raw_result)
+            else:
+                result = await self.session.call_tool(tool_name, args)
             self.logger.info(f"Herramienta '{tool_name}' ejecutada exitosamente")
             return result
         except Exception as e:
             self.logger.error(f"Error ejecutando herramienta '{tool_name}': {str(e)}", exc_info=True)
             raise ValueError(f"Error ejecutando herramienta '{tool_name}': {str(e)}") from e
 
+    async def close(self):
+        """Cierra la sesión y el transporte abiertos por `connect`."""
+        # La conexión remota pertenece al pool compartido: solo se suelta la referencia
+        self.remote = None
+        try:
+            await self.exit_stack.aclose()
+        finally:
+            self.session = None
+            self.stdio = None
+            self.write = None
+            self.exit_stack = AsyncExitStack()
+
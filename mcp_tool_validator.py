@@ -0,0 +1,170 @@
+"""
+Validación de argumentos de herramientas MCP
+Compila una sola vez el `inputSchema` de cada herramienta y valida los `params`
+generados por el LLM antes de enviarlos al servidor MCP.
+"""
+
+import hashlib
+import json
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from jsonschema import validators
+from jsonschema.exceptions import SchemaError
+
+
+def get_tool_input_schema(tool: Any) -> Optional[Dict]:
+    """
+    Obtiene el `inputSchema` de una herramienta MCP.
+
+    Soporta objetos `Tool` del SDK (atributo `inputSchema` o `input_schema`
+    según la versión) y diccionarios con el formato del protocolo.
+    """
+    if isinstance(tool, dict):
+        schema = tool.get("inputSchema") or tool.get("input_schema")
+    else:
+        schema = getattr(tool, "inputSchema", None) or getattr(tool, "input_schema", None)
+    return schema if isinstance(schema, dict) else None
+
+
+def get_tool_name(tool: Any) -> str:
+    """Obtiene el nombre de una herramienta (objeto del SDK o diccionario)."""
+    if isinstance(tool, dict):
+        return tool.get("name", "")
+    return getattr(tool, "name", "")
+
+
+class ToolSchemaValidator:
+    """
+    Caché de validadores compilados para los `inputSchema` de las herramientas MCP.
+
+    Cada esquema se verifica y compila una única vez; los validadores se indexan
+    por (servidor, herramienta) y por la huella del esquema, de modo que varias
+    herramientas con el mismo esquema comparten el validador compilado.
+    """
+
+    def __init__(self, max_errors: int = 10):
+        """
+        Args:
+            max_errors: Número máximo de errores devueltos por validación
+        """
+        self.max_errors = max_errors
+        self._lock = threading.Lock()
+        self._by_tool: Dict[Tuple[str, str], Any] = {}
+        self._by_fingerprint: Dict[str, Any] = {}
+
+    @staticmethod
+    def schema_fingerprint(schema: Dict) -> str:
+        """Calcula una huella estable del esquema (JSON canónico + SHA-256)."""
+        canonical = json.dumps(schema, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def _compile(self, schema: Dict):
+        """Compila un esquema en un validador reutilizable (None si el esquema es inválido)."""
+        fingerprint = self.schema_fingerprint(schema)
+        validator = self._by_fingerprint.get(fingerprint)
+        if validator is not None:
+            return validator
+
+        validator_cls = validators.validator_for(schema)
+        try:
+            validator_cls.check_schema(schema)
+        except SchemaError:
+            # Un esquema roto del servidor no debe bloquear la llamada:
+            # se deja la validación en manos del propio servidor.
+            validator = False
+        else:
+            validator = validator_cls(schema)
+
+        self._by_fingerprint[fingerprint] = validator
+        return validator
+
+    def register_tools(self, server: str, tools: List[Any]) -> int:
+        """
+        Compila los validadores de todas las herramientas de un servidor.
+
+        Args:
+            server: Identificador del servidor (nombre en mcp_servers.json o ruta del script)
+            tools: Lista de herramientas devuelta por `list_tools`
+
+        Returns:
+            Número de herramientas con validador compilado
+        """
+        compiled = 0
+        with self._lock:
+            # Descartar validadores de herramientas que ya no existen en el servidor
+            for key in [k for k in self._by_tool if k[0] == server]:
+                del self._by_tool[key]
+
+            for tool in tools:
+                name = get_tool_name(tool)
+                schema = get_tool_input_schema(tool)
+                if not name or schema is None:
+                    continue
+                validator = self._compile(schema)
+                if validator:
+                    self._by_tool[(server, name)] = validator
+                    compiled += 1
+        return compiled
+
+    def has_tool(self, server: str, tool_name: str) -> bool:
+        """Indica si hay un validador compilado para la herramienta."""
+        return (server, tool_name) in self._by_tool
+
+    def validate(self, server: str, tool_name: str, arguments: Any) -> List[Dict[str, Any]]:
+        """
+        Valida los argumentos de una llamada a herramienta.
+
+        Args:
+            server: Identificador del servidor
+            tool_name: Nombre de la herramienta
+            arguments: Argumentos (`params`) generados por el LLM
+
+        Returns:
+            Lista de errores estructurados (vacía si los argumentos son válidos
+            o si no hay esquema registrado para la herramienta)
+        """
+        validator = self._by_tool.get((server, tool_name))
+        if validator is None:
+            return []
+
+        errors = []
+        for error in validator.iter_errors(arguments):
+            detail = {
+                "path": "/" + "/".join(str(p) for p in error.absolute_path),
+                "message": error.message,
+                "validator": error.validator,
+            }
+            if error.validator in ("type", "enum", "required", "const"):
+                detail["expected"] = error.validator_value
+            errors.append(detail)
+            if len(errors) >= self.max_errors:
+                break
+        return errors
+
+    def build_error_payload(self, server: str, tool_name: str, errors: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Construye la respuesta de error que se devuelve al LLM en lugar de llamar al servidor.
+
+        El formato es estable para que el modelo pueda corregir los `params`
+        y reintentar el comando.
+        """
+        return {
+            "error": {
+                "type": "invalid_params",
+                "server": server,
+                "tool": tool_name,
+                "message": f"Los argumentos de '{tool_name}' no cumplen el inputSchema de la herramienta",
+                "errors": errors,
+            }
+        }
+
+    def clear(self, server: Optional[str] = None):
+        """Elimina los validadores de un servidor (o todos si server es None)."""
+        with self._lock:
+            if server is None:
+                self._by_tool.clear()
+                self._by_fingerprint.clear()
+            else:
+                for key in [k for k in self._by_tool if k[0] == server]:
+                    del self._by_tool[key]
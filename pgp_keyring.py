@@ -0,0 +1,275 @@
+"""
+Llavero PGP en memoria para la verificación de firmas de la galería MCP
+Las claves públicas se parsean una sola vez (con pgpy) o se importan una sola
+vez en un GNUPGHOME privado (con gpg) y se mantienen en memoria hasta que
+cambia el archivo de la clave o se refresca el llavero. Los veredictos de
+verificación se guardan por (SHA-256 del contenido, SHA-256 de la firma,
+huella de la clave), de modo que volver a verificar o reinstalar un artefacto
+conocido no repite el trabajo criptográfico.
+"""
+
+import hashlib
+import os
+import subprocess
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from config_store import get_store
+from staged_download import StagedFile, hash_file
+
+try:
+    import pgpy
+except ImportError:  # Se usa gpg si está disponible
+    pgpy = None
+
+GNUPG_HOME_DIR = ".gnupg"
+VERDICT_CACHE_FILE = ".verdicts.json"
+
+
+def content_sha256(content) -> str:
+    """SHA-256 de un contenido en bytes, StagedFile o ruta (reutiliza el hash de la descarga si existe)."""
+    if isinstance(content, StagedFile):
+        return content.hexdigest("sha256") or hash_file(content.path)["sha256"]
+    if isinstance(content, Path):
+        return hash_file(content)["sha256"]
+    return hashlib.sha256(content).hexdigest()
+
+
+def _file_signature(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class PublicKey:
+    """Clave pública cargada: huella y, con pgpy, el objeto ya parseado."""
+
+    def __init__(self, path: Path, fingerprint: str, signature, parsed=None):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.signature = signature  # (mtime_ns, tamaño) del archivo al cargarla
+        self.parsed = parsed
+        self.gpg_imported = parsed is None and not fingerprint.startswith("sha256:")
+
+
+class PGPKeyring:
+    """
+    Claves públicas y veredictos de verificación compartidos por todas las verificaciones.
+    """
+
+    def __init__(self, keys_dir, logger=None, max_verdicts: int = 2048):
+        """
+        Args:
+            keys_dir: Directorio de claves públicas (public_keys)
+            logger: Logger opcional
+            max_verdicts: Veredictos que se conservan (los más antiguos se descartan)
+        """
+        self.keys_dir = Path(keys_dir)
+        self.gnupg_home = self.keys_dir / GNUPG_HOME_DIR
+        self.logger = logger
+        self.max_verdicts = max_verdicts
+
+        self._lock = threading.RLock()
+        self._keys: Dict[Path, PublicKey] = {}
+        self._gpg_available: Optional[bool] = None
+        self._verdict_store = get_store(self.keys_dir / VERDICT_CACHE_FILE, indent=0)
+        self._verdicts: Optional[OrderedDict] = None
+
+    # ------------------------------------------------------------------ #
+    # Claves
+    # ------------------------------------------------------------------ #
+
+    def refresh(self):
+        """Descarta las claves cargadas (tras instalar o eliminar una clave)."""
+        with self._lock:
+            self._keys.clear()
+
+    def get_key(self, key_file) -> Optional[PublicKey]:
+        """
+        Clave pública de un archivo, parseada una sola vez mientras el archivo no cambie.
+
+        Returns:
+            PublicKey, o None si el archivo no existe
+        """
+        path = Path(key_file).resolve()
+        signature = _file_signature(path)
+        if signature is None:
+            return None
+        with self._lock:
+            key = self._keys.get(path)
+            if key is None or key.signature != signature:
+                key = self._keys[path] = self._load_key(path, signature)
+            return key
+
+    def _load_key(self, path: Path, signature) -> PublicKey:
+        blob = path.read_bytes()
+        if pgpy is not None:
+            parsed, _ = pgpy.PGPKey.from_blob(blob)
+            return PublicKey(path, str(parsed.fingerprint).replace(" ", "").upper(), signature, parsed)
+        if self._has_gpg():
+            fingerprint = self._gpg_import(path)
+            if fingerprint:
+                return PublicKey(path, fingerprint, signature)
+        # Sin herramientas PGP: la huella es el hash del archivo (la verificación informará de la falta de herramientas)
+        return PublicKey(path, "sha256:" + hashlib.sha256(blob).hexdigest(), signature)
+
+    def _has_gpg(self) -> bool:
+        if self._gpg_available is None:
+            try:
+                result = subprocess.run(["gpg", "--version"], capture_output=True, text=True, timeout=5)
+                self._gpg_available = result.returncode == 0
+            except (OSError, subprocess.TimeoutExpired):
+                self._gpg_available = False
+        return self._gpg_available
+
+    def _gpg(self, *args, timeout: int = 10) -> subprocess.CompletedProcess:
+        self.gnupg_home.mkdir(mode=0o700, parents=True, exist_ok=True)
+        return subprocess.run(["gpg", "--homedir", str(self.gnupg_home), "--batch", "--no-tty", *args],
+                              capture_output=True, text=True, timeout=timeout)
+
+    def _gpg_import(self, path: Path) -> Optional[str]:
+        """Importa la clave en el GNUPGHOME privado del llavero y devuelve su huella primaria."""
+        result = self._gpg("--import-options", "import-show", "--with-colons", "--import", str(path))
+        if result.returncode != 0:
+            if self.logger:
+                self.logger.warning(f"gpg no pudo importar {path.name}: {result.stderr.strip()}")
+            return None
+        for line in result.stdout.splitlines():
+            fields = line.split(":")
+            if fields[0] == "fpr":
+                return fields[9].upper()
+        return None
+
+    # ------------------------------------------------------------------ #
+    # Verificación
+    # ------------------------------------------------------------------ #
+
+    def verify(self, content, signature: bytes, key_file) -> Tuple[Optional[bool], str]:
+        """
+        Verifica una firma separada.
+
+        Args:
+            content: Contenido en bytes, StagedFile o ruta del archivo firmado
+            signature: Firma PGP descargada
+            key_file: Archivo de la clave pública
+
+        Returns:
+            Tupla (verificado o None si no hay herramientas PGP, mensaje)
+        """
+        key = self.get_key(key_file)
+        if key is None:
+            return False, f"Archivo de clave pública no encontrado: {key_file}"
+
+        cache_key = f"{content_sha256(content)}:{hashlib.sha256(signature).hexdigest()}:{key.fingerprint}"
+        cached = self._get_verdict(cache_key)
+        if cached is not None:
+            return cached[0], cached[1]
+
+        verified = message = definitive = None
+        if key.parsed is not None:
+            verified, message, definitive = self._verify_with_pgpy(key, content, signature)
+        # Si pgpy no pudo verificar (algoritmo no soportado, firma ilegible...) se intenta con gpg
+        if not definitive and self._has_gpg() and self._ensure_gpg_import(key):
+            verified, message, definitive = self._verify_with_gpg(key, content, signature)
+        if verified is None:
+            return None, "No hay herramientas de verificación PGP disponibles"
+
+        # Los errores transitorios (timeouts, firmas ilegibles...) no se recuerdan
+        if definitive:
+            self._put_verdict(cache_key, verified, message)
+        return verified, message
+
+    def _ensure_gpg_import(self, key: PublicKey) -> bool:
+        """Importa en el GNUPGHOME privado una clave parseada con pgpy (solo la primera vez que hace falta gpg)."""
+        if key.fingerprint.startswith("sha256:"):
+            return False
+        with self._lock:
+            if not key.gpg_imported:
+                key.gpg_imported = self._gpg_import(key.path) is not None
+            return key.gpg_imported
+
+    def _verify_with_pgpy(self, key: PublicKey, content, signature: bytes) -> Tuple[bool, str, bool]:
+        """Verificación usando la clave ya parseada por pgpy. Devuelve (verificado, mensaje, definitivo)."""
+        try:
+            if isinstance(content, StagedFile):
+                content = content.path.read_bytes()
+            elif isinstance(content, Path):
+                content = content.read_bytes()
+            parsed_signature = pgpy.PGPSignature.from_blob(signature)
+            # Firma separada: se verifica sobre los bytes tal cual, no sobre un PGPMessage
+            if key.parsed.verify(content, parsed_signature):
+                return True, "Firma PGP verificada correctamente", True
+            return False, "Firma PGP inválida", True
+        except Exception as e:
+            return False, f"Error en verificación pgpy: {e}", False
+
+    def _verify_with_gpg(self, key: PublicKey, content, signature: bytes) -> Tuple[bool, str, bool]:
+        """
+        Verificación con gpg sobre el GNUPGHOME del llavero (la clave ya está importada).
+        Devuelve (verificado, mensaje, definitivo).
+        """
+        import tempfile
+        try:
+            with tempfile.TemporaryDirectory() as temp_dir:
+                temp_path = Path(temp_dir)
+                signature_file = temp_path / "signature.sig"
+                signature_file.write_bytes(signature)
+                if isinstance(content, StagedFile):
+                    content_file = content.path
+                elif isinstance(content, Path):
+                    content_file = content
+                else:
+                    content_file = temp_path / "content.tmp"
+                    content_file.write_bytes(content)
+
+                result = self._gpg("--status-fd", "1", "--verify", str(signature_file), str(content_file))
+            # La firma debe ser válida y de la clave pedida (el GNUPGHOME contiene todas las claves)
+            status = [line.split() for line in result.stdout.splitlines()]
+            for fields in status:
+                if len(fields) > 2 and fields[1] == "VALIDSIG":
+                    if fields[-1].upper() == key.fingerprint or fields[2].upper() == key.fingerprint:
+                        return True, "Firma PGP verificada con gpg", True
+                    return False, "La firma es válida pero de otra clave", True
+            bad_signature = any(len(fields) > 1 and fields[1] == "BADSIG" for fields in status)
+            return False, f"Verificación gpg falló: {result.stderr.strip()}", bad_signature
+        except subprocess.TimeoutExpired:
+            return False, "Timeout en verificación gpg", False
+        except OSError as e:
+            return False, f"Error en verificación gpg: {e}", False
+
+    # ------------------------------------------------------------------ #
+    # Caché de veredictos
+    # ------------------------------------------------------------------ #
+
+    def _load_verdicts(self) -> OrderedDict:
+        if self._verdicts is None:
+            try:
+                stored = self._verdict_store.read(default={})
+            except ValueError:
+                stored = {}
+            self._verdicts = OrderedDict(stored if isinstance(stored, dict) else {})
+        return self._verdicts
+
+    def _get_verdict(self, cache_key: str):
+        with self._lock:
+            verdicts = self._load_verdicts()
+            cached = verdicts.get(cache_key)
+            if cached is not None:
+                verdicts.move_to_end(cache_key)
+            return cached
+
+    def _put_verdict(self, cache_key: str, verified: bool, message: str):
+        with self._lock:
+            verdicts = self._load_verdicts()
+            verdicts[cache_key] = [verified, message]
+            while len(verdicts) > self.max_verdicts:
+                verdicts.popitem(last=False)
+            try:
+                self._verdict_store.write_later(dict(verdicts))
+            except OSError as e:
+                if self.logger:
+                    self.logger.warning(f"No se pudo guardar la caché de verificaciones: {e}")
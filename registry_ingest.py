@@ -0,0 +1,535 @@
+"""
+Ingesta paginada del registro oficial de servidores MCP
+Recorre todas las páginas de `/v0/servers` siguiendo el cursor, decodifica cada
+página de forma incremental mientras se descarga y normaliza las entradas en un
+pool de hilos acotado, de modo que la memoria no crece con el tamaño de las
+páginas sino solo con el número de servidores resultantes.
+
+Las peticiones son condicionales página a página: el `etag` que devuelve una
+ingesta es un validador opaco con el ETag, el Last-Modified y el cursor
+siguiente de cada página, y la ingesta solo se da por no modificada si todas
+las páginas responden 304.
+"""
+
+import base64
+import codecs
+import json
+import re
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import requests
+
+OFFICIAL_META_KEY = "io.modelcontextprotocol.registry/official"
+
+TAG_KEYWORDS = {
+    "filesystem": ["file", "folder", "directory", "filesystem"],
+    "weather": ["weather", "clima", "meteorol"],
+    "github": ["github", "git"],
+    "database": ["database", "sql", "postgres", "mysql", "sqlite"],
+    "api": ["api", "rest", "http"],
+    "search": ["search", "query", "find"],
+    "analytics": ["analytics", "analysis", "statistics"],
+    "commerce": ["commerce", "stripe", "payment", "merchant"],
+    "network": ["network", "pcap", "packet"],
+    "memory": ["memory", "context", "conversation"]
+}
+
+ICON_MAPPING = {
+    "filesystem": "📁",
+    "weather": "🌤️",
+    "github": "🐙",
+    "database": "🗄️",
+    "api": "🔗",
+    "search": "🔍",
+    "analytics": "📊",
+    "commerce": "🛒",
+    "network": "🌐",
+    "memory": "🧠",
+    "python": "🐍",
+    "nodejs": "📗",
+    "docker": "🐳"
+}
+DEFAULT_ICON = "data:text/plain;charset=utf-8,⚙️"
+PAGE_VALIDATORS_PREFIX = "pages:"  # Validador compuesto (uno por página) que devuelve RegistryIngestor
+
+
+# ---------------------------------------------------------------------- #
+# Normalización de entradas del registro
+# ---------------------------------------------------------------------- #
+
+def extract_server_id(server_name: str) -> str:
+    """Extrae un ID limpio del nombre del servidor."""
+    if not server_name:
+        return "unknown"
+
+    # Para nombres como "ai.company/server-name", usar "server-name"
+    if "/" in server_name:
+        return server_name.split("/")[-1]
+
+    # Para nombres como "company.server", usar "server"
+    if "." in server_name:
+        return server_name.split(".")[-1]
+
+    return server_name.lower().replace(" ", "-")
+
+
+def clean_server_name(server_name: str) -> str:
+    """Limpia el nombre del servidor para mostrar en UI."""
+    if "/" in server_name:
+        return server_name.split("/")[-1].replace("-", " ").title()
+    return server_name
+
+
+def extract_tags(server_data: Dict) -> List[str]:
+    """Extrae tags del servidor basado en descripción y datos (en orden estable)."""
+    tags = []
+
+    description = (server_data.get("description") or "").lower()
+    name = (server_data.get("name") or "").lower()
+
+    # Tags basados en palabras clave en descripción y nombre
+    for tag, keywords in TAG_KEYWORDS.items():
+        if any(keyword in description or keyword in name for keyword in keywords):
+            tags.append(tag)
+
+    # Tags desde packages
+    for package in server_data.get("packages") or []:
+        if package.get("registryType") == "npm":
+            tags.append("nodejs")
+        elif package.get("registryType") == "pypi":
+            tags.append("python")
+        elif package.get("registryType") == "oci":
+            tags.append("docker")
+
+    # Tags desde remotes
+    if server_data.get("remotes"):
+        tags.append("remote")
+
+    # dict.fromkeys elimina duplicados conservando el orden, para que el
+    # catálogo sea idéntico entre ejecuciones (la caché compara por igualdad)
+    return list(dict.fromkeys(tags)) if tags else ["general"]
+
+
+def extract_manifest_url(server_data: Dict) -> str:
+    """Extrae la URL del manifest desde packages o remotes."""
+    # Prioridad: remotes > packages
+    remotes = server_data.get("remotes") or []
+    if remotes:
+        return remotes[0].get("url", "")
+
+    packages = server_data.get("packages") or []
+    if packages:
+        package = packages[0]
+        registry_type = package.get("registryType", "")
+        identifier = package.get("identifier", "")
+
+        if registry_type == "npm":
+            return f"https://registry.npmjs.org/{identifier}"
+        elif registry_type == "pypi":
+            return f"https://pypi.org/project/{identifier}/"
+
+    return ""
+
+
+def generate_icon_url(tags: List[str], server_id: str) -> str:
+    """Genera URL de ícono (emoji en data URL) basado en tags."""
+    for tag in tags:
+        if tag in ICON_MAPPING:
+            return f"data:text/plain;charset=utf-8,{ICON_MAPPING[tag]}"
+    return DEFAULT_ICON
+
+
+def registry_item_key(item: Dict) -> str:
+    """Identificador estable de una entrada del registro (nombre completo con espacio de nombres)."""
+    return (item.get("server") or {}).get("name", "")
+
+
+def normalize_registry_item(item: Dict) -> Optional[Dict]:
+    """
+    Convierte una entrada del registro oficial al formato esperado por la UI.
+
+    Returns:
+        Servidor normalizado, o None si la entrada no está activa o no es la última versión
+    """
+    server_data = item.get("server") or {}
+    meta_data = (item.get("_meta") or {}).get(OFFICIAL_META_KEY, {})
+
+    # Solo incluir servidores activos y latest
+    if meta_data.get("status") != "active" or not meta_data.get("isLatest", False):
+        return None
+
+    server_id = extract_server_id(server_data.get("name", ""))
+    tags = extract_tags(server_data)
+
+    return {
+        "id": server_id,
+        "name": clean_server_name(server_data.get("name", "")),
+        "description": server_data.get("description", ""),
+        "icon": generate_icon_url(tags, server_id),
+        "manifest_url": extract_manifest_url(server_data),
+        "version": server_data.get("version", "1.0.0"),
+        "min_client_version": "1.0.0",  # Valor por defecto
+        "checksum": "",  # No disponible en API oficial
+        "signature_url": "",  # No disponible en API oficial
+        "tags": tags,
+        "_original": server_data  # Mantener datos originales para instalación
+    }
+
+
+# ---------------------------------------------------------------------- #
+# Decodificación incremental de páginas
+# ---------------------------------------------------------------------- #
+
+class RegistryPageParser:
+    """
+    Decodifica una página `{"servers": [...], "metadata": {...}}` a medida que llega.
+
+    Las entradas del array se devuelven en cuanto están completas; el resto del
+    documento (metadatos con el cursor) se conserva aparte y se decodifica al final.
+    """
+
+    _array_start = re.compile(r'"servers"\s*:\s*\[')
+
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._json = json.JSONDecoder()
+        self._buffer = ""
+        self._state = "prefix"
+        self._prefix = ""
+        self._suffix: List[str] = []
+
+    def feed(self, data: bytes) -> List[Dict]:
+        """Añade bytes de la respuesta y devuelve las entradas completas."""
+        self._buffer += self._decoder.decode(data)
+        items = []
+
+        if self._state == "prefix":
+            match = self._array_start.search(self._buffer)
+            if not match:
+                return items
+            self._prefix = self._buffer[:match.end() - 1]
+            self._buffer = self._buffer[match.end():]
+            self._state = "items"
+
+        if self._state == "items":
+            buffer = self._buffer
+            pos = 0
+            length = len(buffer)
+            while True:
+                while pos < length and buffer[pos] in " \t\r\n,":
+                    pos += 1
+                if pos >= length:
+                    break
+                if buffer[pos] == "]":
+                    self._state = "suffix"
+                    self._suffix.append(buffer[pos + 1:])
+                    pos = length
+                    break
+                try:
+                    item, pos = self._json.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    break  # entrada incompleta: esperar más datos
+                items.append(item)
+            self._buffer = buffer[pos:]
+        elif self._state == "suffix":
+            self._suffix.append(self._buffer)
+            self._buffer = ""
+        return items
+
+    def close(self) -> Dict:
+        """
+        Termina la página y devuelve el documento sin las entradas (metadatos).
+
+        Raises:
+            ValueError: Si la página está truncada o no tiene el array `servers`
+        """
+        self._buffer += self._decoder.decode(b"", final=True)
+        if self._state == "prefix":
+            # Página sin array "servers": decodificar el documento completo
+            try:
+                return json.loads(self._buffer or "{}")
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Página del registro inválida: {e}") from e
+        if self._state != "suffix":
+            raise ValueError("Página del registro truncada: el array 'servers' no se cerró")
+        self._suffix.append(self._buffer)
+        try:
+            return json.loads(self._prefix + "[]" + "".join(self._suffix))
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Metadatos de página inválidos: {e}") from e
+
+
+def parse_page_chunks(chunks: Iterable[bytes]) -> Tuple[List[Dict], Dict]:
+    """Decodifica una página completa a partir de sus fragmentos (útil en tests)."""
+    parser = RegistryPageParser()
+    items = []
+    for chunk in chunks:
+        items.extend(parser.feed(chunk))
+    return items, parser.close()
+
+
+# ---------------------------------------------------------------------- #
+# Ingesta
+# ---------------------------------------------------------------------- #
+
+def _intern_keys(value: Any) -> Any:
+    """
+    Reconstruye un valor JSON con las claves internadas.
+
+    Cada entrada se decodifica por separado, así que sus claves no comparten
+    memoria entre entradas (como sí ocurre con `json.loads` de una página entera).
+    Con decenas de miles de servidores conservados en `_original`, internarlas
+    evita miles de copias de "name", "version", "registryType", etc.
+    """
+    if isinstance(value, dict):
+        return {sys.intern(k): _intern_keys(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_intern_keys(v) for v in value]
+    return value
+
+
+def encode_page_validators(pages: List[List[Optional[str]]]) -> Optional[str]:
+    """
+    Validador opaco de una ingesta completa.
+
+    Args:
+        pages: Listas [cursor, etag, last_modified, cursor siguiente] de cada página, en orden
+
+    Returns:
+        Validador, o None si ninguna página devolvió ETag ni Last-Modified
+    """
+    if not any(page[1] or page[2] for page in pages):
+        return None
+    raw = json.dumps(pages, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return PAGE_VALIDATORS_PREFIX + base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_page_validators(etag: Optional[str], last_modified: Optional[str] = None
+                           ) -> Dict[str, Tuple[Optional[str], Optional[str], Optional[str], bool]]:
+    """
+    Validadores por página a partir del `etag` de la ingesta anterior.
+
+    Un ETag normal (de versiones anteriores) solo vale para la primera página y,
+    como no se conoce su cursor siguiente, esa página se vuelve a descargar si
+    el resto del recorrido lo necesita.
+
+    Returns:
+        Diccionario cursor ("" para la primera página) -> (etag, last_modified,
+        cursor siguiente, si se conoce el cursor siguiente)
+    """
+    if etag and etag.startswith(PAGE_VALIDATORS_PREFIX):
+        try:
+            pages = json.loads(base64.urlsafe_b64decode(etag[len(PAGE_VALIDATORS_PREFIX):]))
+            return {page[0] or "": (page[1], page[2], page[3], True) for page in pages}
+        except (ValueError, TypeError, IndexError, KeyError):
+            return {}
+    if etag or last_modified:
+        return {"": (etag, last_modified, None, False)}
+    return {}
+
+
+def _normalize_batch(batch: List[Dict]) -> List[Tuple[str, Optional[Dict]]]:
+    normalized = []
+    for item in batch:
+        server = normalize_registry_item(item)
+        if server is not None:
+            server["_original"] = _intern_keys(server["_original"])
+            normalized.append((registry_item_key(item) or server["id"], server))
+        elif registry_item_key(item) and \
+                (item.get("_meta") or {}).get(OFFICIAL_META_KEY, {}).get("status", "active") != "active":
+            # Entrada retirada (deleted/deprecated): la sincronización incremental la da de baja
+            normalized.append((registry_item_key(item), None))
+    return normalized
+
+
+class RegistryIngestor:
+    """
+    Descarga todas las páginas del registro y normaliza sus entradas.
+
+    La descarga de la página N+1 se solapa con la normalización de la página N
+    en un pool acotado; cuando hay demasiados lotes pendientes la descarga espera,
+    lo que mantiene plana la memoria con registros de decenas de miles de entradas.
+    """
+
+    def __init__(self, base_url: str, session: Optional[requests.Session] = None,
+                 page_size: int = 100, max_workers: int = 4, batch_size: int = 50,
+                 timeout: float = 15, max_pages: int = 1000,
+                 progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 logger: Optional[object] = None):
+        """
+        Args:
+            base_url: URL de `/v0/servers`
+            session: Sesión HTTP reutilizable (keep-alive)
+            page_size: Entradas solicitadas por página (`limit`)
+            max_workers: Hilos de normalización
+            batch_size: Entradas por lote de normalización
+            timeout: Timeout de cada petición en segundos
+            max_pages: Límite de seguridad de páginas
+            progress_callback: Recibe un diccionario de progreso tras cada página
+            logger: Logger opcional
+        """
+        self.base_url = base_url
+        self.session = session or requests.Session()
+        self.page_size = page_size
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.max_pages = max_pages
+        self.progress_callback = progress_callback
+        self.logger = logger
+        self.stats: Dict[str, Any] = {}
+
+    def ingest(self, etag: Optional[str] = None, last_modified: Optional[str] = None,
+               updated_since: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Recorre el registro completo.
+
+        Cada página se pide con los validadores que devolvió en la ingesta anterior.
+        Si todas responden 304 el resultado es `not_modified`; si alguna ha cambiado
+        después de páginas sin cambios, el recorrido se repite sin condiciones para
+        obtener el catálogo completo en orden.
+
+        Args:
+            etag: Validador devuelto por la ingesta anterior (o el ETag de la primera página)
+            last_modified: Last-Modified de la primera página de la ingesta anterior
+            updated_since: Solo entradas actualizadas después de esta fecha RFC 3339
+                (sincronización incremental)
+
+        Returns:
+            Diccionario con `servers` (normalizados y sin duplicados), `retired`
+            (claves de entradas retiradas que no tienen otra versión activa), `etag`
+            (validador de todas las páginas), `last_modified` (de la primera página),
+            `not_modified` y `stats`
+
+        Raises:
+            requests.RequestException: Si falla la descarga de alguna página
+            ValueError: Si una página no se puede decodificar
+        """
+        start = time.perf_counter()
+        results: Dict[str, Dict] = {}
+        retired = set()
+        stats = {"pages": 0, "items": 0, "servers": 0, "duplicates": 0, "bytes": 0, "done": False}
+        self.stats = stats
+        pending: deque = deque()
+        max_pending = self.max_workers * 2
+        stored = decode_page_validators(etag, last_modified)
+        page_validators: List[List[Optional[str]]] = []
+
+        def merge(future):
+            for key, server in future.result():
+                if server is None:
+                    retired.add(key)
+                    continue
+                if key in results:
+                    stats["duplicates"] += 1
+                    continue
+                results[key] = server
+            stats["servers"] = len(results)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="registry-normalize") as pool:
+            def submit(batch):
+                # Contrapresión: no acumular más lotes de los que el pool puede procesar
+                while len(pending) >= max_pending:
+                    merge(pending.popleft())
+                pending.append(pool.submit(_normalize_batch, batch))
+
+            cursor = None
+            seen_cursors = set()
+            conditional = bool(stored)  # Mientras todas las páginas anteriores sigan sin cambios
+            while stats["pages"] < self.max_pages:
+                known = stored.get(cursor or "") if conditional else None
+                response = self._get_page(cursor, known[0] if known else None,
+                                          known[1] if known else None, updated_since)
+                try:
+                    if known and response.status_code == 304 and known[3]:
+                        # Página sin cambios: se sigue con su cursor siguiente sin descargarla
+                        page_validators.append([cursor, known[0], known[1], known[2]])
+                        stats["pages"] += 1
+                        cursor = known[2]
+                        if not cursor or cursor in seen_cursors:
+                            return {"servers": [], "retired": [], "etag": etag, "last_modified": last_modified,
+                                    "not_modified": True, "stats": stats}
+                        seen_cursors.add(cursor)
+                        continue
+                    if conditional and (response.status_code == 304 or page_validators):
+                        # Cambió una página posterior (o no se sabe cómo seguir): recorrer todo de nuevo
+                        if self.logger:
+                            self.logger.info(f"Registro MCP modificado en la página {stats['pages'] + 1}; "
+                                             f"descargando todas las páginas")
+                        conditional = False
+                        page_validators = []
+                        stats["pages"] = 0
+                        cursor = None
+                        seen_cursors = set()
+                        continue
+                    conditional = False
+                    response.raise_for_status()
+
+                    parser = RegistryPageParser()
+                    batch = []
+                    for chunk in response.iter_content(chunk_size=64 * 1024):
+                        stats["bytes"] += len(chunk)
+                        for item in parser.feed(chunk):
+                            stats["items"] += 1
+                            batch.append(item)
+                            if len(batch) >= self.batch_size:
+                                submit(batch)
+                                batch = []
+                    if batch:
+                        submit(batch)
+                    envelope = parser.close()
+                finally:
+                    response.close()
+
+                stats["pages"] += 1
+                while pending and pending[0].done():
+                    merge(pending.popleft())
+                self._report(stats)
+
+                metadata = envelope.get("metadata") or {}
+                next_cursor = metadata.get("nextCursor") or metadata.get("next_cursor")
+                page_validators.append([cursor, response.headers.get("ETag"),
+                                        response.headers.get("Last-Modified"), next_cursor])
+                cursor = next_cursor
+                if not cursor or cursor in seen_cursors:
+                    break
+                seen_cursors.add(cursor)
+
+            while pending:
+                merge(pending.popleft())
+
+        stats["done"] = True
+        stats["seconds"] = time.perf_counter() - start
+        self._report(stats)
+        if self.logger:
+            self.logger.info(f"Registro MCP: {stats['servers']} servidores en {stats['pages']} páginas "
+                             f"({stats['duplicates']} duplicados, {stats['seconds']:.2f}s)")
+        return {"servers": list(results.values()), "retired": sorted(retired - results.keys()),
+                "etag": encode_page_validators(page_validators) if not updated_since else None,
+                "last_modified": page_validators[0][2] if page_validators else None,
+                "not_modified": False, "stats": stats}
+
+    def _get_page(self, cursor: Optional[str], etag: Optional[str], last_modified: Optional[str],
+                  updated_since: Optional[str] = None) -> requests.Response:
+        params = {"limit": self.page_size}
+        if cursor:
+            params["cursor"] = cursor
+        if updated_since:
+            params["updated_since"] = updated_since
+        headers = {"Accept": "application/json"}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        return self.session.get(self.base_url, params=params, headers=headers, stream=True, timeout=self.timeout)
+
+    def _report(self, stats: Dict[str, Any]):
+        if self.progress_callback:
+            try:
+                self.progress_callback(dict(stats))
+            except Exception:
+                pass
@@ -0,0 +1,241 @@
+"""
+Descargas en streaming a un archivo de staging
+Escribe la respuesta por bloques en `<staging>/<clave>.part` mientras calcula los
+hashes de forma incremental, de modo que la memoria no depende del tamaño del
+artefacto y verificar el checksum no requiere otra pasada sobre los datos. Si la
+transferencia se corta, se reanuda con peticiones HTTP Range (validadas con
+If-Range contra el ETag / Last-Modified de la primera respuesta), tanto dentro de
+la misma llamada como en una llamada posterior.
+"""
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional
+
+import requests
+
+CHUNK_SIZE = 256 * 1024
+
+# Errores de red tras los que se reintenta reanudando desde lo ya escrito
+_RESUMABLE_ERRORS = (
+    requests.ConnectionError,
+    requests.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+)
+
+
+class DownloadError(Exception):
+    """Error definitivo de una descarga (tras agotar los reintentos)."""
+
+
+def staging_key(url: str) -> str:
+    """Nombre estable del archivo de staging de una URL."""
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()[:24]
+
+
+class StagedFile:
+    """Archivo descargado y aún no instalado, con los hashes calculados al descargarlo."""
+
+    def __init__(self, path: Path, url: str, size: int, digests: Dict[str, str]):
+        self.path = Path(path)
+        self.url = url
+        self.size = size
+        self.digests = digests
+
+    def hexdigest(self, algorithm: str) -> Optional[str]:
+        """Hash calculado durante la descarga, o None si no se pidió ese algoritmo."""
+        return self.digests.get(algorithm.lower())
+
+    def commit(self, destination) -> Path:
+        """Mueve el archivo a su destino final (reemplazo atómico en el mismo sistema de archivos)."""
+        destination = Path(destination)
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(self.path, destination)
+        self.path = destination
+        return destination
+
+    def discard(self):
+        """Elimina el archivo de staging."""
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def hash_file(path, algorithms: Iterable[str] = ("sha256",), chunk_size: int = CHUNK_SIZE) -> Dict[str, str]:
+    """Calcula hashes de un archivo por bloques."""
+    hashers = {algorithm: hashlib.new(algorithm) for algorithm in algorithms}
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            for hasher in hashers.values():
+                hasher.update(chunk)
+    return {algorithm: hasher.hexdigest() for algorithm, hasher in hashers.items()}
+
+
+def _read_meta(meta_path: Path) -> Dict:
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_meta(meta_path: Path, meta: Dict):
+    tmp = meta_path.with_name(meta_path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(tmp, meta_path)
+
+
+def _content_range_start(response: requests.Response) -> Optional[int]:
+    """Primer byte de un `Content-Range: bytes inicio-fin/total`."""
+    value = response.headers.get("Content-Range", "")
+    try:
+        return int(value.split()[1].split("-")[0])
+    except (IndexError, ValueError):
+        return None
+
+
+def _total_size(response: requests.Response, offset: int) -> Optional[int]:
+    if response.status_code in (206, 416):  # `bytes inicio-fin/total` o `bytes */total`
+        total = response.headers.get("Content-Range", "").rpartition("/")[2]
+        return int(total) if total.isdigit() else None
+    length = response.headers.get("Content-Length")
+    return int(length) if length and length.isdigit() else None
+
+
+def download_to_staging(url: str, staging_dir, session: Optional[requests.Session] = None, timeout: float = 30,
+                        algorithms: Iterable[str] = ("sha256",), max_retries: int = 3,
+                        chunk_size: int = CHUNK_SIZE,
+                        progress_callback: Optional[Callable[[int, Optional[int]], None]] = None,
+                        logger=None) -> StagedFile:
+    """
+    Descarga una URL a un archivo de staging calculando los hashes al vuelo.
+
+    Args:
+        url: URL del artefacto
+        staging_dir: Directorio de staging (los `.part` de descargas interrumpidas se reanudan)
+        session: Sesión HTTP (con pool de conexiones) a reutilizar
+        timeout: Timeout de conexión y de lectura en segundos
+        algorithms: Algoritmos de hash a calcular (p. ej. "sha256", "sha512")
+        max_retries: Reintentos tras errores de red (cada uno reanuda con Range)
+        chunk_size: Tamaño de bloque de lectura
+        progress_callback: Recibe (bytes descargados, total o None)
+        logger: Logger opcional
+
+    Returns:
+        StagedFile con la ruta del archivo completo y sus hashes
+
+    Raises:
+        DownloadError: Si la descarga no se completa
+    """
+    session = session or requests.Session()
+    staging_dir = Path(staging_dir)
+    staging_dir.mkdir(parents=True, exist_ok=True)
+    key = staging_key(url)
+    part_path = staging_dir / f"{key}.part"
+    meta_path = staging_dir / f"{key}.part.json"
+    algorithms = [algorithm.lower() for algorithm in algorithms]
+
+    meta = _read_meta(meta_path)
+    validator = meta.get("etag") or meta.get("last_modified")
+    offset = part_path.stat().st_size if part_path.exists() else 0
+    if offset and (meta.get("url") != url or not validator):
+        offset = 0  # Parcial sin validador: no se puede reanudar con seguridad
+    if offset:
+        # Reanudación entre llamadas: los hashes parten de lo ya escrito
+        hashers = {algorithm: hashlib.new(algorithm) for algorithm in algorithms}
+        with open(part_path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                for hasher in hashers.values():
+                    hasher.update(chunk)
+        if logger:
+            logger.info(f"Reanudando descarga de {url} desde el byte {offset}")
+    else:
+        hashers = {algorithm: hashlib.new(algorithm) for algorithm in algorithms}
+        part_path.write_bytes(b"")
+
+    total = meta.get("total")
+    attempt = 0
+    while True:
+        # Sin compresión de transporte: los offsets de Range son bytes del artefacto
+        headers = {"Accept-Encoding": "identity"}
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+            headers["If-Range"] = validator
+        try:
+            with session.get(url, headers=headers, stream=True, timeout=timeout) as response:
+                if response.status_code == 416 and offset and total == offset and \
+                        _total_size(response, offset) in (None, offset):
+                    break  # Ya estaba completo
+                if response.status_code == 416 and offset:
+                    # El parcial no encaja con el recurso (p. ej. el recurso se acortó): descartarlo
+                    if logger:
+                        logger.warning(f"Rango no satisfacible para {url} desde el byte {offset}; "
+                                       f"descargando de nuevo desde cero")
+                    part_path.unlink(missing_ok=True)
+                    meta_path.unlink(missing_ok=True)
+                    offset = 0
+                    total = validator = None
+                    hashers = {algorithm: hashlib.new(algorithm) for algorithm in algorithms}
+                    continue
+                if offset and (response.status_code != 206 or _content_range_start(response) != offset):
+                    # El servidor ignoró el Range o el recurso cambió: empezar de cero
+                    if response.status_code not in (200, 206):
+                        response.raise_for_status()
+                    offset = 0
+                    hashers = {algorithm: hashlib.new(algorithm) for algorithm in algorithms}
+                    if response.status_code == 206:
+                        validator = None
+                        continue
+                response.raise_for_status()
+
+                total = _total_size(response, offset)
+                validator = response.headers.get("ETag") or response.headers.get("Last-Modified") or validator
+                _write_meta(meta_path, {
+                    "url": url,
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                    "total": total,
+                })
+
+                with open(part_path, "r+b" if offset else "wb") as f:
+                    f.seek(offset)
+                    f.truncate()
+                    for chunk in response.iter_content(chunk_size=chunk_size):
+                        if not chunk:
+                            continue
+                        f.write(chunk)
+                        for hasher in hashers.values():
+                            hasher.update(chunk)
+                        offset += len(chunk)
+                        if progress_callback:
+                            progress_callback(offset, total)
+
+            if total is not None and offset < total:
+                raise requests.exceptions.ChunkedEncodingError(f"respuesta incompleta ({offset}/{total} bytes)")
+            break
+        except _RESUMABLE_ERRORS as e:
+            attempt += 1
+            if attempt > max_retries:
+                raise DownloadError(f"Descarga de {url} interrumpida tras {max_retries} reintentos: {e}") from e
+            if logger:
+                logger.warning(f"Descarga de {url} interrumpida en el byte {offset}, reintentando: {e}")
+            time.sleep(min(0.5 * 2 ** (attempt - 1), 5))
+            if not validator:
+                # Sin validador no se puede pedir Range con garantías
+                offset = 0
+                hashers = {algorithm: hashlib.new(algorithm) for algorithm in algorithms}
+        except requests.RequestException as e:
+            raise DownloadError(f"Error descargando {url}: {e}") from e
+
+    try:
+        meta_path.unlink()
+    except FileNotFoundError:
+        pass
+    staged_path = part_path.with_suffix(".staged")
+    os.replace(part_path, staged_path)
+    return StagedFile(staged_path, url, offset, {a: h.hexdigest() for a, h in hashers.items()})
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark: listado completo /mcps de la API de la galería.
+
+Compara el endpoint anterior (response_model=List[MCPServer], validación y
+serialización en cada petición) con el cuerpo precalculado actual, en sus
+variantes identidad, gzip y revalidación con If-None-Match (304).
+
+Uso:
+    python tests/bench_gallery_api.py [--entries 10000] [--requests 50]
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from mcp_gallery_api.server import MCPServer, create_app
+
+
+def synthetic_catalog(entries):
+    return [{
+        "id": f"server-{i}",
+        "name": f"Server {i}",
+        "description": f"MCP server {i} providing file, search and database tools for agents",
+        "icon": f"https://example.com/icons/{i}.png",
+        "manifest_url": f"https://example.com/manifests/server-{i}.json",
+        "version": f"1.{i % 10}.0",
+        "min_client_version": "1.0.0",
+        "checksum": f"sha256:{i:064x}",
+        "signature_url": f"https://example.com/signatures/server-{i}.sig",
+        "tags": ["filesystem", "database"],
+    } for i in range(entries)]
+
+
+def legacy_app(catalog):
+    """El endpoint /mcps tal como era antes de precalcular la respuesta."""
+    app = FastAPI()
+
+    @app.get("/mcps", response_model=List[MCPServer])
+    async def list_mcps():
+        return catalog
+
+    return app
+
+
+def measure(client, requests, headers=None):
+    response = client.get("/mcps", headers=headers)  # Calentamiento (y serialización perezosa)
+    start = time.perf_counter()
+    for _ in range(requests):
+        response = client.get("/mcps", headers=headers)
+    elapsed = time.perf_counter() - start
+    return {
+        "status": response.status_code,
+        "bytes": response.num_bytes_downloaded,
+        "ms_per_request": round(elapsed / requests * 1000, 3),
+        "requests_per_sec": round(requests / elapsed, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del listado /mcps de la API de la galería")
+    parser.add_argument("--entries", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    catalog = synthetic_catalog(args.entries)
+    with tempfile.TemporaryDirectory() as data_dir:
+        Path(data_dir, "gallery.json").write_text(json.dumps(catalog), encoding="utf-8")
+        current = TestClient(create_app(data_dir))
+        legacy = TestClient(legacy_app(catalog))
+
+        etag = current.get("/mcps", headers={"Accept-Encoding": "gzip"}).headers["etag"]
+        report = {
+            "entries": args.entries,
+            "requests": args.requests,
+            "legacy": measure(legacy, args.requests, {"Accept-Encoding": "identity"}),
+            "precomputed_identity": measure(current, args.requests, {"Accept-Encoding": "identity"}),
+            "precomputed_gzip": measure(current, args.requests, {"Accept-Encoding": "gzip"}),
+            "not_modified": measure(current, args.requests, {"Accept-Encoding": "gzip", "If-None-Match": etag}),
+        }
+    report["speedup_identity"] = round(report["legacy"]["ms_per_request"] /
+                                       report["precomputed_identity"]["ms_per_request"], 1)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
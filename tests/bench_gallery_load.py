@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Prueba de carga en proceso de la API de la galería MCP.
+
+Ejecuta la aplicación ASGI de mcp_gallery_api contra un cliente HTTP asíncrono
+(httpx.ASGITransport, sin red) con varios clientes concurrentes y una mezcla
+de operaciones: listado completo (revalidado con ETag), páginas, detalle,
+búsqueda y altas/bajas. Informa de la latencia p50/p95/p99 por operación y
+del rendimiento total para cada tamaño de catálogo.
+
+Con --check se comparan los resultados con umbrales de regresión (los de
+DEFAULT_THRESHOLDS o los de un JSON con --thresholds) y el código de salida
+es 1 si alguno se supera; así lo ejecuta `tests/run_tests.py --load`.
+
+Uso:
+    python tests/bench_gallery_load.py [--sizes 100,1000,10000,50000] [--requests 1000]
+                                       [--concurrency 16] [--workload mixed] [--check]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import httpx
+
+from mcp_gallery_api.server import MCPGalleryAPI
+
+WORDS = ["file", "search", "database", "github", "slack", "weather", "browser", "memory", "docker",
+         "postgres", "sqlite", "calendar", "email", "notion", "finance", "image", "audio", "translate"]
+TAGS = ["filesystem", "database", "github", "web", "ai", "productivity", "nodejs", "python", "docker"]
+
+# Peso de cada operación por carga de trabajo
+WORKLOADS = {
+    "read": {"list_full": 5, "list_page": 30, "get": 40, "search": 25},
+    "mixed": {"list_full": 5, "list_page": 25, "get": 40, "search": 25, "add": 2.5, "delete": 2.5},
+    "churn": {"list_page": 20, "get": 20, "search": 10, "add": 25, "delete": 25},
+}
+
+# Umbrales de regresión (ms y peticiones/s) para --check, con margen sobre lo medido con 1000 entradas.
+# La cola (p99) la marcan las altas/bajas: esperan a que se publique la nueva versión del catálogo
+# (índice de búsqueda y cuerpos precalculados, construidos en un hilo); las lecturas no esperan.
+DEFAULT_THRESHOLDS = {
+    "max_error_rate": 0.0,
+    "max_p95_ms": 500.0,
+    "max_p99_ms": 2500.0,
+    "min_throughput_rps": 50.0,
+}
+
+
+def synthetic_catalog(entries: int, seed: int = 7) -> List[Dict]:
+    rng = random.Random(seed)
+    catalog = []
+    for i in range(entries):
+        words = rng.sample(WORDS, 4)
+        server_id = f"{words[0]}-{words[1]}-{i}"
+        catalog.append({
+            "id": server_id,
+            "name": f"{words[0].title()} {words[1].title()} Server {i}",
+            "description": f"MCP server {i} providing {words[2]} and {words[3]} tools for agents",
+            "icon": "",
+            "manifest_url": f"https://example.com/manifests/{server_id}.json",
+            "version": f"1.{i % 10}.0",
+            "min_client_version": "1.0.0",
+            "checksum": "sha256:placeholder",
+            "signature_url": "",
+            "tags": rng.sample(TAGS, 2),
+        })
+    return catalog
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Percentil por rango más cercano sobre valores ya ordenados."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(fraction * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies: List[float]) -> Dict:
+    values = sorted(latencies)
+    return {
+        "count": len(values),
+        "p50_ms": round(percentile(values, 0.50), 3),
+        "p95_ms": round(percentile(values, 0.95), 3),
+        "p99_ms": round(percentile(values, 0.99), 3),
+        "max_ms": round(values[-1], 3) if values else 0.0,
+    }
+
+
+class LoadRun:
+    """Estado compartido por los clientes concurrentes de una ejecución."""
+
+    def __init__(self, client: httpx.AsyncClient, catalog_ids: List[str], workload: Dict[str, float], seed: int):
+        self.client = client
+        self.ids = list(catalog_ids)
+        self.added: List[str] = []
+        self.operations = list(workload)
+        self.weights = [workload[operation] for operation in self.operations]
+        self.rng = random.Random(seed)
+        self.latencies: Dict[str, List[float]] = {operation: [] for operation in self.operations}
+        self.errors: Dict[str, int] = {}
+        self.etag = None
+        self.counter = 0
+
+    def _request(self, operation: str):
+        """Método, ruta y cabeceras de la siguiente petición de una operación."""
+        rng = self.rng
+        if operation == "list_full":
+            headers = {"Accept-Encoding": "gzip"}
+            if self.etag:
+                headers["If-None-Match"] = self.etag
+            return "GET", "/mcps", None, headers
+        if operation == "list_page":
+            return "GET", "/mcps?limit=50&fields=version", None, None
+        if operation == "get":
+            return "GET", f"/mcps/{rng.choice(self.ids)}", None, None
+        if operation == "search":
+            return "GET", f"/search?q={rng.choice(WORDS)}&limit=20", None, None
+        if operation == "delete" and self.added:
+            return "DELETE", f"/mcps/{self.added.pop(rng.randrange(len(self.added)))}", None, None
+        # Alta (también cuando no queda ninguna alta previa que borrar)
+        self.counter += 1
+        server = synthetic_catalog(1, seed=self.counter)[0]
+        server["id"] = f"load-{self.counter}"
+        return "POST", "/mcps", server, None
+
+    async def worker(self, requests: int):
+        for _ in range(requests):
+            operation = self.rng.choices(self.operations, self.weights)[0]
+            method, path, body, headers = self._request(operation)
+            start = time.perf_counter()
+            try:
+                response = await self.client.request(method, path, json=body, headers=headers)
+                ok = response.status_code in (200, 304)
+            except httpx.HTTPError:
+                ok = False
+            self.latencies[operation].append((time.perf_counter() - start) * 1000)
+            if not ok:
+                self.errors[operation] = self.errors.get(operation, 0) + 1
+                continue
+            if operation == "list_full":
+                self.etag = response.headers.get("etag")
+            elif method == "POST":
+                self.added.append(body["id"])
+
+
+async def run_load(app, catalog_ids: List[str], workload: Dict[str, float], total_requests: int,
+                   concurrency: int, seed: int = 11) -> Dict:
+    """
+    Ejecuta una carga contra una aplicación ASGI.
+
+    Returns:
+        Diccionario con latencias por operación, total, errores y rendimiento
+    """
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://gallery") as client:
+        run = LoadRun(client, catalog_ids, workload, seed)
+        per_worker = [total_requests // concurrency + (1 if i < total_requests % concurrency else 0)
+                      for i in range(concurrency)]
+        start = time.perf_counter()
+        await asyncio.gather(*(run.worker(count) for count in per_worker if count))
+        elapsed = time.perf_counter() - start
+
+    all_latencies = [value for values in run.latencies.values() for value in values]
+    return {
+        "requests": len(all_latencies),
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(all_latencies) / elapsed, 1) if elapsed else 0.0,
+        "errors": sum(run.errors.values()),
+        "error_rate": round(sum(run.errors.values()) / max(len(all_latencies), 1), 4),
+        "latency": summarize(all_latencies),
+        "operations": {operation: summarize(values) for operation, values in run.latencies.items() if values},
+    }
+
+
+def benchmark_size(entries: int, workload: str, total_requests: int, concurrency: int,
+                   storage: str = None) -> Dict:
+    """Carga un catálogo sintético en un directorio temporal y lo somete a la carga indicada."""
+    with tempfile.TemporaryDirectory() as data_dir:
+        catalog = synthetic_catalog(entries)
+        Path(data_dir, "gallery.json").write_text(json.dumps(catalog), encoding="utf-8")
+        gallery_api = MCPGalleryAPI(data_dir, storage)
+        try:
+            result = asyncio.run(run_load(gallery_api.app, [server["id"] for server in catalog],
+                                          WORKLOADS[workload], total_requests, concurrency))
+        finally:
+            gallery_api.storage.close()
+    return {"entries": entries, "workload": workload, **result}
+
+
+def check_thresholds(results: List[Dict], thresholds: Dict) -> List[str]:
+    """Umbrales superados (lista vacía si todo está dentro de los límites)."""
+    failures = []
+    for result in results:
+        label = f"{result['entries']} entradas/{result['workload']}"
+        if result["error_rate"] > thresholds["max_error_rate"]:
+            failures.append(f"{label}: tasa de errores {result['error_rate']}")
+        if result["latency"]["p95_ms"] > thresholds["max_p95_ms"]:
+            failures.append(f"{label}: p95 {result['latency']['p95_ms']} ms > {thresholds['max_p95_ms']} ms")
+        if result["latency"]["p99_ms"] > thresholds["max_p99_ms"]:
+            failures.append(f"{label}: p99 {result['latency']['p99_ms']} ms > {thresholds['max_p99_ms']} ms")
+        if result["throughput_rps"] < thresholds["min_throughput_rps"]:
+            failures.append(f"{label}: {result['throughput_rps']} peticiones/s < "
+                            f"{thresholds['min_throughput_rps']}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga en proceso de la API de la galería")
+    parser.add_argument("--sizes", default="100,1000,10000,50000", help="Tamaños de catálogo separados por coma")
+    parser.add_argument("--requests", type=int, default=1000, help="Peticiones por tamaño de catálogo")
+    parser.add_argument("--concurrency", type=int, default=16, help="Clientes concurrentes")
+    parser.add_argument("--workload", choices=sorted(WORKLOADS), default="mixed")
+    parser.add_argument("--storage", choices=["sqlite", "json"], help="Almacenamiento de la API")
+    parser.add_argument("--check", action="store_true", help="Comprobar los umbrales de regresión")
+    parser.add_argument("--thresholds", help="JSON con umbrales que sustituyen a los predeterminados")
+    args = parser.parse_args()
+
+    thresholds = dict(DEFAULT_THRESHOLDS)
+    if args.thresholds:
+        thresholds.update(json.loads(Path(args.thresholds).read_text(encoding="utf-8")))
+
+    results = [benchmark_size(int(size), args.workload, args.requests, args.concurrency, args.storage)
+               for size in args.sizes.split(",")]
+    report = {"results": results}
+    if args.check:
+        report["thresholds"] = thresholds
+        report["failures"] = check_thresholds(results, thresholds)
+    print(json.dumps(report, indent=2))
+    if args.check and report["failures"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark: búsqueda en el catálogo de la galería.
+
+Compara el filtrado lineal por subcadena (el de la ventana y de /search antes
+del índice) con GallerySearchIndex sobre un catálogo sintético.
+
+Uso:
+    python tests/bench_gallery_search.py [--entries 30000] [--repeat 20]
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from gallery_search_index import GallerySearchIndex
+
+WORDS = ["file", "search", "database", "github", "slack", "weather", "browser", "memory", "docker",
+         "postgres", "sqlite", "calendar", "email", "notion", "finance", "image", "audio", "translate"]
+TAGS = ["filesystem", "database", "github", "web", "ai", "productivity", "nodejs", "python", "docker"]
+QUERIES = ["github", "data", "sqlite tools", "wether", "serv 123", "postgres search", "xyz"]
+
+
+def synthetic_catalog(entries, seed=7):
+    rng = random.Random(seed)
+    catalog = []
+    for i in range(entries):
+        words = rng.sample(WORDS, 4)
+        catalog.append({
+            "id": f"{words[0]}-{words[1]}-{i}",
+            "name": f"{words[0].title()} {words[1].title()} Server {i}",
+            "description": f"MCP server {i} providing {words[2]} and {words[3]} tools for agents",
+            "tags": rng.sample(TAGS, 2),
+        })
+    return catalog
+
+
+def linear_search(catalog, term):
+    term = term.lower()
+    return [server for server in catalog
+            if (term in server["name"].lower() or term in server["description"].lower() or
+                any(term in tag.lower() for tag in server.get("tags", [])))]
+
+
+def timed(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del índice de búsqueda de la galería")
+    parser.add_argument("--entries", type=int, default=30000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    catalog = synthetic_catalog(args.entries)
+    start = time.perf_counter()
+    index = GallerySearchIndex(catalog)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    queries = []
+    for query in QUERIES:
+        linear_ms, linear = timed(lambda: linear_search(catalog, query), args.repeat)
+        index_ms, hits = timed(lambda: index.search_ids(query), args.repeat)
+        queries.append({"query": query, "linear_ms": round(linear_ms, 3), "linear_hits": len(linear),
+                        "index_ms": round(index_ms, 3), "index_hits": len(hits)})
+
+    report = {
+        "entries": args.entries,
+        "build_ms": round(build_ms, 1),
+        "vocabulary": len(index._vocabulary),
+        "queries": queries,
+        "max_index_ms": max(q["index_ms"] for q in queries),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
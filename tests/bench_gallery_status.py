@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark: estado de instalación de las tarjetas de la galería.
+
+Compara la consulta anterior (releer y parsear installed_servers.json y
+mcp_servers.json por tarjeta, con coincidencia por patrón O(M)) con el índice
+precalculado InstallationStatusIndex para un catálogo sintético.
+
+Uso:
+    python tests/bench_gallery_status.py [--entries 5000] [--installed 300] [--configured 60]
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from gallery_status_index import ID_MAPPINGS, InstallationStatusIndex
+
+
+def legacy_status(server_info, installed_file, mcp_file):
+    """Reproducción de la consulta por tarjeta previa al índice."""
+    server_id = server_info.get("id") or server_info.get("name", "unknown_server")
+    with open(installed_file, 'r', encoding='utf-8') as f:
+        installed_servers = json.load(f)
+    if server_id in installed_servers:
+        if installed_servers[server_id].get("version", "") != server_info.get("version", "1.0.0"):
+            return "update_available"
+        return "installed"
+    with open(mcp_file, 'r', encoding='utf-8') as f:
+        mcp_servers = json.load(f).get("mcpServers", {})
+    if server_id in mcp_servers:
+        return "installed"
+    if ID_MAPPINGS.get(server_id, server_id) in mcp_servers:
+        return "installed"
+    reverse_mappings = {v: k for k, v in ID_MAPPINGS.items()}
+    if reverse_mappings.get(server_id, server_id) in mcp_servers:
+        return "installed"
+    for mcp_id in mcp_servers.keys():
+        if (server_id.replace("-", "").lower() in mcp_id.lower() or
+                mcp_id.lower() in server_id.replace("-", "").lower()):
+            return "installed"
+    return "not_installed"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del índice de estado de la galería")
+    parser.add_argument("--entries", type=int, default=5000)
+    parser.add_argument("--installed", type=int, default=300)
+    parser.add_argument("--configured", type=int, default=60)
+    args = parser.parse_args()
+
+    entries = [{"id": f"gallery-server-{i}", "version": f"1.{i % 3}.0"} for i in range(args.entries)]
+    with tempfile.TemporaryDirectory() as tmp:
+        installed_file = Path(tmp) / "installed_servers.json"
+        mcp_file = Path(tmp) / "mcp_servers.json"
+        installed_file.write_text(json.dumps({
+            f"gallery-server-{i * 7}": {"version": "1.0.0", "install_path": f"/opt/mcps/{i}"}
+            for i in range(args.installed)
+        }))
+        mcp_file.write_text(json.dumps({"mcpServers": {
+            f"local-tool-{i}": {"command": "python", "args": [f"server_{i}.py"]} for i in range(args.configured)
+        }}))
+
+        start = time.perf_counter()
+        legacy = [legacy_status(e, installed_file, mcp_file) for e in entries]
+        legacy_seconds = time.perf_counter() - start
+
+        index = InstallationStatusIndex(installed_file, mcp_file)
+        start = time.perf_counter()
+        indexed = [index.status(e) for e in entries]
+        cold_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        [index.status(e) for e in entries]
+        warm_seconds = time.perf_counter() - start
+
+    report = {
+        "entries": args.entries,
+        "installed": args.installed,
+        "configured": args.configured,
+        "results_match": legacy == indexed,
+        "legacy_seconds": legacy_seconds,
+        "index_cold_seconds": cold_seconds,
+        "index_warm_seconds": warm_seconds,
+        "speedup_cold": legacy_seconds / cold_seconds,
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark: latencia de las mutaciones de la API de la galería según el almacenamiento.
+
+Mide POST /mcps y DELETE /mcps/{id} con el almacenamiento JSON (gallery.json
+completo en cada cambio) y con SQLite en modo WAL, para varios tamaños de
+catálogo.
+
+Uso:
+    python tests/bench_gallery_storage.py [--sizes 1000,10000,50000] [--mutations 50]
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from fastapi.testclient import TestClient
+
+from mcp_gallery_api.server import create_app
+
+
+def make_server(server_id):
+    return {
+        "id": server_id,
+        "name": f"Server {server_id}",
+        "description": "MCP server providing file, search and database tools for agents",
+        "icon": "",
+        "manifest_url": f"https://example.com/manifests/{server_id}.json",
+        "version": "1.0.0",
+        "min_client_version": "1.0.0",
+        "checksum": "sha256:placeholder",
+        "signature_url": "",
+        "tags": ["filesystem", "database"],
+    }
+
+
+def measure(backend, size, mutations):
+    with tempfile.TemporaryDirectory() as data_dir:
+        catalog = [make_server(f"server-{i}") for i in range(size)]
+        Path(data_dir, "gallery.json").write_text(json.dumps(catalog), encoding="utf-8")
+        insert_ms, delete_ms = [], []
+        # Un solo bucle de eventos, como en uvicorn: la publicación del catálogo sigue en segundo plano
+        with TestClient(create_app(data_dir, backend)) as client:
+            for i in range(mutations):
+                start = time.perf_counter()
+                client.post("/mcps", json=make_server(f"bench-{i}")).raise_for_status()
+                insert_ms.append((time.perf_counter() - start) * 1000)
+            for i in range(mutations):
+                start = time.perf_counter()
+                client.delete(f"/mcps/bench-{i}").raise_for_status()
+                delete_ms.append((time.perf_counter() - start) * 1000)
+    return {
+        "backend": backend,
+        "entries": size,
+        "insert_ms": round(sorted(insert_ms)[len(insert_ms) // 2], 3),
+        "delete_ms": round(sorted(delete_ms)[len(delete_ms) // 2], 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del almacenamiento de la API de la galería")
+    parser.add_argument("--sizes", default="1000,10000,50000")
+    parser.add_argument("--mutations", type=int, default=50)
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    results = [measure(backend, size, args.mutations) for backend in ("json", "sqlite") for size in sizes]
+    print(json.dumps({"mutations": args.mutations, "median_latency": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
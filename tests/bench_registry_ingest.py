@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmark: ingesta paginada del registro MCP contra un registro falso local.
+
+Compara la ingesta incremental (RegistryIngestor) con la forma ingenua de
+descargar cada página completa con `response.json()` y normalizarla en serie.
+Las páginas sintéticas se generan antes de medir, así que el pico de memoria
+(tracemalloc) refleja solo al cliente.
+
+Uso:
+    python tests/bench_registry_ingest.py [--entries 12000] [--page-size 100] [--latency-ms 20]
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from registry_ingest import RegistryIngestor, normalize_registry_item
+
+
+def synthetic_item(i):
+    return {
+        "server": {
+            "name": f"io.github.publisher{i % 97}/server-{i}",
+            "description": f"Synthetic MCP server {i} exposing database and file search tools " * 3,
+            "version": f"1.{i % 10}.0",
+            "repository": {"url": f"https://github.com/publisher{i % 97}/server-{i}", "source": "github"},
+            "packages": [{"registryType": "npm", "identifier": f"@publisher/server-{i}", "version": "1.0.0",
+                          "environmentVariables": [{"name": "API_KEY", "isSecret": True}]}],
+        },
+        "_meta": {"io.modelcontextprotocol.registry/official": {"status": "active", "isLatest": True,
+                                                                  "publishedAt": "2025-01-01T00:00:00Z"}},
+    }
+
+
+def build_pages(entries, page_size):
+    pages = {}
+    for offset in range(0, entries, page_size):
+        metadata = {"count": min(page_size, entries - offset)}
+        if offset + page_size < entries:
+            metadata["nextCursor"] = str(offset + page_size)
+        items = [synthetic_item(i) for i in range(offset, min(offset + page_size, entries))]
+        pages[str(offset)] = json.dumps({"servers": items, "metadata": metadata}).encode()
+    return pages
+
+
+def start_fake_registry(pages, latency):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            cursor = parse_qs(urlparse(self.path).query).get("cursor", ["0"])[0]
+            body = pages[cursor]
+            time.sleep(latency)  # latencia de red simulada
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v0/servers"
+
+
+def naive_ingest(url, page_size):
+    servers, cursor = {}, None
+    while True:
+        params = {"limit": page_size}
+        if cursor:
+            params["cursor"] = cursor
+        data = requests.get(url, params=params, timeout=30).json()
+        for item in data.get("servers", []):
+            normalized = normalize_registry_item(item)
+            if normalized:
+                servers[item["server"]["name"]] = normalized
+        cursor = data.get("metadata", {}).get("nextCursor")
+        if not cursor:
+            return list(servers.values())
+
+
+def measure(label, func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    servers = func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"label": label, "servers": len(servers), "seconds": elapsed, "peak_mb": peak / 1e6}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de ingesta del registro MCP")
+    parser.add_argument("--entries", type=int, default=12000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    pages = build_pages(args.entries, args.page_size)
+    server, url = start_fake_registry(pages, args.latency_ms / 1000)
+    try:
+        naive = measure("naive", lambda: naive_ingest(url, args.page_size))
+        ingestor = RegistryIngestor(url, page_size=args.page_size, max_workers=args.workers, timeout=30)
+        pipelined = measure("pipelined", lambda: ingestor.ingest()["servers"])
+    finally:
+        server.shutdown()
+
+    report = {
+        "entries": args.entries,
+        "pages": len(pages),
+        "page_bytes": sum(len(p) for p in pages.values()),
+        "results": [naive, pipelined],
+        "speedup": naive["seconds"] / pipelined["seconds"],
+        "stats": ingestor.stats,
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark: coste de validar argumentos con el validador compilado frente al
+viaje de ida y vuelta a un servidor MCP stdio que evita.
+
+El "servidor" es un proceso Python mínimo que responde a cada línea JSON-RPC
+con un error de validación, es decir, el mejor caso posible de un round-trip
+real (sin lógica de herramienta). El arranque en frío mide spawn + primera respuesta.
+
+Uso:
+    python tests/bench_tool_validation.py [--calls 20000] [--round-trips 200]
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from mcp_tool_validator import ToolSchemaValidator
+
+STUB_SERVER = (
+    "import sys, json\n"
+    "for line in sys.stdin:\n"
+    "    req = json.loads(line)\n"
+    "    sys.stdout.write(json.dumps({'jsonrpc': '2.0', 'id': req['id'],"
+    " 'error': {'code': -32602, 'message': 'Invalid params'}}) + '\\n')\n"
+    "    sys.stdout.flush()\n"
+)
+
+TOOL = {
+    "name": "search_files",
+    "inputSchema": {
+        "type": "object",
+        "properties": {
+            "path": {"type": "string"},
+            "pattern": {"type": "string", "minLength": 1},
+            "excludePatterns": {"type": "array", "items": {"type": "string"}},
+            "maxResults": {"type": "integer", "minimum": 1, "maximum": 1000},
+        },
+        "required": ["path", "pattern"],
+        "additionalProperties": False,
+    },
+}
+
+
+def bench_validation(calls):
+    validator = ToolSchemaValidator()
+    compile_start = time.perf_counter()
+    validator.register_tools("bench", [TOOL])
+    compile_time = time.perf_counter() - compile_start
+
+    valid_args = {"path": "/tmp", "pattern": "*.py", "excludePatterns": ["venv"], "maxResults": 50}
+    invalid_args = {"path": 1, "pattern": "", "maxResults": 0, "unexpected": True}
+
+    results = {"compile_ms": compile_time * 1000}
+    for label, args in (("valid", valid_args), ("invalid", invalid_args)):
+        start = time.perf_counter()
+        for _ in range(calls):
+            validator.validate("bench", "search_files", args)
+        results[f"{label}_us_per_call"] = (time.perf_counter() - start) / calls * 1e6
+    return results
+
+
+def bench_round_trip(round_trips):
+    cold_start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-c", STUB_SERVER], stdin=subprocess.PIPE,
+                            stdout=subprocess.PIPE, text=True, bufsize=1)
+    try:
+        request = {"jsonrpc": "2.0", "id": 0, "method": "tools/call",
+                   "params": {"name": "search_files", "arguments": {"path": 1}}}
+        proc.stdin.write(json.dumps(request) + "\n")
+        proc.stdin.flush()
+        proc.stdout.readline()
+        cold_ms = (time.perf_counter() - cold_start) * 1000
+
+        start = time.perf_counter()
+        for i in range(1, round_trips + 1):
+            request["id"] = i
+            proc.stdin.write(json.dumps(request) + "\n")
+            proc.stdin.flush()
+            proc.stdout.readline()
+        warm_us = (time.perf_counter() - start) / round_trips * 1e6
+    finally:
+        proc.stdin.close()
+        proc.wait(timeout=5)
+    return {"cold_start_ms": cold_ms, "warm_round_trip_us": warm_us}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de validación de argumentos MCP")
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--round-trips", type=int, default=200)
+    args = parser.parse_args()
+
+    report = {"validation": bench_validation(args.calls), "round_trip": bench_round_trip(args.round_trips)}
+    validation_us = report["validation"]["invalid_us_per_call"]
+    report["speedup_vs_warm_round_trip"] = report["round_trip"]["warm_round_trip_us"] / validation_us
+    report["speedup_vs_cold_start"] = report["round_trip"]["cold_start_ms"] * 1000 / validation_us
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
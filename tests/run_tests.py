@@ -1,6 +1,9 @@
 #!/usr/bin/env python3
 """
 Script principal para ejecutar todos los tests de PuenteLLM-MCP
+
+Con --load se ejecutan además los umbrales de regresión de la prueba de carga
+de la API de la galería (bench_gallery_load.py --check).
 """
 
 import os
@@ -9,13 +12,16 @@ import subprocess
 import json
 from pathlib import Path
 
-def run_test_file(test_file):
+# Prueba de carga reducida de la API de la galería: catálogos pequeño y mediano, carga mixta
+LOAD_TEST = ("bench_gallery_load.py", ["--sizes", "100,1000", "--requests", "400", "--check"])
+
+def run_test_file(test_file, args=None):
     """Ejecuta un archivo de test específico"""
     print(f"\n🧪 Ejecutando {test_file}...")
     print("="*50)
     
     try:
-        result = subprocess.run([sys.executable, test_file], 
+        result = subprocess.run([sys.executable, test_file] + list(args or []), 
                               capture_output=True, text=True, cwd=Path(__file__).parent)
         
         if result.returncode == 0:
@@ -72,6 +78,10 @@ def main():
         success = run_test_file(test_file)
         results.append((test_file, success))
     
+    if "--load" in sys.argv[1:]:
+        load_file, load_args = LOAD_TEST
+        results.append((load_file, run_test_file(load_file, load_args)))
+    
     # Resumen final
     print(f"\n{'='*60}")
     print("📊 RESUMEN FINAL")
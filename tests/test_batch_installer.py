@@ -0,0 +1,198 @@
+"""
+Tests para la instalación y actualización por lotes de servidores de la galería
+"""
+import json
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from gallery_batch_installer import BatchInstaller
+from mcp_gallery_manager import MCPGalleryManager
+from staged_download import StagedFile
+
+
+class LocalGalleryManager(MCPGalleryManager):
+    """Gestor con mcp_servers.json en el directorio temporal y runtimes siempre disponibles."""
+
+    fail_config_entry = False
+
+    def _mcp_servers_file(self) -> Path:
+        return self.base_dir / "mcp_servers.json"
+
+    def check_package_runtime(self, registry_type):
+        return True, "disponible"
+
+    def mcp_config_entry(self, server_id, server_data, mcp_servers):
+        if self.fail_config_entry:
+            raise OSError("disco lleno")
+        return super().mcp_config_entry(server_id, server_data, mcp_servers)
+
+
+class RecordingInstaller(BatchInstaller):
+    """
+    Registra los comandos en lugar de ejecutarlos; falla si incluyen un paquete marcado.
+    Los manifests "verificados" se escriben directamente en staging.
+    """
+
+    def __init__(self, *args, failing=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.failing = set(failing)
+        self.commands = []
+        self._commands_lock = threading.Lock()
+
+    def _run_command(self, cmd):
+        with self._commands_lock:
+            self.commands.append(cmd)
+        if any(part.split("@")[0].split("==")[0] in self.failing for part in cmd[2:]):
+            return False, "paquete no encontrado"
+        return True, ""
+
+    def _verify_one(self, item):
+        downloads_dir = self.gallery_manager.downloads_dir
+        downloads_dir.mkdir(parents=True, exist_ok=True)
+        path = downloads_dir / f"{item['server_id']}.part"
+        content = json.dumps({"name": item["server_id"], "version": item["server"]["version"]}).encode()
+        path.write_bytes(content)
+        return True, StagedFile(path, item["server"]["manifest_url"], len(content), {}), "Checksum verificado"
+
+
+def package_server(server_id, registry_type, version="1.0.0"):
+    return {
+        "id": server_id,
+        "name": server_id,
+        "description": f"Servidor {server_id}",
+        "version": version,
+        "tags": [],
+        "_original": {"packages": [{"registryType": registry_type, "identifier": f"pkg-{server_id}",
+                                    "version": version}]},
+    }
+
+
+def verified_server(server_id, registry_type, version="1.0.0"):
+    """Servidor de paquete con manifest remoto y checksum, que el lote descarga y verifica."""
+    server = package_server(server_id, registry_type, version)
+    server["manifest_url"] = f"https://example.com/{server_id}.json"
+    server["checksum"] = "sha256:verificado"
+    return server
+
+
+class TestBatchInstaller(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.manager = LocalGalleryManager(self.tmp.name)
+        self.mcp_file = self.manager._mcp_servers_file()
+        self.mcp_file.write_text(json.dumps({"mcpServers": {}}), encoding="utf-8")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _installer(self, **kwargs):
+        return RecordingInstaller(self.manager, **kwargs)
+
+    def test_same_runtime_packages_share_one_command(self):
+        servers = [package_server("a", "npm"), package_server("b", "npm"), package_server("c", "pypi")]
+        events = []
+        installer = self._installer(progress_callback=events.append)
+        result = installer.install(servers)
+
+        self.assertTrue(result["committed"])
+        self.assertEqual({r["status"] for r in result["results"].values()}, {"installed"})
+        npm_commands = [cmd for cmd in installer.commands if cmd[1] == "install" and cmd[0].startswith("npm")]
+        self.assertEqual(npm_commands, [[self.manager._npm_command(), "install", "-g", "pkg-a@1.0.0", "pkg-b@1.0.0"]])
+        self.assertIn(["pip", "install", "pkg-c==1.0.0"], installer.commands)
+
+        installed = self.manager.get_installed_servers()
+        self.assertEqual(set(installed), {"a", "b", "c"})
+        mcp_servers = json.loads(self.mcp_file.read_text(encoding="utf-8"))["mcpServers"]
+        self.assertEqual(set(mcp_servers), {"a", "b", "c"})
+        self.assertEqual(len({entry["port"] for entry in mcp_servers.values()}), 3)
+        self.assertEqual(self.manager.get_server_status(servers[0]), "installed")
+        self.assertEqual(events[-1]["completed"], 3)
+
+    def test_failed_group_is_retried_per_package(self):
+        servers = [package_server("a", "npm"), package_server("b", "npm")]
+        installer = self._installer(failing={"pkg-b"})
+        result = installer.install(servers)
+
+        self.assertTrue(result["committed"])
+        self.assertEqual(result["results"]["a"]["status"], "installed")
+        self.assertEqual(result["results"]["b"]["status"], "failed")
+        self.assertEqual(set(self.manager.get_installed_servers()), {"a"})
+
+    def test_rollback_on_failure_reverts_whole_batch(self):
+        self.manager.save_installed_servers({"a": self.manager.installation_record(
+            package_server("a", "npm"), {"install_method": "package", "registry_type": "npm",
+                                         "identifier": "pkg-a", "package_version": "1.0.0"})})
+        servers = [package_server("a", "npm", "2.0.0"), package_server("b", "pypi"), package_server("c", "pypi")]
+        installer = self._installer(failing={"pkg-c"}, rollback_on_failure=True)
+        result = installer.install(servers)
+
+        self.assertFalse(result["committed"])
+        self.assertEqual(result["results"]["a"]["status"], "rolled_back")
+        self.assertEqual(result["results"]["b"]["status"], "rolled_back")
+        self.assertEqual(result["results"]["c"]["status"], "failed")
+        # La actualización vuelve a la versión anterior; la instalación nueva se desinstala
+        self.assertIn([self.manager._npm_command(), "install", "-g", "pkg-a@1.0.0"], installer.commands)
+        self.assertIn(["pip", "uninstall", "-y", "pkg-b"], installer.commands)
+        self.assertEqual(self.manager.get_installed_servers()["a"]["version"], "1.0.0")
+
+    def test_commit_failure_restores_configuration(self):
+        before = self.mcp_file.read_bytes()
+        self.manager.fail_config_entry = True
+        installer = self._installer()
+        result = installer.install([package_server("a", "pypi")])
+
+        self.assertFalse(result["committed"])
+        self.assertEqual(result["results"]["a"]["status"], "rolled_back")
+        self.assertIn(["pip", "uninstall", "-y", "pkg-a"], installer.commands)
+        self.assertEqual(self.mcp_file.read_bytes(), before)
+        self.assertEqual(self.manager.get_installed_servers(), {})
+
+    def test_staged_manifests_of_failed_items_are_discarded(self):
+        installer = self._installer(failing={"pkg-b"})
+        result = installer.install([verified_server("a", "pypi"), verified_server("b", "pypi")])
+
+        self.assertEqual(result["results"]["b"]["status"], "failed")
+        self.assertTrue((self.manager.mcps_dir / "a" / "manifest.json").exists())
+        self.assertFalse((self.manager.mcps_dir / "b" / "manifest.json").exists())
+        self.assertEqual(list(self.manager.downloads_dir.iterdir()), [])
+
+    def test_config_write_failure_keeps_previous_manifest(self):
+        manifest = self.manager.mcps_dir / "a" / "manifest.json"
+        manifest.parent.mkdir(parents=True, exist_ok=True)
+        manifest.write_text('{"name": "a", "version": "1.0.0"}', encoding="utf-8")
+        self.manager.save_installed_servers({"a": {"version": "1.0.0"}})
+
+        def failing_write(data):
+            raise OSError("disco lleno")
+
+        mcp_store = self.manager._mcp_servers_store()
+        mcp_store.write = failing_write
+        try:
+            result = self._installer().install([verified_server("a", "pypi", "2.0.0")])
+        finally:
+            del mcp_store.write
+
+        self.assertFalse(result["committed"])
+        self.assertEqual(result["results"]["a"]["status"], "rolled_back")
+        self.assertEqual(json.loads(manifest.read_text(encoding="utf-8"))["version"], "1.0.0")
+        self.assertEqual(self.manager.get_installed_servers()["a"]["version"], "1.0.0")
+        self.assertEqual(list(self.manager.downloads_dir.iterdir()), [])
+
+    def test_up_to_date_servers_are_skipped(self):
+        self.manager.save_installed_servers({"a": {"version": "1.0.0"}})
+        installer = self._installer()
+        result = installer.install([package_server("a", "npm")])
+
+        self.assertEqual(result["results"]["a"]["status"], "skipped")
+        self.assertEqual(installer.commands, [])
+        self.assertFalse(result["committed"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+"""
+Tests para el almacén de configuración JSON (caché por mtime, escrituras atómicas y debounce)
+"""
+import json
+import subprocess
+import sys
+import tempfile
+import textwrap
+import unittest
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from config_store import JsonFileStore, get_store
+
+
+class CountingStore(JsonFileStore):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.writes = 0
+
+    def _write_locked(self, data):
+        self.writes += 1
+        super()._write_locked(data)
+
+
+class TestJsonFileStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "config.json"
+        self.path.write_text(json.dumps({"a": 1}), encoding="utf-8")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_read_is_cached_until_file_changes(self):
+        store = JsonFileStore(self.path)
+        first = store.read(copy=False)
+        self.assertIs(store.read(copy=False), first)
+
+        # Modificación externa (otro proceso o editor)
+        self.path.write_text(json.dumps({"a": 1, "b": 2}), encoding="utf-8")
+        self.assertEqual(store.read(), {"a": 1, "b": 2})
+
+        # Las copias devueltas por defecto no alteran la caché
+        copy = store.read()
+        copy["c"] = 3
+        self.assertNotIn("c", store.read(copy=False))
+
+    def test_write_is_atomic_and_updates_cache(self):
+        store = JsonFileStore(self.path, indent=2)
+        store.write({"servers": ["x"]})
+        self.assertEqual(json.loads(self.path.read_text(encoding="utf-8")), {"servers": ["x"]})
+        self.assertEqual(store.read(), {"servers": ["x"]})
+        leftovers = [p.name for p in self.path.parent.iterdir() if p.name.endswith(".tmp")]
+        self.assertEqual(leftovers, [])
+
+    def test_write_later_coalesces_bursts(self):
+        store = CountingStore(self.path, debounce=60)
+        for value in range(5):
+            store.write_later({"a": value})
+        # Aún no se escribió, pero las lecturas ven el valor pendiente
+        self.assertEqual(json.loads(self.path.read_text(encoding="utf-8")), {"a": 1})
+        self.assertEqual(store.read(), {"a": 4})
+
+        store.flush()
+        self.assertEqual(store.writes, 1)
+        self.assertEqual(json.loads(self.path.read_text(encoding="utf-8")), {"a": 4})
+
+    def test_update_without_changes_does_not_write(self):
+        store = CountingStore(self.path)
+        self.assertFalse(store.update(lambda data: False))
+        self.assertEqual(store.writes, 0)
+        store.update(lambda data: data.update(b=2))
+        self.assertEqual(store.writes, 1)
+        self.assertEqual(store.read(), {"a": 1, "b": 2})
+
+    def test_get_store_is_shared_per_path(self):
+        self.assertIs(get_store(self.path), get_store(str(self.path)))
+
+    def test_updates_from_several_processes_are_serialized(self):
+        self.path.write_text(json.dumps({"count": 0}), encoding="utf-8")
+        script = textwrap.dedent(f"""
+            import sys
+            sys.path.insert(0, {str(project_root)!r})
+            from config_store import JsonFileStore
+            store = JsonFileStore({str(self.path)!r})
+            for _ in range(40):
+                store.update(lambda data: data.update(count=data["count"] + 1))
+        """)
+        workers = [subprocess.Popen([sys.executable, "-c", script]) for _ in range(3)]
+        for worker in workers:
+            self.assertEqual(worker.wait(timeout=60), 0)
+        self.assertEqual(json.loads(self.path.read_text(encoding="utf-8"))["count"], 120)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,223 @@
+"""
+Tests para el servicio de disponibilidad de Docker (contra un daemon falso en un socket unix)
+"""
+import json
+import os
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import docker
+
+from docker_availability import DockerAvailability
+
+
+class FakeDaemon(BaseHTTPRequestHandler):
+    """Solo `/_ping` y `/version`; cierra cada conexión para que una parada se note en el siguiente ping."""
+
+    def log_message(self, *args):
+        pass
+
+    def address_string(self):
+        return "unix"
+
+    def do_GET(self):
+        self.server.calls.append(self.path)
+        if self.path.endswith("/_ping"):
+            body = b"OK"
+        else:
+            body = json.dumps({"ApiVersion": "1.44", "Version": "25.0.0"}).encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FakeDaemonServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path, calls):
+        super().__init__(path, FakeDaemon)
+        self.calls = calls
+
+
+class TestDockerAvailability(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.socket_path = str(Path(self.tmp.name, "docker.sock"))
+        self.calls = []
+        self.server = None
+        self.start_daemon()
+        self.attempts = []
+
+        def broken(timeout):
+            self.attempts.append("broken")
+            raise docker.errors.DockerException("endpoint inaccesible")
+
+        def unix(timeout):
+            self.attempts.append("unix")
+            kwargs = {"timeout": timeout} if timeout is not None else {}
+            return docker.DockerClient(base_url=f"unix://{self.socket_path}", version="1.44", **kwargs)
+
+        self.endpoints = [("roto", broken), ("unix", unix)]
+        self.services = []
+
+    def tearDown(self):
+        for service in self.services:
+            service.stop()
+        self.stop_daemon()
+        self.tmp.cleanup()
+
+    def make(self, **kwargs):
+        service = DockerAvailability(endpoints=self.endpoints, **kwargs)
+        self.services.append(service)
+        return service
+
+    def start_daemon(self):
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self.server = FakeDaemonServer(self.socket_path, self.calls)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop_daemon(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def pings(self):
+        return sum(1 for call in self.calls if call.endswith("/_ping"))
+
+    def test_endpoint_resolved_once_and_cached(self):
+        service = self.make(ttl=3600, probe_interval=60)
+        self.assertTrue(service.available)
+        self.assertEqual(service.endpoint, "unix")
+        self.assertIsNotNone(service.client)
+        self.assertEqual(self.attempts, ["broken", "unix", "unix"])  # Cliente de ping y cliente de trabajo
+
+        pings = self.pings()
+        for _ in range(1000):
+            self.assertTrue(service.available)
+        self.assertEqual(self.pings(), pings)  # Consultar no toca el daemon
+
+        # Una nueva comprobación basta con un ping con el cliente ya resuelto
+        self.assertTrue(service.refresh())
+        self.assertEqual(self.pings(), pings + 1)
+        self.assertEqual(service.stats["resolutions"], 1)
+        self.assertEqual(self.attempts, ["broken", "unix", "unix"])
+
+    def test_change_notifications_and_negative_cache(self):
+        service = self.make(ttl=3600, probe_interval=60)
+        changes = []
+        unsubscribe = service.subscribe(changes.append)
+        self.assertTrue(service.refresh())
+        self.assertEqual(changes, [True])
+
+        self.stop_daemon()
+        service.mark_unavailable()
+        self.assertFalse(service.available)
+        self.assertIsNone(service.client)
+        self.assertEqual(changes, [True, False])
+        resolutions = service.stats["resolutions"]
+        for _ in range(100):
+            self.assertFalse(service.available)  # El resultado negativo también se guarda
+        self.assertEqual(service.stats["resolutions"], resolutions)
+
+        self.start_daemon()
+        self.assertTrue(service.refresh())
+        self.assertEqual(changes, [True, False, True])
+        self.assertTrue(service.refresh())
+        self.assertEqual(len(changes), 3)  # Sin cambio no hay notificación
+
+        unsubscribe()
+        self.stop_daemon()
+        self.assertFalse(service.refresh())
+        self.assertEqual(len(changes), 3)
+
+    def test_available_never_probes_on_the_caller_thread(self):
+        with self.assertRaises(ValueError):
+            self.make(ttl=5, probe_interval=15)
+
+        service = self.make(ttl=0.05, probe_interval=0.01)
+        self.assertTrue(service.available)  # Primera consulta: aún no había estado
+        pings = self.pings()
+        time.sleep(0.1)
+        for _ in range(1000):
+            self.assertTrue(service.available)  # Estado antiguo, pero sin ping desde quien consulta
+        self.assertEqual(self.pings(), pings)
+
+        # Una operación explícita con el estado más antiguo que el TTL sí comprueba
+        self.assertTrue(service.ensure_running())
+        self.assertEqual(self.pings(), pings + 1)
+
+    def test_mark_unavailable_wakes_background_probe(self):
+        service = self.make(ttl=3600, probe_interval=60)
+        changes = []
+        service.subscribe(changes.append)
+        self.assertTrue(service.available)
+        service.start()
+
+        service.mark_unavailable()
+        self.assertFalse(service.available)
+        # El hilo comprueba enseguida, sin esperar al intervalo, y el daemon sigue respondiendo
+        deadline = time.monotonic() + 5
+        while changes[-1] is not True and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(changes, [True, False, True])
+        self.assertTrue(service.available)
+
+    def test_background_probe_detects_changes(self):
+        service = self.make(ttl=60, probe_interval=0.05)
+        changes = []
+        service.subscribe(changes.append)
+        self.assertTrue(service.available)
+        service.start()
+
+        self.stop_daemon()
+        deadline = time.monotonic() + 5
+        while changes[-1] is not False and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(changes, [True, False])
+        self.assertFalse(service.available)  # Ya en caché, sin esperar al TTL
+
+        self.start_daemon()
+        deadline = time.monotonic() + 5
+        while changes[-1] is not True and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(changes, [True, False, True])
+
+    def test_manager_skips_cli_probes_until_explicit_operation(self):
+        from docker_mcp_manager import DockerMCPManager
+
+        service = self.make(ttl=3600, probe_interval=60)
+        manager = DockerMCPManager(str(Path(self.tmp.name, "config")), availability=service)
+        commands = []
+        manager.docker_helper.run_command = lambda *args, **kwargs: commands.append(args) or (False, "")
+        try:
+            self.assertTrue(manager.check_docker_availability())
+            self.assertIs(manager.docker_client, service.client)
+
+            self.stop_daemon()
+            service.mark_unavailable()
+            self.assertEqual(manager.get_available_docker_servers(), [])
+            self.assertFalse(manager.check_docker_availability())
+            self.assertEqual(commands, [])
+
+            # Solo una operación explícita intenta arrancar Docker con la CLI
+            success, _ = manager.install_docker_server("inexistente")
+            self.assertFalse(success)
+            self.assertTrue(commands)
+        finally:
+            manager.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,270 @@
+"""
+Tests para el arranque de servidores MCP Docker: reutilización de contenedores,
+señales de preparación y arranques en paralelo (contra una API de Docker falsa en un socket unix)
+"""
+import json
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import docker
+
+from docker_availability import DockerAvailability
+from docker_mcp_manager import DockerMCPManager
+
+READY_DELAY = 0.4  # Segundos que tarda cada servidor falso en estar listo
+
+
+class FakeEngine(BaseHTTPRequestHandler):
+    """Ping, inspect, create, start, stop, remove y logs de contenedores."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def address_string(self):
+        return "unix"
+
+    def _reply(self, status, payload=None, raw=None):
+        body = raw if raw is not None else (json.dumps(payload).encode() if payload is not None else b"")
+        self.send_response(status)
+        if payload is not None:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _route(self):
+        url = urlparse(self.path)
+        path = url.path.split("/", 2)[2] if url.path.startswith("/v1.") else url.path.lstrip("/")
+        return path.split("/"), parse_qs(url.query)
+
+    def _find(self, ref):
+        engine = self.server.engine
+        return engine.containers.get(ref) or next(
+            (c for c in engine.containers.values() if c["Id"] == ref), None)
+
+    def do_GET(self):
+        parts, query = self._route()
+        if parts == ["_ping"]:
+            return self._reply(200, raw=b"OK")
+        if parts == ["version"]:
+            return self._reply(200, {"ApiVersion": "1.44", "Version": "25.0.0"})
+        container = self._find(parts[1]) if parts[0] == "containers" and len(parts) == 3 else None
+        if container is None:
+            return self._reply(404, {"message": "No such container"})
+        if parts[2] == "json":
+            return self._reply(200, self.server.engine.inspect(container))
+        since = float(query.get("since", ["0"])[0])
+        lines = [line for at, line in container["logs"] if at >= since]
+        self._reply(200, raw="".join(f"{line}\n" for line in lines).encode())
+
+    def do_POST(self):
+        parts, query = self._route()
+        engine = self.server.engine
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+        if parts == ["containers", "create"]:
+            return self._reply(201, {"Id": engine.create(query["name"][0], body), "Warnings": []})
+        container = self._find(parts[1])
+        if container is None:
+            return self._reply(404, {"message": "No such container"})
+        if parts[2] == "start":
+            engine.start(container)
+        elif parts[2] == "stop":
+            container["Status"] = "exited"
+        self._reply(204)
+
+    def do_DELETE(self):
+        parts, _ = self._route()
+        container = self._find(parts[1])
+        self.server.engine.containers.pop(container["Name"], None)
+        self.server.engine.calls.append("remove")
+        self._reply(204)
+
+
+class Engine:
+    """Estado del daemon falso; el comportamiento al arrancar depende de la imagen."""
+
+    def __init__(self):
+        self.containers = {}
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def create(self, name, body):
+        with self.lock:
+            self.calls.append("create")
+            container = {"Id": f"id-{name}-{len(self.calls)}", "Name": name, "Image": body["Image"],
+                         "Labels": body.get("Labels") or {}, "Env": body.get("Env") or [],
+                         "Status": "created", "ExitCode": 0, "StartedAt": "0001-01-01T00:00:00Z",
+                         "Health": None, "logs": [], "started": 0.0}
+            self.containers[name] = container
+            return container["Id"]
+
+    def start(self, container):
+        self.calls.append("start")
+        now = time.time()
+        container.update(Status="running", started=now, StartedAt=datetime.fromtimestamp(
+            now, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f") + "123Z")
+        container["logs"].append((now, "arrancando"))
+        image = container["Image"].split(":")[0]
+        if image == "mcp/health":
+            container["Health"] = "starting"
+        if image == "mcp/crash":
+            container.update(Status="exited", ExitCode=1)
+
+        def become_ready():
+            if container["Status"] != "running":
+                return
+            if image == "mcp/log":
+                container["logs"].append((time.time(), "server ready"))
+            elif image == "mcp/health":
+                container["Health"] = "healthy"
+        threading.Timer(READY_DELAY, become_ready).start()
+
+    def inspect(self, container):
+        state = {"Status": container["Status"], "Running": container["Status"] == "running",
+                 "ExitCode": container["ExitCode"], "StartedAt": container["StartedAt"]}
+        if container["Health"]:
+            state["Health"] = {"Status": container["Health"]}
+        return {"Id": container["Id"], "Name": f"/{container['Name']}", "State": state,
+                "Config": {"Image": container["Image"], "Labels": container["Labels"], "Tty": True,
+                           "Env": container["Env"]},
+                "HostConfig": {"LogConfig": {"Type": "json-file"}}}
+
+
+class FakeEngineServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path, engine):
+        super().__init__(path, FakeEngine)
+        self.engine = engine
+
+
+class FakeMCP(BaseHTTPRequestHandler):
+    """Responde a initialize solo cuando el contenedor `mcp-init` lleva READY_DELAY en ejecución."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        message = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        container = self.server.engine.containers.get("mcp-init")
+        ready = container and container["Status"] == "running" and time.time() - container["started"] >= READY_DELAY
+        if not ready:
+            status, body = 503, b"starting"
+        elif "id" not in message:
+            status, body = 202, b""
+        else:
+            status, body = 200, json.dumps({"jsonrpc": "2.0", "id": message["id"], "result": {
+                "protocolVersion": "2025-03-26", "capabilities": {}, "serverInfo": {"name": "init"}}}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class TestDockerStartup(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        socket_path = str(Path(self.tmp.name, "docker.sock"))
+        self.engine = Engine()
+        self.server = FakeEngineServer(socket_path, self.engine)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        self.mcp_server = ThreadingHTTPServer(("127.0.0.1", 0), FakeMCP)
+        self.mcp_server.daemon_threads = True
+        self.mcp_server.engine = self.engine
+        threading.Thread(target=self.mcp_server.serve_forever, daemon=True).start()
+        mcp_port = self.mcp_server.server_address[1]
+
+        availability = DockerAvailability(endpoints=[(
+            "unix", lambda timeout: docker.DockerClient(base_url=f"unix://{socket_path}", version="1.44"))])
+        self.manager = DockerMCPManager(str(Path(self.tmp.name, "config")), availability=availability)
+        self.manager.docker_helper.run_command = lambda *args, **kwargs: (False, "")
+
+        def entry(name, image, **docker_config):
+            return {"name": name, "docker": {"image": image, "tag": "latest", "environment": {"MODE": "a"},
+                                             **docker_config}}
+        self.manager.docker_servers_catalog = [
+            entry("log", "mcp/log", readiness={"log_pattern": r"server ready"}),
+            entry("health", "mcp/health"),
+            entry("init", "mcp/init", ports=[f"{mcp_port}:8080"], readiness={"mcp_path": "/mcp"}),
+            entry("crash", "mcp/crash", readiness={"log_pattern": "nunca", "timeout": 30}),
+        ] + [entry(f"log-{i}", "mcp/log", readiness={"log_pattern": r"server ready"}) for i in range(4)]
+
+    def tearDown(self):
+        self.manager.close()
+        self.mcp_server.shutdown()
+        self.mcp_server.server_close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def running_file(self):
+        return json.loads(self.manager.running_containers_file.read_text(encoding="utf-8"))
+
+    def test_warm_start_reuses_stopped_container_with_same_config(self):
+        started = time.perf_counter()
+        success, message = self.manager.start_docker_server("log")
+        self.assertTrue(success, message)
+        self.assertGreaterEqual(time.perf_counter() - started, READY_DELAY)  # Esperó al log, no a un sleep fijo
+        self.assertEqual(self.running_file()["log"]["start_mode"], "cold")
+        self.assertEqual(self.running_file()["log"]["ready_by"], "log")
+        self.assertFalse(self.manager.start_docker_server("log")[0])  # Ya en ejecución
+
+        # Detenido y arrancado de nuevo: mismo contenedor; los logs del arranque anterior no cuentan
+        self.assertTrue(self.manager.stop_docker_server("log")[0])
+        started = time.perf_counter()
+        self.assertTrue(self.manager.start_docker_server("log")[0])
+        self.assertGreaterEqual(time.perf_counter() - started, READY_DELAY)
+        self.assertEqual(self.engine.calls.count("create"), 1)
+        self.assertEqual(self.running_file()["log"]["start_mode"], "warm")
+
+        # Con otra configuración el contenedor se sustituye
+        self.manager.stop_docker_server("log")
+        self.assertTrue(self.manager.start_docker_server("log", {"MODE": "b"})[0])
+        self.assertEqual(self.engine.calls.count("create"), 2)
+        self.assertEqual(self.engine.calls.count("remove"), 1)
+        self.assertEqual(self.manager.docker_servers_catalog[0]["docker"]["environment"], {"MODE": "a"})
+
+        stats = self.manager.get_startup_stats()
+        self.assertEqual((stats["cold"]["count"], stats["warm"]["count"]), (2, 1))
+
+    def test_parallel_start_with_each_readiness_signal(self):
+        names = ["log", "health", "init"] + [f"log-{i}" for i in range(4)]
+        started = time.perf_counter()
+        results = self.manager.start_docker_servers(names, max_workers=len(names))
+        elapsed = time.perf_counter() - started
+
+        self.assertTrue(all(success for success, _ in results.values()), results)
+        self.assertLess(elapsed, len(names) * READY_DELAY * 0.75)  # En serie tardaría al menos len(names) * READY_DELAY
+        running = self.running_file()
+        self.assertEqual({name: running[name]["ready_by"] for name in ("log", "health", "init")},
+                         {"log": "log", "health": "healthcheck", "init": "initialize"})
+
+    def test_exited_container_fails_without_waiting_for_timeout(self):
+        started = time.perf_counter()
+        success, message = self.manager.start_docker_server("crash")
+        self.assertFalse(success)
+        self.assertIn("código 1", message)
+        self.assertLess(time.perf_counter() - started, 5)
+        self.assertEqual(self.manager.get_startup_stats()["cold"], {"count": 0})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,192 @@
+"""
+Tests para la instantánea del estado de Docker (contra una API de Docker falsa en un socket unix)
+"""
+import json
+import queue
+import re
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler
+from pathlib import Path
+from urllib.parse import urlparse
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import docker
+
+from docker_availability import DockerAvailability
+from docker_state_snapshot import DockerStateSnapshot
+
+CATALOG_SIZE = 40
+
+
+class FakeDockerAPI(BaseHTTPRequestHandler):
+    """Subconjunto de la API de Docker Engine: ping, listados y flujo de eventos."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def address_string(self):
+        return "unix"
+
+    def _json(self, payload, status=200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        state = self.server.state
+        path = re.sub(r"^/v[\d.]+", "", urlparse(self.path).path)
+        state["calls"].append(path)
+        if path == "/_ping":
+            body = b"OK"
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif path == "/version":
+            self._json({"ApiVersion": "1.44", "Version": "25.0.0"})
+        elif path == "/images/json":
+            self._json([{"Id": f"sha256:{i}", "RepoTags": [tag]} for i, tag in enumerate(state["images"])])
+        elif path == "/containers/json":
+            self._json([{"Id": name, "Names": [f"/{name}"], "State": status}
+                        for name, status in state["containers"].items()])
+        elif path == "/events":
+            self._stream_events(state["events"])
+        else:
+            self._json({"message": "not found"}, status=404)
+
+    def _stream_events(self, events: queue.Queue):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        self.wfile.flush()
+        while not self.server.closing.is_set():
+            try:
+                event = events.get(timeout=0.05)
+            except queue.Empty:
+                continue
+            if event is None:  # Cortar el flujo
+                break
+            data = json.dumps(event).encode() + b"\n"
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+        self.close_connection = True
+
+
+class FakeDockerServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path):
+        super().__init__(path, FakeDockerAPI)
+        self.closing = threading.Event()
+        self.state = {"calls": [], "images": [], "containers": {}, "events": queue.Queue()}
+
+
+def make_catalog():
+    return [{"name": f"server-{i}", "docker": {"image": f"mcp/server-{i}", "tag": "latest"}}
+            for i in range(CATALOG_SIZE)]
+
+
+class TestDockerStateSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        socket_path = str(Path(self.tmp.name, "docker.sock"))
+        self.server = FakeDockerServer(socket_path)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.state = self.server.state
+        self.state["images"] = ["mcp/server-0:latest", "mcp/server-1:latest", "other/image:1.0"]
+        self.state["containers"] = {"mcp-server-0": "running", "mcp-server-1": "exited"}
+        self.socket_path = socket_path
+        self.client = docker.DockerClient(base_url=f"unix://{socket_path}", version="1.44")
+        self.snapshot = DockerStateSnapshot(lambda: self.client)
+
+    def tearDown(self):
+        self.server.closing.set()
+        self.snapshot.stop()
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def list_calls(self):
+        return [call for call in self.state["calls"] if call in ("/images/json", "/containers/json")]
+
+    def wait_for(self, condition, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if condition():
+                return True
+            time.sleep(0.01)
+        return False
+
+    def test_single_pass_snapshot_cached_while_subscribed(self):
+        self.snapshot.start()
+        self.assertTrue(self.snapshot.wait_live(5))
+
+        catalog = self.snapshot.annotate(make_catalog())
+        self.assertEqual([(s["installed"], s["running"]) for s in catalog[:3]],
+                         [(True, True), (True, False), (False, False)])
+        # Dos llamadas en total, no dos por entrada del catálogo
+        self.assertEqual(self.list_calls(), ["/images/json", "/containers/json"])
+
+        self.snapshot.annotate(make_catalog())
+        self.assertEqual(len(self.list_calls()), 2)  # Servida desde la caché
+
+        # Un evento invalida la instantánea y la siguiente lectura ve el cambio
+        self.state["containers"]["mcp-server-2"] = "running"
+        self.state["images"].append("mcp/server-2:latest")
+        self.state["events"].put({"Type": "container", "Action": "start", "Actor": {"ID": "mcp-server-2"}})
+        self.assertTrue(self.wait_for(lambda: self.snapshot.stats["events"] == 1))
+        catalog = self.snapshot.annotate(make_catalog())
+        self.assertEqual((catalog[2]["installed"], catalog[2]["running"]), (True, True))
+        self.assertEqual(len(self.list_calls()), 4)
+
+    def test_without_subscription_every_read_lists(self):
+        self.snapshot.annotate(make_catalog())
+        self.snapshot.annotate(make_catalog())
+        self.assertEqual(len(self.list_calls()), 4)
+
+        # Al cortarse el flujo se deja de confiar en la caché hasta reconectar
+        self.snapshot.start()
+        self.assertTrue(self.snapshot.wait_live(5))
+        self.snapshot.get()
+        self.state["events"].put(None)
+        self.assertTrue(self.wait_for(lambda: not self.snapshot.live))
+        calls = len(self.list_calls())
+        self.snapshot.get()
+        self.assertEqual(len(self.list_calls()), calls + 2)
+        self.assertTrue(self.snapshot.wait_live(5))  # Se vuelve a suscribir
+        self.assertEqual(self.snapshot.stats["reconnects"], 1)
+
+    def test_manager_uses_snapshot_without_cli_probes(self):
+        from docker_mcp_manager import DockerMCPManager
+
+        availability = DockerAvailability(endpoints=[(
+            "unix", lambda timeout: docker.DockerClient(base_url=f"unix://{self.socket_path}", version="1.44"))])
+        manager = DockerMCPManager(str(Path(self.tmp.name, "config")), availability=availability)
+        probes = []
+        manager.docker_helper.run_command = lambda *args, **kwargs: probes.append(args) or (False, "")
+        manager.docker_servers_catalog = make_catalog()
+
+        servers = manager.get_available_docker_servers()
+        self.assertEqual(len(servers), CATALOG_SIZE)
+        self.assertTrue(servers[0]["running"])
+        self.assertEqual(probes, [])
+        self.assertEqual(len(self.list_calls()), 2)
+        manager.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+"""
+Tests para las respuestas precalculadas de /mcps (ETag, 304 y compresión) y el índice por ID
+"""
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+try:
+    from fastapi.testclient import TestClient
+except ImportError:
+    TestClient = None
+
+
+def make_server(server_id):
+    return {
+        "id": server_id,
+        "name": server_id.title(),
+        "description": f"Servidor {server_id}",
+        "icon": "",
+        "manifest_url": f"https://example.com/{server_id}.json",
+        "version": "1.0.0",
+        "min_client_version": "1.0.0",
+        "checksum": "sha256:placeholder",
+        "signature_url": "",
+        "tags": ["test"],
+        "extra": "no forma parte del modelo",
+    }
+
+
+@unittest.skipIf(TestClient is None, "fastapi no disponible")
+class TestGalleryAPICache(unittest.TestCase):
+    def setUp(self):
+        from mcp_gallery_api.server import create_app
+
+        self.tmp = tempfile.TemporaryDirectory()
+        catalog = [make_server("alpha"), make_server("beta")]
+        Path(self.tmp.name, "gallery.json").write_text(json.dumps(catalog), encoding="utf-8")
+        # Un solo bucle de eventos durante el test, como en uvicorn (la publicación es en segundo plano)
+        self.client = TestClient(create_app(self.tmp.name))
+        self.client.__enter__()
+
+    def tearDown(self):
+        self.client.__exit__(None, None, None)
+        self.tmp.cleanup()
+
+    def test_list_matches_model_and_supports_conditional_requests(self):
+        response = self.client.get("/mcps", headers={"Accept-Encoding": "identity"})
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual([server["id"] for server in body], ["alpha", "beta"])
+        self.assertNotIn("extra", body[0])  # Mismo filtrado que response_model
+        etag = response.headers["etag"]
+
+        cached = self.client.get("/mcps", headers={"If-None-Match": etag})
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.content, b"")
+
+    def test_local_servers_have_no_registry_field(self):
+        full = self.client.get("/mcps").json()
+        paged = self.client.get("/mcps", params={"limit": 10}).json()
+        for body in (full, paged):
+            self.assertEqual([server["id"] for server in body], ["alpha", "beta"])
+            self.assertTrue(all("registry" not in server for server in body))
+        self.assertNotIn("registry", self.client.get("/mcps/alpha").json())
+
+    def test_gzip_variant_has_its_own_strong_etag(self):
+        plain = self.client.get("/mcps", headers={"Accept-Encoding": "identity"})
+        compressed = self.client.get("/mcps", headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(compressed.headers["content-encoding"], "gzip")
+        self.assertNotEqual(compressed.headers["etag"], plain.headers["etag"])
+        self.assertIn("Accept-Encoding", compressed.headers["vary"])
+        # El cliente descomprime: mismo contenido, menos bytes en la red
+        self.assertEqual(compressed.json(), plain.json())
+        self.assertLess(compressed.num_bytes_downloaded, len(plain.content))
+
+    def test_mutations_change_etag_and_id_index(self):
+        etag = self.client.get("/mcps").headers["etag"]
+        self.assertEqual(self.client.post("/mcps", json={k: v for k, v in make_server("gamma").items()
+                                                         if k != "extra"},
+                                         params={"wait": True}).status_code, 200)
+        self.assertEqual(self.client.get("/mcps", headers={"If-None-Match": etag}).status_code, 200)
+        self.assertEqual(self.client.get("/mcps/gamma").json()["id"], "gamma")
+
+        self.assertEqual(self.client.delete("/mcps/alpha", params={"wait": True}).status_code, 200)
+        self.assertEqual(self.client.get("/mcps/alpha").status_code, 404)
+        self.assertEqual(self.client.get("/mcps/beta").json()["id"], "beta")
+        self.assertEqual([s["id"] for s in self.client.get("/mcps").json()], ["beta", "gamma"])
+
+
+if __name__ == "__main__":
+    unittest.main()
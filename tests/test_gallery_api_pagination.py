@@ -0,0 +1,161 @@
+"""
+Tests para la paginación por cursor, la proyección de campos y la sincronización incremental de la galería
+"""
+import json
+import sys
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+try:
+    from fastapi.testclient import TestClient
+except ImportError:
+    TestClient = None
+
+
+def make_server(server_id, description="Servidor de prueba"):
+    return {
+        "id": server_id,
+        "name": server_id.title(),
+        "description": description,
+        "icon": "",
+        "manifest_url": f"https://example.com/{server_id}.json",
+        "version": "1.0.0",
+        "min_client_version": "1.0.0",
+        "checksum": "sha256:placeholder",
+        "signature_url": "",
+        "tags": ["test"],
+    }
+
+
+@unittest.skipIf(TestClient is None, "fastapi no disponible")
+class TestGalleryAPIPagination(unittest.TestCase):
+    def setUp(self):
+        from mcp_gallery_api.server import create_app
+
+        self.tmp = tempfile.TemporaryDirectory()
+        catalog = [make_server(f"server-{i:02d}") for i in range(10)]
+        Path(self.tmp.name, "gallery.json").write_text(json.dumps(catalog), encoding="utf-8")
+        # Un solo bucle de eventos durante el test, como en uvicorn (la publicación es en segundo plano)
+        self.client = TestClient(create_app(self.tmp.name))
+        self.client.__enter__()
+
+    def tearDown(self):
+        self.client.__exit__(None, None, None)
+        self.tmp.cleanup()
+
+    def _walk(self, path, params, mutate=None):
+        """Recorre todas las páginas; `mutate` se ejecuta tras la primera."""
+        ids, response = [], self.client.get(path, params=params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            ids.extend(server["id"] for server in response.json())
+            cursor = response.headers.get("x-next-cursor")
+            if mutate:
+                mutate()
+                mutate = None
+            if not cursor:
+                return ids, response
+            response = self.client.get(path, params={"limit": params["limit"], "cursor": cursor})
+
+    def test_pages_are_stable_across_mutations(self):
+        def mutate():
+            # Baja de un elemento ya entregado y alta de uno anterior al cursor
+            self.assertEqual(self.client.delete("/mcps/server-00").status_code, 200)
+            self.assertEqual(self.client.post("/mcps", json=make_server("aaa")).status_code, 200)
+
+        ids, _ = self._walk("/mcps", {"limit": 3}, mutate)
+        self.assertEqual(ids, [f"server-{i:02d}" for i in range(10)])
+
+    def test_fields_projection_and_link_header(self):
+        response = self.client.get("/mcps", params={"limit": 2, "fields": "version"})
+        self.assertEqual(response.json(), [{"id": "server-00", "version": "1.0.0"},
+                                           {"id": "server-01", "version": "1.0.0"}])
+        self.assertIn('rel="next"', response.headers["link"])
+        self.assertEqual(self.client.get("/mcps", params={"fields": "secret"}).status_code, 400)
+        self.assertEqual(self.client.get("/mcps", params={"cursor": "no-es-un-cursor"}).status_code, 400)
+
+    def test_updated_since_and_removed(self):
+        first = self.client.get("/mcps", params={"limit": 100})
+        since = first.headers["x-server-time"]
+        self.client.post("/mcps", json=make_server("nuevo"), params={"wait": True})
+        self.client.delete("/mcps/server-03", params={"wait": True})
+
+        changed = self.client.get("/mcps", params={"updated_since": since, "fields": "updated_at"}).json()
+        self.assertEqual([server["id"] for server in changed], ["nuevo"])
+        self.assertEqual(self.client.get("/mcps/removed", params={"since": since}).json()["removed"],
+                         ["server-03"])
+
+    def test_search_pagination(self):
+        self.client.post("/mcps", json=make_server("github-tools", "Herramientas para github"), params={"wait": True})
+        ids, _ = self._walk("/search", {"q": "servidor", "limit": 4})
+        self.assertEqual(ids, [f"server-{i:02d}" for i in range(10)])
+        self.assertEqual(self.client.get("/search", params={"q": "github", "limit": 5}).json()[0]["id"],
+                         "github-tools")
+
+    def test_search_pages_keep_first_page_order_across_mutations(self):
+        def mutate():
+            # El alta cambia el IDF de "servidor" (y las puntuaciones de todos) y quedaría primera
+            response = self.client.post("/mcps", json=make_server("aaa", "Servidor servidor de prueba"),
+                                        params={"wait": True})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(self.client.delete("/mcps/server-09", params={"wait": True}).status_code, 200)
+
+        ids, _ = self._walk("/search", {"q": "servidor", "limit": 4}, mutate)
+        self.assertEqual(ids, [f"server-{i:02d}" for i in range(9)])
+        self.assertEqual(self.client.get("/search", params={"q": "servidor", "limit": 4}).json()[0]["id"], "aaa")
+
+    def test_expired_search_cursor(self):
+        cursor = self.client.get("/search", params={"q": "servidor", "limit": 4}).headers["x-next-cursor"]
+        later = time.monotonic() + 3600
+        with patch("mcp_gallery_api.pagination.time.monotonic", return_value=later):
+            response = self.client.get("/search", params={"limit": 4, "cursor": cursor})
+        self.assertEqual(response.status_code, 410)
+
+
+@unittest.skipIf(TestClient is None, "fastapi no disponible")
+class TestGalleryAPISync(unittest.TestCase):
+    def setUp(self):
+        from mcp_gallery_api.server import create_app
+        from mcp_gallery_manager import MCPGalleryManager
+
+        self.tmp = tempfile.TemporaryDirectory()
+        api_dir = Path(self.tmp.name, "api")
+        api_dir.mkdir()
+        catalog = [make_server(f"server-{i:02d}") for i in range(5)]
+        (api_dir / "gallery.json").write_text(json.dumps(catalog), encoding="utf-8")
+        # Un solo bucle de eventos durante el test, como en uvicorn (la publicación es en segundo plano)
+        self.client = TestClient(create_app(str(api_dir)))
+        self.client.__enter__()
+
+        self.manager = MCPGalleryManager(str(Path(self.tmp.name, "config")))
+        self.manager.http_session = self.client
+        self.requests = []
+        self.client.event_hooks["request"].append(lambda request: self.requests.append(request.url))
+
+    def tearDown(self):
+        self.client.__exit__(None, None, None)
+        self.tmp.cleanup()
+
+    def test_incremental_sync(self):
+        servers = self.manager.sync_gallery_api("http://testserver", page_size=2)
+        self.assertEqual(sorted(server["id"] for server in servers), [f"server-{i:02d}" for i in range(5)])
+        self.assertEqual(len(self.requests), 3)
+
+        self.client.post("/mcps", json=make_server("nuevo"), params={"wait": True})
+        self.client.delete("/mcps/server-01", params={"wait": True})
+        self.requests.clear()
+        servers = self.manager.sync_gallery_api("http://testserver", page_size=2)
+        ids = sorted(server["id"] for server in servers)
+        self.assertEqual(ids, ["nuevo", "server-00", "server-02", "server-03", "server-04"])
+        # Una página con el único cambio y la consulta de bajas
+        self.assertEqual([url.path for url in self.requests], ["/mcps", "/mcps/removed"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+"""
+Tests de arranque de la API de la Galería MCP ejecutada como script
+"""
+import json
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+SERVER_SCRIPT = project_root / "mcp_gallery_api" / "server.py"
+
+try:
+    import fastapi
+except ImportError:
+    fastapi = None
+
+
+@unittest.skipIf(fastapi is None, "FastAPI no está instalado")
+class TestServerScript(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.data_dir = Path(self.temp_dir.name)
+        self.addCleanup(self.temp_dir.cleanup)
+
+    def run_script(self, *args, cwd):
+        return subprocess.run([sys.executable, str(SERVER_SCRIPT), *args], cwd=cwd,
+                              capture_output=True, text=True, timeout=60)
+
+    def test_runs_as_script_from_any_directory(self):
+        # Sin la raíz del proyecto en el path fallan los imports de módulos compartidos
+        for cwd in (project_root, SERVER_SCRIPT.parent, self.data_dir):
+            with self.subTest(cwd=cwd):
+                exported = self.data_dir / "export.json"
+                result = self.run_script("--data-dir", str(self.data_dir), "--export-json", str(exported), cwd=cwd)
+                self.assertEqual(result.returncode, 0, result.stderr)
+                self.assertIsInstance(json.loads(exported.read_text(encoding="utf-8")), list)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+"""
+Tests para la caché en disco del catálogo de la galería (stale-while-revalidate)
+"""
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from gallery_catalog_cache import (GalleryCatalogCache, apply_catalog_diff, catalog_diff_is_empty,
+                                   diff_catalogs)
+
+
+class NullLogger:
+    def info(self, *args, **kwargs): pass
+    def warning(self, *args, **kwargs): pass
+    def error(self, *args, **kwargs): pass
+
+
+class FakeGalleryManager:
+    """Gestor falso: devuelve un catálogo fijo y registra las peticiones condicionales."""
+
+    def __init__(self, base_dir, servers, delay=0.0):
+        self.base_dir = base_dir
+        self.logger = NullLogger()
+        self.servers = servers
+        self.delay = delay
+        self.calls = []
+
+    def fetch_catalog(self, etag=None, last_modified=None, cached_official=None):
+        self.calls.append((etag, last_modified))
+        time.sleep(self.delay)
+        not_modified = etag == "v1"
+        return {
+            "servers": list(cached_official) if not_modified else self.servers,
+            "official_names": [s["name"] for s in self.servers],
+            "etag": "v1",
+            "last_modified": "Mon, 01 Jan 2024 00:00:00 GMT",
+            "not_modified": not_modified,
+        }
+
+
+def server(sid, version="1.0.0"):
+    return {"id": sid, "name": sid.title(), "description": f"{sid} server", "version": version}
+
+
+class TestGalleryCatalogCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.servers = [server("github"), server("filesystem")]
+        self.manager = FakeGalleryManager(self.tmp.name, self.servers)
+        self.cache = GalleryCatalogCache(self.manager)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _revalidate_and_wait(self, cache=None):
+        done = threading.Event()
+        results = []
+
+        def on_complete(diff, servers, error):
+            results.append((diff, servers, error))
+            done.set()
+
+        (cache or self.cache).revalidate(on_complete)
+        self.assertTrue(done.wait(5))
+        return results[0]
+
+    def test_snapshot_round_trip_and_conditional_revalidation(self):
+        self.assertIsNone(self.cache.load_snapshot())
+        diff, servers, error = self._revalidate_and_wait()
+        self.assertIsNone(error)
+        self.assertEqual(len(diff["added"]), 2)
+
+        # Una instancia nueva (otra apertura de la ventana) ve el snapshot sin red
+        fresh = GalleryCatalogCache(self.manager)
+        self.assertEqual(fresh.load_snapshot()["servers"], self.servers)
+
+        diff, servers, error = self._revalidate_and_wait(fresh)
+        self.assertEqual(self.manager.calls[-1][0], "v1")
+        self.assertTrue(catalog_diff_is_empty(diff))
+        self.assertEqual(servers, self.servers)
+
+    def test_concurrent_revalidations_share_one_fetch(self):
+        self.manager.delay = 0.3
+        done = threading.Event()
+        results = []
+
+        def on_complete(diff, servers, error):
+            results.append(servers)
+            if len(results) == 3:
+                done.set()
+
+        started = [GalleryCatalogCache(self.manager).revalidate(on_complete) for _ in range(3)]
+        self.assertTrue(done.wait(5))
+        self.assertEqual(started, [True, False, False])
+        self.assertEqual(len(self.manager.calls), 1)
+        self.assertEqual(len(results), 3)
+
+    def test_diff_and_apply_preserve_unchanged_objects(self):
+        old = [server("a"), server("b"), server("c")]
+        new = [server("a"), server("b", "2.0.0"), server("d")]
+        diff = diff_catalogs(old, new)
+        self.assertEqual([s["id"] for s in diff["added"]], ["d"])
+        self.assertEqual([s["id"] for s in diff["changed"]], ["b"])
+        self.assertEqual(diff["removed"], ["c"])
+
+        visible = apply_catalog_diff(old, diff)
+        self.assertEqual(visible, new)
+        self.assertIs(visible[0], old[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,172 @@
+"""
+Tests para la importación masiva de manifests de GitHub en la galería (contra una API de GitHub falsa)
+"""
+import hashlib
+import json
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from mcp_gallery_api.storage import JsonFileStorage, SQLiteStorage
+from mcp_gallery_api.utils import GalleryDataManager
+
+REPOS = 60
+DELAY = 0.05
+
+
+def manifest_body(i):
+    manifest = {
+        "$schema": "https://static.modelcontextprotocol.io/schemas/2025-09-29/server.schema.json",
+        "name": f"server-{i}",
+        "description": f"Servidor {i}",
+        "version": "1.0.0",
+        "packages": [{"registryType": "npm", "identifier": f"@owner/server-{i}", "version": "1.0.0",
+                      "transport": {"type": "stdio"}}],
+    }
+    if i == 1:
+        del manifest["packages"]  # Sin packages ni remotes: no cumple el esquema
+    return json.dumps(manifest).encode()
+
+
+class FakeGitHub(BaseHTTPRequestHandler):
+    """`/repos/{owner}/{repo}/contents/manifest.json` con contenido en bruto, ETag y If-None-Match."""
+
+    protocol_version = "HTTP/1.1"
+    requests = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        type(self).requests.append((self.path, self.headers.get("Accept"), self.headers.get("If-None-Match")))
+        time.sleep(DELAY)
+        parts = self.path.strip("/").split("/")
+        repo = parts[2]
+        if repo == "missing" or parts[-1] != "manifest.json":
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = manifest_body(int(repo.split("-")[1]))
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/vnd.github.raw+json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class TestGitHubBulkImport(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), FakeGitHub)
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.data_dir = Path(self.tmp.name)
+        FakeGitHub.requests = []
+        self.manager = GalleryDataManager(self.data_dir, github_api_url=self.url)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_concurrent_import_checksums_and_single_upsert(self):
+        (self.data_dir / "gallery.json").write_text(json.dumps([{"id": "existing", "name": "Existing"}]),
+                                                    encoding="utf-8")
+        repos = [f"https://github.com/owner/server-{i}" for i in range(REPOS)]
+        repos += ["owner/missing", "https://gitlab.com/owner/server-2"]
+
+        started = time.perf_counter()
+        report = self.manager.import_many_from_github(repos, max_workers=16)
+        elapsed = time.perf_counter() - started
+        self.assertLess(elapsed, REPOS * DELAY / 3)  # Muy por debajo del tiempo en serie
+
+        self.assertEqual(report["stats"]["imported"], REPOS - 1)
+        self.assertEqual(sorted(report["errors"]),
+                         sorted(["https://github.com/owner/server-1", "owner/missing",
+                                 "https://gitlab.com/owner/server-2"]))
+        self.assertIn("packages", report["errors"]["https://github.com/owner/server-1"])
+        self.assertTrue(all(accept == "application/vnd.github.raw+json" for _, accept, _ in FakeGitHub.requests))
+
+        server = next(server for server in report["servers"] if server["id"] == "server-7")
+        self.assertEqual(server["checksum"], f"sha256:{hashlib.sha256(manifest_body(7)).hexdigest()}")
+        self.assertEqual(server["manifest_url"],
+                         "https://raw.githubusercontent.com/owner/server-7/HEAD/manifest.json")
+
+        gallery = json.loads((self.data_dir / "gallery.json").read_text(encoding="utf-8"))
+        self.assertEqual(len(gallery), REPOS)  # La entrada existente y las importadas
+        self.assertEqual(gallery[0]["id"], "existing")
+        self.assertTrue(all(entry.get("updated_at") for entry in gallery[1:]))
+
+    def test_second_pass_uses_conditional_requests(self):
+        repos = [f"owner/server-{i}" for i in range(10)]
+        self.manager.import_many_from_github(repos)
+        gallery_mtime = (self.data_dir / "gallery.json").stat().st_mtime_ns
+
+        FakeGitHub.requests = []
+        report = self.manager.import_many_from_github(repos)
+        self.assertEqual(report["stats"]["not_modified"], 10)
+        self.assertEqual(report["stats"]["unchanged"], 9)
+        self.assertTrue(all(etag for _, _, etag in FakeGitHub.requests))
+        # Sin cambios no se reescribe gallery.json
+        self.assertEqual((self.data_dir / "gallery.json").stat().st_mtime_ns, gallery_mtime)
+
+        # La importación individual usa el mismo camino (con checksum real)
+        server = self.manager.import_from_github("https://github.com/owner/server-3")
+        self.assertTrue(server["checksum"].startswith("sha256:") and server["checksum"] != "sha256:placeholder")
+        with self.assertRaises(Exception):
+            self.manager.import_from_github("https://github.com/owner/missing")
+
+    def test_import_while_api_storage_is_open_is_kept(self):
+        existing = {"id": "existing", "name": "Existing"}
+        for backend, storage_class in (("sqlite", SQLiteStorage), ("json", JsonFileStorage)):
+            with self.subTest(backend=backend):
+                data_dir = self.data_dir / backend
+                data_dir.mkdir()
+                (data_dir / "gallery.json").write_text(json.dumps([existing]), encoding="utf-8")
+                # Almacenamiento abierto como lo tiene la API en marcha
+                api_storage = storage_class(data_dir)
+                api_storage.load()
+
+                manager = GalleryDataManager(data_dir, github_api_url=self.url, storage=backend)
+                imported = [f"server-{i}" for i in (0, 2, 3, 4, 5)]  # server-1 no cumple el esquema
+                report = manager.import_many_from_github([f"owner/{name}" for name in imported])
+                self.assertEqual(report["stats"]["added"], 5)
+
+                # Una mutación posterior de la API y su cierre (SQLite exporta gallery.json) no borran la importación
+                api_storage.insert({"id": "added-by-api", "name": "API"})
+                api_storage.close()
+
+                reloaded = storage_class(data_dir)
+                servers, _ = reloaded.load()
+                reloaded.close()
+                self.assertEqual([server["id"] for server in servers],
+                                 ["existing"] + imported + ["added-by-api"])
+                gallery = json.loads((data_dir / "gallery.json").read_text(encoding="utf-8"))
+                self.assertEqual(len(gallery), 7)
+
+
+if __name__ == "__main__":
+    unittest.main()
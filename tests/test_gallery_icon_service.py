@@ -0,0 +1,146 @@
+"""
+Tests para el servicio de íconos de la galería (pool, de-duplicación y caché en disco)
+"""
+import io
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from PIL import Image
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from gallery_icon_service import IconService, inline_icon_text
+
+
+def png_bytes(color, size=128):
+    buffer = io.BytesIO()
+    Image.new("RGB", (size, size), color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+IMAGES = {
+    "/red.png": png_bytes("red"),
+    "/red-copy.png": png_bytes("red"),
+    "/blue.png": png_bytes("blue"),
+    "/green.png": png_bytes("green"),
+}
+
+
+class IconHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    hits = {}
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        with self.lock:
+            IconHandler.hits[self.path] = IconHandler.hits.get(self.path, 0) + 1
+        time.sleep(0.1)  # descarga lenta para que las peticiones se solapen
+        body = IMAGES.get(self.path)
+        self.send_response(200 if body else 404)
+        self.send_header("Content-Type", "image/png")
+        self.send_header("Content-Length", str(len(body or b"")))
+        self.end_headers()
+        self.wfile.write(body or b"")
+
+
+class TestIconService(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), IconHandler)
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        IconHandler.hits = {}
+        self.tmp = tempfile.TemporaryDirectory()
+        self.services = []
+
+    def tearDown(self):
+        for service in self.services:
+            service.close()
+        self.tmp.cleanup()
+
+    def service(self, **kwargs):
+        service = IconService(self.tmp.name, **kwargs)
+        self.services.append(service)
+        return service
+
+    def fetch_all(self, service, urls):
+        results, done = {}, threading.Event()
+
+        def callback(url, path):
+            results.setdefault(url, []).append(path)
+            if sum(len(v) for v in results.values()) == len(urls):
+                done.set()
+
+        for url in urls:
+            service.request(url, callback)
+        self.assertTrue(done.wait(5))
+        return results
+
+    def test_concurrent_requests_share_one_download_and_persist(self):
+        url = self.base + "/blue.png"
+        results = self.fetch_all(self.service(), [url] * 5)
+        self.assertEqual(IconHandler.hits, {"/blue.png": 1})
+        path = results[url][0]
+        self.assertEqual(Image.open(path).size, (40, 40))
+
+        # Una sesión nueva encuentra la miniatura en disco sin descargar
+        fresh = self.service()
+        self.assertEqual(fresh.cached_path(url), path)
+        self.assertEqual(self.fetch_all(fresh, [url])[url], [path])
+        self.assertEqual(IconHandler.hits, {"/blue.png": 1})
+
+    def test_content_addressed_blobs_and_failures(self):
+        service = self.service()
+        results = self.fetch_all(service, [self.base + "/red.png", self.base + "/red-copy.png",
+                                           self.base + "/missing.png"])
+        self.assertEqual(results[self.base + "/red.png"], results[self.base + "/red-copy.png"])
+        self.assertEqual(results[self.base + "/missing.png"], [None])
+        self.assertEqual(len(list(Path(self.tmp.name, "blobs").glob("*.png"))), 1)
+
+    def test_lru_eviction_keeps_cache_bounded(self):
+        service = self.service(max_workers=1)
+        first = self.fetch_all(service, [self.base + "/red.png"])[self.base + "/red.png"][0]
+        service.max_cache_bytes = first.stat().st_size * 2 - 1
+        for name in ("/blue.png", "/green.png"):
+            self.fetch_all(service, [self.base + name])
+        self.assertFalse(first.exists())
+        self.assertIsNone(service.cached_path(self.base + "/red.png"))
+        self.assertIsNotNone(service.cached_path(self.base + "/green.png"))
+
+    def test_cancelled_pending_request_is_dropped(self):
+        service = self.service(max_workers=1)
+        calls = []
+        busy = self.base + "/green.png"
+        service.request(busy, lambda url, path: calls.append(url))
+        time.sleep(0.03)  # el único hilo queda ocupado con la primera descarga
+        callback = lambda url, path: calls.append(url)
+        service.request(self.base + "/blue.png", callback)
+        service.cancel(self.base + "/blue.png", callback)
+        time.sleep(0.4)
+        self.assertEqual(calls, [busy])
+        self.assertNotIn("/blue.png", IconHandler.hits)
+
+    def test_inline_icons(self):
+        self.assertEqual(inline_icon_text("data:text/plain;charset=utf-8,📁"), "📁")
+        self.assertIsNone(inline_icon_text("https://example.com/icon.png"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,236 @@
+"""
+Tests para el modo espejo del registro de la API de la galería (contra un registro local falso)
+"""
+import asyncio
+import json
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from mcp_gallery_api.mirror import RegistryMirror
+
+try:
+    from fastapi.testclient import TestClient
+except ImportError:
+    TestClient = None
+
+
+def registry_item(i, status="active", updated_at="2026-01-01T00:00:00Z", description=None):
+    return {
+        "server": {
+            "name": f"io.github.owner/server-{i}",
+            "description": description or f"Synthetic server {i} for file search",
+            "version": "1.0.0",
+            "packages": [{"registryType": "npm", "identifier": f"@owner/server-{i}", "version": "1.0.0"}],
+        },
+        "_meta": {"io.modelcontextprotocol.registry/official": {
+            "status": status, "isLatest": True, "updatedAt": updated_at}},
+    }
+
+
+class FakeUpstream(BaseHTTPRequestHandler):
+    """Registro con cursor, ETag y filtro `updated_since` sobre `updatedAt`."""
+
+    protocol_version = "HTTP/1.1"
+    items = []
+    etag = '"v1"'
+    queries = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        query = {key: values[0] for key, values in parse_qs(urlparse(self.path).query).items()}
+        type(self).queries.append(query)
+        if self.headers.get("If-None-Match") == self.etag:
+            self.send_response(304)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        items = self.items
+        if "updated_since" in query:
+            since = query["updated_since"].replace(".000000", "")
+            items = [item for item in items
+                     if item["_meta"]["io.modelcontextprotocol.registry/official"]["updatedAt"] > since]
+        else:
+            items = [item for item in items
+                     if item["_meta"]["io.modelcontextprotocol.registry/official"]["status"] == "active"]
+        limit, offset = int(query.get("limit", 100)), int(query.get("cursor", 0))
+        metadata = {"count": len(items[offset:offset + limit])}
+        if offset + limit < len(items):
+            metadata["nextCursor"] = str(offset + limit)
+        body = json.dumps({"servers": items[offset:offset + limit], "metadata": metadata}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", self.etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class MirrorTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), FakeUpstream)
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.url = f"http://127.0.0.1:{cls.server.server_address[1]}/v0/servers"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        FakeUpstream.items = [registry_item(i) for i in range(25)]
+        FakeUpstream.etag = '"v1"'
+        FakeUpstream.queries = []
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def change_upstream(self):
+        """Una entrada modificada, una retirada y una nueva, con fecha posterior a la primera sincronización."""
+        FakeUpstream.items[3] = registry_item(3, updated_at="2999-01-01T00:00:00Z", description="Nueva descripción")
+        FakeUpstream.items[4] = registry_item(4, status="deleted", updated_at="2999-01-01T00:00:00Z")
+        FakeUpstream.items.append(registry_item(99, updated_at="2999-01-01T00:00:00Z"))
+        FakeUpstream.etag = '"v2"'
+
+
+class TestRegistryMirror(MirrorTestCase):
+    def test_full_then_incremental_sync(self):
+        mirror = RegistryMirror(self.url, Path(self.tmp.name, "mirror.db"), page_size=10)
+        stats = mirror.sync_once()
+        self.assertEqual((stats["mode"], stats["updated"], stats["entries"]), ("full", 25, 25))
+        self.assertEqual(len(FakeUpstream.queries), 3)
+        entry = mirror.catalog()["server-3"]
+        self.assertEqual(entry["registry"]["packages"][0]["identifier"], "@owner/server-3")
+        first_stamp = mirror.catalog()["server-0"]["updated_at"]
+
+        self.change_upstream()
+        FakeUpstream.queries = []
+        stats = mirror.sync_once()
+        self.assertEqual((stats["mode"], stats["updated"], stats["removed"]), ("incremental", 2, 1))
+        self.assertTrue(all("updated_since" in query for query in FakeUpstream.queries))
+        self.assertEqual(len(FakeUpstream.queries), 1)  # Solo una página con los cambios
+
+        catalog = mirror.catalog()
+        self.assertNotIn("server-4", catalog)
+        self.assertIn("server-99", catalog)
+        self.assertEqual(catalog["server-3"]["description"], "Nueva descripción")
+        self.assertEqual(catalog["server-0"]["updated_at"], first_stamp)
+        self.assertIn("server-4", mirror.removed)
+        mirror.close()
+
+        # El estado persiste; una sincronización completa no encuentra nada más y la siguiente es condicional
+        reopened = RegistryMirror(self.url, Path(self.tmp.name, "mirror.db"))
+        self.assertEqual(len(reopened.catalog()), 25)
+        stats = reopened.sync_once(full=True)
+        self.assertEqual((stats["not_modified"], stats["updated"], stats["removed"]), (False, 0, 0))
+        self.assertTrue(reopened.sync_once(full=True)["not_modified"])
+        reopened.close()
+
+    def test_full_sync_detects_silent_removals(self):
+        mirror = RegistryMirror(self.url, Path(self.tmp.name, "mirror.db"))
+        mirror.sync_once()
+        del FakeUpstream.items[0]
+        FakeUpstream.etag = '"v2"'
+        stats = mirror.sync_once(full=True)
+        self.assertEqual((stats["updated"], stats["removed"]), (0, 1))
+        self.assertNotIn("server-0", mirror.catalog())
+        mirror.close()
+
+    def test_stable_time_holds_until_changes_are_delivered(self):
+        delivered = []
+
+        async def on_change(catalog):
+            # Mientras se entrega, la hora estable no pasa de la marca de las entradas nuevas
+            delivered.append(mirror.stable_time() <= catalog["server-0"]["updated_at"])
+
+        mirror = RegistryMirror(self.url, Path(self.tmp.name, "mirror.db"), on_change=on_change)
+        mirror.sync_once()
+        stamp = mirror.catalog()["server-0"]["updated_at"]
+        self.assertLessEqual(mirror.stable_time(), stamp)  # Sincronizado pero aún sin entregar
+
+        asyncio.run(mirror.sync())
+        self.assertEqual(delivered, [True])
+        self.assertGreater(mirror.stable_time(), stamp)
+        mirror.close()
+
+
+def make_local_server(server_id):
+    return {
+        "id": server_id,
+        "name": server_id.title(),
+        "description": "Servidor local",
+        "icon": "",
+        "manifest_url": f"https://example.com/{server_id}.json",
+        "version": "2.0.0",
+        "min_client_version": "1.0.0",
+        "checksum": "sha256:placeholder",
+        "signature_url": "",
+        "tags": ["local"],
+    }
+
+
+@unittest.skipIf(TestClient is None, "fastapi no disponible")
+class TestMirrorAPI(MirrorTestCase):
+    def setUp(self):
+        from mcp_gallery_api.server import MCPGalleryAPI
+        from mcp_gallery_manager import MCPGalleryManager
+
+        super().setUp()
+        self.api_dir = Path(self.tmp.name, "api")
+        self.api_dir.mkdir()
+        local = [make_local_server("local-only"), make_local_server("server-1")]
+        (self.api_dir / "gallery.json").write_text(json.dumps(local), encoding="utf-8")
+        self.api = MCPGalleryAPI(str(self.api_dir), upstream_url=self.url)
+        self.client = TestClient(self.api.app)
+        self.manager = MCPGalleryManager(str(Path(self.tmp.name, "config")))
+        self.manager.http_session = self.client
+
+    def tearDown(self):
+        self.api.mirror.close()
+        self.api.health.history.close()
+        self.api.storage.close()
+        super().tearDown()
+
+    def test_serves_merged_catalog_and_feeds_clients(self):
+        asyncio.run(self.api.mirror.sync())
+        self.assertEqual(self.api._snapshot.version, self.api._version)  # Publicada tras la sincronización
+
+        response = self.client.get("/mcps")
+        self.assertEqual(response.headers["x-registry-mirror"], self.url)
+        servers = {server["id"]: server for server in response.json()}
+        self.assertEqual(len(servers), 26)
+        self.assertEqual(servers["server-1"]["version"], "2.0.0")  # Gana la entrada local
+        self.assertEqual(self.client.get("/mcps/server-7").json()["registry"]["name"], "io.github.owner/server-7")
+
+        self.manager.gallery_api_url = "http://testserver"
+        self.manager.official_api_url = self.url
+        FakeUpstream.queries = []
+        catalog = self.manager.fetch_catalog()
+        self.assertEqual(FakeUpstream.queries, [])  # El cliente no consulta el registro
+        self.assertEqual(self.manager.gallery_api_mirror, self.url)
+        server = next(server for server in catalog["servers"] if server.get("id") == "server-7")
+        self.assertEqual(server["_original"]["packages"][0]["identifier"], "@owner/server-7")
+
+        self.change_upstream()
+        asyncio.run(self.api.mirror.sync())
+        servers = self.manager.sync_gallery_api()
+        ids = {server["id"] for server in servers}
+        self.assertNotIn("server-4", ids)
+        self.assertIn("server-99", ids)
+        self.assertEqual(next(s for s in servers if s["id"] == "server-3")["description"], "Nueva descripción")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+"""
+Tests para el índice de búsqueda compartido de la galería
+"""
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from gallery_search_index import GallerySearchIndex, split_tag_filters
+
+CATALOG = [
+    {"id": "weather", "name": "Weather Server", "description": "Forecasts for any city", "tags": ["web", "api"]},
+    {"id": "github", "name": "GitHub", "description": "Repositories, issues and pull requests", "tags": ["github"]},
+    {"id": "filesystem", "name": "Filesystem", "description": "Read and write local files",
+     "tags": ["filesystem"]},
+    {"id": "notes", "name": "Notes", "description": "Store notes, sync with github gists", "tags": ["productivity"]},
+]
+
+
+class TestGallerySearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = GallerySearchIndex(CATALOG)
+
+    def ids(self, query, tags=None):
+        return [server["id"] for server in self.index.search(query, tags=tags)]
+
+    def test_ranks_name_matches_above_description_matches(self):
+        self.assertEqual(self.ids("github"), ["github", "notes"])
+
+    def test_prefix_infix_and_typo_tolerance(self):
+        self.assertEqual(self.ids("fore"), ["weather"])         # prefijo
+        self.assertEqual(self.ids("system"), ["filesystem"])    # subcadena
+        self.assertEqual(self.ids("wether"), ["weather"])       # errata
+        self.assertEqual(self.ids("repositries"), ["github"])   # errata en término largo
+        self.assertEqual(self.ids("zzzz"), [])
+
+    def test_ties_keep_catalog_order(self):
+        # "ser" se expande a "server" y "service": los postings no siguen el orden del catálogo
+        names = ["Service", "Server", "Server", "Service"]
+        index = GallerySearchIndex([{"id": f"s{i}", "name": name, "description": "", "tags": []}
+                                    for i, name in enumerate(names)])
+        self.assertEqual([doc for doc, _ in index.search_ids("ser")], [0, 1, 2, 3])
+        self.assertEqual([doc for doc, _ in index.search_ids("ser", limit=3)], [0, 1, 2])
+
+    def test_all_terms_must_match(self):
+        self.assertEqual(self.ids("notes github"), ["notes"])
+
+    def test_tag_filters_and_facets(self):
+        self.assertEqual(self.ids("", tags=["github", "web"]), ["weather", "github"])
+        self.assertEqual(split_tag_filters("sync tag:Productivity"), ("sync", ["productivity"]))
+        hits = self.index.search_ids("github")
+        self.assertEqual(self.index.facets(hits), {"github": 1, "productivity": 1})
+
+    def test_api_search_uses_index(self):
+        try:
+            from fastapi.testclient import TestClient
+        except ImportError:
+            self.skipTest("fastapi no disponible")
+        from mcp_gallery_api.server import create_app
+
+        with tempfile.TemporaryDirectory() as tmp:
+            Path(tmp, "gallery.json").write_text(json.dumps(CATALOG), encoding="utf-8")
+            client = TestClient(create_app(tmp))
+            response = client.get("/search", params={"q": "githb"})
+            self.assertEqual([s["id"] for s in response.json()], ["github", "notes"])
+            facets = client.get("/search/facets", params={"q": "files"}).json()
+            self.assertEqual(facets, {"total": 1, "tags": {"filesystem": 1}})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+"""
+Tests para el índice precalculado del estado de instalación de la galería
+"""
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from gallery_status_index import InstallationStatusIndex
+
+
+class TestInstallationStatusIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        base = Path(self.tmp.name)
+        self.installed_file = base / "installed_servers.json"
+        self.mcp_file = base / "mcp_servers.json"
+        self._write(self.installed_file, {"github": {"version": "1.0.0"}})
+        self._write(self.mcp_file, {"mcpServers": {"filesystem": {}, "weather-server-python": {}, "sqlitetools": {}}})
+        self.index = InstallationStatusIndex(self.installed_file, self.mcp_file, max_staleness=0)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write(self, path, data):
+        path.write_text(json.dumps(data), encoding="utf-8")
+
+    def test_matches_legacy_semantics(self):
+        cases = {
+            ("github", "1.0.0"): "installed",
+            ("github", "2.0.0"): "update_available",
+            ("filesystem", "1.0.0"): "installed",
+            ("file-manager", "1.0.0"): "installed",          # alias galería -> config
+            ("weather-server-local", "1.0.0"): "installed",  # alias galería -> config
+            ("sqlite", "1.0.0"): "installed",                # contenido en un ID configurado
+            ("sqlite-tools-extra", "1.0.0"): "installed",    # contiene un ID configurado
+            ("postgres", "1.0.0"): "not_installed",
+        }
+        for (server_id, version), expected in cases.items():
+            with self.subTest(server_id=server_id, version=version):
+                self.assertEqual(self.index.status({"id": server_id, "version": version}), expected)
+
+    def test_rebuilds_when_files_change(self):
+        self.assertEqual(self.index.status({"id": "postgres"}), "not_installed")
+        self._write(self.mcp_file, {"mcpServers": {"postgres": {}}})
+        # Garantizar un mtime distinto aunque el sistema de archivos tenga poca resolución
+        stat = os.stat(self.mcp_file)
+        os.utime(self.mcp_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10_000_000))
+        self.assertEqual(self.index.status({"id": "postgres"}), "installed")
+        self.assertEqual(self.index.status({"id": "filesystem"}), "not_installed")
+
+    def test_invalidate_overrides_staleness_window(self):
+        index = InstallationStatusIndex(self.installed_file, self.mcp_file, max_staleness=3600)
+        self.assertEqual(index.status({"id": "postgres"}), "not_installed")
+        self._write(self.installed_file, {"postgres": {"version": "1.0.0"}})
+        self.assertEqual(index.status({"id": "postgres"}), "not_installed")
+        index.invalidate()
+        self.assertEqual(index.status({"id": "postgres", "version": "1.0.0"}), "installed")
+
+
+if __name__ == '__main__':
+    unittest.main()
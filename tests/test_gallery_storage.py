@@ -0,0 +1,239 @@
+"""
+Tests para el almacenamiento del catálogo de la API de la galería (SQLite WAL y JSON)
+"""
+import json
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from mcp_gallery_api.storage import GalleryStorage, JsonFileStorage, SQLiteStorage
+
+try:
+    from fastapi.testclient import TestClient
+except ImportError:
+    TestClient = None
+
+
+def make_server(server_id):
+    return {
+        "id": server_id,
+        "name": server_id.title(),
+        "description": "Servidor de prueba",
+        "icon": "",
+        "manifest_url": f"https://example.com/{server_id}.json",
+        "version": "1.0.0",
+        "min_client_version": "1.0.0",
+        "checksum": "sha256:placeholder",
+        "signature_url": "",
+        "tags": ["test"],
+    }
+
+
+class TestSQLiteStorage(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.data_dir = Path(self.tmp.name)
+        self.gallery_file = self.data_dir / "gallery.json"
+        self.gallery_file.write_text(json.dumps([make_server("alpha"), make_server("beta")]), encoding="utf-8")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_mutations_persist_and_export(self):
+        storage = SQLiteStorage(self.data_dir)
+        servers, removed = storage.load()
+        self.assertEqual([server["id"] for server in servers], ["alpha", "beta"])
+        self.assertTrue(all(server["updated_at"] for server in servers))
+        self.assertEqual(removed, {})
+
+        storage.insert(make_server("gamma"))
+        storage.delete("alpha", "2026-01-01T00:00:00.000000Z")
+        self.assertEqual(storage._conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        storage.close()  # Exporta gallery.json
+
+        exported = json.loads(self.gallery_file.read_text(encoding="utf-8"))
+        self.assertEqual([server["id"] for server in exported], ["beta", "gamma"])
+
+        # La exportación propia no provoca una reimportación
+        reopened = SQLiteStorage(self.data_dir)
+        servers, removed = reopened.load()
+        self.assertEqual([server["id"] for server in servers], ["beta", "gamma"])
+        self.assertEqual(removed, {"alpha": "2026-01-01T00:00:00.000000Z"})
+        reopened.close()
+
+    def test_edited_gallery_file_is_reimported(self):
+        storage = SQLiteStorage(self.data_dir)
+        storage.load()
+        storage.close()
+        time.sleep(0.01)
+        self.gallery_file.write_text(json.dumps([make_server("delta")]), encoding="utf-8")
+
+        reopened = SQLiteStorage(self.data_dir)
+        servers, _ = reopened.load()
+        self.assertEqual([server["id"] for server in servers], ["delta"])
+        reopened.close()
+
+
+    def test_unexported_changes_survive_reimport(self):
+        storage = SQLiteStorage(self.data_dir)
+        storage.load()
+        storage.insert(make_server("gamma"))
+        storage.delete("beta", "2026-01-01T00:00:00.000000Z")
+        time.sleep(0.01)
+        # Edición manual mientras la API tiene cambios sin exportar
+        self.gallery_file.write_text(json.dumps([make_server("alpha"), make_server("beta"), make_server("delta")]),
+                                     encoding="utf-8")
+
+        servers, _ = storage.load()
+        self.assertEqual([server["id"] for server in servers], ["alpha", "delta", "gamma"])
+        storage.close()
+        exported = json.loads(self.gallery_file.read_text(encoding="utf-8"))
+        self.assertEqual([server["id"] for server in exported], ["alpha", "delta", "gamma"])
+
+    def test_unexported_changes_survive_crash(self):
+        storage = SQLiteStorage(self.data_dir)
+        storage.load()
+        storage.insert(make_server("gamma"))
+        storage.delete("beta", "2026-01-01T00:00:00.000000Z")
+        storage._conn.close()  # Caída: el proceso termina sin exportar gallery.json
+        time.sleep(0.01)
+        self.gallery_file.write_text(json.dumps([make_server("alpha"), make_server("beta"), make_server("delta")]),
+                                     encoding="utf-8")
+
+        reopened = SQLiteStorage(self.data_dir)
+        servers, _ = reopened.load()
+        self.assertEqual([server["id"] for server in servers], ["alpha", "delta", "gamma"])
+        reopened.close()
+        exported = json.loads(self.gallery_file.read_text(encoding="utf-8"))
+        self.assertEqual([server["id"] for server in exported], ["alpha", "delta", "gamma"])
+
+    def test_incomplete_backend_cannot_be_instantiated(self):
+        class PartialStorage(GalleryStorage):
+            def is_empty(self):
+                return True
+
+        with self.assertRaises(TypeError):
+            PartialStorage()
+
+
+class SlowStorage(JsonFileStorage):
+    """Almacenamiento cuyas altas esperan a una señal, para simular un disco lento."""
+
+    def __init__(self, data_dir):
+        super().__init__(data_dir)
+        self.release = threading.Event()
+        self.writing = threading.Event()
+
+    def insert(self, server):
+        self.writing.set()
+        self.release.wait(5)
+        super().insert(server)
+
+
+@unittest.skipIf(TestClient is None, "fastapi no disponible")
+class TestGalleryAPIStorage(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.data_dir = Path(self.tmp.name)
+        (self.data_dir / "gallery.json").write_text(json.dumps([make_server("alpha")]), encoding="utf-8")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_reads_do_not_wait_on_writes(self):
+        from mcp_gallery_api.server import MCPGalleryAPI
+
+        storage = SlowStorage(self.data_dir)
+        with TestClient(MCPGalleryAPI(str(self.data_dir), storage).app) as client:
+            results = {}
+            writer = threading.Thread(target=lambda: results.update(
+                post=client.post("/mcps", json=make_server("beta")).status_code))
+            writer.start()
+            try:
+                self.assertTrue(storage.writing.wait(5))
+                # Mientras la escritura está en curso la lectura responde con el catálogo anterior
+                self.assertEqual(client.get("/mcps/alpha").status_code, 200)
+                self.assertEqual(client.get("/mcps/beta").status_code, 404)
+            finally:
+                storage.release.set()
+                writer.join(5)
+            self.assertEqual(results["post"], 200)
+            self.assertEqual(client.get("/mcps/beta").status_code, 200)
+        saved = json.loads((self.data_dir / "gallery.json").read_text(encoding="utf-8"))
+        self.assertEqual([server["id"] for server in saved], ["alpha", "beta"])
+
+    def test_reads_serve_previous_version_while_rebuilding(self):
+        from unittest import mock
+
+        from mcp_gallery_api import server as server_module
+
+        building, release = threading.Event(), threading.Event()
+
+        class SlowSnapshot(server_module.CatalogSnapshot):
+            def __init__(self, version, servers, watermark):
+                if len(servers) > 1:  # Solo las versiones posteriores al arranque
+                    building.set()
+                    release.wait(5)
+                super().__init__(version, servers, watermark)
+
+        with mock.patch.object(server_module, "CatalogSnapshot", SlowSnapshot), \
+                TestClient(server_module.MCPGalleryAPI(str(self.data_dir), "json").app) as client:
+            synced_at = client.get("/mcps", params={"limit": 100}).headers["x-server-time"]
+            try:
+                # La mutación responde en cuanto se guarda; la publicación sigue en segundo plano
+                response = client.post("/mcps", json=make_server("beta"))
+                self.assertEqual(response.status_code, 200)
+                version = response.json()["version"]
+                self.assertTrue(building.wait(5))
+                # La reconstrucción ocurre fuera del bucle de eventos: las lecturas responden con la versión anterior
+                started = time.perf_counter()
+                self.assertEqual([server["id"] for server in client.get("/mcps").json()], ["alpha"])
+                self.assertEqual(client.get("/search", params={"q": "beta"}).json(), [])
+                self.assertEqual(client.get("/mcps/beta").status_code, 200)  # El detalle ya ve el alta
+                self.assertLess(client.get("/health").json()["catalog_version"], version)
+                self.assertLess(time.perf_counter() - started, 2)
+                # Una sincronización incremental en este intervalo no ve el alta ni avanza más allá de ella
+                response = client.get("/mcps", params={"updated_since": synced_at})
+                self.assertEqual(response.json(), [])
+                synced_at = response.headers["x-server-time"]
+            finally:
+                release.set()
+            deadline = time.monotonic() + 5
+            while client.get("/health").json()["catalog_version"] < version and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertEqual([server["id"] for server in client.get("/mcps").json()], ["alpha", "beta"])
+            self.assertEqual([server["id"] for server in client.get("/search", params={"q": "beta"}).json()],
+                             ["beta"])
+            changed = client.get("/mcps", params={"updated_since": synced_at}).json()
+            self.assertEqual([server["id"] for server in changed], ["beta"])
+
+    def test_wait_returns_after_the_version_is_published(self):
+        from mcp_gallery_api.server import MCPGalleryAPI
+
+        with TestClient(MCPGalleryAPI(str(self.data_dir), "json").app) as client:
+            response = client.post("/mcps", json=make_server("beta"), params={"wait": True})
+            self.assertGreaterEqual(client.get("/health").json()["catalog_version"], response.json()["version"])
+            self.assertEqual([server["id"] for server in client.get("/mcps").json()], ["alpha", "beta"])
+            client.delete("/mcps/alpha", params={"wait": True})
+            self.assertEqual([server["id"] for server in client.get("/search", params={"q": "alpha"}).json()], [])
+
+    def test_sqlite_is_the_default_backend(self):
+        from mcp_gallery_api.server import create_app
+
+        with TestClient(create_app(str(self.data_dir))) as client:
+            self.assertEqual(client.post("/mcps", json=make_server("beta")).status_code, 200)
+            self.assertEqual(client.delete("/mcps/alpha").status_code, 200)
+        # Al cerrar la API el catálogo se exporta a gallery.json
+        self.assertTrue((self.data_dir / "gallery.db").exists())
+        saved = json.loads((self.data_dir / "gallery.json").read_text(encoding="utf-8"))
+        self.assertEqual([server["id"] for server in saved], ["beta"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+"""
+Tests para los cálculos de la lista virtual de tarjetas de la galería
+"""
+import sys
+import unittest
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from gallery_virtual_list import VirtualListLayout, plan_recycling
+
+
+class TestVirtualListLayout(unittest.TestCase):
+    def setUp(self):
+        self.layout = VirtualListLayout(row_height=140, overscan=2)
+
+    def test_visible_range_is_bounded_by_viewport(self):
+        # 5000 entradas y un viewport de 600 px: solo unas pocas filas tienen widget
+        visible = self.layout.visible_range(0, 600, 5000)
+        self.assertEqual(visible, range(0, 7))
+        visible = self.layout.visible_range(140 * 2500 + 70, 600, 5000)
+        self.assertEqual(visible, range(2498, 2507))
+        self.assertEqual(self.layout.visible_range(10_000_000, 600, 5000), range(0))
+        self.assertEqual(self.layout.visible_range(0, 600, 0), range(0))
+        self.assertEqual(self.layout.content_height(5000), 700_000)
+
+    def test_recycling_reuses_cards_leaving_the_viewport(self):
+        bound = {i: f"card{i}" for i in range(0, 7)}
+        missing, freed = plan_recycling(bound, range(3, 10))
+        self.assertEqual(missing, [7, 8, 9])
+        self.assertEqual(sorted(freed), ["card0", "card1", "card2"])
+        self.assertEqual(sorted(bound), [3, 4, 5, 6])
+
+        # Al simular un scroll completo el número de tarjetas nunca crece
+        pool, bound, created = [], {}, 0
+        for top in range(0, 140 * 5000, 97):
+            missing, freed = plan_recycling(bound, self.layout.visible_range(top, 600, 5000))
+            pool.extend(freed)
+            for index in missing:
+                if pool:
+                    bound[index] = pool.pop()
+                else:
+                    created += 1
+                    bound[index] = created
+        self.assertLessEqual(created, 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,172 @@
+"""
+Tests para el rastreador de salud de los manifests de la galería
+"""
+import asyncio
+import collections
+import json
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import httpx
+
+from mcp_gallery_api.health_crawler import HealthCrawler, HealthHistory
+
+try:
+    from fastapi.testclient import TestClient
+except ImportError:
+    TestClient = None
+
+
+def make_server(server_id, host="example.com"):
+    return {
+        "id": server_id,
+        "name": server_id.title(),
+        "description": "Servidor de prueba",
+        "icon": "",
+        "manifest_url": f"https://{host}/{server_id}.json",
+        "version": "1.0.0",
+        "min_client_version": "1.0.0",
+        "checksum": "sha256:placeholder",
+        "signature_url": "",
+        "tags": ["test"],
+    }
+
+
+class FakeManifestHost:
+    """
+    Respuestas de manifests por ruta, con ETag y soporte de If-None-Match.
+    Registra el máximo de peticiones simultáneas, en total y por host.
+    """
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.host_in_flight = collections.Counter()
+        self.max_host_in_flight = collections.Counter()
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append((time.perf_counter(), request))
+        host = request.url.host
+        self.in_flight += 1
+        self.host_in_flight[host] += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        self.max_host_in_flight[host] = max(self.max_host_in_flight[host], self.host_in_flight[host])
+        try:
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            return self._respond(request)
+        finally:
+            self.in_flight -= 1
+            self.host_in_flight[host] -= 1
+
+    def _respond(self, request: httpx.Request) -> httpx.Response:
+        name = request.url.path.strip("/")
+        if name.startswith("down"):
+            return httpx.Response(503)
+        if name.startswith("broken"):
+            return httpx.Response(200, json={"description": "sin nombre ni versión"}, headers={"ETag": '"b"'})
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304, headers={"ETag": '"v1"'})
+        return httpx.Response(200, json={"name": name, "version": "1.0.0"}, headers={"ETag": '"v1"'})
+
+
+class TestHealthCrawler(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.history = HealthHistory(Path(self.tmp.name) / "health.db")
+
+    def tearDown(self):
+        self.history.close()
+        self.tmp.cleanup()
+
+    def _crawler(self, servers, host, **kwargs):
+        return HealthCrawler(lambda: servers, self.history, transport=httpx.MockTransport(host), **kwargs)
+
+    def test_results_history_and_conditional_requests(self):
+        servers = [make_server("alpha"), make_server("broken"), make_server("down")]
+        host = FakeManifestHost()
+        crawler = self._crawler(servers, host, per_host_rate=0)
+
+        stats = asyncio.run(crawler.crawl_once())
+        self.assertEqual((stats["checked"], stats["available"], stats["valid"]), (3, 2, 1))
+        self.assertTrue(crawler.summary("alpha")["valid"])
+        self.assertIn("name", crawler.summary("broken")["error"])
+        self.assertFalse(crawler.summary("down")["available"])
+
+        host.requests.clear()
+        stats = asyncio.run(crawler.crawl_once())
+        self.assertEqual(stats["not_modified"], 1)
+        sent = {request.url.path: request.headers.get("if-none-match") for _, request in host.requests}
+        self.assertEqual(sent["/alpha.json"], '"v1"')
+        self.assertEqual(crawler.summary("alpha")["checks"], 2)
+        self.assertEqual(crawler.summary("down")["uptime"], 0.0)
+        self.assertEqual(len(self.history.history("alpha")), 2)
+
+    def test_bounded_concurrency_and_per_host_rate(self):
+        servers = [make_server(f"fast-{i}", host=f"host{i % 20}.example") for i in range(200)]
+        servers += [make_server(f"busy-{i}", host="busy.example") for i in range(40)]
+        # Respuestas lentas y sin límite de ritmo, para que se acumulen más de 4 por host y más de 32 en total
+        host = FakeManifestHost(delay=0.1)
+        crawler = self._crawler(servers, host, concurrency=32, per_host_concurrency=4, per_host_rate=0)
+
+        stats = asyncio.run(crawler.crawl_once())
+        self.assertEqual(stats["valid"], 240)
+        self.assertLessEqual(host.max_in_flight, 32)
+        self.assertGreater(host.max_in_flight, 4)  # Hosts distintos se rastrean en paralelo
+        self.assertLessEqual(max(host.max_host_in_flight.values()), 4)
+        self.assertGreater(host.max_host_in_flight["busy.example"], 1)
+
+        servers = [make_server(f"slow-{i}", host="limited.example") for i in range(5)]
+        host = FakeManifestHost()
+        stats = asyncio.run(self._crawler(servers, host, per_host_rate=20).crawl_once())
+        self.assertEqual(stats["valid"], 5)
+        limited = sorted(moment for moment, _ in host.requests)
+        gaps = [later - earlier for earlier, later in zip(limited, limited[1:])]
+        self.assertGreaterEqual(min(gaps), 1 / 20 * 0.8)
+
+
+@unittest.skipIf(TestClient is None, "fastapi no disponible")
+class TestHealthEndpoints(unittest.TestCase):
+    def setUp(self):
+        from mcp_gallery_api.server import MCPGalleryAPI
+
+        self.tmp = tempfile.TemporaryDirectory()
+        catalog = [make_server("weather-down"), make_server("weather-ok")]
+        catalog[0]["manifest_url"] = "https://example.com/down.json"
+        Path(self.tmp.name, "gallery.json").write_text(json.dumps(catalog), encoding="utf-8")
+        self.api = MCPGalleryAPI(self.tmp.name)
+        self.api.health.transport = httpx.MockTransport(FakeManifestHost())
+        self.client = TestClient(self.api.app)
+
+    def tearDown(self):
+        self.api.health.history.close()
+        self.tmp.cleanup()
+
+    def test_health_endpoint_and_search_sort(self):
+        by_relevance = [s["id"] for s in self.client.get("/search", params={"q": "weather"}).json()]
+        self.assertEqual(by_relevance, ["weather-down", "weather-ok"])
+
+        asyncio.run(self.api.health.crawl_once())
+        health = self.client.get("/mcps/weather-ok/health").json()
+        self.assertTrue(health["summary"]["available"])
+        self.assertEqual(len(health["history"]), 1)
+        self.assertEqual(self.client.get("/mcps/missing/health").status_code, 404)
+
+        by_health = self.client.get("/search", params={"q": "weather", "sort": "health"}).json()
+        self.assertEqual([s["id"] for s in by_health], ["weather-ok", "weather-down"])
+        page = self.client.get("/search", params={"q": "weather", "sort": "health", "limit": 1})
+        self.assertEqual(page.json()[0]["id"], "weather-ok")
+        rest = self.client.get("/search", params={"cursor": page.headers["x-next-cursor"], "limit": 1})
+        self.assertEqual(rest.json()[0]["id"], "weather-down")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,151 @@
+"""
+Tests para la extracción y ejecución concurrente de lotes de comandos MCP
+"""
+import asyncio
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from llm_mcp_handler import LLMMCPHandler, extract_mcp_commands, mcp_command_stream_complete
+from mcp_tool_validator import ToolSchemaValidator
+
+TOOL_DELAY = 0.3
+
+
+class FakeBridge:
+    """Puente MCP falso: cada herramienta tarda TOOL_DELAY segundos y anota cuántas llamadas hay en curso."""
+
+    validator = ToolSchemaValidator()
+
+    def __init__(self, server, manager):
+        self.server = server
+        self.manager = manager
+        self.active = 0
+        self.max_active = 0
+
+    async def connect(self, script_path):
+        return [SimpleNamespace(name="echo"), SimpleNamespace(name="slow")]
+
+    def validate_tool_arguments(self, tool_name, args):
+        return [] if isinstance(args, dict) else [{"path": "/", "message": "not an object"}]
+
+    async def call_tool(self, tool_name, args):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        self.manager.active += 1
+        self.manager.max_active = max(self.manager.max_active, self.manager.active)
+        try:
+            await asyncio.sleep(TOOL_DELAY if tool_name == "echo" else 5)
+        finally:
+            self.active -= 1
+            self.manager.active -= 1
+        return SimpleNamespace(content=[{"type": "text", "text": f"{self.server}:{args.get('value')}"}])
+
+    async def close(self):
+        pass
+
+
+class FakeManager:
+    def __init__(self, servers_config):
+        self.servers_config = servers_config
+        self.bridges = []
+        # Llamadas en curso entre todos los servidores y su máximo
+        self.active = 0
+        self.max_active = 0
+
+    def get_client(self, server_name):
+        bridge = FakeBridge(server_name, self)
+        self.bridges.append(bridge)
+        return bridge
+
+
+class TestExtractCommands(unittest.TestCase):
+    def test_single_command(self):
+        commands = extract_mcp_commands('MCP_COMMAND_JSON: {"server": "a", "method": "echo"}')
+        self.assertEqual(commands, [{"server": "a", "method": "echo"}])
+
+    def test_several_prefixed_objects(self):
+        text = ('Voy a consultar:\nMCP_COMMAND_JSON: {"server": "a", "method": "echo"}\n'
+                'MCP_COMMAND_JSON: {"server": "b", "method": "echo", "params": {"x": "}"}}')
+        commands = extract_mcp_commands(text)
+        self.assertEqual([c["server"] for c in commands], ["a", "b"])
+        self.assertEqual(commands[1]["params"], {"x": "}"})
+
+    def test_json_array(self):
+        text = 'MCP_COMMAND_JSON: [{"server": "a", "method": "echo"}, {"server": "b", "method": "echo"}]'
+        self.assertEqual(len(extract_mcp_commands(text)), 2)
+
+    def test_missing_keys(self):
+        with self.assertRaises(ValueError):
+            extract_mcp_commands('MCP_COMMAND_JSON: {"server": "a"}')
+
+    def test_stream_complete(self):
+        self.assertFalse(mcp_command_stream_complete('MCP_COMMAND_JSON: [{"server": "a", "method": "x"}'))
+        self.assertFalse(mcp_command_stream_complete('MCP_COMMAND_JSON: {"server": "a", "method": "x"}\nMCP_'))
+        self.assertTrue(mcp_command_stream_complete('MCP_COMMAND_JSON: {"server": "a", "method": "x"}\nListo'))
+
+
+class TestBatchExecution(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        script = Path(self.tmp.name) / "server.py"
+        script.write_text("")
+        servers = {
+            name: {"enabled": True, "args": [str(script)], "call_timeout": 1}
+            for name in ("a", "b", "c")
+        }
+        servers["c"]["max_concurrent_calls"] = 4
+        self.manager = FakeManager({"mcpServers": servers})
+        self.handler = LLMMCPHandler(mcp_manager=self.manager)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_fan_out_across_servers_runs_concurrently(self):
+        commands = [{"server": s, "method": "echo", "params": {"value": i}} for i, s in enumerate("abc")]
+        results = self.handler.run_mcp_batch(commands)
+        self.assertEqual(self.manager.max_active, 3)
+        self.assertEqual([r["result"] for r in results], ["a:0", "b:1", "c:2"])
+
+    def test_concurrency_within_server_is_opt_in(self):
+        serial = [{"server": "a", "method": "echo", "params": {"value": i}} for i in range(3)]
+        self.handler.run_mcp_batch(serial)
+        self.assertEqual(self.manager.bridges[-1].max_active, 1)
+
+        parallel = [{"server": "c", "method": "echo", "params": {"value": i}} for i in range(3)]
+        results = self.handler.run_mcp_batch(parallel)
+        self.assertEqual(self.manager.bridges[-1].max_active, 3)
+        self.assertEqual([r["result"] for r in results], ["c:0", "c:1", "c:2"])
+
+    def test_per_call_errors_keep_order(self):
+        commands = [
+            {"server": "a", "method": "slow", "params": {}},
+            {"server": "missing", "method": "echo"},
+            {"server": "b", "method": "unknown"},
+            {"server": "b", "method": "echo", "params": {"value": "ok"}},
+        ]
+        results = self.handler.run_mcp_batch(commands)
+        self.assertIn("Timeout", results[0]["error"])
+        self.assertIn("missing", results[1]["error"])
+        self.assertIn("unknown", results[2]["error"])
+        self.assertEqual(results[3]["result"], "b:ok")
+
+    def test_handler_aggregates_into_single_callback(self):
+        received = []
+        text = ('MCP_COMMAND_JSON: {"server": "a", "method": "echo", "params": {"value": 1}}\n'
+                'MCP_COMMAND_JSON: {"server": "b", "method": "echo", "params": {"value": 2}}')
+        commands = extract_mcp_commands(text)
+        self.handler.handle_mcp_batch(commands, received.append, wait=True)
+        self.assertEqual(len(received), 1)
+        payload = json.loads(received[0])
+        self.assertEqual([r["server"] for r in payload["mcp_batch_results"]], ["a", "b"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,174 @@
+"""
+Tests para la recarga en caliente de mcp_servers.json
+"""
+import json
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from mcp_config_watcher import MCPConfigWatcher, diff_server_configs
+from mcp_manager import MCPManager
+
+
+def server(command="npx", args=None, enabled=True, **extra):
+    config = {"command": command, "args": args or ["-y", "pkg"], "enabled": enabled, "port": 8080}
+    config.update(extra)
+    return config
+
+
+class RecordingManager(MCPManager):
+    """MCPManager que registra los arranques y paradas en lugar de lanzar procesos."""
+
+    def __init__(self):
+        super().__init__(app_logger_func=lambda msg, tag: None)
+        self.started, self.stopped = [], []
+        self.live = set()
+
+    def start_server(self, server_name):
+        self.started.append(server_name)
+        self.live.add(server_name)
+        return True
+
+    def stop_server(self, server_name, log_not_active=True):
+        self.stopped.append(server_name)
+        self.live.discard(server_name)
+        return True
+
+    def _has_live_session(self, server_name):
+        return server_name in self.live
+
+
+class TestConfigDiff(unittest.TestCase):
+    def test_classifies_changes(self):
+        old = {
+            "same": server(),
+            "gone": server(),
+            "disabled": server(),
+            "new_args": server(args=["a"]),
+            "new_env": server(env={"A": "1"}),
+            "new_port": server(),
+        }
+        new = {
+            "same": server(),
+            "disabled": server(enabled=False),
+            "new_args": server(args=["b"]),
+            "new_env": server(env={"A": "2"}),
+            "new_port": server(port=9000),
+            "fresh": server(),
+        }
+        diff = diff_server_configs(old, new)
+        self.assertEqual(diff.added, ["fresh"])
+        self.assertEqual(diff.removed, ["disabled", "gone"])
+        self.assertEqual(diff.restarted, ["new_args", "new_env"])
+        self.assertEqual(diff.updated, ["new_port"])
+        self.assertTrue(diff_server_configs(old, old).is_empty())
+
+
+class TestApplyConfig(unittest.TestCase):
+    def test_only_changed_servers_are_touched(self):
+        manager = RecordingManager()
+        manager.servers_config = {"mcpServers": {"keep": server(), "edit": server(args=["a"]),
+                                                 "idle": server(args=["a"]), "drop": server()}}
+        manager.live = {"keep", "edit", "drop"}
+
+        diff = manager.apply_config({"mcpServers": {"keep": server(), "edit": server(args=["b"]),
+                                                    "idle": server(args=["b"]), "add": server()}})
+
+        self.assertEqual(diff.restarted, ["edit", "idle"])
+        self.assertEqual(sorted(manager.stopped), ["drop", "edit"])
+        # "idle" no estaba en marcha: se actualiza su configuración sin arrancarlo
+        self.assertEqual(sorted(manager.started), ["add", "edit"])
+        self.assertEqual(manager.servers_config["mcpServers"]["idle"]["args"], ["b"])
+        self.assertIn("add", manager.server_ports)
+
+    def test_invalid_added_or_changed_entries_are_skipped(self):
+        manager = RecordingManager()
+        manager.servers_config = {"mcpServers": {"edit": server(args=["a"]), "keep": server()}}
+        manager.live = {"edit", "keep"}
+        broken = server(args=["b"])
+        del broken["command"]
+
+        diff = manager.apply_config({"mcpServers": {
+            "edit": broken, "keep": server(), "bad": {"enabled": True}, "add": server(),
+            "remote": {"type": "remote", "url": "https://example.com/mcp"},
+            "off": {"enabled": False},
+        }})
+
+        self.assertEqual(diff.added, ["add", "remote"])
+        self.assertEqual(diff.restarted, [])
+        self.assertEqual(manager.stopped, [])
+        self.assertEqual(sorted(manager.started), ["add", "remote"])
+        # La entrada inválida conserva la configuración en marcha; la nueva inválida no se añade
+        self.assertEqual(manager.servers_config["mcpServers"]["edit"]["args"], ["a"])
+        self.assertNotIn("bad", manager.servers_config["mcpServers"])
+        self.assertIn("off", manager.servers_config["mcpServers"])
+
+    def test_other_keys_and_skipped_entries_survive_reload_and_save(self):
+        manager = RecordingManager()
+        manager.servers_config = {"mcpServers": {"keep": server()}, "theme": "dark"}
+
+        manager.apply_config({"mcpServers": {"keep": server(), "add": server(), "bad": {"enabled": True}},
+                              "theme": "light"})
+        self.assertEqual(manager.servers_config["theme"], "light")
+        # Sin cambios en los servidores también se recogen las demás claves
+        manager.apply_config({"mcpServers": {"keep": server(), "add": server(), "bad": {"enabled": True}},
+                              "theme": "light", "language": "es"})
+        self.assertEqual(manager.servers_config["language"], "es")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "mcp_servers.json"
+            self.assertTrue(manager.save_config(path))
+            saved = json.loads(path.read_text(encoding="utf-8"))
+        self.assertEqual((saved["theme"], saved["language"]), ("light", "es"))
+        self.assertEqual(sorted(saved["mcpServers"]), ["add", "bad", "keep"])
+
+
+class TestMCPConfigWatcher(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "mcp_servers.json"
+        self.manager = RecordingManager()
+        self.manager.servers_config = {"mcpServers": {"a": server()}}
+        self._write({"mcpServers": {"a": server()}})
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write(self, data):
+        self.path.write_text(json.dumps(data), encoding="utf-8")
+
+    def test_polling_reload_is_debounced(self):
+        reloaded = threading.Event()
+        diffs = []
+
+        def on_reload(diff):
+            diffs.append(diff)
+            reloaded.set()
+
+        watcher = MCPConfigWatcher(self.manager, self.path, debounce=0.2, poll_interval=0.05,
+                                   on_reload=on_reload, use_watchdog=False)
+        watcher.start()
+        try:
+            self._write({"mcpServers": {"a": server(), "b": server()}})
+            self._write({"mcpServers": {"a": server(), "b": server(), "c": server(extra=1)}})
+            self.assertTrue(reloaded.wait(5))
+        finally:
+            watcher.stop()
+        self.assertEqual(len(diffs), 1)
+        self.assertEqual(diffs[0].added, ["b", "c"])
+        self.assertEqual(self.manager.stopped, [])
+
+    def test_invalid_json_keeps_running_config(self):
+        watcher = MCPConfigWatcher(self.manager, self.path, use_watchdog=False)
+        self.path.write_text('{"mcpServers": {', encoding="utf-8")
+        self.assertIsNone(watcher.reload())
+        self.assertEqual(list(self.manager.servers_config["mcpServers"]), ["a"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+"""
+Tests para el llavero PGP en memoria y la caché de veredictos de firma
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import pgp_keyring
+from pgp_keyring import PGPKeyring
+
+
+class CountingKeyring(PGPKeyring):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.verifications = 0
+        self.imports = 0
+        self.gpg_verifications = 0
+        self.pgpy_verifications = 0
+
+    def _verify_with_gpg(self, *args):
+        self.verifications += 1
+        self.gpg_verifications += 1
+        return super()._verify_with_gpg(*args)
+
+    def _verify_with_pgpy(self, *args):
+        self.verifications += 1
+        self.pgpy_verifications += 1
+        return super()._verify_with_pgpy(*args)
+
+    def _load_key(self, *args):
+        self.imports += 1
+        return super()._load_key(*args)
+
+
+@unittest.skipUnless(shutil.which("gpg"), "gpg no disponible")
+class TestPGPKeyring(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # Clave de firma de prueba en un GNUPGHOME temporal
+        cls.signer_dir = tempfile.mkdtemp()
+        os.chmod(cls.signer_dir, 0o700)
+        cls.gpg = ["gpg", "--homedir", cls.signer_dir, "--batch", "--no-tty", "--pinentry-mode", "loopback",
+                   "--passphrase", ""]
+        subprocess.run(cls.gpg + ["--quick-gen-key", "Test Signer <signer@example.com>", "ed25519", "sign", "never"],
+                       check=True, capture_output=True, timeout=60)
+        cls.public_key = subprocess.run(cls.gpg + ["--armor", "--export", "signer@example.com"],
+                                        check=True, capture_output=True, timeout=30).stdout
+
+    @classmethod
+    def tearDownClass(cls):
+        subprocess.run(["gpgconf", "--homedir", cls.signer_dir, "--kill", "gpg-agent"], capture_output=True)
+        shutil.rmtree(cls.signer_dir, ignore_errors=True)
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.keys_dir = Path(self.tmp.name) / "public_keys"
+        self.keys_dir.mkdir()
+        self.key_file = self.keys_dir / "mcp.gpg"
+        self.key_file.write_bytes(self.public_key)
+        self.content = b"manifest firmado\n"
+        self.signature = self._sign(self.content)
+
+    def tearDown(self):
+        subprocess.run(["gpgconf", "--homedir", str(self.keys_dir / ".gnupg"), "--kill", "gpg-agent"],
+                       capture_output=True)
+        self.tmp.cleanup()
+
+    def _sign(self, content: bytes) -> bytes:
+        source = Path(self.tmp.name) / "to_sign"
+        source.write_bytes(content)
+        subprocess.run(self.gpg + ["--yes", "--detach-sign", "--output", str(source) + ".sig", str(source)],
+                       check=True, capture_output=True, timeout=30)
+        return Path(str(source) + ".sig").read_bytes()
+
+    def test_verdicts_are_cached_and_key_loaded_once(self):
+        keyring = CountingKeyring(self.keys_dir)
+        self.assertEqual(keyring.verify(self.content, self.signature, self.key_file)[0], True)
+        self.assertEqual(keyring.verify(self.content, self.signature, self.key_file)[0], True)
+        self.assertEqual(keyring.verifications, 1)
+        self.assertEqual(keyring.imports, 1)
+
+        # El veredicto sobrevive a la sesión (caché en disco)
+        keyring._verdict_store.flush()
+        fresh = CountingKeyring(self.keys_dir)
+        self.assertEqual(fresh.verify(self.content, self.signature, self.key_file)[0], True)
+        self.assertEqual(fresh.verifications, 0)
+
+    @unittest.skipUnless(pgp_keyring.pgpy, "pgpy no disponible")
+    def test_pgpy_verifies_detached_signature_without_gpg(self):
+        keyring = CountingKeyring(self.keys_dir)
+        content_file = Path(self.tmp.name) / "manifest.json"
+        content_file.write_bytes(self.content)
+        verified, message = keyring.verify(content_file, self.signature, self.key_file)
+        self.assertTrue(verified, message)
+        self.assertEqual(keyring.pgpy_verifications, 1)
+        self.assertEqual(keyring.gpg_verifications, 0)
+
+        verified, _ = keyring.verify(b"manifest alterado\n", self.signature, self.key_file)
+        self.assertFalse(verified)
+        self.assertEqual(keyring.gpg_verifications, 0)
+
+    @unittest.skipUnless(pgp_keyring.pgpy, "pgpy no disponible")
+    def test_pgpy_error_falls_back_to_gpg(self):
+        class BrokenPgpyKeyring(CountingKeyring):
+            def _verify_with_pgpy(self, *args):
+                self.pgpy_verifications += 1
+                return False, "Error en verificación pgpy: algoritmo no soportado", False
+
+        keyring = BrokenPgpyKeyring(self.keys_dir)
+        verified, message = keyring.verify(self.content, self.signature, self.key_file)
+        self.assertTrue(verified, message)
+        self.assertEqual(keyring.pgpy_verifications, 1)
+        self.assertEqual(keyring.gpg_verifications, 1)
+
+    def test_tampered_content_is_rejected(self):
+        keyring = CountingKeyring(self.keys_dir)
+        verified, _ = keyring.verify(b"manifest alterado\n", self.signature, self.key_file)
+        self.assertFalse(verified)
+
+    def test_refresh_after_key_removal(self):
+        keyring = CountingKeyring(self.keys_dir)
+        keyring.verify(self.content, self.signature, self.key_file)
+        self.key_file.unlink()
+        keyring.refresh()
+        verified, message = keyring.verify(self.content, self.signature, self.key_file)
+        self.assertFalse(verified)
+        self.assertIn("no encontrado", message)
+
+
+if __name__ == "__main__":
+    unittest.main()
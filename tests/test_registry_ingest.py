@@ -0,0 +1,185 @@
+"""
+Tests para la ingesta paginada del registro oficial de servidores MCP
+"""
+import hashlib
+import json
+import sys
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from registry_ingest import (RegistryIngestor, decode_page_validators, extract_tags,
+                             parse_page_chunks)
+
+TOTAL_ENTRIES = 730
+
+
+def registry_item(i, latest=True):
+    return {
+        "server": {
+            "name": f"io.github.owner{i % 7}/server-{i}",
+            "description": f"Synthetic server {i} for file search",
+            "version": "1.0.0",
+            "packages": [{"registryType": "npm", "identifier": f"@owner/server-{i}", "version": "1.0.0"}],
+        },
+        "_meta": {"io.modelcontextprotocol.registry/official": {"status": "active", "isLatest": latest}},
+    }
+
+
+class FakeRegistryHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        if self.headers.get("If-None-Match") == '"catalog-v1"':
+            self.send_response(304)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        limit = int(query.get("limit", ["100"])[0])
+        offset = int(query.get("cursor", ["0"])[0])
+        items = [registry_item(i) for i in range(offset, min(offset + limit, TOTAL_ENTRIES))]
+        if offset == 0:
+            # Entradas repetidas e históricas que deben descartarse
+            items.append(registry_item(1))
+            items.append(registry_item(TOTAL_ENTRIES + 1, latest=False))
+        metadata = {"count": len(items)}
+        if offset + limit < TOTAL_ENTRIES:
+            metadata["nextCursor"] = str(offset + limit)
+        # Los metadatos van antes del array para probar el orden arbitrario de claves
+        body = json.dumps({"metadata": metadata, "servers": items}, indent=1).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", '"catalog-v1"')
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class PagedRegistryHandler(BaseHTTPRequestHandler):
+    """Registro con un ETag distinto por página, calculado a partir de su contenido."""
+
+    protocol_version = "HTTP/1.1"
+    items = []
+    requests_seen = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        limit = int(query.get("limit", ["100"])[0])
+        offset = int(query.get("cursor", ["0"])[0])
+        metadata = {"count": len(self.items[offset:offset + limit])}
+        if offset + limit < len(self.items):
+            metadata["nextCursor"] = str(offset + limit)
+        body = json.dumps({"servers": self.items[offset:offset + limit], "metadata": metadata}).encode()
+        etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+        not_modified = self.headers.get("If-None-Match") == etag
+        type(self).requests_seen.append((offset, 304 if not_modified else 200))
+        if not_modified:
+            self.send_response(304)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class TestRegistryIngest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), FakeRegistryHandler)
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.url = f"http://127.0.0.1:{cls.server.server_address[1]}/v0/servers"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def test_follows_cursors_and_dedupes(self):
+        progress = []
+        ingestor = RegistryIngestor(self.url, page_size=100, max_workers=3, batch_size=16,
+                                    progress_callback=progress.append)
+        result = ingestor.ingest()
+        self.assertEqual(len(result["servers"]), TOTAL_ENTRIES)
+        self.assertEqual(result["stats"]["pages"], 8)
+        self.assertEqual(result["stats"]["duplicates"], 1)
+        pages = decode_page_validators(result["etag"])
+        self.assertEqual(len(pages), 8)
+        self.assertEqual({validators[0] for validators in pages.values()}, {'"catalog-v1"'})
+        self.assertEqual(result["servers"][0]["id"], "server-0")
+        self.assertTrue(progress[-1]["done"])
+        self.assertEqual([p["pages"] for p in progress[:-1]], list(range(1, 9)))
+
+    def test_conditional_request_not_modified(self):
+        first = RegistryIngestor(self.url).ingest()
+        result = RegistryIngestor(self.url).ingest(etag=first["etag"])
+        self.assertTrue(result["not_modified"])
+        self.assertEqual(result["servers"], [])
+        self.assertEqual(result["stats"]["pages"], 8)
+
+        # Un ETag suelto solo cubre la primera página: se descarga todo el registro
+        result = RegistryIngestor(self.url).ingest(etag='"catalog-v1"')
+        self.assertFalse(result["not_modified"])
+        self.assertEqual(len(result["servers"]), TOTAL_ENTRIES)
+
+    def test_change_after_unchanged_first_page_is_picked_up(self):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), PagedRegistryHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_address[1]}/v0/servers"
+        try:
+            PagedRegistryHandler.items = [registry_item(i) for i in range(3)]
+            first = RegistryIngestor(url, page_size=2).ingest()
+            self.assertEqual(len(first["servers"]), 3)
+
+            # Nueva entrada en la página 2: la página 1 responde 304
+            PagedRegistryHandler.items.append(registry_item(3))
+            PagedRegistryHandler.requests_seen = []
+            result = RegistryIngestor(url, page_size=2).ingest(etag=first["etag"])
+            self.assertFalse(result["not_modified"])
+            self.assertEqual(sorted(s["id"] for s in result["servers"]), [f"server-{i}" for i in range(4)])
+            self.assertEqual(PagedRegistryHandler.requests_seen, [(0, 304), (2, 200), (0, 200), (2, 200)])
+
+            PagedRegistryHandler.requests_seen = []
+            unchanged = RegistryIngestor(url, page_size=2).ingest(etag=result["etag"])
+            self.assertTrue(unchanged["not_modified"])
+            self.assertEqual(PagedRegistryHandler.requests_seen, [(0, 304), (2, 304)])
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_incremental_parser_handles_split_utf8_and_keys_order(self):
+        page = json.dumps({"servers": [{"a": "ñandú"}, {"b": [1, {"c": "]"}]}], "metadata": {"nextCursor": "x"}},
+                          ensure_ascii=False).encode("utf-8")
+        chunks = [page[i:i + 3] for i in range(0, len(page), 3)]
+        items, envelope = parse_page_chunks(chunks)
+        self.assertEqual(items, [{"a": "ñandú"}, {"b": [1, {"c": "]"}]}])
+        self.assertEqual(envelope["metadata"]["nextCursor"], "x")
+
+    def test_truncated_page_raises(self):
+        with self.assertRaises(ValueError):
+            parse_page_chunks([b'{"servers": [{"a": 1}, {"b"'])
+
+    def test_tags_are_deterministic(self):
+        data = {"name": "git-files", "description": "GitHub file search", "packages": [{"registryType": "npm"}]}
+        self.assertEqual(extract_tags(data), ["filesystem", "github", "search", "nodejs"])
+
+
+if __name__ == '__main__':
+    unittest.main()
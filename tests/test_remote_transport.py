@@ -0,0 +1,251 @@
+"""
+Tests para el transporte remoto MCP (Streamable HTTP y SSE) contra un servidor local de prueba
+"""
+import asyncio
+import itertools
+import json
+import queue
+import socket
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from mcp_remote_transport import (RemoteMCPConnection, RemoteMCPError, RemoteTransportPool,
+                                  get_remote_pool)
+from mcp_sdk_bridge import MCPSDKBridge
+
+TOOLS = [{"name": "add", "inputSchema": {"type": "object", "properties": {"a": {"type": "number"}, "b": {"type": "number"}}}}]
+
+
+def handle_rpc(message):
+    """Lógica MCP mínima del servidor de prueba."""
+    method = message.get("method")
+    if method == "initialize":
+        result = {"protocolVersion": "2025-03-26", "capabilities": {"tools": {}}, "serverInfo": {"name": "stub", "version": "0"}}
+    elif method == "tools/list":
+        result = {"tools": TOOLS}
+    elif method == "tools/call":
+        args = message["params"]["arguments"]
+        result = {"content": [{"type": "text", "text": str(args["a"] + args["b"])}], "isError": False}
+    else:
+        return {"jsonrpc": "2.0", "id": message.get("id"), "error": {"code": -32601, "message": "Method not found"}}
+    return {"jsonrpc": "2.0", "id": message.get("id"), "result": result}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body=b"", content_type="application/json", headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        state = self.server.state
+        state["client_ports"].add(self.client_address[1])
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        path = urlparse(self.path)
+
+        if path.path == "/messages":
+            sid = parse_qs(path.query)["sid"][0]
+            if sid not in state["sse_queues"]:
+                return self._send(404, b"unknown session", "text/plain")
+            if "id" in body:
+                state["sse_queues"][sid].put(handle_rpc(body))
+            return self._send(202)
+
+        if body.get("method") == "initialize":
+            state["initializations"] += 1
+            sid = f"s{next(state['ids'])}"
+            state["sessions"].add(sid)
+            return self._send(200, json.dumps(handle_rpc(body)).encode(), headers={"Mcp-Session-Id": sid})
+        if self.headers.get("Mcp-Session-Id") not in state["sessions"]:
+            return self._send(404, b"unknown session", "text/plain")
+        if "id" not in body:
+            return self._send(202)
+        reply = json.dumps(handle_rpc(body))
+        if body.get("method") == "tools/call":
+            # Respuesta en formato SSE, como hacen los servidores Streamable HTTP con streaming
+            stream = f": keep-alive\n\nid: 1\nevent: message\ndata: {reply}\n\n".encode()
+            return self._send(200, stream, "text/event-stream")
+        self._send(200, reply.encode())
+
+    def do_GET(self):
+        state = self.server.state
+        sid = f"sse{next(state['ids'])}"
+        events = state["sse_queues"].setdefault(sid, queue.Queue())
+        self.close_connection = True
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        self.wfile.write(f"event: endpoint\ndata: /messages?sid={sid}\n\n".encode())
+        self.wfile.flush()
+        while not state["stopping"].is_set():
+            try:
+                message = events.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            self.wfile.write(f"event: message\ndata: {json.dumps(message)}\n\n".encode())
+            self.wfile.flush()
+
+
+class TestRemoteTransport(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        self.server.daemon_threads = True
+        self.server.state = {
+            "ids": itertools.count(1), "sessions": set(), "initializations": 0,
+            "client_ports": set(), "sse_queues": {}, "stopping": threading.Event(),
+        }
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.pool = RemoteTransportPool()
+
+    def tearDown(self):
+        self.pool.close_all()
+        self.server.state["stopping"].set()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_streamable_http_round_trip_reuses_connection(self):
+        connection = self.pool.get({"url": f"{self.base_url}/mcp", "transport": "streamable-http"})
+        self.assertEqual(connection.initialize()["serverInfo"]["name"], "stub")
+        self.assertEqual([t["name"] for t in connection.list_tools()], ["add"])
+        for _ in range(3):
+            result = connection.call_tool("add", {"a": 2, "b": 3})
+        self.assertEqual(result["content"][0]["text"], "5")
+        self.assertEqual(connection.session_id, "s1")
+        # Todas las peticiones viajaron por la misma conexión keep-alive
+        self.assertEqual(len(self.server.state["client_ports"]), 1)
+
+    def test_expired_session_is_reinitialized(self):
+        connection = self.pool.get({"url": f"{self.base_url}/mcp"})
+        connection.initialize()
+        self.server.state["sessions"].clear()
+        result = connection.call_tool("add", {"a": 1, "b": 1})
+        self.assertEqual(result["content"][0]["text"], "2")
+        self.assertEqual(self.server.state["initializations"], 2)
+        self.assertNotEqual(connection.session_id, "s1")
+
+    def test_legacy_sse_transport(self):
+        connection = self.pool.get({"url": f"{self.base_url}/sse", "transport": "sse"})
+        connection.initialize()
+        result = connection.call_tool("add", {"a": 4, "b": 5})
+        self.assertEqual(result["content"][0]["text"], "9")
+        with self.assertRaises(RemoteMCPError):
+            connection.request("unknown/method")
+
+    def test_expired_sse_session_opens_new_stream(self):
+        connection = self.pool.get({"url": f"{self.base_url}/sse", "transport": "sse"})
+        connection.initialize()
+        expired = connection._endpoint
+        self.server.state["sse_queues"].pop(parse_qs(urlparse(expired).query)["sid"][0])
+        result = connection.call_tool("add", {"a": 1, "b": 1})
+        self.assertEqual(result["content"][0]["text"], "2")
+        self.assertNotEqual(connection._endpoint, expired)
+        self.assertEqual(len(self.server.state["sse_queues"]), 1)  # Un solo stream nuevo
+
+    def test_pool_shares_connection_per_server(self):
+        config = {"url": f"{self.base_url}/mcp", "transport": "http", "headers": [{"name": "X-Key", "value": "1"}]}
+        self.assertIs(self.pool.get(config), self.pool.get(dict(config)))
+        self.assertIsNot(self.pool.get(config), self.pool.get({"url": f"{self.base_url}/mcp"}))
+
+    def test_unreachable_server_backs_off_and_fails(self):
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            port = probe.getsockname()[1]
+        connection = RemoteMCPConnection(f"http://127.0.0.1:{port}/mcp", max_retries=2, backoff_base=0.01, timeout=2)
+        with self.assertRaises(RemoteMCPError):
+            connection.initialize()
+        self.assertEqual(connection.reconnects, 2)
+        self.assertTrue(connection.failed)
+
+    def test_remote_entry_loaded_from_config_file(self):
+        from mcp_manager import MCPManager
+
+        remote = {"type": "remote", "url": f"{self.base_url}/mcp", "enabled": True}
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp, "mcp_servers.json")
+            path.write_text(json.dumps({"mcpServers": {
+                "remoto": remote,
+                "sin-url": {"type": "remote", "enabled": True},
+            }}), encoding="utf-8")
+            manager = MCPManager(app_logger_func=lambda msg, tag: None)
+            self.assertTrue(manager.load_config(str(path)))
+        self.assertEqual(list(manager.servers_config["mcpServers"]), ["remoto"])
+        try:
+            reply = manager.send_command_to_mcp("remoto", "tools/call", {"name": "add", "arguments": {"a": 2, "b": 2}})
+        finally:
+            get_remote_pool().close(remote)
+        self.assertEqual(reply["result"]["content"][0]["text"], "4")
+
+    def test_sdk_bridge_uses_remote_transport(self):
+        config = {"type": "remote", "url": f"{self.base_url}/mcp", "transport": "streamable-http"}
+        bridge = MCPSDKBridge()
+
+        async def run():
+            tools = await bridge.connect_remote(config)
+            result = await bridge.call_tool("add", {"a": 10, "b": 5})
+            await bridge.close()
+            return tools, result
+
+        try:
+            tools, result = asyncio.run(run())
+        finally:
+            get_remote_pool().close(config)
+        self.assertEqual(tools[0].name, "add")
+        self.assertEqual(result.content[0].text, "15")
+
+
+class TestLoadConfigValidation(unittest.TestCase):
+    def test_invalid_entries_are_skipped_in_memory_only(self):
+        from mcp_manager import MCPManager
+
+        document = {"mcpServers": {
+            "fs": {"command": "npx", "args": ["-y", "@modelcontextprotocol/server-filesystem", "/tmp"]},
+            "sin-url": {"type": "remote", "enabled": True},
+        }, "theme": "dark"}
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp, "mcp_servers.json")
+            path.write_text(json.dumps(document), encoding="utf-8")
+            before = path.read_bytes()
+            manager = MCPManager(app_logger_func=lambda msg, tag: None)
+            self.assertTrue(manager.load_config(str(path)))
+
+            # Las entradas locales sin puerto ni estado se aceptan como antes; la remota sin URL se ignora
+            self.assertEqual(list(manager.servers_config["mcpServers"]), ["fs"])
+            self.assertEqual(path.read_bytes(), before)
+
+            # Guardar no pierde la entrada ignorada ni las demás claves del documento
+            self.assertTrue(manager.save_config(str(path)))
+            self.assertEqual(json.loads(path.read_text(encoding="utf-8")), document)
+
+    def test_all_invalid_entries_do_not_overwrite_file(self):
+        from mcp_manager import MCPManager
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp, "mcp_servers.json")
+            path.write_text(json.dumps({"mcpServers": {"sin-url": {"type": "remote"}}}), encoding="utf-8")
+            before = path.read_bytes()
+            manager = MCPManager(app_logger_func=lambda msg, tag: None)
+            self.assertTrue(manager.load_config(str(path)))
+            self.assertEqual(manager.servers_config["mcpServers"], {})
+            self.assertEqual(path.read_bytes(), before)
+
+
+if __name__ == '__main__':
+    unittest.main()
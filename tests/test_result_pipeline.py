@@ -0,0 +1,73 @@
+"""
+Tests para el procesamiento acotado de resultados de herramientas MCP
+"""
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from mcp.types import CallToolResult
+from mcp_result_pipeline import ToolResultPipeline, read_spilled, strip_nulls
+
+
+def text_result(*texts):
+    return CallToolResult.model_validate({"content": [{"type": "text", "text": t} for t in texts]})
+
+
+class TestToolResultPipeline(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.pipeline = ToolResultPipeline(spill_dir=self.tmp.name, max_bytes=1024)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_small_result_is_minified_not_truncated(self):
+        payload = json.dumps({"files": ["a.txt", "b.txt"], "error": None}, indent=4)
+        processed = self.pipeline.process(text_result(payload), "fs", "list")
+        self.assertEqual(processed["content"], '{"files":["a.txt","b.txt"]}')
+        self.assertFalse(processed["truncated"])
+        self.assertGreater(processed["bytes_saved"], 0)
+
+    def test_large_result_is_truncated_and_spilled(self):
+        blocks = [f"línea {i} " * 20 for i in range(200)]
+        processed = self.pipeline.process(text_result(*blocks), "fs", "read_file")
+        self.assertTrue(processed["truncated"])
+        self.assertLessEqual(processed["bytes"], 1024 + 200)
+        spilled = Path(processed["spill_path"]).read_text(encoding="utf-8")
+        self.assertEqual(spilled.splitlines(), blocks)
+        self.assertEqual(read_spilled(processed["spill_path"], 0, 8), "línea 0")
+        self.assertEqual(processed["bytes_saved"], processed["original_bytes"] - processed["bytes"])
+        self.assertNotIn(processed["spill_path"], processed["content"])  # El LLM no puede leer el volcado
+
+    def test_no_savings_reported_when_text_is_unchanged(self):
+        processed = self.pipeline.process(text_result("sin cambios", "otra línea"), "fs", "echo")
+        self.assertEqual(processed["content"], "sin cambios\notra línea")
+        self.assertEqual(processed["original_bytes"], len("sin cambiosotra línea".encode("utf-8")))
+        self.assertEqual(processed["bytes_saved"], 0)
+        self.assertEqual(self.pipeline.total_bytes_saved, 0)
+
+    def test_per_tool_limits_from_server_config(self):
+        config = {"result_limits": {"max_bytes": 4096, "tools": {"read_file": {"max_tokens": 10}}}}
+        self.assertEqual(self.pipeline.limits_for("read_file", config), 40)
+        self.assertEqual(self.pipeline.limits_for("list", config), 4096)
+        self.assertEqual(self.pipeline.limits_for("list"), 1024)
+
+    def test_non_text_blocks_and_plain_values(self):
+        image = SimpleNamespace(content=[{"type": "image", "data": "QUJD", "mimeType": "image/png", "annotations": None}])
+        processed = self.pipeline.process(image, "srv", "shot")
+        self.assertEqual(json.loads(processed["content"]), {"type": "image", "data": "QUJD", "mimeType": "image/png"})
+        self.assertEqual(processed["bytes_saved"], 0)
+        self.assertEqual(self.pipeline.process("hola", "srv", "echo")["content"], "hola")
+
+    def test_strip_nulls(self):
+        self.assertEqual(strip_nulls({"a": None, "b": [1, None, {"c": None}]}), {"b": [1, {}]})
+
+
+if __name__ == '__main__':
+    unittest.main()
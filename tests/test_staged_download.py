@@ -0,0 +1,160 @@
+"""
+Tests para las descargas en streaming con hash incremental y reanudación por Range
+"""
+import hashlib
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from staged_download import DownloadError, download_to_staging, staging_key
+
+PAYLOAD = os.urandom(3 * 1024 * 1024 + 17)
+PAYLOAD_SHA256 = hashlib.sha256(PAYLOAD).hexdigest()
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    requests_seen = []
+    cut_after = None  # Cortar la conexión tras N bytes (una vez)
+    etag = '"v1"'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        RangeHandler.requests_seen.append(self.headers.get("Range"))
+        if self.path == "/missing":
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        start = 0
+        range_header = self.headers.get("Range")
+        if range_header and self.headers.get("If-Range") == self.etag:
+            start = int(range_header.split("=")[1].rstrip("-"))
+            if start >= len(PAYLOAD):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(PAYLOAD)}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(PAYLOAD) - 1}/{len(PAYLOAD)}")
+        else:
+            self.send_response(200)
+        body = PAYLOAD[start:]
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", self.etag)
+        self.end_headers()
+        if RangeHandler.cut_after is not None:
+            cut, RangeHandler.cut_after = RangeHandler.cut_after, None
+            self.wfile.write(body[:cut])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+
+class TestStagedDownload(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), RangeHandler)
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.url = f"http://127.0.0.1:{cls.server.server_address[1]}/artifact.tar.gz"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        RangeHandler.requests_seen = []
+        RangeHandler.cut_after = None
+        RangeHandler.etag = '"v1"'
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_streams_and_hashes_incrementally(self):
+        staged = download_to_staging(self.url, self.tmp.name, algorithms=["sha256", "sha512"])
+        self.assertEqual(staged.size, len(PAYLOAD))
+        self.assertEqual(staged.hexdigest("sha256"), PAYLOAD_SHA256)
+        self.assertEqual(staged.hexdigest("sha512"), hashlib.sha512(PAYLOAD).hexdigest())
+        self.assertEqual(staged.path.read_bytes(), PAYLOAD)
+        target = staged.commit(Path(self.tmp.name) / "installed" / "artifact.tar.gz")
+        self.assertTrue(target.exists())
+        self.assertEqual(sorted(p.name for p in Path(self.tmp.name).iterdir()), ["installed"])
+
+    def test_resumes_with_range_after_connection_drop(self):
+        RangeHandler.cut_after = 1024 * 1024
+        staged = download_to_staging(self.url, self.tmp.name)
+        self.assertEqual(staged.hexdigest("sha256"), PAYLOAD_SHA256)
+        self.assertEqual(RangeHandler.requests_seen, [None, f"bytes={1024 * 1024}-"])
+
+    def test_resumes_partial_file_from_previous_attempt(self):
+        key = staging_key(self.url)
+        Path(self.tmp.name, f"{key}.part").write_bytes(PAYLOAD[:500000])
+        Path(self.tmp.name, f"{key}.part.json").write_text(
+            '{"url": "%s", "etag": "\\"v1\\"", "total": %d}' % (self.url, len(PAYLOAD)))
+        staged = download_to_staging(self.url, self.tmp.name)
+        self.assertEqual(staged.hexdigest("sha256"), PAYLOAD_SHA256)
+        self.assertEqual(RangeHandler.requests_seen, ["bytes=500000-"])
+
+    def test_changed_resource_restarts_from_zero(self):
+        key = staging_key(self.url)
+        Path(self.tmp.name, f"{key}.part").write_bytes(b"x" * 1000)
+        Path(self.tmp.name, f"{key}.part.json").write_text(
+            '{"url": "%s", "etag": "\\"old\\""}' % self.url)
+        staged = download_to_staging(self.url, self.tmp.name)
+        self.assertEqual(staged.hexdigest("sha256"), PAYLOAD_SHA256)
+        self.assertEqual(staged.path.read_bytes(), PAYLOAD)
+
+    def test_unsatisfiable_range_discards_partial_and_restarts(self):
+        key = staging_key(self.url)
+        oversized = len(PAYLOAD) + 10  # Parcial de una versión más larga del recurso
+        # Total guardado distinto del parcial, o igual pero distinto del que anuncia el servidor
+        for stored_total in (oversized + 5, oversized):
+            with self.subTest(stored_total=stored_total), tempfile.TemporaryDirectory() as staging_dir:
+                RangeHandler.requests_seen = []
+                Path(staging_dir, f"{key}.part").write_bytes(b"x" * oversized)
+                Path(staging_dir, f"{key}.part.json").write_text(
+                    '{"url": "%s", "etag": "\\"v1\\"", "total": %d}' % (self.url, stored_total))
+                staged = download_to_staging(self.url, staging_dir)
+                self.assertEqual(staged.hexdigest("sha256"), PAYLOAD_SHA256)
+                self.assertEqual(RangeHandler.requests_seen, [f"bytes={oversized}-", None])
+                self.assertEqual(sorted(p.suffix for p in Path(staging_dir).iterdir()), [".staged"])
+
+    def test_manager_verifies_staged_file_without_rereading(self):
+        from mcp_gallery_manager import MCPGalleryManager
+
+        manager = MCPGalleryManager(self.tmp.name)
+        info = {"checksum": f"sha256:{PAYLOAD_SHA256}", "signature_url": ""}
+        ok, staged, details, _ = manager.download_and_verify(self.url, info)
+        self.assertTrue(ok)
+        self.assertTrue(details["checksum_verified"])
+        # El hash viene de la descarga: el archivo ya no hace falta para verificar
+        staged.discard()
+        self.assertTrue(manager.verify_checksum(staged, info["checksum"]))
+
+        ok, staged, details, _ = manager.download_and_verify(self.url, {"checksum": "sha256:" + "0" * 64})
+        self.assertFalse(ok)
+        self.assertIsNone(staged)
+        self.assertEqual(list(manager.downloads_dir.iterdir()), [])
+
+    def test_http_errors_are_not_retried(self):
+        with self.assertRaises(DownloadError):
+            download_to_staging(self.url.replace("artifact.tar.gz", "missing"), self.tmp.name)
+        self.assertEqual(len(RangeHandler.requests_seen), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
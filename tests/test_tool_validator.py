@@ -0,0 +1,80 @@
+"""
+Tests para la validación compilada de argumentos de herramientas MCP
+"""
+import sys
+import unittest
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from mcp_tool_validator import ToolSchemaValidator
+
+
+READ_FILE_TOOL = {
+    "name": "read_file",
+    "inputSchema": {
+        "type": "object",
+        "properties": {
+            "path": {"type": "string"},
+            "encoding": {"type": "string", "enum": ["utf-8", "latin-1"]},
+        },
+        "required": ["path"],
+        "additionalProperties": False,
+    },
+}
+
+
+class TestToolSchemaValidator(unittest.TestCase):
+    def setUp(self):
+        self.validator = ToolSchemaValidator()
+        self.validator.register_tools("filesystem", [READ_FILE_TOOL])
+
+    def test_valid_arguments(self):
+        self.assertEqual(self.validator.validate("filesystem", "read_file", {"path": "/tmp/a.txt"}), [])
+
+    def test_structured_errors(self):
+        errors = self.validator.validate("filesystem", "read_file", {"path": 3, "extra": True})
+        validators = {e["validator"] for e in errors}
+        self.assertIn("type", validators)
+        self.assertIn("additionalProperties", validators)
+        type_error = next(e for e in errors if e["validator"] == "type")
+        self.assertEqual(type_error["path"], "/path")
+        self.assertEqual(type_error["expected"], "string")
+
+    def test_missing_required(self):
+        errors = self.validator.validate("filesystem", "read_file", {})
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(errors[0]["validator"], "required")
+
+    def test_unknown_tool_is_not_validated(self):
+        self.assertEqual(self.validator.validate("filesystem", "write_file", {"x": 1}), [])
+        self.assertEqual(self.validator.validate("other", "read_file", {}), [])
+
+    def test_identical_schemas_share_compiled_validator(self):
+        twin = dict(READ_FILE_TOOL, name="read_text")
+        self.validator.register_tools("filesystem", [READ_FILE_TOOL, twin])
+        self.assertIs(
+            self.validator._by_tool[("filesystem", "read_file")],
+            self.validator._by_tool[("filesystem", "read_text")],
+        )
+
+    def test_reregister_drops_removed_tools(self):
+        self.validator.register_tools("filesystem", [])
+        self.assertFalse(self.validator.has_tool("filesystem", "read_file"))
+
+    def test_invalid_schema_is_skipped(self):
+        broken = {"name": "broken", "inputSchema": {"type": 12}}
+        self.assertEqual(self.validator.register_tools("srv", [broken]), 0)
+        self.assertEqual(self.validator.validate("srv", "broken", {"a": 1}), [])
+
+    def test_error_payload_format(self):
+        errors = self.validator.validate("filesystem", "read_file", {})
+        payload = self.validator.build_error_payload("filesystem", "read_file", errors)
+        self.assertEqual(payload["error"]["type"], "invalid_params")
+        self.assertEqual(payload["error"]["tool"], "read_file")
+        self.assertEqual(payload["error"]["errors"], errors)
+
+
+if __name__ == '__main__':
+    unittest.main()